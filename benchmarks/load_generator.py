@@ -0,0 +1,433 @@
+"""
+Load generator for the API: drives /align/file, /align/url, /align/ass and /words at
+controlled concurrency levels and reports requests/s, latency percentiles, error rates
+and the server RSS over time.
+
+Run it against a server using the stub transcriber, so no model or Modal GPU is used:
+    STUB_TRANSCRIBER=true CALIBRATE_COMPUTE_PROFILE=false uvicorn main:app --port 7000  # from src/
+    PYTHONPATH=src python benchmarks/load_generator.py --port 7000 --server-pid <pid> --concurrency 1,8,32
+
+or let it start one (--spawn-server). STUB_TRANSCRIBER_LATENCY / STUB_TRANSCRIBER_RTF set the
+artificial transcription latency of the spawned server.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+from media_fixtures import generate_audio, media_fixture
+from media_benchmark import serve_directory
+
+
+ENDPOINTS = ("/align/file", "/align/url", "/align/ass", "/words")
+PARAGRAPH_WORDS = 40
+RSS_SAMPLE_INTERVAL = 0.5
+SERVER_START_TIMEOUT = 60.0
+
+
+async def http_request(
+    host: str, port: int, method: str, path: str, body: bytes = b"", headers: Optional[Dict[str, str]] = None
+) -> Tuple[int, bytes]:
+    """
+    Sends one HTTP/1.1 request on a new connection and reads the whole response.
+
+    Args:
+        host (str): Server host.
+        port (int): Server port.
+        method (str): HTTP method.
+        path (str): Path with query string.
+        body (bytes): Request body.
+        headers (Optional[Dict[str, str]]): Additional request headers.
+
+    Returns:
+        Tuple[int, bytes]: The status code and the response body.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        head = [f"{method} {path} HTTP/1.1", f"Host: {host}:{port}", "Connection: close", f"Content-Length: {len(body)}"]
+        head += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(("\r\n".join(head) + "\r\n\r\n").encode() + body)
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+    header_bytes, _, response_body = response.partition(b"\r\n\r\n")
+    status = int(header_bytes.split(b" ", 2)[1])
+    if b"transfer-encoding: chunked" in header_bytes.lower():
+        response_body = _dechunk(response_body)
+    return status, response_body
+
+
+def _dechunk(body: bytes) -> bytes:
+    chunks = []
+    while body:
+        size_line, _, body = body.partition(b"\r\n")
+        size = int(size_line.split(b";")[0], 16)
+        if size == 0:
+            break
+        chunks.append(body[:size])
+        body = body[size + 2:]
+    return b"".join(chunks)
+
+
+def encode_multipart(fields: Dict[str, str], files: Dict[str, Tuple[str, bytes, str]]) -> Tuple[str, bytes]:
+    """
+    Encodes form fields and files as multipart/form-data.
+
+    Args:
+        fields (Dict[str, str]): Form fields.
+        files (Dict[str, Tuple[str, bytes, str]]): Files as (filename, content, content type) by field name.
+
+    Returns:
+        Tuple[str, bytes]: The content type header and the body.
+    """
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'.encode() + value.encode() + b"\r\n"
+        )
+    for name, (filename, content, content_type) in files.items():
+        parts.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n".encode() + content + b"\r\n"
+        )
+    parts.append(f"--{boundary}--\r\n".encode())
+    return f"multipart/form-data; boundary={boundary}", b"".join(parts)
+
+
+def _ass_time(seconds: float) -> str:
+    hours, rest = divmod(seconds, 3600)
+    minutes, rest = divmod(rest, 60)
+    return f"{int(hours)}:{int(minutes):02d}:{rest:05.2f}"
+
+
+class Workload:
+    """
+    Requests of every endpoint, built once from synthetic media whose stub transcript is known,
+    so the paragraphs really align.
+    """
+
+    def __init__(self, fixtures_dir: str, media_seconds: float, audio_variants: int, media_base_url: str):
+        from timestamp_whisper.core.transcriber.stub_transcriber import StubTranscriber
+
+        fixture = media_fixture(fixtures_dir, media_seconds)
+        # Distinct audio contents, so identical requests are not coalesced or reused
+        self.audio_files = []
+        for variant in range(audio_variants):
+            path = os.path.join(fixtures_dir, f"synthetic_{int(media_seconds)}s_v{variant}.wav")
+            if not os.path.exists(path):
+                generate_audio(path, media_seconds, seed=variant + 1)
+            with open(path, "rb") as f:
+                self.audio_files.append((os.path.basename(path), f.read()))
+        self.video_url = f"{media_base_url}/{os.path.basename(fixture['video'])}"
+
+        segments, words = StubTranscriber(model_name="stub").timeline(media_seconds)
+        texts = [word.text.strip() for word in words]
+        self.paragraphs = [
+            " ".join(texts[start:start + PARAGRAPH_WORDS]) for start in range(0, len(texts), PARAGRAPH_WORDS)
+        ]
+        events = [
+            f"Dialogue: 0,{_ass_time(segment.start)},{_ass_time(segment.end)},Default,,0000,0000,0000,,{segment.text}"
+            for segment in segments
+        ]
+        self.ass_file = ("[Script Info]\nScriptType: v4.00+\n\n[Events]\n"
+                         "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+                         + "\n".join(events) + "\n").encode()
+        self._audio_cycle = itertools.cycle(self.audio_files)
+
+    def request(self, endpoint: str, query: Dict[str, str]) -> Tuple[str, str, bytes, Dict[str, str]]:
+        """
+        Builds a request of an endpoint.
+
+        Args:
+            endpoint (str): The endpoint path.
+            query (Dict[str, str]): Query parameters of the upload endpoints.
+
+        Returns:
+            Tuple[str, str, bytes, Dict[str, str]]: The method, path, body and headers.
+        """
+        if endpoint == "/align/url":
+            body = json.dumps({"media_url": self.video_url, "paragraphs": self.paragraphs, **query}).encode()
+            return "POST", endpoint, body, {"Content-Type": "application/json"}
+        if endpoint == "/align/ass":
+            content_type, body = encode_multipart({}, {
+                "paragraphs_file": ("paragraphs.json", json.dumps({"paragraphs": self.paragraphs}).encode(), "application/json"),
+                "ass_file": ("captions.ass", self.ass_file, "text/plain"),
+            })
+            return "POST", endpoint, body, {"Content-Type": content_type}
+
+        filename, audio = next(self._audio_cycle)
+        fields = {}
+        if endpoint == "/align/file":
+            fields["paragraphs_data"] = json.dumps({"paragraphs": [
+                {"text": text, "paragraph_index": index} for index, text in enumerate(self.paragraphs)
+            ]})
+        content_type, body = encode_multipart(fields, {"media_file": (filename, audio, "audio/wav")})
+        path = f"{endpoint}?{urlencode(query)}" if query else endpoint
+        return "POST", path, body, {"Content-Type": content_type}
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+
+
+def summarize(samples: List[dict], elapsed: float) -> dict:
+    """
+    Summarizes request samples: throughput, latency percentiles, error rate and status codes.
+
+    Args:
+        samples (List[dict]): Samples with latency, status and error.
+        elapsed (float): Wall time of the run.
+
+    Returns:
+        dict: The summary.
+    """
+    latencies = [sample["latency"] for sample in samples]
+    errors = [sample for sample in samples if sample["error"] or sample["status"] >= 400]
+    status_counts: Dict[str, int] = {}
+    for sample in samples:
+        status = str(sample["status"]) if not sample["error"] else "connection_error"
+        status_counts[status] = status_counts.get(status, 0) + 1
+    return {
+        "requests": len(samples),
+        "requests_per_second": round(len(samples) / elapsed, 3) if elapsed else 0.0,
+        "error_rate": round(len(errors) / len(samples), 4) if samples else 0.0,
+        "latency_p50": _percentile(latencies, 0.50),
+        "latency_p95": _percentile(latencies, 0.95),
+        "latency_p99": _percentile(latencies, 0.99),
+        "status_counts": status_counts,
+    }
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """
+    Reads the resident set size of a process from /proc.
+
+    Args:
+        pid (int): The process id.
+
+    Returns:
+        Optional[float]: The RSS in MB, or None if it cannot be read.
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024 / 1e6
+    except OSError:
+        return None
+    return None
+
+
+async def run_level(
+    host: str, port: int, workload: Workload, endpoints: List[str], concurrency: int, duration: float,
+    query: Dict[str, str], api_keys: List[str],
+) -> Tuple[List[dict], float]:
+    """
+    Runs closed-loop workers for a duration, each sending its next request when the previous one completes.
+
+    Args:
+        host (str): Server host.
+        port (int): Server port.
+        workload (Workload): The request builder.
+        endpoints (List[str]): Endpoints, cycled by every worker.
+        concurrency (int): Number of workers.
+        duration (float): Duration of the level in seconds.
+        query (Dict[str, str]): Query parameters of the requests.
+        api_keys (List[str]): X-API-Key values spread over the workers.
+
+    Returns:
+        Tuple[List[dict], float]: The request samples and the wall time.
+    """
+    samples = []
+    deadline = time.monotonic() + duration
+
+    async def worker(index: int):
+        for endpoint in itertools.cycle(endpoints[index % len(endpoints):] + endpoints[:index % len(endpoints)]):
+            if time.monotonic() >= deadline:
+                return
+            method, path, body, headers = workload.request(endpoint, query)
+            if api_keys:
+                headers = {**headers, "X-API-Key": api_keys[index % len(api_keys)]}
+            started = time.monotonic()
+            status, error = 0, None
+            try:
+                status, _ = await http_request(host, port, method, path, body, headers)
+            except Exception as e:
+                error = str(e)
+            samples.append({
+                "endpoint": endpoint, "latency": time.monotonic() - started, "status": status, "error": error,
+            })
+
+    started = time.monotonic()
+    await asyncio.gather(*(worker(index) for index in range(concurrency)))
+    return samples, time.monotonic() - started
+
+
+async def sample_rss(pid: int, timeline: List[dict], started: float, state: dict, stop: asyncio.Event):
+    """Appends the server RSS to the timeline until stopped."""
+    while not stop.is_set():
+        rss_mb = read_rss_mb(pid)
+        if rss_mb is not None:
+            timeline.append({
+                "t": round(time.monotonic() - started, 2), "rss_mb": round(rss_mb, 1), "concurrency": state["concurrency"],
+            })
+        try:
+            await asyncio.wait_for(stop.wait(), RSS_SAMPLE_INTERVAL)
+        except asyncio.TimeoutError:
+            pass
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    """
+    Starts the API with the stub transcriber on a local port and waits until it answers.
+
+    Args:
+        port (int): The port.
+
+    Returns:
+        subprocess.Popen: The server process.
+    """
+    src_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+    env = {
+        **os.environ,
+        "STUB_TRANSCRIBER": "true",
+        "CALIBRATE_COMPUTE_PROFILE": "false",
+        "PYTHONPATH": os.pathsep.join(filter(None, [src_dir, os.environ.get("PYTHONPATH")])),
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=src_dir, env=env,
+    )
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise Exception(f"Server exited with code {server.returncode}")
+        try:
+            status, _ = asyncio.run(http_request("127.0.0.1", port, "GET", "/metrics"))
+            if status == 200:
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.terminate()
+    raise Exception("Server did not start in time")
+
+
+async def run_load_test(args: argparse.Namespace, server_pid: Optional[int]) -> dict:
+    fixtures_dir = args.fixtures_dir
+    media_server = serve_directory(fixtures_dir)
+    try:
+        workload = Workload(
+            fixtures_dir, args.media_seconds, args.audio_variants,
+            media_base_url=f"http://127.0.0.1:{media_server.server_address[1]}",
+        )
+        endpoints = [endpoint for endpoint in args.endpoints.split(",") if endpoint]
+        query = {"transcriber_backend": args.transcriber_backend}
+        if args.pipeline_mode:
+            query["pipeline_mode"] = args.pipeline_mode
+        api_keys = [key for key in args.api_keys.split(",") if key]
+
+        rss_timeline: List[dict] = []
+        state = {"concurrency": 0}
+        stop = asyncio.Event()
+        started = time.monotonic()
+        sampler = asyncio.ensure_future(sample_rss(server_pid, rss_timeline, started, state, stop)) if server_pid else None
+
+        levels = []
+        for concurrency in [int(value) for value in args.concurrency.split(",") if value]:
+            state["concurrency"] = concurrency
+            samples, elapsed = await run_level(
+                args.host, args.port, workload, endpoints, concurrency, args.duration, query, api_keys
+            )
+            level = {"concurrency": concurrency, "elapsed_seconds": round(elapsed, 2), **summarize(samples, elapsed)}
+            level["endpoints"] = {
+                endpoint: summarize([sample for sample in samples if sample["endpoint"] == endpoint], elapsed)
+                for endpoint in endpoints
+            }
+            levels.append(level)
+            print(
+                f"concurrency {concurrency:>4}: {level['requests_per_second']:>8.2f} req/s  "
+                f"p50 {level['latency_p50']}s  p95 {level['latency_p95']}s  p99 {level['latency_p99']}s  "
+                f"errors {level['error_rate']:.1%}",
+                file=sys.stderr,
+            )
+
+        stop.set()
+        if sampler:
+            await sampler
+    finally:
+        media_server.shutdown()
+
+    best = max(levels, key=lambda level: level["requests_per_second"]) if levels else None
+    return {
+        "benchmark": "api_load",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "config": {
+            "endpoints": endpoints,
+            "media_seconds": args.media_seconds,
+            "audio_variants": args.audio_variants,
+            "paragraphs": len(workload.paragraphs),
+            "level_duration_seconds": args.duration,
+            "stub_latency_seconds": os.environ.get("STUB_TRANSCRIBER_LATENCY"),
+            "stub_real_time_factor": os.environ.get("STUB_TRANSCRIBER_RTF"),
+        },
+        "levels": levels,
+        "throughput_ceiling": {
+            "concurrency": best["concurrency"], "requests_per_second": best["requests_per_second"],
+        } if best else None,
+        "server_rss": rss_timeline,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--spawn-server", action="store_true", help="Start the API with the stub transcriber.")
+    parser.add_argument("--server-pid", type=int, default=None, help="Process to sample the RSS of.")
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS), help="Comma-separated endpoints to drive.")
+    parser.add_argument("--concurrency", default="1,4,16,64", help="Comma-separated concurrency levels.")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds per concurrency level.")
+    parser.add_argument("--media-seconds", type=float, default=60.0, help="Length of the synthetic media.")
+    parser.add_argument("--audio-variants", type=int, default=8, help="Distinct audio contents to upload.")
+    parser.add_argument("--transcriber-backend", default="modal", choices=["local", "modal"])
+    parser.add_argument("--pipeline-mode", default=None, help="pipeline_mode of the /align requests.")
+    parser.add_argument("--api-keys", default="", help="Comma-separated X-API-Key values spread over workers.")
+    parser.add_argument("--fixtures-dir", default=None, help="Where fixtures are generated and reused.")
+    parser.add_argument("--output", default="load_test.json", help="JSON file receiving the report.")
+    args = parser.parse_args(argv)
+
+    unknown = {endpoint for endpoint in args.endpoints.split(",") if endpoint} - set(ENDPOINTS)
+    if unknown:
+        parser.error(f"Unknown endpoints: {', '.join(sorted(unknown))}")
+    args.fixtures_dir = args.fixtures_dir or os.path.join(
+        os.environ.get("TMPDIR", "/tmp"), "timestamp_whisper_media_fixtures"
+    )
+
+    server = spawn_server(args.port) if args.spawn_server else None
+    try:
+        report = asyncio.run(run_load_test(args, server.pid if server else args.server_pid))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
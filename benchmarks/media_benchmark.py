@@ -0,0 +1,320 @@
+"""
+Benchmark of the media path: MIME detection, zstd compression, video to audio
+extraction and URL download, on synthetic media from 1 minute to 3 hours.
+
+Each stage runs in a fresh process, so its peak RSS is its own. Temporary files
+are created in a dedicated directory whose size is sampled during the stage.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/media_benchmark.py --durations 60,600 --output media.json
+    PYTHONPATH=src python benchmarks/media_benchmark.py --baseline media.json --max-regression 0.2
+"""
+import argparse
+import asyncio
+import functools
+import http.server
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from media_fixtures import media_fixture
+
+
+DEFAULT_DURATIONS = "60,600,3600,10800"
+STAGES = ("detect_file_type", "compress", "decompress", "convert_video_to_audio", "read_url")
+DISK_SAMPLE_INTERVAL = 0.05
+
+
+def _peak_rss_mb() -> Tuple[float, float]:
+    """
+    Peak RSS of this process and the largest peak RSS of its finished children (ffmpeg), in MB.
+    They are reported separately: the children ran one after the other, not alongside the process.
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    scale = 1 if sys.platform == "darwin" else 1024  # ru_maxrss is in bytes on macOS, KiB on Linux
+    return own * scale / 1e6, children * scale / 1e6
+
+
+def _stage_detect_file_type(media_path: str) -> dict:
+    from timestamp_whisper.utils import AudioBuffer, detect_file_type
+
+    started = time.perf_counter()
+    mime = detect_file_type(AudioBuffer.from_file(media_path).getbuffer())
+    return {"elapsed": time.perf_counter() - started, "mime": mime}
+
+
+def _stage_compress(media_path: str, compressed_path: str) -> dict:
+    from timestamp_whisper.utils import AudioBuffer, compress_bytes
+
+    buffer = AudioBuffer.from_file(media_path)
+    started = time.perf_counter()
+    compressed = compress_bytes(buffer.getbuffer())
+    elapsed = time.perf_counter() - started
+    with open(compressed_path, "wb") as f:
+        f.write(compressed)
+    return {"elapsed": elapsed, "compression_ratio": buffer.nbytes / max(1, len(compressed))}
+
+
+def _stage_decompress(compressed_path: str) -> dict:
+    from timestamp_whisper.utils import decompress_bytes
+
+    with open(compressed_path, "rb") as f:
+        compressed = f.read()
+    started = time.perf_counter()
+    decompress_bytes(compressed)
+    return {"elapsed": time.perf_counter() - started}
+
+
+def _stage_convert_video_to_audio(media_path: str) -> dict:
+    from timestamp_whisper.utils import AudioBuffer, convert_video_to_audio
+
+    buffer = AudioBuffer.from_file(media_path)
+    started = time.perf_counter()
+    audio = asyncio.run(convert_video_to_audio(buffer.getbuffer(), os.path.basename(media_path)))
+    return {"elapsed": time.perf_counter() - started, "output_mb": audio.nbytes / 1e6}
+
+
+def _stage_read_url(url: str) -> dict:
+    from timestamp_whisper.utils import read_url
+
+    started = time.perf_counter()
+    result = read_url(url)
+    return {"elapsed": time.perf_counter() - started, "content_type": result.content_type}
+
+
+def _run_stage(temp_dir: str, stage: Callable[..., dict], *args) -> dict:
+    """Runs a stage in the worker process, with temporary files created in temp_dir."""
+    tempfile.tempdir = temp_dir
+    os.environ["TMPDIR"] = temp_dir
+    baseline_rss_mb, baseline_children_rss_mb = _peak_rss_mb()
+    result = stage(*args)
+    result["baseline_rss_mb"] = baseline_rss_mb
+    result["baseline_children_rss_mb"] = baseline_children_rss_mb
+    result["peak_rss_mb"], result["peak_children_rss_mb"] = _peak_rss_mb()
+    return result
+
+
+def _used_disk(path: str) -> int:
+    """Bytes used on the filesystem of path; also counts unlinked temporary files."""
+    stats = os.statvfs(path)
+    return (stats.f_blocks - stats.f_bfree) * stats.f_frsize
+
+
+def _directory_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def measure(stage: Callable[..., dict], *args) -> dict:
+    """
+    Runs a stage in a fresh process while sampling its temporary disk usage: the size of its
+    temporary directory, or the growth of its filesystem for anonymous temporary files.
+
+    Args:
+        stage (Callable[..., dict]): The stage, returning its elapsed time and extra fields.
+        *args: Arguments of the stage.
+
+    Returns:
+        dict: The stage result with peak RSS and peak temporary disk usage.
+    """
+    temp_dir = tempfile.mkdtemp(prefix="media_benchmark_")
+    peak_disk = 0
+    initial_used = _used_disk(temp_dir)
+    done = threading.Event()
+
+    def sample_disk():
+        nonlocal peak_disk
+        while not done.is_set():
+            peak_disk = max(peak_disk, _directory_size(temp_dir), _used_disk(temp_dir) - initial_used)
+            done.wait(DISK_SAMPLE_INTERVAL)
+
+    sampler = threading.Thread(target=sample_disk, daemon=True)
+    sampler.start()
+    try:
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            result = pool.submit(_run_stage, temp_dir, stage, *args).result()
+    finally:
+        done.set()
+        sampler.join()
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    result["peak_temp_disk_mb"] = peak_disk / 1e6
+    return result
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_directory(directory: str) -> http.server.ThreadingHTTPServer:
+    """
+    Serves a directory over HTTP on a free local port, in a background thread.
+
+    Args:
+        directory (str): The served directory.
+
+    Returns:
+        http.server.ThreadingHTTPServer: The running server.
+    """
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(_QuietHandler, directory=directory)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_benchmark(durations: List[float], stages: List[str], fixtures_dir: str) -> List[dict]:
+    """
+    Runs the selected stages on audio and video fixtures of every duration.
+
+    Args:
+        durations (List[float]): Media lengths in seconds.
+        stages (List[str]): The stages to run.
+        fixtures_dir (str): Directory of the generated fixtures.
+
+    Returns:
+        List[dict]: One record per stage, media kind and duration.
+    """
+    server = serve_directory(fixtures_dir)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    records = []
+    try:
+        for seconds in durations:
+            print(f"Generating {seconds:.0f} s fixtures...", file=sys.stderr)
+            fixture = media_fixture(fixtures_dir, seconds)
+            compressed_path = os.path.join(fixtures_dir, f"synthetic_{int(seconds)}s.wav.zst")
+            plan = []
+            for media in ("audio", "video"):
+                path = fixture[media]
+                if "detect_file_type" in stages:
+                    plan.append(("detect_file_type", media, path, _stage_detect_file_type, (path,)))
+                if "read_url" in stages:
+                    url = f"{base_url}/{os.path.basename(path)}"
+                    plan.append(("read_url", media, path, _stage_read_url, (url,)))
+            if "compress" in stages or "decompress" in stages:
+                plan.append(("compress", "audio", fixture["audio"], _stage_compress, (fixture["audio"], compressed_path)))
+            if "decompress" in stages:
+                plan.append(("decompress", "audio", fixture["audio"], _stage_decompress, (compressed_path,)))
+            if "convert_video_to_audio" in stages:
+                plan.append((
+                    "convert_video_to_audio", "video", fixture["video"], _stage_convert_video_to_audio, (fixture["video"],)
+                ))
+
+            for stage_name, media, path, stage, args in plan:
+                result = measure(stage, *args)
+                input_mb = os.path.getsize(path) / 1e6
+                elapsed = max(result.pop("elapsed"), 1e-9)
+                record = {
+                    "stage": stage_name,
+                    "media": media,
+                    "duration_seconds": seconds,
+                    "input_mb": round(input_mb, 3),
+                    "elapsed_seconds": round(elapsed, 4),
+                    "mb_per_second": round(input_mb / elapsed, 2),
+                    "audio_seconds_per_second": round(seconds / elapsed, 2),
+                    **{key: round(value, 2) if isinstance(value, float) else value for key, value in result.items()},
+                }
+                records.append(record)
+                print(
+                    f"{stage_name:>24} {media:>5} {seconds:>7.0f}s  {record['mb_per_second']:>9.2f} MB/s  "
+                    f"{record['audio_seconds_per_second']:>10.1f} audio-s/s  rss {record['peak_rss_mb']:>8.1f} MB  "
+                    f"children rss {record['peak_children_rss_mb']:>8.1f} MB  "
+                    f"disk {record['peak_temp_disk_mb']:>8.1f} MB",
+                    file=sys.stderr,
+                )
+            if os.path.exists(compressed_path):
+                os.remove(compressed_path)
+    finally:
+        server.shutdown()
+    return records
+
+
+def find_regressions(records: List[dict], baseline: List[dict], max_regression: float) -> List[str]:
+    """
+    Compares throughputs with a baseline run.
+
+    Args:
+        records (List[dict]): The current records.
+        baseline (List[dict]): The baseline records.
+        max_regression (float): Tolerated relative throughput drop.
+
+    Returns:
+        List[str]: A description of every stage slower than tolerated.
+    """
+    def key(record: dict) -> tuple:
+        return record["stage"], record["media"], record["duration_seconds"]
+
+    previous: Dict[tuple, dict] = {key(record): record for record in baseline}
+    regressions = []
+    for record in records:
+        before = previous.get(key(record))
+        if before is None or before["mb_per_second"] <= 0:
+            continue
+        drop = 1 - record["mb_per_second"] / before["mb_per_second"]
+        if drop > max_regression:
+            regressions.append(
+                f"{record['stage']} {record['media']} {record['duration_seconds']:.0f}s: "
+                f"{before['mb_per_second']} -> {record['mb_per_second']} MB/s ({drop:.0%} slower)"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", default=DEFAULT_DURATIONS, help="Comma-separated media lengths in seconds.")
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages to run.")
+    parser.add_argument("--fixtures-dir", default=None, help="Where fixtures are generated and reused.")
+    parser.add_argument("--output", default="media_benchmark.json", help="JSON file receiving the results.")
+    parser.add_argument("--baseline", default=None, help="Previous results to compare throughputs with.")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="Tolerated relative throughput drop.")
+    args = parser.parse_args(argv)
+
+    durations = [float(value) for value in args.durations.split(",") if value]
+    stages = [value for value in args.stages.split(",") if value]
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+    fixtures_dir = args.fixtures_dir or os.path.join(tempfile.gettempdir(), "timestamp_whisper_media_fixtures")
+    records = run_benchmark(durations, stages, fixtures_dir)
+    report = {
+        "benchmark": "media_path",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": records,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = find_regressions(records, json.load(f)["results"], args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,114 @@
+import os
+import subprocess
+import wave
+from typing import Optional
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+CHUNK_SECONDS = 60
+VIDEO_SIZE = "320x240"
+VIDEO_FPS = 10
+
+
+def ffmpeg_executable() -> str:
+    """
+    Returns the ffmpeg binary, the one bundled with imageio-ffmpeg (used by moviepy) when available.
+
+    Returns:
+        str: Path or name of the ffmpeg executable.
+    """
+    try:
+        import imageio_ffmpeg
+
+        return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        return "ffmpeg"
+
+
+def _synthetic_chunk(start_sample: int, n_samples: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Speech-like synthetic signal: tone bursts with a varying pitch, 6 s on / 4 s off, over low noise.
+    """
+    t = (start_sample + np.arange(n_samples)) / SAMPLE_RATE
+    pitch = 180 + 60 * np.sin(2 * np.pi * 0.07 * t)
+    tone = 0.3 * np.sin(2 * np.pi * pitch * t) * ((t % 10) < 6)
+    noise = 0.01 * rng.standard_normal(n_samples)
+    return np.clip(tone + noise, -1.0, 1.0)
+
+
+def generate_audio(path: str, seconds: float, seed: int = 0) -> str:
+    """
+    Writes a 16 kHz mono 16-bit WAV of the given length, generated in chunks so
+    hours of audio never sit in memory.
+
+    Args:
+        path (str): Destination of the WAV file.
+        seconds (float): Length of the audio.
+        seed (int): Seed of the noise.
+
+    Returns:
+        str: The path of the WAV file.
+    """
+    rng = np.random.default_rng(seed)
+    total_samples = int(seconds * SAMPLE_RATE)
+    with wave.open(path, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(SAMPLE_RATE)
+        for start in range(0, total_samples, CHUNK_SECONDS * SAMPLE_RATE):
+            n_samples = min(CHUNK_SECONDS * SAMPLE_RATE, total_samples - start)
+            chunk = _synthetic_chunk(start, n_samples, rng)
+            wav_file.writeframes((chunk * 32767).astype("<i2").tobytes())
+    return path
+
+
+def generate_video(path: str, audio_path: str, seconds: float, ffmpeg: Optional[str] = None) -> str:
+    """
+    Muxes a WAV with a generated test pattern into an H.264/AAC MP4 using ffmpeg.
+
+    Args:
+        path (str): Destination of the MP4 file.
+        audio_path (str): The WAV used as audio track.
+        seconds (float): Length of the video.
+        ffmpeg (Optional[str]): The ffmpeg executable.
+
+    Returns:
+        str: The path of the MP4 file.
+    """
+    command = [
+        ffmpeg or ffmpeg_executable(), "-y", "-loglevel", "error",
+        "-f", "lavfi", "-i", f"testsrc=size={VIDEO_SIZE}:rate={VIDEO_FPS}:duration={seconds}",
+        "-i", audio_path,
+        "-c:v", "libx264", "-preset", "ultrafast", "-tune", "stillimage",
+        "-c:a", "aac", "-b:a", "64k",
+        "-shortest", path,
+    ]
+    try:
+        subprocess.run(command, check=True, capture_output=True)
+    except subprocess.CalledProcessError as e:
+        raise Exception(f"An error occurred while generating video: {e.stderr.decode(errors='replace')}")
+    return path
+
+
+def media_fixture(directory: str, seconds: float) -> dict:
+    """
+    Returns the audio and video fixtures of a length, generating them only if missing.
+
+    Args:
+        directory (str): Directory holding the fixtures.
+        seconds (float): Length of the media.
+
+    Returns:
+        dict: Paths of the "audio" (WAV) and "video" (MP4) fixtures.
+    """
+    os.makedirs(directory, exist_ok=True)
+    audio_path = os.path.join(directory, f"synthetic_{int(seconds)}s.wav")
+    video_path = os.path.join(directory, f"synthetic_{int(seconds)}s.mp4")
+    if not os.path.exists(audio_path):
+        generate_audio(audio_path + ".partial", seconds)
+        os.replace(audio_path + ".partial", audio_path)
+    if not os.path.exists(video_path):
+        generate_video(video_path + ".partial.mp4", audio_path, seconds)
+        os.replace(video_path + ".partial.mp4", video_path)
+    return {"audio": audio_path, "video": video_path}
@@ -0,0 +1,161 @@
+"""
+Tail latency benchmark of the remote call policy: transcribes through the Modal transcriber
+backed by the in-process stand-in, which injects a base latency, a fraction of slow calls
+(cold starts, slow containers) and batch failures, and compares call policies: no retry,
+retries, and retries with hedging. It reports the success rate, latency percentiles and
+the hedge win rate. No model or Modal deployment is needed.
+
+Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/remote_call_policy_benchmark.py --requests 400 --slow-rate 0.03 --failure-rate 0.02
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from types import SimpleNamespace
+from typing import List, Optional
+
+from load_generator import _percentile
+
+
+SEGMENT_SECONDS = 5.0
+
+
+class SyntheticModel:
+    """
+    Stands in for a faster-whisper model: one segment every 5 s of the received audio, so a
+    retry resuming after the received segments transcribes the remaining audio.
+    """
+
+    def transcribe(self, audio, word_timestamps: bool = False, **kwargs):
+        from timestamp_whisper.utils.audio_util import audio_duration
+
+        segments = []
+        for index in range(int(audio_duration(audio) // SEGMENT_SECONDS)):
+            start, end = index * SEGMENT_SECONDS, index * SEGMENT_SECONDS + SEGMENT_SECONDS - 0.2
+            words = [SimpleNamespace(word=f" w{index}", start=start, end=end)] if word_timestamps else []
+            segments.append(SimpleNamespace(id=index + 1, text=f" w{index}", start=start, end=end, words=words))
+        return iter(segments), None
+
+
+async def run_configuration(name: str, policy_kwargs: dict, args: argparse.Namespace) -> dict:
+    """
+    Runs the requests of one call policy at the given concurrency.
+
+    Args:
+        name (str): Name of the configuration, used as metric label.
+        policy_kwargs (dict): CallPolicy arguments.
+        args (argparse.Namespace): Benchmark arguments.
+
+    Returns:
+        dict: Success rate, latencies and hedge outcomes of the configuration.
+    """
+    from timestamp_whisper.core.profile.compute_profile import generate_calibration_audio
+    from timestamp_whisper.core.transcriber.modal_whisper import ModalFasterWhisperTranscriber
+    from timestamp_whisper.modal_class.local_whisper_transcription import LocalWhisperTranscriber
+    from timestamp_whisper.utils.audio_util import samples_to_wav
+    from timestamp_whisper.utils.call_policy_util import CallPolicy, remote_call_attempts, remote_call_hedges
+
+    stand_in = LocalWhisperTranscriber(
+        model=SyntheticModel(),
+        latency=args.latency,
+        slow_call_rate=args.slow_rate,
+        slow_call_latency=args.slow_latency,
+        failure_rate=args.failure_rate,
+        seed=args.seed,
+    )
+    transcriber = ModalFasterWhisperTranscriber(
+        "synthetic", modal_cls=lambda model_name: stand_in, call_policy=CallPolicy(name=name, **policy_kwargs)
+    )
+    audio = samples_to_wav(generate_calibration_audio(args.audio_seconds))
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def transcribe(index: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                await transcriber.atranscribe_segments_timestamp(audio)
+            except Exception:
+                errors += 1
+                return
+            # The first requests fill the latency window of the hedge delay
+            if index >= args.warmup:
+                latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(transcribe(index) for index in range(args.requests)))
+    elapsed = time.perf_counter() - started
+    hedges = {winner: remote_call_hedges.value(call=name, winner=winner) for winner in ("primary", "hedge")}
+    return {
+        "policy": name,
+        "requests": args.requests,
+        "success_rate": round(1 - errors / args.requests, 4),
+        "elapsed_seconds": round(elapsed, 3),
+        "latency_p50": _percentile(latencies, 0.50),
+        "latency_p95": _percentile(latencies, 0.95),
+        "latency_p99": _percentile(latencies, 0.99),
+        "attempts": {
+            outcome: remote_call_attempts.value(call=name, outcome=outcome) for outcome in ("success", "error", "timeout")
+        },
+        "hedges": hedges,
+        "hedge_win_rate": round(hedges["hedge"] / sum(hedges.values()), 4) if sum(hedges.values()) else None,
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=400, help="Transcriptions per policy.")
+    parser.add_argument("--warmup", type=int, default=100, help="First transcriptions left out of the latencies.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Transcriptions at once.")
+    parser.add_argument("--audio-seconds", type=int, default=300, help="Duration of each audio.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Latency of every call before its first batch.")
+    parser.add_argument("--slow-rate", type=float, default=0.03, help="Fraction of slow calls.")
+    parser.add_argument("--slow-latency", type=float, default=5.0, help="Additional latency of the slow calls.")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="Probability that a batch fails.")
+    parser.add_argument("--deadline", type=float, default=10.0, help="Deadline of the next result of a call.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the injected latency and failures.")
+    parser.add_argument("--output", default="remote_call_policy_benchmark.json", help="JSON file receiving the results.")
+    args = parser.parse_args(argv)
+
+    os.environ["TRANSCRIPTION_CHECKPOINTS"] = "false"
+    configurations = {
+        "no_retry": dict(deadline=args.deadline, max_attempts=1),
+        "retry": dict(deadline=args.deadline, max_attempts=3, backoff=0.1),
+        "retry_hedge": dict(deadline=args.deadline, max_attempts=3, backoff=0.1, hedge=True),
+    }
+    records = []
+    for name, policy_kwargs in configurations.items():
+        record = asyncio.run(run_configuration(name, policy_kwargs, args))
+        records.append(record)
+        print(
+            f"{name:<12} success {record['success_rate']:.2%}  p50 {record['latency_p50']:.2f} s  "
+            f"p95 {record['latency_p95']:.2f} s  p99 {record['latency_p99']:.2f} s  "
+            f"hedge wins {record['hedges']['hedge']:.0f}/{sum(record['hedges'].values()):.0f}",
+            file=sys.stderr,
+        )
+    report = {
+        "benchmark": "remote_call_policy",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "injected": {
+            "latency": args.latency,
+            "slow_rate": args.slow_rate,
+            "slow_latency": args.slow_latency,
+            "failure_rate": args.failure_rate,
+        },
+        "results": records,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+"""
+Replays a local audio or video file at real-time speed to the live alignment endpoint
+(/align/stream) and reports when each paragraph start arrives: its lag behind real time, the
+paragraphs skipped or never found and, given the /align/file result of the same media, the
+error of the live starts against the offline ones.
+
+With a server using the stub transcriber the replay exercises the protocol and the latency
+only (every window is transcribed as the beginning of the stub text); detection needs a
+small model, e.g. a local server with the default base model:
+    uvicorn main:app --port 7000  # from src/
+    PYTHONPATH=src python benchmarks/stream_replay.py talk.mp4 --paragraphs talk.json --port 7000
+
+Without --paragraphs the script is generated from the text of the stub transcriber.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import time
+from typing import List, Optional
+
+import numpy as np
+
+from load_generator import PARAGRAPH_WORDS, _percentile
+
+
+def read_paragraphs(path: Optional[str]) -> List[dict]:
+    """
+    Reads the script of the stream.
+
+    Args:
+        path (Optional[str]): JSON file in the /align/file format ({"paragraphs": [...]}), None for the stub text.
+
+    Returns:
+        List[dict]: The paragraphs, with their text and paragraph_index.
+    """
+    if path is None:
+        from timestamp_whisper.core.transcriber.stub_transcriber import STUB_CORPUS, stub_words
+
+        return [
+            {"text": " ".join(stub_words(PARAGRAPH_WORDS, start=index * PARAGRAPH_WORDS)), "paragraph_index": index}
+            for index in range(len(STUB_CORPUS) // PARAGRAPH_WORDS)
+        ]
+    with open(path) as f:
+        paragraphs = json.load(f)["paragraphs"]
+    return [
+        {"text": paragraph, "paragraph_index": index} if isinstance(paragraph, str) else paragraph
+        for index, paragraph in enumerate(paragraphs)
+    ]
+
+
+def read_reference(path: Optional[str]) -> dict:
+    """
+    Reads the offline starts of the paragraphs.
+
+    Args:
+        path (Optional[str]): JSON response of /align/file for the same media and script.
+
+    Returns:
+        dict: The start of each paragraph index.
+    """
+    if path is None:
+        return {}
+    with open(path) as f:
+        return {alignment["paragraph_index"]: alignment["start"] for alignment in json.load(f)["result"]}
+
+
+async def replay(args: argparse.Namespace, pcm: bytes, paragraphs: List[dict]) -> dict:
+    """
+    Streams the audio at the replay speed while receiving the events of the server.
+
+    Args:
+        args (argparse.Namespace): Replay arguments.
+        pcm (bytes): The audio, 16 kHz mono 16-bit PCM.
+        paragraphs (List[dict]): The script.
+
+    Returns:
+        dict: The events received, each with its arrival time on the stream clock, and the final event.
+    """
+    from websockets.asyncio.client import connect
+
+    from timestamp_whisper.utils.audio_util import SAMPLE_RATE
+
+    query = (
+        f"transcriber_backend={args.backend}&transcribe_model={args.model}"
+        f"&decode_preset={args.decode_preset}&aligner_type={args.aligner}"
+    )
+    frame_bytes = int(SAMPLE_RATE * args.frame_ms / 1000) * 2
+    events: List[dict] = []
+    async with connect(f"ws://{args.host}:{args.port}/align/stream?{query}", max_size=None) as websocket:
+        await websocket.send(json.dumps({"paragraphs": paragraphs}))
+        started = time.monotonic()
+
+        async def send_audio() -> None:
+            for offset in range(0, len(pcm), frame_bytes):
+                # Frames leave when the audio they end with is "spoken"
+                stream_time = (offset + frame_bytes) / 2 / SAMPLE_RATE
+                await asyncio.sleep(max(0.0, started + stream_time / args.speed - time.monotonic()))
+                await websocket.send(pcm[offset:offset + frame_bytes])
+            await websocket.send(json.dumps({"type": "end"}))
+
+        sender = asyncio.ensure_future(send_audio())
+        try:
+            async for message in websocket:
+                event = json.loads(message)
+                event["arrival"] = round((time.monotonic() - started) * args.speed, 3)
+                events.append(event)
+                if event["type"] in ("done", "error"):
+                    break
+        finally:
+            sender.cancel()
+    return {"events": events, "final": events[-1] if events else None}
+
+
+def summarize(result: dict, reference: dict, audio_seconds: float) -> dict:
+    """
+    Computes the lag and accuracy of the paragraph starts of a replay.
+
+    Args:
+        result (dict): Events of the replay.
+        reference (dict): Offline start of each paragraph index.
+        audio_seconds (float): Duration of the replayed audio.
+
+    Returns:
+        dict: Counts, lag percentiles and start errors.
+    """
+    starts = [event for event in result["events"] if event["type"] == "paragraph_start"]
+    # Lag: how far behind the audio being spoken a start was received
+    live = [event for event in starts if event["arrival"] <= audio_seconds]
+    lags = [event["arrival"] - event["start"] for event in live]
+    errors = [
+        abs(event["start"] - reference[event["paragraph_index"]])
+        for event in starts if event["paragraph_index"] in reference
+    ]
+    final = result["final"] or {}
+    return {
+        "paragraph_starts": len(starts),
+        "received_after_end": len(starts) - len(live),
+        "skipped": len(final.get("skipped", [])),
+        "missing": len(final.get("missing", [])),
+        "error": final.get("detail") if final.get("type") == "error" else None,
+        "lag_p50": _percentile(lags, 0.50),
+        "lag_p95": _percentile(lags, 0.95),
+        "lag_max": round(max(lags), 4) if lags else None,
+        "start_error_mean": round(sum(errors) / len(errors), 4) if errors else None,
+        "start_error_p95": _percentile(errors, 0.95),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("media", help="Audio or video file replayed.")
+    parser.add_argument("--paragraphs", help="Script of the media ({\"paragraphs\": [...]}), default: the stub text.")
+    parser.add_argument("--reference", help="/align/file response for the same media, to measure the start errors.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=7000)
+    parser.add_argument("--backend", default="local", choices=("local", "modal"))
+    parser.add_argument("--model", default="base", help="Model transcribing the stream.")
+    parser.add_argument("--decode-preset", default="fast")
+    parser.add_argument("--aligner", default="fuzzywuzzy_aligner")
+    parser.add_argument("--frame-ms", type=int, default=100, help="Duration of each audio frame.")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed, 1 for real time.")
+    parser.add_argument("--output", default="stream_replay.json", help="JSON file receiving the results.")
+    args = parser.parse_args(argv)
+
+    from timestamp_whisper.utils.audio_util import SAMPLE_RATE, load_audio_samples
+
+    samples = load_audio_samples(args.media)
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    audio_seconds = len(samples) / SAMPLE_RATE
+    result = asyncio.run(replay(args, pcm, read_paragraphs(args.paragraphs)))
+    summary = summarize(result, read_reference(args.reference), audio_seconds)
+    for event in result["events"]:
+        if event["type"] == "paragraph_start":
+            print(
+                f"paragraph {event['paragraph_index']:>4}  start {event['start']:8.2f} s  "
+                f"received {event['arrival']:8.2f} s  score {event['score']:.2f}",
+                file=sys.stderr,
+            )
+    print(
+        f"{summary['paragraph_starts']} starts, {summary['skipped']} skipped, {summary['missing']} missing  "
+        f"lag p50 {summary['lag_p50']} s  p95 {summary['lag_p95']} s  max {summary['lag_max']} s",
+        file=sys.stderr,
+    )
+    report = {
+        "benchmark": "stream_replay",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "media": args.media,
+        "audio_seconds": round(audio_seconds, 3),
+        "configuration": {
+            "backend": args.backend,
+            "model": args.model,
+            "decode_preset": args.decode_preset,
+            "aligner": args.aligner,
+            "frame_ms": args.frame_ms,
+            "speed": args.speed,
+        },
+        "summary": summary,
+        "events": result["events"],
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return 0 if summary["error"] is None else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Throughput benchmark of the local transcription worker pool: submits transcriptions of
+synthetic speech-like audio at a fixed concurrency to pools of different sizes and reports
+the aggregate audio-hours transcribed per hour and the per-request latency percentiles.
+
+It needs the faster-whisper model locally (downloaded on first use). Usage (from the repository root):
+    PYTHONPATH=src python benchmarks/transcription_pool_benchmark.py --model base --workers 1,2,4,8 --requests 32
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from load_generator import _percentile
+
+
+def run_configuration(model: str, workers: int, requests: int, concurrency: int, audio_seconds: int) -> dict:
+    """
+    Runs a batch of transcriptions on a pool with the given number of workers.
+
+    Args:
+        model (str): Name of the faster-whisper model.
+        workers (int): Number of worker processes.
+        requests (int): Number of transcriptions submitted.
+        concurrency (int): Transcriptions submitted at once.
+        audio_seconds (int): Duration of each audio.
+
+    Returns:
+        dict: Throughput and latency of the configuration.
+    """
+    from timestamp_whisper.core.profile import get_compute_profile
+    from timestamp_whisper.core.profile.compute_profile import generate_calibration_audio
+    from timestamp_whisper.core.transcriber.faster_whisper_pool import FasterWhisperPoolTranscriber, worker_cpu_threads
+    from timestamp_whisper.utils import AudioBuffer
+
+    os.environ["TRANSCRIPTION_CHECKPOINTS"] = "false"
+    transcriber = FasterWhisperPoolTranscriber(model_name=model, workers=workers)
+    audio = generate_calibration_audio(audio_seconds)
+    decode = dict(beam_size=1, best_of=1, condition_on_previous_text=False)
+
+    # Load the model in every worker before measuring
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(
+            lambda _: transcriber.transcribe_segments_timestamp(AudioBuffer.from_samples(audio[:16000]), **decode),
+            range(workers),
+        ))
+
+    def transcribe(_) -> float:
+        started = time.perf_counter()
+        transcriber.transcribe_segments_timestamp(AudioBuffer.from_samples(audio), **decode)
+        return time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(transcribe, range(requests)))
+    elapsed = time.perf_counter() - started
+    transcriber.pool.close()
+    return {
+        "workers": workers,
+        "cpu_threads_per_worker": worker_cpu_threads(get_compute_profile(), workers),
+        "requests": requests,
+        "concurrency": concurrency,
+        "elapsed_seconds": round(elapsed, 3),
+        "audio_hours_per_hour": round(requests * audio_seconds / elapsed, 2),
+        "latency_p50": _percentile(latencies, 0.50),
+        "latency_p95": _percentile(latencies, 0.95),
+        "latency_p99": _percentile(latencies, 0.99),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model", default="base", help="faster-whisper model.")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated pool sizes.")
+    parser.add_argument("--requests", type=int, default=16, help="Transcriptions per pool size.")
+    parser.add_argument("--concurrency", type=int, default=None, help="Transcriptions at once (default: 2 per worker).")
+    parser.add_argument("--audio-seconds", type=int, default=30, help="Duration of each audio.")
+    parser.add_argument("--output", default="transcription_pool_benchmark.json", help="JSON file receiving the results.")
+    args = parser.parse_args(argv)
+
+    records = []
+    for workers in [int(value) for value in args.workers.split(",") if value]:
+        record = run_configuration(
+            args.model, workers, args.requests, args.concurrency or 2 * workers, args.audio_seconds
+        )
+        records.append(record)
+        print(
+            f"workers {workers:>3} x {record['cpu_threads_per_worker']:>2} threads  "
+            f"{record['audio_hours_per_hour']:>8.1f} audio-h/h  p50 {record['latency_p50']:.2f} s  "
+            f"p95 {record['latency_p95']:.2f} s",
+            file=sys.stderr,
+        )
+    report = {
+        "benchmark": "transcription_pool",
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "environment": {"python": platform.python_version(), "platform": platform.platform(), "cpu_count": os.cpu_count()},
+        "model": args.model,
+        "audio_seconds": args.audio_seconds,
+        "results": records,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
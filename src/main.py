@@ -1,7 +1,29 @@
+import logging
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from starlette.concurrency import run_in_threadpool
 from timestamp_whisper.api.paragraph_timestamp_route import paragraph_timestamp_router
 from timestamp_whisper.api.transcriber_router import transcriber_router
+from timestamp_whisper.api.metrics_router import metrics_router
+from timestamp_whisper.api.profiling_router import ProfilingMiddleware, profiling_router
+from timestamp_whisper.core.profile import load_or_calibrate_compute_profile
 
-app = FastAPI()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Calibrate (or load the persisted) compute profile of the local backend once at startup
+    if os.environ.get("CALIBRATE_COMPUTE_PROFILE", "true").lower() == "true":
+        try:
+            await run_in_threadpool(load_or_calibrate_compute_profile)
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Compute profile calibration failed: {str(e)}")
+    yield
+
+
+app = FastAPI(lifespan=lifespan)
 app.include_router(paragraph_timestamp_router, tags=["Paragraphs Timestamp"])
 app.include_router(transcriber_router, tags=["Transcriber"])
+app.include_router(metrics_router, tags=["Metrics"])
+app.include_router(profiling_router, tags=["Profiling"])
+app.add_middleware(ProfilingMiddleware)
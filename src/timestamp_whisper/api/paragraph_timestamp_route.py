@@ -1,16 +1,36 @@
-import io
+import asyncio
 import json
-from typing import List, Literal, Optional
-from fastapi import APIRouter, File, Form, Query, UploadFile, HTTPException
+from functools import lru_cache
+from typing import List, Literal, Optional, Union
+from fastapi import (
+    APIRouter, Depends, File, Form, Header, Query, UploadFile, HTTPException, WebSocket, WebSocketDisconnect,
+)
 from pydantic import BaseModel, Field
+from starlette.concurrency import run_in_threadpool
 
-from timestamp_whisper.core.types import FasterWhisperModel, TranscriberType, AlignerType
+from timestamp_whisper.api.request_cancellation import cancelled_request_error, request_cancellation
+from timestamp_whisper.core.types import (
+    FasterWhisperModel, TranscriberType, AlignerType, DecodePreset, PipelineMode,
+    DEFAULT_DECODE_PRESET, DEFAULT_COARSE_MODEL, DEFAULT_STREAM_DECODE_PRESET, DEFAULT_STREAM_MODEL,
+)
+from timestamp_whisper.core.profile import get_decode_options
 from timestamp_whisper.core.factory.aligner_factory import AlignerFactory
 from timestamp_whisper.core.factory.transcriber_factory import TranscriberFactory
 from timestamp_whisper.models.aligner_models import ParagraphAlignment, ParagraphAlignmentWithWords, ParagraphItem
-from timestamp_whisper.services import FileChunksTimestampService
+from timestamp_whisper.models.transcription_models import SegmentTranscriptionModelWithWords
+from timestamp_whisper.services import (
+    FileChunksTimestampService, CoarseToFineTimestampService, SegmentOnlyTimestampService,
+    BoundaryRefinementTimestampService, TranscriptAlignmentService, StreamingAlignmentService,
+    ScriptConditionedTimestampService,
+)
 from timestamp_whisper.services.align_text_with_transcription import ParagraphAssAlimentService
-from timestamp_whisper.utils import convert_video_to_audio, detect_file_type, read_url, read_ass_file
+from timestamp_whisper.services.backend_router import run_on_backend
+from timestamp_whisper.services.transcript_alignment_service import transcript_aligners
+from timestamp_whisper.utils import AudioBuffer, convert_video_to_audio, detect_file_type, read_url, read_ass_file
+from timestamp_whisper.utils.audio_fingerprint_util import transcription_reuse_enabled
+from timestamp_whisper.utils.cancellation_util import CLIENT_DISCONNECTED, CancellationToken, OperationCancelled
+from timestamp_whisper.utils.speech_detection_util import silence_removal_enabled
+from timestamp_whisper.utils.transcript_store_util import get_transcript_store
 
 
 paragraph_timestamp_router = APIRouter()
@@ -22,24 +42,118 @@ def get_pipeline(
     transcriber_type: Optional[str] = TranscriberType.MODAL_WHISPER,
     transcribe_model: Optional[str] = FasterWhisperModel.LARGE_V3,
     aligner_type: Optional[str] = AlignerType.FUZZYWUZZY_ALIGNER,
+    decode_preset: Optional[str] = DEFAULT_DECODE_PRESET,
+    pipeline_mode: Optional[str] = PipelineMode.STANDARD,
 ):
     try:
+        aligner = AlignerFactory.get_aligner(aligner_type=aligner_type)
+        decode_options = get_decode_options(decode_preset)
+
+        if pipeline_mode == PipelineMode.COARSE_TO_FINE:
+            return CoarseToFineTimestampService(
+                transcriber=TranscriberFactory.get_transcriber(
+                    transcriber_type=transcriber_type,
+                    model_name=DEFAULT_COARSE_MODEL,
+                    reuse_transcriptions=transcription_reuse_enabled(),
+                    remove_silence=silence_removal_enabled(),
+                ),
+                fine_transcriber=TranscriberFactory.get_transcriber(
+                    transcriber_type=transcriber_type,
+                    model_name=transcribe_model,
+                ),
+                aligner=aligner,
+                decode_options=decode_options,
+            )
+
+        if pipeline_mode == PipelineMode.SCRIPT_CONDITIONED:
+            # The windows depend on the script, so the transcriber does not reuse whole-file transcriptions
+            return ScriptConditionedTimestampService(
+                transcriber=TranscriberFactory.get_transcriber(
+                    transcriber_type=transcriber_type,
+                    model_name=transcribe_model,
+                ),
+                aligner=aligner,
+                decode_options=decode_options,
+            )
+
         transcriber = TranscriberFactory.get_transcriber(
             transcriber_type=transcriber_type,
             model_name=transcribe_model,
+            reuse_transcriptions=transcription_reuse_enabled(),
+            remove_silence=silence_removal_enabled(),
         )
 
-        aligner = AlignerFactory.get_aligner(aligner_type=aligner_type)
+        if pipeline_mode == PipelineMode.BOUNDARY_REFINE:
+            return BoundaryRefinementTimestampService(
+                transcriber=transcriber,
+                window_transcriber=TranscriberFactory.get_transcriber(
+                    transcriber_type=transcriber_type,
+                    model_name=transcribe_model,
+                ),
+                aligner=aligner,
+                decode_options=decode_options,
+            )
 
-        pipeline = FileChunksTimestampService(
+        service_class = (
+            SegmentOnlyTimestampService if pipeline_mode == PipelineMode.SEGMENT_ONLY
+            else FileChunksTimestampService
+        )
+        pipeline = service_class(
             transcriber=transcriber,
             aligner=aligner,
+            decode_options=decode_options,
         )
         return pipeline
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+# Get the transcriber of the live streams, created once so its model stays loaded between streams
+@lru_cache(maxsize=None)
+def get_stream_transcriber(transcriber_type: str, transcribe_model: str):
+    return TranscriberFactory.get_transcriber(transcriber_type=transcriber_type, model_name=transcribe_model)
+
+
+# Feed the audio frames of a stream to its service until the client ends the stream
+async def receive_stream_audio(
+    websocket: WebSocket, service: StreamingAlignmentService, audio_received: asyncio.Event,
+    cancellation: CancellationToken,
+):
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(code=message.get("code", 1000))
+            if message.get("bytes") is not None:
+                service.add_audio(message["bytes"])
+                audio_received.set()
+            elif message.get("text") and json.loads(message["text"]).get("type") == "end":
+                return
+    except WebSocketDisconnect:
+        cancellation.cancel(CLIENT_DISCONNECTED)
+        raise
+
+
+# Transcribe a stream step by step while its audio is received, sending the paragraph starts as they are found
+async def send_stream_alignments(
+    websocket: WebSocket, service: StreamingAlignmentService, audio_received: asyncio.Event,
+    receiver: asyncio.Task,
+):
+    while not receiver.done():
+        if service.pending_seconds >= service.step_seconds:
+            for event in await service.advance():
+                await websocket.send_json(event)
+            continue
+        audio_received.clear()
+        wait_audio = asyncio.ensure_future(audio_received.wait())
+        await asyncio.wait({receiver, wait_audio}, return_when=asyncio.FIRST_COMPLETED)
+        wait_audio.cancel()
+    receiver.result()
+    for event in await service.advance(final=True):
+        await websocket.send_json(event)
+    await websocket.send_json(service.summary())
+
+
 # Function to extract paragraphs from a JSON file
 async def extract_paragraphs_from_json(paragraphs_file: UploadFile):
     try:
@@ -63,11 +177,28 @@ class ParagraphsAlignmentResponse(BaseModel):
         description="List of aligned paragraphs with their timestamps."
     )
 
+class ParagraphsAssAlignmentResponse(BaseModel):
+    result: List[ParagraphAlignment] = Field(
+        description="List of aligned paragraphs with their timestamps."
+    )
+
+class TranscriptAlignmentResponse(BaseModel):
+    result: List[ParagraphAlignmentWithWords] = Field(
+        description="List of aligned paragraphs with their timestamps."
+    )
+    transcript_id: str = Field(
+        description="Identifier of the stored transcript, to align the next revision of the script with."
+    )
+
 class ParagraphRequestSchema(BaseModel):
     paragraphs: List[ParagraphItem] = Field(
         description="List of paragraphs to align."
     )
 
+class StreamStartMessage(BaseModel):
+    paragraphs: List[Union[ParagraphItem, str]] = Field(
+        description="Script of the stream, as items or plain texts (indexed by position)")
+
 # Endpoints
 
 # Align with video file
@@ -75,28 +206,40 @@ class ParagraphRequestSchema(BaseModel):
 async def align_paragraphs_with_audio(
    paragraphs_data: str = Form(..., description="JSON string containing paragraphs list"),
     media_file: UploadFile = File(...),
-    transcriber_backend: Literal["local", "modal"] = Query(
-        default="modal", description="Backend to run transcriber"
+    transcriber_backend: Literal["local", "modal", "auto"] = Query(
+        default="modal", description="Backend to run transcriber, auto to route by duration and load"
+    ),
+    decode_preset: DecodePreset = Query(
+        default=DEFAULT_DECODE_PRESET, description="Latency/quality decoding preset"
+    ),
+    pipeline_mode: PipelineMode = Query(
+        default=PipelineMode.STANDARD, description="Transcription pipeline mode"
     ),
+    aligner_type: AlignerType = Query(
+        default=AlignerType.FUZZYWUZZY_ALIGNER, description="Aligner used to match the paragraphs"
+    ),
+    x_api_key: Optional[str] = Header(default=None, description="API key, used for fair scheduling"),
+    cancellation: CancellationToken = Depends(request_cancellation),
 ):
     try:
-        media_file_bytes = await media_file.read()
-        if not media_file_bytes:
+        # Map the spooled upload instead of reading it into memory
+        media_buffer = AudioBuffer.from_upload(media_file.file)
+        if media_buffer.nbytes == 0:
             raise HTTPException(status_code=400, detail="Uploaded file is empty")
 
         # Detect MIME type
-        mimetypes = detect_file_type(file_bytes=media_file_bytes)
+        mimetypes = detect_file_type(file_bytes=media_buffer.getbuffer())
         if not mimetypes.startswith("video/") and not mimetypes.startswith("audio/"):
             raise HTTPException(
                 status_code=400,
                 detail="Invalid file format. Please upload a video or audio file.",
             )
         elif mimetypes.startswith("video/"):
-            binary_audio = await convert_video_to_audio(
-                video_bytes=media_file_bytes, video_name=media_file.filename
-            )
+            binary_audio = await cancellation.run(convert_video_to_audio(
+                video_bytes=media_buffer.getbuffer(), video_name=media_file.filename
+            ))
         else:
-            binary_audio = io.BytesIO(media_file_bytes)
+            binary_audio = media_buffer
 
         # Prepare paragraphs
         paragraphs_dict = json.loads(paragraphs_data)
@@ -107,19 +250,24 @@ async def align_paragraphs_with_audio(
                 status_code=400, detail="No paragraphs found in the JSON file."
             )
 
-        # Create pipeline
-        transcriber_type = (
-            TranscriberType.MODAL_WHISPER
-            if transcriber_backend == "modal"
-            else TranscriberType.FASTER_WHISPER
-        )
-        pipeline = get_pipeline(transcriber_type=transcriber_type)
+        # Create pipeline and align paragraphs with audio
+        async def align(transcriber_type: str, transcribe_model: str):
+            pipeline = get_pipeline(
+                transcriber_type=transcriber_type,
+                transcribe_model=transcribe_model,
+                aligner_type=aligner_type,
+                decode_preset=decode_preset,
+                pipeline_mode=pipeline_mode,
+            )
+            return await pipeline.aget_paragraphs_timestamp(
+                paragraphs=paragraphs.paragraphs, audio=binary_audio, tenant=x_api_key
+            )
 
-        # Align paragraphs with audio
-        result = pipeline.get_paragraphs_timestamp(
-            paragraphs=paragraphs.paragraphs, audio=binary_audio
-        )
+        # Abandoned when the client disconnects or the deadline passes
+        result = await cancellation.run(run_on_backend(transcriber_backend, binary_audio, align))
         return ParagraphsAlignmentResponse(result=result)
+    except OperationCancelled as e:
+        raise cancelled_request_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -131,36 +279,54 @@ async def align_paragraphs_with_audio(
 
 class VideoURLrequest(BaseModel):
     media_url: str
-    paragraphs: list[str]
-    transcriber_backend: Optional[Literal["local", "modal"]] = Field(
-        default="modal", description="Backend to run transcriber")
+    paragraphs: List[Union[ParagraphItem, str]] = Field(
+        description="Paragraphs to align, as items or plain texts (indexed by position)")
+    transcriber_backend: Optional[Literal["local", "modal", "auto"]] = Field(
+        default="modal", description="Backend to run transcriber, auto to route by duration and load")
+    decode_preset: Optional[DecodePreset] = Field(
+        default=DEFAULT_DECODE_PRESET, description="Latency/quality decoding preset")
+    pipeline_mode: Optional[PipelineMode] = Field(
+        default=PipelineMode.STANDARD, description="Transcription pipeline mode")
+    aligner_type: Optional[AlignerType] = Field(
+        default=AlignerType.FUZZYWUZZY_ALIGNER, description="Aligner used to match the paragraphs")
 
 
 @paragraph_timestamp_router.post("/align/url")
 async def align_paragraphs_with_audio(
-    req: VideoURLrequest
+    req: VideoURLrequest,
+    x_api_key: Optional[str] = Header(default=None, description="API key, used for fair scheduling"),
+    cancellation: CancellationToken = Depends(request_cancellation),
 ):
     try:
         # Read media url
         video_name = req.media_url.split("/")[-1]
         media_data = read_url(url=req.media_url)
-        binary_audio = await convert_video_to_audio(
+        binary_audio = await cancellation.run(convert_video_to_audio(
                 video_bytes=media_data.content, video_name=video_name
+            ))
+        # Create pipeline and align paragraphs with audio
+        async def align(transcriber_type: str, transcribe_model: str):
+            pipeline = get_pipeline(
+                transcriber_type=transcriber_type,
+                transcribe_model=transcribe_model,
+                aligner_type=req.aligner_type,
+                decode_preset=req.decode_preset,
+                pipeline_mode=req.pipeline_mode,
+            )
+            return await pipeline.aget_paragraphs_timestamp(
+                paragraphs=[
+                    ParagraphItem(text=paragraph, paragraph_index=index) if isinstance(paragraph, str) else paragraph
+                    for index, paragraph in enumerate(req.paragraphs)
+                ],
+                audio=binary_audio,
+                tenant=x_api_key,
             )
-        binary_audio = io.BytesIO(binary_audio)
-        # Create pipeline
-        transcriber_type = (
-            TranscriberType.MODAL_WHISPER
-            if req.transcriber_backend == "modal"
-            else TranscriberType.FASTER_WHISPER
-        )
-        pipeline = get_pipeline(transcriber_type=transcriber_type)
 
-        # Align paragraphs with audio
-        result = pipeline.get_paragraphs_timestamp(
-            paragraphs=req.paragraphs, audio=binary_audio
-        )
+        # Abandoned when the client disconnects or the deadline passes
+        result = await cancellation.run(run_on_backend(req.transcriber_backend, binary_audio, align))
         return ParagraphsAlignmentResponse(result=result)
+    except OperationCancelled as e:
+        raise cancelled_request_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -172,6 +338,7 @@ async def align_paragraphs_with_audio(
 async def align_paragraphs_with_audio(
     paragraphs_file: UploadFile = File(...),
     ass_file: UploadFile = File(...),
+    cancellation: CancellationToken = Depends(request_cancellation),
 ):
     try:
         # Read ass file
@@ -189,13 +356,136 @@ async def align_paragraphs_with_audio(
         aligner = AlignerFactory.get_aligner(aligner_type=AlignerType.FUZZYWUZZY_ALIGNER)
         pipeline = ParagraphAssAlimentService(aligner=aligner)
 
-        # Align paragraphs with audio
-        result = pipeline.get_paragraphs_timestamp(
-            paragraphs=paragraphs, ass_segments=ass_transcription_segments
+        # Align paragraphs with audio in a worker thread, stopped between paragraphs once abandoned
+        result = await cancellation.run(run_in_threadpool(
+            pipeline.get_paragraphs_timestamp, paragraphs=paragraphs, ass_segments=ass_transcription_segments
+        ))
+        return ParagraphsAssAlignmentResponse(result=result)
+    except OperationCancelled as e:
+        raise cancelled_request_error(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500,
+            detail=f"An error occurred while processing the request: {str(e)}",
         )
-        return ParagraphsAlignmentResponse(result=result)
+
+
+# Align with a stored or supplied transcript
+
+class TranscriptAlignmentRequest(BaseModel):
+    paragraphs: List[Union[ParagraphItem, str]] = Field(
+        description="Paragraphs to align, as items or plain texts (indexed by position)")
+    transcript_id: Optional[str] = Field(
+        default=None, description="Identifier of a stored transcript (X-Transcript-ID of /words)")
+    transcript: Optional[SegmentTranscriptionModelWithWords] = Field(
+        default=None, description="Transcript to align with, as returned by /words; it is stored")
+    aligner_type: Optional[AlignerType] = Field(
+        default=AlignerType.FUZZYWUZZY_ALIGNER, description="Aligner used to match the paragraphs")
+
+
+@paragraph_timestamp_router.post("/align/transcript", response_model=TranscriptAlignmentResponse)
+async def align_paragraphs_with_transcript(
+    req: TranscriptAlignmentRequest,
+    cancellation: CancellationToken = Depends(request_cancellation),
+):
+    if (req.transcript_id is None) == (req.transcript is None):
+        raise HTTPException(status_code=400, detail="Provide either transcript_id or transcript.")
+    try:
+        # Get the transcript
+        store = get_transcript_store()
+        if req.transcript is not None:
+            transcript_id = await run_in_threadpool(store.save, req.transcript)
+            transcription = req.transcript
+        else:
+            transcript_id = req.transcript_id
+            transcription = await run_in_threadpool(store.load, transcript_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if transcription is None:
+        raise HTTPException(status_code=404, detail=f"Transcript not found: {transcript_id}")
+
+    try:
+        # Align paragraphs with the transcript, reusing the alignments of unchanged paragraphs
+        # and the aligner (and its search index) of the transcript
+        pipeline = TranscriptAlignmentService(aligner=transcript_aligners.get(transcript_id, req.aligner_type))
+        result = await cancellation.run(run_in_threadpool(
+            pipeline.align_with_transcript,
+            paragraphs=[
+                ParagraphItem(text=paragraph, paragraph_index=index) if isinstance(paragraph, str) else paragraph
+                for index, paragraph in enumerate(req.paragraphs)
+            ],
+            transcript_id=transcript_id,
+            transcription=transcription,
+        ))
+        return TranscriptAlignmentResponse(result=result, transcript_id=transcript_id)
+    except OperationCancelled as e:
+        raise cancelled_request_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"An error occurred while processing the request: {str(e)}",
         )
+
+
+# Align a live audio stream with a known script
+
+@paragraph_timestamp_router.websocket("/align/stream")
+async def align_paragraphs_with_stream(
+    websocket: WebSocket,
+    transcriber_backend: Literal["local", "modal"] = Query(
+        default="local", description="Backend to run transcriber"
+    ),
+    transcribe_model: FasterWhisperModel = Query(
+        default=DEFAULT_STREAM_MODEL, description="Model transcribing the stream"
+    ),
+    decode_preset: DecodePreset = Query(
+        default=DEFAULT_STREAM_DECODE_PRESET, description="Latency/quality decoding preset"
+    ),
+    aligner_type: AlignerType = Query(
+        default=AlignerType.FUZZYWUZZY_ALIGNER, description="Aligner used to match the paragraph starts"
+    ),
+):
+    # The client sends the script first ({"paragraphs": [...]}), then the audio as binary frames of
+    # 16 kHz mono 16-bit PCM, and {"type": "end"} when the stream ends. The server sends a
+    # paragraph_start event ({"paragraph_index", "start", "score", "delay"}) as soon as the start of a
+    # paragraph is found, paragraph_skipped for the paragraphs the speaker skipped, and a final done
+    # event with every start.
+    await websocket.accept()
+    try:
+        start_message = StreamStartMessage(**await websocket.receive_json())
+        transcriber_type = (
+            TranscriberType.MODAL_WHISPER
+            if transcriber_backend == "modal"
+            else TranscriberType.FASTER_WHISPER
+        )
+        service = StreamingAlignmentService(
+            transcriber=get_stream_transcriber(transcriber_type, transcribe_model),
+            aligner=AlignerFactory.get_aligner(aligner_type=aligner_type),
+            paragraphs=[
+                ParagraphItem(text=paragraph, paragraph_index=index) if isinstance(paragraph, str) else paragraph
+                for index, paragraph in enumerate(start_message.paragraphs)
+            ],
+            decode_options=get_decode_options(decode_preset),
+        )
+    except WebSocketDisconnect:
+        return
+    except Exception as e:
+        await websocket.send_json({"type": "error", "detail": f"Invalid stream start: {str(e)}"})
+        await websocket.close(code=1008)
+        return
+
+    # The transcription of the current window is abandoned when the client disconnects
+    cancellation = CancellationToken()
+    audio_received = asyncio.Event()
+    receiver = asyncio.ensure_future(receive_stream_audio(websocket, service, audio_received, cancellation))
+    try:
+        await cancellation.run(send_stream_alignments(websocket, service, audio_received, receiver))
+        await websocket.close()
+    except (OperationCancelled, WebSocketDisconnect):
+        pass
+    except Exception as e:
+        await websocket.send_json({"type": "error", "detail": f"An error occurred while processing the stream: {str(e)}"})
+        await websocket.close(code=1011)
+    finally:
+        receiver.cancel()
+        receiver.add_done_callback(lambda task: task.cancelled() or task.exception())
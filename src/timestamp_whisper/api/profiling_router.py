@@ -0,0 +1,94 @@
+import uuid
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from timestamp_whisper.utils.profiling_util import (
+    REQUEST_ID_PATTERN,
+    RequestProfile,
+    get_profile_store,
+    profile_listing_enabled,
+    profiling_min_duration,
+    should_profile,
+)
+
+
+profiling_router = APIRouter()
+
+
+class ProfilingMiddleware:
+    """
+    Profiles a PROFILE_SAMPLE_RATE fraction of the requests, and the requests carrying "X-Profile: true"
+    when PROFILE_ON_REQUEST is set, with a sampling profiler and tracemalloc. Profiles of requests lasting
+    at least PROFILE_MIN_DURATION are stored under PROFILE_DIR, keyed by a server-generated profile id
+    returned in the X-Profile-ID response header, next to the request id (X-Request-ID, generated when missing).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["path"].startswith("/profiles"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+        if not should_profile(headers.get("x-profile", "").lower() == "true"):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = headers.get("x-request-id", "")
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid.uuid4().hex
+        profile = RequestProfile(request_id=request_id)
+        profile.metadata.update(method=scope["method"], path=scope["path"], status=None)
+
+        async def send_with_request_id(message: Message):
+            if message["type"] == "http.response.start":
+                profile.metadata["status"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (b"x-request-id", request_id.encode("latin-1")),
+                    (b"x-profile-id", profile.profile_id.encode("latin-1")),
+                ]
+            await send(message)
+
+        profile.start()
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            await run_in_threadpool(profile.stop)
+            if profile.metadata["duration"] >= profiling_min_duration():
+                await run_in_threadpool(get_profile_store().save, profile)
+
+
+# Endpoints
+
+# The listing exposes the paths and ids of every profiled request, it is only served when PROFILE_LISTING is set
+@profiling_router.get("/profiles")
+async def list_profiles():
+    if not profile_listing_enabled():
+        raise HTTPException(status_code=404, detail="Profile listing is disabled")
+    return {"profiles": await run_in_threadpool(get_profile_store().list)}
+
+
+@profiling_router.get("/profiles/{profile_id}")
+async def get_profile(profile_id: str):
+    try:
+        metadata = get_profile_store().metadata(profile_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if metadata is None:
+        raise HTTPException(status_code=404, detail=f"No profile {profile_id}")
+    return metadata
+
+
+@profiling_router.get("/profiles/{profile_id}/folded", response_class=PlainTextResponse)
+async def get_profile_stacks(profile_id: str):
+    try:
+        folded = get_profile_store().folded(profile_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if folded is None:
+        raise HTTPException(status_code=404, detail=f"No profile {profile_id}")
+    return PlainTextResponse(folded)
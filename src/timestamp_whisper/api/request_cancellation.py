@@ -0,0 +1,80 @@
+import asyncio
+import os
+from typing import AsyncIterator, Optional
+from fastapi import Header, HTTPException, Request
+
+from timestamp_whisper.utils.cancellation_util import CLIENT_DISCONNECTED, CancellationToken, OperationCancelled
+
+
+# Interval between two checks of the client connection
+DISCONNECT_POLL_SECONDS = 0.25
+
+# Status of a request abandoned by its client (nginx convention), nobody reads it
+CLIENT_CLOSED_REQUEST = 499
+
+
+def request_timeout(requested: Optional[float] = None) -> Optional[float]:
+    """
+    Deadline of a request in seconds: the one requested by the client (X-Request-Timeout), capped by
+    REQUEST_TIMEOUT_SECONDS when it is set.
+
+    Args:
+        requested (Optional[float]): Timeout requested by the client.
+
+    Returns:
+        Optional[float]: The timeout, None for no deadline.
+    """
+    configured = os.environ.get("REQUEST_TIMEOUT_SECONDS")
+    timeouts = [timeout for timeout in (requested, float(configured) if configured else None) if timeout]
+    return min(timeouts) if timeouts else None
+
+
+async def request_cancellation(
+    request: Request,
+    x_request_timeout: Optional[float] = Header(
+        default=None, gt=0, description="Seconds after which the request is abandoned (504)"
+    ),
+) -> AsyncIterator[CancellationToken]:
+    """
+    Dependency creating the cancellation token of a request. The token is cancelled when the client
+    disconnects (or a proxy in front of it gives up) and when the deadline of the request passes; the
+    work of the route runs under token.run() so its conversion, transcription and alignment stop.
+
+    Args:
+        request (Request): The request, polled for the disconnection of its client.
+        x_request_timeout (Optional[float]): Deadline requested by the client, in seconds.
+
+    Yields:
+        CancellationToken: The token of the request.
+    """
+    token = CancellationToken(timeout=request_timeout(x_request_timeout))
+
+    async def watch_disconnect() -> None:
+        # The body is read before the dependencies are solved, so polling receive loses nothing
+        while not token.cancelled:
+            if await request.is_disconnected():
+                token.cancel(CLIENT_DISCONNECTED)
+                return
+            await asyncio.sleep(DISCONNECT_POLL_SECONDS)
+
+    watcher = asyncio.ensure_future(watch_disconnect())
+    try:
+        yield token
+    finally:
+        watcher.cancel()
+
+
+def cancelled_request_error(e: OperationCancelled) -> HTTPException:
+    """
+    Error response of an abandoned request.
+
+    Args:
+        e (OperationCancelled): The cancellation.
+
+    Returns:
+        HTTPException: 504 when the deadline was exceeded, 499 when the client disconnected.
+    """
+    return HTTPException(
+        status_code=504 if e.deadline_exceeded else CLIENT_CLOSED_REQUEST,
+        detail=f"The request was abandoned: {e.reason}",
+    )
@@ -1,13 +1,20 @@
-import io
 from typing import Literal, Optional
-from fastapi import APIRouter, File, Query, UploadFile, HTTPException
+from fastapi import APIRouter, Depends, File, Header, Query, Response, UploadFile, HTTPException
+from starlette.concurrency import run_in_threadpool
 from pydantic import Field
 
-from timestamp_whisper.core.types import FasterWhisperModel, TranscriberType
+from timestamp_whisper.api.request_cancellation import cancelled_request_error, request_cancellation
+from timestamp_whisper.core.types import FasterWhisperModel, TranscriberType, DecodePreset, DEFAULT_DECODE_PRESET
+from timestamp_whisper.core.profile import get_decode_options
 from timestamp_whisper.core.factory.transcriber_factory import TranscriberFactory
 from timestamp_whisper.models.transcription_models import SegmentTranscriptionModelWithWords
 from timestamp_whisper.services import TranscriberService
-from timestamp_whisper.utils import convert_video_to_audio, detect_file_type
+from timestamp_whisper.services.backend_router import run_on_backend
+from timestamp_whisper.utils import AudioBuffer, convert_video_to_audio, detect_file_type
+from timestamp_whisper.utils.audio_fingerprint_util import transcription_reuse_enabled
+from timestamp_whisper.utils.cancellation_util import CancellationToken, OperationCancelled
+from timestamp_whisper.utils.speech_detection_util import silence_removal_enabled
+from timestamp_whisper.utils.transcript_store_util import get_transcript_store
 
 
 transcriber_router = APIRouter()
@@ -18,15 +25,19 @@ transcriber_router = APIRouter()
 def get_pipeline(
     transcriber_type: Optional[str] = TranscriberType.MODAL_WHISPER,
     transcribe_model: Optional[str] = FasterWhisperModel.LARGE_V3,
+    decode_preset: Optional[str] = DEFAULT_DECODE_PRESET,
 ):
     try:
         transcriber = TranscriberFactory.get_transcriber(
             transcriber_type=transcriber_type,
             model_name=transcribe_model,
+            reuse_transcriptions=transcription_reuse_enabled(),
+            remove_silence=silence_removal_enabled(),
         )
 
         pipeline = TranscriberService(
             transcriber=transcriber,
+            decode_options=get_decode_options(decode_preset),
         )
         return pipeline
     except Exception as e:
@@ -37,43 +48,52 @@ def get_pipeline(
 # transcriber_router.post("/
 @transcriber_router.post("/words", response_model=SegmentTranscriptionModelWithWords)
 async def transcribe_with_words_timestamp(
+    response: Response,
     media_file: UploadFile = File(...),
-    transcriber_backend: Literal["local", "modal"] = Query(
-        default="modal", description="Backend to run transcriber"
+    transcriber_backend: Literal["local", "modal", "auto"] = Query(
+        default="modal", description="Backend to run transcriber, auto to route by duration and load"
     ),
+    decode_preset: DecodePreset = Query(
+        default=DEFAULT_DECODE_PRESET, description="Latency/quality decoding preset"
+    ),
+    x_api_key: Optional[str] = Header(default=None, description="API key, used for fair scheduling"),
+    cancellation: CancellationToken = Depends(request_cancellation),
 ):
     try:
-        media_file_bytes = await media_file.read()
-        if not media_file_bytes:
+        # Map the spooled upload instead of reading it into memory
+        media_buffer = AudioBuffer.from_upload(media_file.file)
+        if media_buffer.nbytes == 0:
             raise HTTPException(status_code=400, detail="Uploaded file is empty")
 
         # Detect MIME type
-        mimetypes = detect_file_type(file_bytes=media_file_bytes)
+        mimetypes = detect_file_type(file_bytes=media_buffer.getbuffer())
         if not mimetypes.startswith("video/") and not mimetypes.startswith("audio/"):
             raise HTTPException(
                 status_code=400,
                 detail="Invalid file format. Please upload a video or audio file.",
             )
         elif mimetypes.startswith("video/"):
-            binary_audio = await convert_video_to_audio(
-                video_bytes=media_file_bytes, video_name=media_file.filename
-            )
+            binary_audio = await cancellation.run(convert_video_to_audio(
+                video_bytes=media_buffer.getbuffer(), video_name=media_file.filename
+            ))
         else:
-            binary_audio = io.BytesIO(media_file_bytes)
+            binary_audio = media_buffer
 
-        # Create pipeline
-        transcriber_type = (
-            TranscriberType.MODAL_WHISPER
-            if transcriber_backend == "modal"
-            else TranscriberType.FASTER_WHISPER
-        )
-        pipeline = get_pipeline(transcriber_type=transcriber_type)
+        # Create pipeline and transcribe the audio
+        async def transcribe(transcriber_type: str, transcribe_model: str):
+            pipeline = get_pipeline(
+                transcriber_type=transcriber_type, transcribe_model=transcribe_model, decode_preset=decode_preset
+            )
+            return await pipeline.aget_paragraphs_timestamp(audio=binary_audio, tenant=x_api_key)
 
-        # Align paragraphs with audio
-        result = pipeline.get_paragraphs_timestamp(
-             audio=binary_audio
-        )
+        # Abandoned when the client disconnects or the deadline passes
+        result = await cancellation.run(run_on_backend(transcriber_backend, binary_audio, transcribe))
+
+        # Store the transcript, so script revisions can be aligned with it through /align/transcript
+        response.headers["X-Transcript-ID"] = await run_in_threadpool(get_transcript_store().save, result)
         return result
+    except OperationCancelled as e:
+        raise cancelled_request_error(e)
     except Exception as e:
         raise HTTPException(
             status_code=500,
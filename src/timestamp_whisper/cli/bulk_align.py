@@ -0,0 +1,392 @@
+"""
+Offline bulk alignment of a catalogue, without the HTTP API.
+
+The manifest is a JSON Lines file, one item per line:
+    {"media": "talks/01.mp4", "paragraphs": "talks/01.json"}
+    {"ass": "subtitles/02.ass", "paragraphs": "subtitles/02.json", "id": "episode-02"}
+
+A media item is transcribed and aligned by FileChunksTimestampService, an ASS item is aligned with
+its subtitles by ParagraphAssAlimentService. Paragraph files use the /align/file format
+({"paragraphs": [...]}) and relative paths are resolved from the manifest directory.
+
+Items run in a pool of worker processes, each loading its model once. The result of an item is
+written to <output>/<id>.json as soon as it is done, so a restarted run skips the completed items;
+the error of a failed item is written to <output>/<id>.error.txt and the item is retried by the
+next run.
+
+Usage:
+    timestamp-whisper-bulk manifest.jsonl --output results/ --workers 4 --model large-v3
+"""
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from timestamp_whisper.core.factory.aligner_factory import AlignerFactory
+from timestamp_whisper.core.factory.transcriber_factory import TranscriberFactory
+from timestamp_whisper.core.profile import get_compute_profile, get_decode_options
+from timestamp_whisper.core.transcriber import FasterWhisperTranscriber
+from timestamp_whisper.core.transcriber.faster_whisper_pool import local_transcription_workers, worker_cpu_threads
+from timestamp_whisper.core.transcriber.stub_transcriber import stub_transcriber_enabled
+from timestamp_whisper.core.types import (
+    DEFAULT_DECODE_PRESET, AlignerType, DecodePreset, FasterWhisperModel, TranscriberType,
+)
+from timestamp_whisper.models.aligner_models import ParagraphItem
+from timestamp_whisper.services import FileChunksTimestampService
+from timestamp_whisper.services.align_text_with_transcription import ParagraphAssAlimentService
+from timestamp_whisper.utils import AudioBuffer, detect_file_type, read_ass_file
+from timestamp_whisper.utils.audio_util import audio_duration
+from timestamp_whisper.utils.cancellation_util import CancellationToken, OperationCancelled, cancellation_scope
+from timestamp_whisper.utils.video_to_audio_util import extract_audio
+
+
+# State of a worker process: its options, the services created once per process, and the token
+# cancelled when the run is interrupted
+_worker_options: dict = {}
+_worker_services: dict = {}
+_worker_cancellation = CancellationToken()
+
+
+def read_manifest(path: str) -> List[dict]:
+    """
+    Reads the items of a manifest, resolving their paths and giving each one a stable id.
+
+    Args:
+        path (str): Path of the JSON Lines manifest.
+
+    Returns:
+        List[dict]: The items, with their id, kind ("media" or "ass"), source path and paragraphs path.
+
+    Raises:
+        ValueError: When an item has neither media nor ass, or no paragraphs.
+    """
+    base_dir = os.path.dirname(os.path.abspath(path))
+    items = []
+    with open(path) as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            entry = json.loads(line)
+            kind = "media" if entry.get("media") else "ass" if entry.get("ass") else None
+            if kind is None or not entry.get("paragraphs"):
+                raise ValueError(f"Line {line_number}: an item needs 'paragraphs' and 'media' or 'ass'")
+            source = os.path.join(base_dir, entry[kind])
+            paragraphs = os.path.join(base_dir, entry["paragraphs"])
+            item_id = entry.get("id") or _item_id(source, paragraphs)
+            items.append({"id": str(item_id), "kind": kind, "source": source, "paragraphs": paragraphs})
+    return items
+
+
+def _item_id(source: str, paragraphs: str) -> str:
+    """Id of an item without one: the name of its file, made unique by the hash of its paths."""
+    digest = hashlib.sha1(f"{source}\n{paragraphs}".encode("utf-8")).hexdigest()[:10]
+    return f"{os.path.splitext(os.path.basename(source))[0]}-{digest}"
+
+
+def result_path(output_dir: str, item_id: str) -> str:
+    return os.path.join(output_dir, f"{item_id}.json")
+
+
+def error_path(output_dir: str, item_id: str) -> str:
+    return os.path.join(output_dir, f"{item_id}.error.txt")
+
+
+def _write_atomic(path: str, content: str) -> None:
+    """Writes a file through a temporary file, so an interrupted run never leaves a partial result."""
+    temporary_path = f"{path}.tmp"
+    with open(temporary_path, "w") as f:
+        f.write(content)
+    os.replace(temporary_path, path)
+
+
+def _read_paragraphs(path: str) -> list:
+    """Reads a paragraphs file in the /align/file format, or a bare list of paragraphs."""
+    with open(path) as f:
+        data = json.load(f)
+    return data.get("paragraphs", []) if isinstance(data, dict) else data
+
+
+def _init_worker(options: dict, stop) -> None:
+    """
+    Initializer of a worker process. Ctrl-C is left to the parent, which sets the stop event: the item
+    in progress then stops at its next segment or paragraph, as a cancelled request does.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_options.update(options)
+
+    def cancel_on_stop() -> None:
+        stop.wait()
+        _worker_cancellation.cancel()
+
+    threading.Thread(target=cancel_on_stop, daemon=True).start()
+
+
+def _media_service() -> FileChunksTimestampService:
+    """
+    Returns the alignment service of the worker, loading its model on the first media item.
+
+    Returns:
+        FileChunksTimestampService: The service of the worker.
+    """
+    if "media" not in _worker_services:
+        options = _worker_options
+        if options["backend"] == "local" and not stub_transcriber_enabled():
+            # The workers of the bulk run are the pool: each one runs its model in its own process
+            transcriber = FasterWhisperTranscriber(
+                model_name=options["model"],
+                cpu_threads=worker_cpu_threads(get_compute_profile(), options["workers"]),
+                num_workers=1,
+            )
+        else:
+            transcriber = TranscriberFactory.get_transcriber(
+                transcriber_type=TranscriberType.MODAL_WHISPER, model_name=options["model"]
+            )
+        _worker_services["media"] = FileChunksTimestampService(
+            transcriber=transcriber,
+            aligner=AlignerFactory.get_aligner(aligner_type=options["aligner"]),
+            decode_options=get_decode_options(options["decode_preset"]),
+        )
+    return _worker_services["media"]
+
+
+def _ass_service() -> ParagraphAssAlimentService:
+    """
+    Returns the ASS alignment service of the worker.
+
+    Returns:
+        ParagraphAssAlimentService: The service of the worker.
+    """
+    if "ass" not in _worker_services:
+        _worker_services["ass"] = ParagraphAssAlimentService(
+            aligner=AlignerFactory.get_aligner(aligner_type=AlignerType.FUZZYWUZZY_ALIGNER)
+        )
+    return _worker_services["ass"]
+
+
+def align_item(item: dict) -> dict:
+    """
+    Aligns one item under the cancellation token of the worker.
+
+    Args:
+        item (dict): The manifest item.
+
+    Returns:
+        dict: The outcome of the item, see _align_item.
+    """
+    with cancellation_scope(_worker_cancellation):
+        return _align_item(item)
+
+
+def _align_item(item: dict) -> dict:
+    """
+    Aligns one item in a worker process and writes its result.
+
+    Args:
+        item (dict): The manifest item.
+
+    Returns:
+        dict: The id of the item, whether it succeeded, its audio duration and its processing time.
+    """
+    output_dir = _worker_options["output"]
+    started = time.perf_counter()
+    audio_seconds = 0.0
+    try:
+        _worker_cancellation.raise_if_cancelled()
+        paragraphs = _read_paragraphs(item["paragraphs"])
+        if item["kind"] == "ass":
+            with open(item["source"], "rb") as f:
+                ass_segments = read_ass_file(f.read())
+            result = _ass_service().get_paragraphs_timestamp(
+                paragraphs=[paragraph["text"] if isinstance(paragraph, dict) else paragraph for paragraph in paragraphs],
+                ass_segments=ass_segments,
+            )
+        else:
+            audio = AudioBuffer.from_file(item["source"])
+            if detect_file_type(file_bytes=audio.getbuffer()).startswith("video/"):
+                audio = extract_audio(audio.getbuffer(), os.path.basename(item["source"]))
+            audio_seconds = audio_duration(audio)
+            audio.seek(0)
+            result = _media_service().get_paragraphs_timestamp(
+                paragraphs=[
+                    ParagraphItem(text=paragraph, paragraph_index=index) if isinstance(paragraph, str)
+                    else ParagraphItem(**paragraph)
+                    for index, paragraph in enumerate(paragraphs)
+                ],
+                audio=audio,
+            )
+        elapsed = time.perf_counter() - started
+        _write_atomic(
+            result_path(output_dir, item["id"]),
+            json.dumps({
+                "id": item["id"],
+                item["kind"]: item["source"],
+                "paragraphs": item["paragraphs"],
+                "audio_seconds": round(audio_seconds, 3),
+                "elapsed_seconds": round(elapsed, 3),
+                "result": [alignment.model_dump() for alignment in result],
+            }),
+        )
+        if os.path.exists(error_path(output_dir, item["id"])):
+            os.remove(error_path(output_dir, item["id"]))
+        return {"id": item["id"], "ok": True, "audio_seconds": audio_seconds, "elapsed_seconds": elapsed}
+    except OperationCancelled:
+        return {
+            "id": item["id"], "ok": False, "cancelled": True, "audio_seconds": 0.0,
+            "elapsed_seconds": time.perf_counter() - started, "error": "interrupted",
+        }
+    except Exception as e:
+        _write_atomic(error_path(output_dir, item["id"]), f"{item['source']}: {str(e)}\n")
+        return {
+            "id": item["id"], "ok": False, "audio_seconds": 0.0,
+            "elapsed_seconds": time.perf_counter() - started, "error": str(e),
+        }
+
+
+def _format_duration(seconds: float) -> str:
+    seconds = int(seconds)
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+class Progress:
+    """
+    Progress of a run: items done, throughput and estimated time left, printed after every item.
+    """
+
+    def __init__(self, total: int, skipped: int):
+        """
+        Initializes the progress.
+
+        Args:
+            total (int): Items in the manifest.
+            skipped (int): Items already completed by a previous run.
+        """
+        self.total = total
+        self.skipped = skipped
+        self.done = 0
+        self.failed = 0
+        self.audio_seconds = 0.0
+        self.started = time.monotonic()
+
+    @property
+    def remaining(self) -> int:
+        return self.total - self.skipped - self.done - self.failed
+
+    def update(self, outcome: dict) -> str:
+        """
+        Records the outcome of an item.
+
+        Args:
+            outcome (dict): The outcome returned by align_item.
+
+        Returns:
+            str: The progress line of the item.
+        """
+        if outcome["ok"]:
+            self.done += 1
+            self.audio_seconds += outcome["audio_seconds"]
+        else:
+            self.failed += 1
+        elapsed = max(1e-6, time.monotonic() - self.started)
+        processed = self.done + self.failed
+        items_per_second = processed / elapsed
+        eta = _format_duration(self.remaining / items_per_second) if items_per_second > 0 else "?"
+        status = f"done in {outcome['elapsed_seconds']:.1f} s" if outcome["ok"] else f"FAILED: {outcome['error']}"
+        return (
+            f"[{self.skipped + processed:>{len(str(self.total))}}/{self.total}] {outcome['id']} {status} | "
+            f"{items_per_second * 3600:.1f} items/h, {self.audio_seconds / elapsed:.1f}x real time | ETA {eta}"
+        )
+
+    def summary(self) -> str:
+        return (
+            f"{self.done} aligned, {self.failed} failed, {self.skipped} already done, {self.remaining} left "
+            f"in {_format_duration(time.monotonic() - self.started)} "
+            f"({self.audio_seconds / 3600:.2f} audio hours)"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="timestamp-whisper-bulk", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("manifest", help="JSON Lines manifest of the items.")
+    parser.add_argument("--output", required=True, help="Directory receiving one result file per item.")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Worker processes (default LOCAL_TRANSCRIPTION_WORKERS or the compute profile).")
+    parser.add_argument("--backend", choices=("local", "modal"), default="local", help="Backend to run transcriber.")
+    parser.add_argument("--model", default=FasterWhisperModel.LARGE_V3.value,
+                        choices=[model.value for model in FasterWhisperModel], help="Transcription model.")
+    parser.add_argument("--decode-preset", default=DEFAULT_DECODE_PRESET.value,
+                        choices=[preset.value for preset in DecodePreset], help="Latency/quality decoding preset.")
+    parser.add_argument("--aligner", default=AlignerType.FUZZYWUZZY_ALIGNER.value,
+                        choices=[aligner.value for aligner in AlignerType], help="Aligner of the media items.")
+    args = parser.parse_args(argv)
+
+    try:
+        items = read_manifest(args.manifest)
+    except Exception as e:
+        print(f"Invalid manifest: {str(e)}", file=sys.stderr)
+        return 2
+    ids = [item["id"] for item in items]
+    if len(set(ids)) != len(ids):
+        print("Invalid manifest: item ids must be unique", file=sys.stderr)
+        return 2
+    os.makedirs(args.output, exist_ok=True)
+    pending = [item for item in items if not os.path.exists(result_path(args.output, item["id"]))]
+    progress = Progress(total=len(items), skipped=len(items) - len(pending))
+    if progress.skipped:
+        print(f"Skipping {progress.skipped} items already done", file=sys.stderr)
+    if not pending:
+        print(progress.summary(), file=sys.stderr)
+        return 0
+
+    if args.workers is None:
+        args.workers = local_transcription_workers() or 1
+    workers = max(1, min(args.workers, len(pending)))
+    options = dict(
+        output=args.output,
+        workers=workers,
+        backend=args.backend,
+        model=args.model,
+        decode_preset=args.decode_preset,
+        aligner=args.aligner,
+    )
+    context = multiprocessing.get_context("spawn")
+    stop = context.Event()
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=context,
+        initializer=_init_worker,
+        initargs=(options, stop),
+    )
+    try:
+        futures = [executor.submit(align_item, item) for item in pending]
+        for future in as_completed(futures):
+            print(progress.update(future.result()), file=sys.stderr)
+    except KeyboardInterrupt:
+        # The items in progress are abandoned and aligned again by the next run
+        print("Interrupted, stopping the workers...", file=sys.stderr)
+        stop.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+        print(f"Interrupted: {progress.summary()}", file=sys.stderr)
+        return 130
+    except BrokenProcessPool as e:
+        # A worker died (out of memory...), the completed items are kept for the next run
+        executor.shutdown(wait=False, cancel_futures=True)
+        print(f"A worker process died ({str(e)}): {progress.summary()}", file=sys.stderr)
+        return 1
+    executor.shutdown()
+    print(progress.summary(), file=sys.stderr)
+    return 1 if progress.failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
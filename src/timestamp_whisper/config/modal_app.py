@@ -7,6 +7,7 @@ faster_whisper_image = (
     .env({"DEBIAN_FRONTEND": "noninteractive"})
     .copy_local_dir(local_path="src/config", remote_path="/root/src/config")
     .copy_local_file(local_path="src/utils/video_compression_util.py", remote_path="/root/src/utils/video_compression_util.py")
+    .copy_local_file(local_path="src/utils/transcription_wire_util.py", remote_path="/root/src/utils/transcription_wire_util.py")
     .apt_install("tzdata", "ffmpeg", "git")
     .pip_install(
         "faster-whisper==1.1.1",
@@ -1,4 +1,5 @@
 from .fuzzy_aligner import FuzzyAligner
 from .fuzzywuzzy_aligner import FuzzyWuzzyAligner
+from .substring_aligner import SubstringAligner
 
-__all__ = ["FuzzyAligner", "FuzzyWuzzyAligner"]
+__all__ = ["FuzzyAligner", "FuzzyWuzzyAligner", "SubstringAligner"]
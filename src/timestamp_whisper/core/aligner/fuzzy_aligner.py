@@ -1,7 +1,13 @@
-from typing import List
+from typing import List, Optional, Tuple
 from Levenshtein import ratio
 
 from timestamp_whisper.core.types import DEFAULT_SEARCH_SEGMENT_SIZE
+from timestamp_whisper.core.aligner.search_index import (
+    NormalizedChunkIndex,
+    SCORE_EPSILON,
+    max_ratio_for_lengths,
+    score_cutoff,
+)
 from timestamp_whisper.core import AlignerInterface
 from timestamp_whisper.models import MatchChunk
 from timestamp_whisper.models import TranscribedChunk, SegmentTranscriptionModel, WordTranscriptionModel
@@ -18,17 +24,17 @@ class FuzzyAligner(AlignerInterface):
         """
         Initializes the FuzzyAligner with.
         """
-        pass
+        self._index_cache: Optional[Tuple[List[TranscribedChunk], int, NormalizedChunkIndex]] = None
 
     def align_paragraph_with_segments(
-        self, paragraph: str, segments: List[SegmentTranscriptionModel]
+        self, paragraph: str, segments: List[SegmentTranscriptionModel], search_length: int = DEFAULT_SEARCH_SEGMENT_SIZE
     ) -> ParagraphAlignment:
         """
         Align the given paragraph with audio segments timestamp.
         Args:
             - paragraph: The paragraph to align with audio segments.
             - segments: List of audio segments with their timestamps.
-            - search_length: Number of words to consider for fuzzy matching (default is 10).
+            - search_length: Number of words of the paragraph start and end to consider for fuzzy matching (default is 8).
         Return:
             - Start and End time of paragraph.
         """
@@ -39,12 +45,12 @@ class FuzzyAligner(AlignerInterface):
             return None
 
         # Find the most similar segment to the paragraph start with fuzzy matching
-        paragraph_start = " ".join(paragraph.strip().split(" ")[:DEFAULT_SEARCH_SEGMENT_SIZE] if paragraph.strip() else "")
-        start_match: MatchChunk = self._get_similar_segment(paragraph_start, segments)
+        paragraph_start = " ".join(paragraph.strip().split(" ")[:search_length] if paragraph.strip() else "")
+        start_match: MatchChunk = self._get_similar_segment(paragraph_start, segments, reuse_index=True)
 
         # Find the most similar segment to the paragraph end with fuzzy matching
-        paragraph_end = " ".join(paragraph.strip().split(" ")[-DEFAULT_SEARCH_SEGMENT_SIZE:] if paragraph.strip() else "")
-        end_match: MatchChunk = self._get_similar_segment(paragraph_end, segments)
+        paragraph_end = " ".join(paragraph.strip().split(" ")[-search_length:] if paragraph.strip() else "")
+        end_match: MatchChunk = self._get_similar_segment(paragraph_end, segments, reuse_index=True)
 
         # Return the alignment with start and end times
         return ParagraphAlignment(
@@ -56,14 +62,15 @@ class FuzzyAligner(AlignerInterface):
         )
 
     def align_paragraph_with_words(
-        self, paragraph: str, words: List[WordTranscriptionModel]
+        self, paragraph: str, words: List[WordTranscriptionModel], search_length: int = 10
     ) -> ParagraphAlignment:
         """
         Align the given paragraph with audio segments timestamp.
         Args:
             - paragraph: The paragraph to align with audio segments.
             - words: List of audio segments with their timestamps.
-            - search_length: Number of words to consider for fuzzy matching (default is 10).
+            - search_length: Accepted for compatibility with the AlignerInterface; the first and last
+              words of the paragraph are matched on their own against single words.
         Return:
             - Start and End time of paragraph.
         """
@@ -91,13 +98,14 @@ class FuzzyAligner(AlignerInterface):
         )
 
     def _get_similar_segment(self,
-        search_sentence: str, chunks: List[TranscribedChunk]
+        search_sentence: str, chunks: List[TranscribedChunk], reuse_index: bool = False
     ) -> MatchChunk:
         """
         Find the most similar segment to the search sentence using fuzzy matching.
         Args:
             - search_sentence: The sentence to search for in the segments.
             - chunks: List of audio segments to search within.
+            - reuse_index: Whether the index of the chunks is cached for the next searches.
         Return:
             - MatchChunk containing the most similar segment's text, start time, end time, and score.
         """
@@ -107,15 +115,39 @@ class FuzzyAligner(AlignerInterface):
         if not search_sentence or search_sentence.strip() == "":
             return None
 
+        index = (
+            self._get_index(chunks) if reuse_index
+            else NormalizedChunkIndex.from_chunks(chunks, normalize=lambda text: text)
+        )
+
+        # Exact match fast path: nothing can score higher than an identical text
+        best_match = index.lookup(search_sentence)
+        if best_match is not None:
+            return MatchChunk(
+                id=best_match.id,
+                text=best_match.text,
+                start=best_match.start,
+                end=best_match.end,
+                score=1.0,
+            )
+
         # Get the segment with the highest similarity score
         max_score = 0
         best_match = None
-        for segment in chunks:
-            if segment and segment.text.strip() != "":
-                score = ratio(segment.text, search_sentence)
-                if max_score ==0 or score > max_score:
-                    max_score = score
-                    best_match = segment
+        search_length = len(search_sentence)
+        for segment, text in index.entries:
+            if max_score != 0:
+                # Skip segments whose length difference alone prevents beating the best score
+                if max_ratio_for_lengths(len(text), search_length) <= max_score - SCORE_EPSILON:
+                    continue
+                score = ratio(text, search_sentence, score_cutoff=score_cutoff(max_score))
+            else:
+                score = ratio(text, search_sentence)
+            if max_score ==0 or score > max_score:
+                max_score = score
+                best_match = segment
+                if max_score >= 1.0:
+                    break
 
         return (
             MatchChunk(
@@ -126,3 +158,19 @@ class FuzzyAligner(AlignerInterface):
                 score=max_score,
             )
         )
+
+    def _get_index(self, chunks: List[TranscribedChunk]) -> NormalizedChunkIndex:
+        """
+        Get the search index of the chunks, reusing it while the same list is searched: the start
+        and end of every paragraph are searched in the same segments. The word lists around each
+        paragraph differ, so they are not cached and do not evict the index of the segments.
+        Args:
+            - chunks: List of audio segments to search within.
+        Return:
+            - NormalizedChunkIndex over the chunks.
+        """
+        if self._index_cache and self._index_cache[0] is chunks and self._index_cache[1] == len(chunks):
+            return self._index_cache[2]
+        index = NormalizedChunkIndex.from_chunks(chunks, normalize=lambda text: text)
+        self._index_cache = (chunks, len(chunks), index)
+        return index
@@ -1,12 +1,24 @@
 import string
-from typing import List
-from fuzzywuzzy import fuzz
+from typing import List, Optional, Tuple
+from rapidfuzz import fuzz
+from rapidfuzz.utils import default_process
 
 from timestamp_whisper.core import AlignerInterface
 from timestamp_whisper.models import MatchChunk
 from timestamp_whisper.models import SegmentTranscriptionModel, WordTranscriptionModel
 from timestamp_whisper.models import ParagraphAlignment
 from timestamp_whisper.core.types import DEFAULT_SEARCH_SEGMENT_SIZE
+from timestamp_whisper.core.aligner.search_index import (
+    NormalizedChunkIndex,
+    SCORE_EPSILON,
+    max_ratio_for_lengths,
+    score_cutoff,
+)
+
+# Weights of the composite segment score
+PARTIAL_WEIGHT = 0.6
+RATIO_WEIGHT = 0.1
+TOKEN_SET_WEIGHT = 0.3
 
 
 class FuzzyWuzzyAligner(AlignerInterface):
@@ -19,7 +31,7 @@ class FuzzyWuzzyAligner(AlignerInterface):
         """
         Initializes the FuzzyAligner with.
         """
-        pass
+        self._index_cache: Optional[Tuple[List[SegmentTranscriptionModel], int, NormalizedChunkIndex]] = None
 
     def align_paragraph_with_segments(
         self, paragraph: str, segments: List[SegmentTranscriptionModel],
@@ -108,22 +120,43 @@ class FuzzyWuzzyAligner(AlignerInterface):
         if not search_sentence or search_sentence.strip() == "":
             return None
 
+        index = self._get_index(segments)
+        search_text = self._normalize(search_sentence)
+
+        # Exact match fast path: identical normalized texts get the maximum composite score
+        best_match = index.lookup(search_text)
+        if best_match is not None:
+            return MatchChunk(
+                id=best_match.id,
+                text=best_match.text,
+                start=best_match.start,
+                end=best_match.end,
+                score=1.0,
+            )
+
         # Get the segment with the highest similarity score
         max_score = 0
         best_match = None
-        for segment in segments:
-            if segment and segment.text.strip() != "":
-                ratio_score = fuzz.ratio(self._clean_text(segment.text).lower().strip(), self._clean_text(search_sentence).lower().strip())  
-                partial_score = fuzz.partial_ratio(
-                    self._clean_text(segment.text).lower().strip(), self._clean_text(search_sentence).lower().strip())
-                token_set_score = fuzz.token_set_ratio(self._clean_text(segment.text).lower().strip(), self._clean_text(search_sentence).lower().strip())
-                composite_score = (partial_score * 0.6 + 
-                  ratio_score * 0.1 + 
-                  token_set_score * 0.3)
-
-                if max_score == 0 or composite_score > max_score:
-                    max_score = composite_score
-                    best_match = segment
+        search_length = len(search_text)
+        for segment, segment_text in index.entries:
+            if max_score != 0:
+                composite_score = self._bounded_composite_score(
+                    segment_text, search_text, search_length, max_score
+                )
+                if composite_score is None:
+                    continue
+            else:
+                composite_score = (
+                    fuzz.partial_ratio(segment_text, search_text) * PARTIAL_WEIGHT
+                    + fuzz.ratio(segment_text, search_text) * RATIO_WEIGHT
+                    + fuzz.token_set_ratio(segment_text, search_text, processor=default_process) * TOKEN_SET_WEIGHT
+                )
+
+            if max_score == 0 or composite_score > max_score:
+                max_score = composite_score
+                best_match = segment
+                if max_score >= 100:
+                    break
 
         return (
             MatchChunk(
@@ -181,16 +214,37 @@ class FuzzyWuzzyAligner(AlignerInterface):
         if not word_sequences:
             return None
 
+        search_text = self._normalize(search_sentence)
+        sequence_entries = [(sequence, self._normalize(str(sequence["text"]))) for sequence in word_sequences]
+
+        # Exact match fast path: an identical normalized sequence scores 100
+        exact_match = NormalizedChunkIndex(sequence_entries).lookup(search_text)
+        if exact_match is not None:
+            return MatchChunk(
+                id=exact_match['id'],
+                text=exact_match['text'],
+                start=exact_match['start'],
+                end=exact_match['end'],
+                score=1.0,
+            )
+
         # Get the segment with the highest similarity score
         max_score = 0
         best_match = None
-        for sequence in word_sequences:
-            score = fuzz.ratio(
-                self._clean_text(str(sequence["text"])).lower().strip(), self._clean_text(search_sentence).lower().strip()
-            )
+        search_length = len(search_text)
+        for sequence, sequence_text in sequence_entries:
+            if max_score != 0:
+                # Skip sequences whose length difference alone prevents beating the best score
+                if 100 * max_ratio_for_lengths(len(sequence_text), search_length) <= max_score - SCORE_EPSILON:
+                    continue
+                score = fuzz.ratio(sequence_text, search_text, score_cutoff=score_cutoff(max_score))
+            else:
+                score = fuzz.ratio(sequence_text, search_text)
             if max_score == 0 or score > max_score:
                 max_score = score
                 best_match = sequence
+                if max_score >= 100:
+                    break
 
         return (
             MatchChunk(
@@ -202,6 +256,71 @@ class FuzzyWuzzyAligner(AlignerInterface):
             )
         )
     
+    def _bounded_composite_score(
+        self, segment_text: str, search_text: str, search_length: int, max_score: float
+    ) -> Optional[float]:
+        """
+        Compute the composite score of a segment only if it can still beat the current best.
+        Each scorer gets the lowest score_cutoff that keeps the composite above max_score,
+        assuming the scorers not computed yet reach their upper bound.
+        Args:
+            - segment_text: Normalized segment text.
+            - search_text: Normalized search text.
+            - search_length: Length of the normalized search text.
+            - max_score: Current best composite score.
+        Return:
+            - The composite score, or None when the segment cannot beat max_score.
+        """
+        # Only the plain ratio is bounded by the length difference
+        ratio_bound = 100 * max_ratio_for_lengths(len(segment_text), search_length)
+        if 100 * PARTIAL_WEIGHT + ratio_bound * RATIO_WEIGHT + 100 * TOKEN_SET_WEIGHT <= max_score - SCORE_EPSILON:
+            return None
+
+        partial_score = fuzz.partial_ratio(
+            segment_text, search_text,
+            score_cutoff=score_cutoff((max_score - ratio_bound * RATIO_WEIGHT - 100 * TOKEN_SET_WEIGHT) / PARTIAL_WEIGHT),
+        )
+        if partial_score * PARTIAL_WEIGHT + ratio_bound * RATIO_WEIGHT + 100 * TOKEN_SET_WEIGHT <= max_score - SCORE_EPSILON:
+            return None
+
+        ratio_score = fuzz.ratio(
+            segment_text, search_text,
+            score_cutoff=score_cutoff((max_score - partial_score * PARTIAL_WEIGHT - 100 * TOKEN_SET_WEIGHT) / RATIO_WEIGHT),
+        )
+        if partial_score * PARTIAL_WEIGHT + ratio_score * RATIO_WEIGHT + 100 * TOKEN_SET_WEIGHT <= max_score - SCORE_EPSILON:
+            return None
+
+        token_set_score = fuzz.token_set_ratio(
+            segment_text, search_text,
+            processor=default_process,
+            score_cutoff=score_cutoff((max_score - partial_score * PARTIAL_WEIGHT - ratio_score * RATIO_WEIGHT) / TOKEN_SET_WEIGHT),
+        )
+        return (
+            partial_score * PARTIAL_WEIGHT
+            + ratio_score * RATIO_WEIGHT
+            + token_set_score * TOKEN_SET_WEIGHT
+        )
+
+    def _get_index(self, segments: List[SegmentTranscriptionModel]) -> NormalizedChunkIndex:
+        """
+        Get the search index of the segments, reusing it while the same list is searched
+        (the start and end of every paragraph are searched in the same segments).
+        Args:
+            - segments: List of audio segments to search within.
+        Return:
+            - NormalizedChunkIndex over the segments.
+        """
+        if self._index_cache and self._index_cache[0] is segments and self._index_cache[1] == len(segments):
+            return self._index_cache[2]
+        index = NormalizedChunkIndex.from_chunks(segments, normalize=self._normalize)
+        self._index_cache = (segments, len(segments), index)
+        return index
+
+    @classmethod
+    def _normalize(cls, text: str) -> str:
+        """Normalize the text for comparison: no punctuation, lowercase, stripped."""
+        return cls._clean_text(text).lower().strip()
+
     @staticmethod
     def _clean_text(text: str) -> str:
         """Clean the text by removing punctuation and converting to lowercase."""
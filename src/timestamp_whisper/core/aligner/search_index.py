@@ -0,0 +1,123 @@
+import bisect
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# Tolerance used when comparing score bounds, so pruning never drops a candidate
+# that could still beat (or tie) the current best because of float rounding.
+SCORE_EPSILON = 1e-9
+
+
+def max_ratio_for_lengths(first_length: int, second_length: int) -> float:
+    """
+    Upper bound of the normalized indel similarity of two strings given only their lengths.
+    Args:
+        - first_length: Length of the first string.
+        - second_length: Length of the second string.
+    Return:
+        - The maximum achievable ratio in [0, 1].
+    """
+    total_length = first_length + second_length
+    if total_length == 0:
+        return 1.0
+    return 2 * min(first_length, second_length) / total_length
+
+
+def score_cutoff(required: float) -> float:
+    """
+    Convert the score a candidate must reach into a score_cutoff for the scorers.
+    Args:
+        - required: Score the candidate must reach to possibly beat the current best.
+    Return:
+        - Non-negative cutoff, slightly relaxed to absorb float rounding.
+    """
+    return max(0.0, required - SCORE_EPSILON)
+
+
+class NormalizedChunkIndex:
+    """
+    Normalized texts of transcribed chunks with an O(1) exact-match lookup.
+    """
+
+    def __init__(self, entries: List[Tuple[Any, str]]):
+        """
+        Initializes the index.
+        Args:
+            - entries: List of (chunk, normalized text) in search order.
+        """
+        self.entries = entries
+        self.exact_positions: Dict[str, int] = {}
+        for position, (_, text) in enumerate(entries):
+            # Keep the first occurrence, as the linear search would
+            self.exact_positions.setdefault(text, position)
+
+    @classmethod
+    def from_chunks(cls, chunks: Sequence[Any], normalize: Callable[[str], str]) -> "NormalizedChunkIndex":
+        """
+        Build the index from chunks with a text attribute, skipping empty chunks.
+        Args:
+            - chunks: The transcribed chunks.
+            - normalize: Function normalizing a chunk text.
+        Return:
+            - NormalizedChunkIndex over the non-empty chunks.
+        """
+        return cls(
+            [(chunk, normalize(chunk.text)) for chunk in chunks if chunk and chunk.text.strip() != ""]
+        )
+
+    def lookup(self, normalized_text: str) -> Optional[Any]:
+        """
+        Find the first chunk whose normalized text equals the given text.
+        Args:
+            - normalized_text: The normalized search text.
+        Return:
+            - The matching chunk, or None.
+        """
+        position = self.exact_positions.get(normalized_text)
+        return None if position is None else self.entries[position][0]
+
+
+class ConcatenatedChunkIndex:
+    """
+    Normalized texts of transcribed chunks concatenated into one string, with the character
+    offset where each chunk starts, so a match anywhere in the string, even across chunk
+    boundaries, maps back to the span of chunks it covers.
+    """
+
+    def __init__(self, chunks: Sequence[Any], normalize: Callable[[str], str]):
+        """
+        Initializes the index, skipping chunks whose normalized text is empty.
+        Args:
+            - chunks: The transcribed chunks, in time order.
+            - normalize: Function normalizing a chunk text.
+        """
+        self.chunks: List[Any] = []
+        self.offsets: List[int] = []
+        self.texts: List[str] = []
+        position = 0
+        for chunk in chunks:
+            text = normalize(chunk.text) if chunk and chunk.text else ""
+            if not text:
+                continue
+            self.chunks.append(chunk)
+            self.offsets.append(position)
+            self.texts.append(text)
+            position += len(text) + 1
+        self.text = " ".join(self.texts)
+
+    def span(self, start: int, end: int) -> Tuple[int, int]:
+        """
+        Get the chunks covered by a range of characters of the concatenated text.
+        Args:
+            - start: Offset of the first character.
+            - end: Offset after the last character.
+        Return:
+            - Indexes of the first and last chunk of the range.
+        """
+        # Separators do not belong to a chunk
+        while start < end - 1 and self.text[start] == " ":
+            start += 1
+        while end - 1 > start and self.text[end - 1] == " ":
+            end -= 1
+        first = max(0, bisect.bisect_right(self.offsets, start) - 1)
+        last = max(first, bisect.bisect_right(self.offsets, end - 1) - 1)
+        return first, last
@@ -0,0 +1,190 @@
+import string
+from typing import List, Optional, Sequence, Tuple
+from rapidfuzz import fuzz
+
+from timestamp_whisper.core import AlignerInterface
+from timestamp_whisper.models import MatchChunk
+from timestamp_whisper.models import SegmentTranscriptionModel, WordTranscriptionModel, TranscribedChunk
+from timestamp_whisper.models import ParagraphAlignment
+from timestamp_whisper.core.types import DEFAULT_SEARCH_SEGMENT_SIZE
+from timestamp_whisper.core.aligner.search_index import ConcatenatedChunkIndex
+
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+# Chunks by which a matched span is shifted when looking for a better aligned span
+SNAP_DISTANCE = 2
+# Score lost per word of difference between a span and the search text, so a misrecognized
+# boundary word is kept in the span rather than dropped
+WORD_COUNT_PENALTY = 5.0
+
+
+class SubstringAligner(AlignerInterface):
+    """
+    Substring Aligner class for aligning audio transcriptions with timestamps.
+    The transcription is concatenated into one normalized string, and each paragraph boundary
+    is located with a single approximate substring search (rapidfuzz partial_ratio_alignment,
+    bit-parallel). The matched characters map back to the exact words or segments they cover,
+    so a boundary straddling two segments matches as well as one inside a segment, and
+    the words of the whole transcription are searched without a segment pass first.
+    """
+
+    # A single word-level search over the whole transcription locates a paragraph
+    single_pass = True
+
+    def __init__(self):
+        """
+        Initializes the SubstringAligner.
+        """
+        self._index_cache: Optional[Tuple[Sequence[TranscribedChunk], int, ConcatenatedChunkIndex]] = None
+
+    def align_paragraph_with_segments(
+        self, paragraph: str, segments: List[SegmentTranscriptionModel],
+        search_length: int = DEFAULT_SEARCH_SEGMENT_SIZE
+    ) -> ParagraphAlignment:
+        """
+        Align the given paragraph with audio segments timestamp.
+        Args:
+            - paragraph: The paragraph to align with audio segments.
+            - segments: List of audio segments with their timestamps.
+            - search_length: Number of words of the paragraph start and end searched (default is 8).
+        Return:
+            - Start and End time of paragraph, with the first and last matched segments.
+        """
+        return self._align(paragraph, segments, search_length, snap=False)
+
+    def align_paragraph_with_words(
+        self, paragraph: str, words: List[WordTranscriptionModel], search_length: int = 10
+    ) -> ParagraphAlignment:
+        """
+        Align the given paragraph with audio words timestamp.
+        Args:
+            - paragraph: The paragraph to align with audio words.
+            - words: List of audio words with their timestamps, possibly the whole transcription.
+            - search_length: Number of words of the paragraph start and end searched (default is 10).
+        Return:
+            - Start and End time of paragraph, with the first and last matched words.
+        """
+        return self._align(paragraph, words, search_length, snap=True)
+
+    def _align(
+        self, paragraph: str, chunks: Sequence[TranscribedChunk], search_length: int, snap: bool
+    ) -> Optional[ParagraphAlignment]:
+        """
+        Locate the paragraph start, then its end after the start, in the concatenated chunks.
+        Args:
+            - paragraph: The paragraph to align.
+            - chunks: Words or segments with their timestamps.
+            - search_length: Number of words of the paragraph start and end searched.
+            - snap: Whether matched spans are snapped to the best aligned words (word-level chunks).
+        Return:
+            - The ParagraphAlignment, or None for an empty paragraph or transcription.
+        """
+        # Validate inputs
+        if not chunks:
+            return None
+        if not paragraph or paragraph.strip() == "":
+            return None
+        index = self._get_index(chunks)
+        if not index.text:
+            return None
+
+        paragraph_words = paragraph.split()
+        start_match, start_offset = self._search(
+            index, " ".join(paragraph_words[:search_length]), 0, first=True, snap=snap
+        )
+        end_match, _ = self._search(
+            index, " ".join(paragraph_words[-search_length:]), start_offset, first=False, snap=snap
+        )
+
+        # Return the alignment with start and end times
+        return ParagraphAlignment(
+            paragraph=paragraph,
+            start=start_match.start if start_match else 0,
+            end=end_match.end if end_match else 0,
+            best_start_match=start_match,
+            best_end_match=end_match,
+        )
+
+    def _search(
+        self, index: ConcatenatedChunkIndex, search_sentence: str, from_offset: int, first: bool, snap: bool
+    ) -> Tuple[Optional[MatchChunk], int]:
+        """
+        Find the span of chunks most similar to the search sentence after an offset of the concatenated text.
+        Args:
+            - index: The concatenated chunks.
+            - search_sentence: The sentence to search for.
+            - from_offset: Offset of the concatenated text where the search starts.
+            - first: Whether the match identifies its first chunk (paragraph start) or its last one (paragraph end).
+            - snap: Whether the matched span is snapped to the best aligned chunks.
+        Return:
+            - MatchChunk covering the matched chunks, and the offset where the match starts.
+        """
+        search_text = self._normalize(search_sentence)
+        if not search_text:
+            return None, from_offset
+        alignment = fuzz.partial_ratio_alignment(search_text, index.text[from_offset:])
+        if alignment is None:
+            return None, from_offset
+        first_index, last_index = index.span(from_offset + alignment.dest_start, from_offset + alignment.dest_end)
+        if snap:
+            first_index, last_index = self._snap(
+                index, search_text, first_index, last_index, after_offset=index.offsets[first_index] > from_offset
+            )
+        matched = index.chunks[first_index:last_index + 1]
+        return MatchChunk(
+            id=str(matched[0].id if first else matched[-1].id),
+            text=" ".join(chunk.text.strip() for chunk in matched),
+            start=matched[0].start,
+            end=matched[-1].end,
+            score=alignment.score / 100,
+        ), index.offsets[first_index]
+
+    @staticmethod
+    def _snap(
+        index: ConcatenatedChunkIndex, search_text: str, first_index: int, last_index: int, after_offset: bool
+    ) -> Tuple[int, int]:
+        """
+        Shift a matched span by a few chunks to the position whose text is the most similar to the
+        search text. The substring search matches a window of the search text length, so a
+        misrecognized first or last word can shift it by a word.
+        Args:
+            - index: The concatenated chunks.
+            - search_text: The normalized search text.
+            - first_index: Index of the first matched chunk.
+            - last_index: Index of the last matched chunk.
+            - after_offset: Whether the span can start before first_index.
+        Return:
+            - Indexes of the first and last chunk of the best span.
+        """
+        length = last_index - first_index + 1
+        lowest = first_index - SNAP_DISTANCE if after_offset else first_index
+        best = (-1.0, 0, first_index, last_index)
+        for first in range(max(0, lowest), min(len(index.chunks), first_index + SNAP_DISTANCE + 1)):
+            for last in range(first + max(0, length - 1 - SNAP_DISTANCE), min(len(index.chunks), first + length + SNAP_DISTANCE)):
+                span_text = " ".join(index.texts[first:last + 1])
+                score = fuzz.ratio(search_text, span_text) - WORD_COUNT_PENALTY * abs(
+                    span_text.count(" ") - search_text.count(" ")
+                )
+                distance = abs(first - first_index) + abs(last - last_index)
+                if score > best[0] or (score == best[0] and distance < best[1]):
+                    best = (score, distance, first, last)
+        return best[2], best[3]
+
+    def _get_index(self, chunks: Sequence[TranscribedChunk]) -> ConcatenatedChunkIndex:
+        """
+        Get the concatenated text of the chunks, reusing it while the same list is searched
+        (the start and end of every paragraph are searched in the same transcription).
+        Args:
+            - chunks: Words or segments to search within.
+        Return:
+            - ConcatenatedChunkIndex over the chunks.
+        """
+        if self._index_cache and self._index_cache[0] is chunks and self._index_cache[1] == len(chunks):
+            return self._index_cache[2]
+        index = ConcatenatedChunkIndex(chunks, normalize=self._normalize)
+        self._index_cache = (chunks, len(chunks), index)
+        return index
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalize the text for comparison: no punctuation, lowercase, single spaces."""
+        return " ".join(text.translate(PUNCTUATION_TABLE).lower().split())
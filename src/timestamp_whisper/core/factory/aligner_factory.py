@@ -1,6 +1,6 @@
 from timestamp_whisper.core import AlignerInterface
 from timestamp_whisper.core.types import AlignerType
-from timestamp_whisper.core.aligner import FuzzyAligner, FuzzyWuzzyAligner
+from timestamp_whisper.core.aligner import FuzzyAligner, FuzzyWuzzyAligner, SubstringAligner
 
 
 class AlignerFactory:
@@ -22,6 +22,8 @@ class AlignerFactory:
             return FuzzyAligner(**kwargs)
         elif aligner_type == AlignerType.FUZZYWUZZY_ALIGNER:
             return FuzzyWuzzyAligner(**kwargs)
+        elif aligner_type == AlignerType.SUBSTRING_ALIGNER:
+            return SubstringAligner(**kwargs)
         else:
             raise ValueError(
                 f"Transcriber type must be one of: {[a.value for a in AlignerType]} but got {aligner_type}"
@@ -3,7 +3,16 @@ from dotenv import load_dotenv
 
 from timestamp_whisper.core import TranscriberInterface
 from timestamp_whisper.core.types import TranscriberType
-from timestamp_whisper.core.transcriber import FasterWhisperTranscriber, ModalFasterWhisperTranscriber
+from timestamp_whisper.core.transcriber import (
+    FasterWhisperTranscriber,
+    FasterWhisperPoolTranscriber,
+    FingerprintReuseTranscriber,
+    ModalFasterWhisperTranscriber,
+    SilenceRemovalTranscriber,
+    StubTranscriber,
+)
+from timestamp_whisper.core.transcriber.faster_whisper_pool import local_transcription_workers
+from timestamp_whisper.core.transcriber.stub_transcriber import stub_transcriber_enabled
 
 # Load environment variables from .env file
 load_dotenv()
@@ -16,21 +25,42 @@ class TranscriberFactory:
 
     @staticmethod
     def get_transcriber(
-        transcriber_type: str, model_name: str, **kwargs
+        transcriber_type: str,
+        model_name: str,
+        reuse_transcriptions: bool = False,
+        remove_silence: bool = False,
+        **kwargs
     ) -> TranscriberInterface:
         """
         Get the appropriate transcriber instance based on the model name.
+        With STUB_TRANSCRIBER=true every transcriber is a StubTranscriber (load testing).
+        The local backend runs in the pool of worker processes unless LOCAL_TRANSCRIPTION_WORKERS=0.
         Args:
             - transcriber_type: Type of the transcriber (e.g., "FASTER_WHISPER").
             - model_name: Name of the transcription model.
+            - reuse_transcriptions: Reuse previous transcriptions of fingerprint-matched audio.
+            - remove_silence: Cut non-speech out of the audio before transcribing it.
             - **kwargs: Additional arguments for the transcriber.
         Returns:
             - An instance of the transcriber.
         """
-        if transcriber_type == TranscriberType.FASTER_WHISPER:
-            return FasterWhisperTranscriber(model_name=model_name, **kwargs)
+        if stub_transcriber_enabled():
+            transcriber_type = TranscriberType.STUB
+
+        if transcriber_type == TranscriberType.FASTER_WHISPER and local_transcription_workers() > 0:
+            transcriber = FasterWhisperPoolTranscriber(model_name=model_name, **kwargs)
+        elif transcriber_type == TranscriberType.FASTER_WHISPER:
+            transcriber = FasterWhisperTranscriber(model_name=model_name, **kwargs)
         elif transcriber_type == TranscriberType.MODAL_WHISPER:
-            return ModalFasterWhisperTranscriber(model_name=model_name, **kwargs)
-        raise ValueError(
-            f"Transcriber type must be one of: {[t.value for t in TranscriberType]} but got {transcriber_type}"
-        )
+            transcriber = ModalFasterWhisperTranscriber(model_name=model_name, **kwargs)
+        elif transcriber_type == TranscriberType.STUB:
+            transcriber = StubTranscriber(model_name=model_name, **kwargs)
+        else:
+            raise ValueError(
+                f"Transcriber type must be one of: {[t.value for t in TranscriberType]} but got {transcriber_type}"
+            )
+        if remove_silence:
+            transcriber = SilenceRemovalTranscriber(transcriber=transcriber)
+        if reuse_transcriptions:
+            return FingerprintReuseTranscriber(transcriber=transcriber)
+        return transcriber
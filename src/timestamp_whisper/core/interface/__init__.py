@@ -1,7 +1,8 @@
-from .transcriber_interface import TranscriberInterface
+from .transcriber_interface import TranscriberInterface, TranscriptionError
 from .aligner_interface import AlignerInterface
 
 __all__ = [
     "TranscriberInterface",
+    "TranscriptionError",
     "AlignerInterface",
 ]
@@ -11,6 +11,10 @@ class AlignerInterface(ABC):
     Abstract base class for aligners.
     """
 
+    # Whether align_paragraph_with_words can search the whole transcription at once,
+    # so paragraphs are aligned without a segment pass first
+    single_pass: bool = False
+
     @abstractmethod
     def align_paragraph_with_segments(
         self, paragraph: str, segments: List[SegmentTranscriptionModel], search_length: int = DEFAULT_SEARCH_SEGMENT_SIZE,  **kwargs
@@ -2,6 +2,13 @@ from abc import ABC, abstractmethod
 from typing import BinaryIO, List, Union
 
 from timestamp_whisper.models import SegmentTranscriptionModel, SegmentTranscriptionModelWithWords
+from timestamp_whisper.utils.cancellation_util import run_in_thread
+
+
+class TranscriptionError(Exception):
+    """
+    Error raised by a transcriber when the transcription itself fails, chained to its cause.
+    """
 
 
 class TranscriberInterface(ABC):
@@ -36,3 +43,33 @@ class TranscriberInterface(ABC):
             - Transcription of the audio file.
         """
         raise NotImplementedError
+
+    async def atranscribe_segments_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> List[SegmentTranscriptionModel]:
+        """
+        Transcribe the given audio file with segments timestamp without blocking the event loop.
+        By default the synchronous transcription runs in the default executor, and is stopped at its
+        next cancellation check when the awaiting task is cancelled; transcribers waiting on the
+        network override it with native async calls.
+        Args:
+            - audio_path: path of audio file.
+            - **args: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        return await run_in_thread(self.transcribe_segments_timestamp, audio_path, **kwargs)
+
+    async def atranscribe_segments_with_words_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the given audio file with segment-level and word-level timestamps without blocking
+        the event loop. By default the synchronous transcription runs in the default executor.
+        Args:
+            - audio_path: path of audio file.
+            - **args: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        return await run_in_thread(self.transcribe_segments_with_words_timestamp, audio_path, **kwargs)
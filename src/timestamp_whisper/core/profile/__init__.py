@@ -0,0 +1,13 @@
+from .compute_profile import (
+    ComputeProfileCalibrator,
+    get_compute_profile,
+    get_decode_options,
+    load_or_calibrate_compute_profile,
+)
+
+__all__ = [
+    "ComputeProfileCalibrator",
+    "get_compute_profile",
+    "get_decode_options",
+    "load_or_calibrate_compute_profile",
+]
@@ -0,0 +1,287 @@
+import json
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+import numpy as np
+from dotenv import load_dotenv
+
+from timestamp_whisper.core.types import (
+    ComputeType,
+    DecodePreset,
+    DEFAULT_CALIBRATION_AUDIO_SECONDS,
+    DEFAULT_CALIBRATION_MODEL,
+    DEFAULT_COMPUTE_PROFILE_PATH,
+)
+from timestamp_whisper.models import ComputeProfile, DecodeOptions
+
+
+# Load environment variables from .env file
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+
+_current_profile: Optional[ComputeProfile] = None
+_profile_lock = threading.Lock()
+
+
+def detect_cpu_count() -> int:
+    """
+    Detect the number of CPU cores available to this process.
+    Return:
+        - Number of usable CPU cores (at least 1).
+    """
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+def build_decode_presets(cpu_count: int) -> Dict[str, DecodeOptions]:
+    """
+    Build the named decoding presets for the given core count.
+    The accurate preset keeps the historical service settings, the other presets
+    trade beam width for latency, more aggressively on small machines.
+    Args:
+        - cpu_count: Number of CPU cores available.
+    Return:
+        - Mapping of preset name to decoding options.
+    """
+    balanced_beam = 2 if cpu_count <= 4 else 3
+    return {
+        DecodePreset.FAST.value: DecodeOptions(beam_size=1, best_of=1, chunk_length=3),
+        DecodePreset.BALANCED.value: DecodeOptions(
+            beam_size=balanced_beam, best_of=balanced_beam, chunk_length=3
+        ),
+        DecodePreset.ACCURATE.value: DecodeOptions(beam_size=5, best_of=5, chunk_length=3),
+    }
+
+
+def default_compute_profile(cpu_count: Optional[int] = None) -> ComputeProfile:
+    """
+    Build an uncalibrated profile from the detected hardware only.
+    Args:
+        - cpu_count: Number of CPU cores, detected when not given.
+    Return:
+        - ComputeProfile using int8 and all cores for a single worker.
+    """
+    cpu_count = cpu_count or detect_cpu_count()
+    return ComputeProfile(
+        compute_type=ComputeType.INT8.value,
+        cpu_threads=cpu_count,
+        num_workers=1,
+        cpu_count=cpu_count,
+        calibrated=False,
+        decode_presets=build_decode_presets(cpu_count),
+    )
+
+
+def generate_calibration_audio(seconds: int, sample_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Generate deterministic speech-like synthetic audio for calibration.
+    Args:
+        - seconds: Duration of the audio in seconds.
+        - sample_rate: Sample rate of the generated audio.
+    Return:
+        - Mono float32 samples in the range [-1, 1].
+    """
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate), dtype=np.float32) / sample_rate
+    # Formant-like harmonics modulated at a syllable rate, plus background noise
+    carrier = sum(np.sin(2 * np.pi * f * t) / (i + 1) for i, f in enumerate((180.0, 720.0, 1240.0, 2600.0)))
+    envelope = 0.5 * (1.0 + np.sin(2 * np.pi * 4.0 * t))
+    audio = 0.3 * carrier * envelope + 0.02 * rng.standard_normal(t.shape[0])
+    return np.clip(audio, -1.0, 1.0).astype(np.float32)
+
+
+class ComputeProfileCalibrator:
+    """
+    Calibrator that benchmarks local compute configurations on synthetic audio.
+    """
+
+    def __init__(
+        self,
+        model_name: str = DEFAULT_CALIBRATION_MODEL,
+        audio_seconds: int = DEFAULT_CALIBRATION_AUDIO_SECONDS,
+        compute_types: Optional[List[str]] = None,
+    ):
+        """
+        Initializes the calibrator.
+        Args:
+            - model_name: Name of the model used for calibration runs.
+            - audio_seconds: Duration of the synthetic calibration audio.
+            - compute_types: Compute types to try (default: int8, int8_float32, float32).
+        """
+        self.model_name = model_name
+        self.audio_seconds = audio_seconds
+        self.compute_types = compute_types or [c.value for c in ComputeType]
+
+    def _thread_candidates(self, cpu_count: int) -> List[int]:
+        """Return the intra-op thread counts worth trying for the core count."""
+        candidates = {cpu_count, max(1, cpu_count // 2)}
+        if cpu_count >= 8:
+            candidates.add(4)
+        return sorted(candidates, reverse=True)
+
+    def _time_configuration(self, audio: np.ndarray, compute_type: str, cpu_threads: int) -> float:
+        """Load the calibration model with the given configuration and time one transcription."""
+        from faster_whisper import WhisperModel
+
+        model = WhisperModel(
+            self.model_name, device="cpu", compute_type=compute_type, cpu_threads=cpu_threads
+        )
+        # Warm up once so model loading and first-call allocations are not measured
+        list(model.transcribe(audio[: SAMPLE_RATE], beam_size=1, without_timestamps=True)[0])
+        started = time.perf_counter()
+        segments, _ = model.transcribe(
+            audio, beam_size=1, without_timestamps=True, condition_on_previous_text=False
+        )
+        list(segments)
+        return time.perf_counter() - started
+
+    def calibrate(self) -> ComputeProfile:
+        """
+        Run the calibration and pick the fastest configuration.
+        Return:
+            - The calibrated ComputeProfile.
+        """
+        cpu_count = detect_cpu_count()
+        audio = generate_calibration_audio(self.audio_seconds)
+        timings: Dict[str, float] = {}
+        best = None
+        for compute_type in self.compute_types:
+            for cpu_threads in self._thread_candidates(cpu_count):
+                try:
+                    elapsed = self._time_configuration(audio, compute_type, cpu_threads)
+                except Exception as e:
+                    logger.warning(f"Calibration of {compute_type}/{cpu_threads} threads failed: {str(e)}")
+                    continue
+                timings[f"{compute_type}:{cpu_threads}"] = round(elapsed, 4)
+                # Per-worker latency decides the compute type; fewer threads wins ties within 10%
+                if best is None or elapsed < best[0] * 0.9 or (
+                    elapsed <= best[0] * 1.1 and cpu_threads < best[2]
+                ):
+                    best = (elapsed, compute_type, cpu_threads)
+
+        if best is None:
+            raise Exception("No compute configuration could be calibrated")
+
+        _, compute_type, cpu_threads = best
+        return ComputeProfile(
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+            num_workers=max(1, cpu_count // cpu_threads),
+            cpu_count=cpu_count,
+            calibrated=True,
+            calibration_timings=timings,
+            decode_presets=build_decode_presets(cpu_count),
+        )
+
+
+def _profile_path(path: Optional[str] = None) -> str:
+    """Resolve the path where the compute profile is persisted."""
+    return os.path.expanduser(path or os.environ.get("COMPUTE_PROFILE_PATH", DEFAULT_COMPUTE_PROFILE_PATH))
+
+
+def load_compute_profile(path: Optional[str] = None) -> Optional[ComputeProfile]:
+    """
+    Load a persisted compute profile.
+    Args:
+        - path: Path of the profile file (default from COMPUTE_PROFILE_PATH).
+    Return:
+        - The persisted ComputeProfile, or None when missing or unreadable.
+    """
+    profile_path = _profile_path(path)
+    if not os.path.exists(profile_path):
+        return None
+    try:
+        with open(profile_path, "r", encoding="utf-8") as f:
+            return ComputeProfile(**json.load(f))
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable compute profile {profile_path}: {str(e)}")
+        return None
+
+
+def save_compute_profile(profile: ComputeProfile, path: Optional[str] = None) -> None:
+    """
+    Persist the compute profile as JSON.
+    Args:
+        - profile: The profile to persist.
+        - path: Path of the profile file (default from COMPUTE_PROFILE_PATH).
+    """
+    profile_path = _profile_path(path)
+    os.makedirs(os.path.dirname(profile_path), exist_ok=True)
+    temp_path = f"{profile_path}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as f:
+        f.write(profile.model_dump_json(indent=2))
+    os.replace(temp_path, profile_path)
+
+
+def _cuda_available() -> bool:
+    """Return whether CTranslate2 can see a CUDA device."""
+    try:
+        import ctranslate2
+
+        return ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        return False
+
+
+def load_or_calibrate_compute_profile(path: Optional[str] = None, force: bool = False) -> ComputeProfile:
+    """
+    Load the persisted profile, calibrating and persisting a new one when needed.
+    A persisted profile is recalibrated when the detected core count changed.
+    Args:
+        - path: Path of the profile file (default from COMPUTE_PROFILE_PATH).
+        - force: Recalibrate even if a matching profile is persisted.
+    Return:
+        - The active ComputeProfile.
+    """
+    global _current_profile
+    with _profile_lock:
+        profile = None if force else load_compute_profile(path)
+        if profile is None or profile.cpu_count != detect_cpu_count():
+            if _cuda_available():
+                # The profile only tunes the CPU path; GPUs keep the CTranslate2 defaults
+                profile = default_compute_profile()
+                profile.compute_type = "default"
+                profile.cpu_threads = 0
+            else:
+                profile = ComputeProfileCalibrator().calibrate()
+            save_compute_profile(profile, path)
+        _current_profile = profile
+        return profile
+
+
+def get_compute_profile() -> ComputeProfile:
+    """
+    Get the active compute profile without running a calibration.
+    Return:
+        - The active, persisted or heuristic ComputeProfile.
+    """
+    global _current_profile
+    if _current_profile is None:
+        with _profile_lock:
+            if _current_profile is None:
+                _current_profile = load_compute_profile() or default_compute_profile()
+    return _current_profile
+
+
+def get_decode_options(preset: str = DecodePreset.ACCURATE) -> DecodeOptions:
+    """
+    Get the decoding options of a named preset for the active profile.
+    Args:
+        - preset: Name of the preset (fast, balanced or accurate).
+    Return:
+        - The DecodeOptions of the preset.
+    """
+    preset_name = preset.value if isinstance(preset, DecodePreset) else str(preset)
+    presets = get_compute_profile().decode_presets or build_decode_presets(detect_cpu_count())
+    if preset_name not in presets:
+        raise ValueError(
+            f"Decode preset must be one of: {[p.value for p in DecodePreset]} but got {preset_name}"
+        )
+    return presets[preset_name]
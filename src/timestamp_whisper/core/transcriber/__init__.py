@@ -1,8 +1,16 @@
 from .faster_whisper import FasterWhisperTranscriber
+from .faster_whisper_pool import FasterWhisperPoolTranscriber
 from .modal_whisper import ModalFasterWhisperTranscriber
+from .fingerprint_reuse import FingerprintReuseTranscriber
+from .silence_removal import SilenceRemovalTranscriber
+from .stub_transcriber import StubTranscriber
 
 
 __all__ = [
     "FasterWhisperTranscriber",
-    "ModalFasterWhisperTranscriber"
+    "FasterWhisperPoolTranscriber",
+    "ModalFasterWhisperTranscriber",
+    "FingerprintReuseTranscriber",
+    "SilenceRemovalTranscriber",
+    "StubTranscriber",
 ]
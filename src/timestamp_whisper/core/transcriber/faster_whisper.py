@@ -1,25 +1,39 @@
-from typing import BinaryIO, List, Union
-import uuid
+from typing import BinaryIO, List, Optional, Union
 from faster_whisper import WhisperModel
 
 from timestamp_whisper.models import (
+    ComputeProfile,
     SegmentTranscriptionModel,
     SegmentTranscriptionModelWithWords,
-    WordTranscriptionModel,
 )
-from timestamp_whisper.core.interface.transcriber_interface import TranscriberInterface
+from timestamp_whisper.core.interface.transcriber_interface import TranscriberInterface, TranscriptionError
+from timestamp_whisper.core.profile import get_compute_profile
+from timestamp_whisper.utils.audio_util import model_input, trim_audio_start
+from timestamp_whisper.utils.cancellation_util import cancellable
+from timestamp_whisper.utils.transcription_checkpoint_util import TranscriptionCheckpoint
 
 
 class FasterWhisperTranscriber(TranscriberInterface):
     """
     Transcriber class for faster-Whisper.
+    Segments are decoded as they are consumed, so a cancelled request stops decoding at the next segment.
     """
 
-    def __init__(self, model_name: str, **kwargs):
+    def __init__(self, model_name: str, compute_profile: Optional[ComputeProfile] = None, **kwargs):
         """
         Initializes the faster-whisper locally with the given model name, .
+        The compute type and thread settings come from the compute profile
+        (the active one by default), explicit kwargs take precedence.
         """
-        self.client = WhisperModel(model_name, device="auto", **kwargs)
+        profile = compute_profile or get_compute_profile()
+        model_kwargs = dict(
+            compute_type=profile.compute_type,
+            cpu_threads=profile.cpu_threads,
+            num_workers=profile.num_workers,
+        )
+        model_kwargs.update(kwargs)
+        self.model_name = model_name
+        self.client = WhisperModel(model_name, device="auto", **model_kwargs)
 
     def transcribe_segments_timestamp(
         self, audio_path: Union[BinaryIO, str], **kwargs
@@ -34,65 +48,53 @@ class FasterWhisperTranscriber(TranscriberInterface):
         """
         try:
             segments, info = self.client.transcribe(
-                audio=audio_path,
+                audio=model_input(audio_path),
                 word_timestamps=False,
                 **kwargs,
             )
             segments = [
                 SegmentTranscriptionModel(
-                    segment_id=str(segment.id),
+                    id=str(segment.id),
                     text=segment.text.strip(),
                     start=segment.start,
                     end=segment.end,
+                    avg_logprob=segment.avg_logprob,
+                    compression_ratio=segment.compression_ratio,
                 )
-                for segment in segments
+                for segment in cancellable(segments)
             ]
             return segments
         except Exception as e:
-            raise Exception(f"Error during transcription: {str(e)}")
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
 
     def transcribe_segments_with_words_timestamp(
         self, audio_path: Union[BinaryIO, str], **kwargs
     ) -> SegmentTranscriptionModelWithWords:
         """
         Transcribe the given audio file using Whisper with segment-level and  word-level timestamps and return the transcription.
+        Segments are checkpointed as they are decoded, so a transcription interrupted by an
+        error or a restart resumes from the last completed timestamp.
         Args:
             - audio_path: path of audio file.
             - **kwargs: Additional arguments for the transcription model.
         Return:
             - Transcription of the audio file.
         """
+        checkpoint = TranscriptionCheckpoint.open(
+            audio_path, model_name=self.model_name, word_timestamps=True, **kwargs
+        )
         try:
+            checkpoint.start_attempt()
             segments, info = self.client.transcribe(
-                audio=audio_path,
+                audio=model_input(trim_audio_start(audio_path, checkpoint.resume_offset)),
                 word_timestamps=True,
                 **kwargs,
             )
-            segments_timestamps = []
-            words_timestamps = []
-            for segment in segments:
-                segments_timestamps.append(
-                    SegmentTranscriptionModel(
-                        id=str(segment.id),
-                        text=segment.text.strip(),
-                        start=segment.start,
-                        end=segment.end,
-                    )
-                )
-                for word in segment.words:
-                    words_timestamps.append(
-                        WordTranscriptionModel(
-                            id=str(uuid.uuid4()),
-                            segment_id=str(segment.id),
-                            text=word.word,
-                            start=word.start,
-                            end=word.end,
-                        )
-                    )
+            for segment in cancellable(segments):
+                checkpoint.add_segment(segment)
 
-            return SegmentTranscriptionModelWithWords(
-                segments=segments_timestamps,
-                words=words_timestamps,
-            )
+            return checkpoint.finish()
         except Exception as e:
-            raise Exception(f"Error during transcription: {str(e)}")
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
+        finally:
+            checkpoint.close()
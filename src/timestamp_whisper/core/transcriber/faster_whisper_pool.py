@@ -0,0 +1,384 @@
+import atexit
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from functools import lru_cache
+from multiprocessing import shared_memory
+from types import SimpleNamespace
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Tuple, Union
+import numpy as np
+
+from timestamp_whisper.models import (
+    ComputeProfile,
+    SegmentTranscriptionModel,
+    SegmentTranscriptionModelWithWords,
+)
+from timestamp_whisper.core.interface.transcriber_interface import TranscriberInterface, TranscriptionError
+from timestamp_whisper.core.profile import get_compute_profile
+from timestamp_whisper.utils.audio_util import SAMPLE_RATE, load_audio_samples, slice_samples
+from timestamp_whisper.utils.cancellation_util import cancellable
+from timestamp_whisper.utils.transcription_checkpoint_util import TranscriptionCheckpoint
+
+
+logger = logging.getLogger(__name__)
+
+def local_transcription_workers() -> int:
+    """
+    Number of local transcription worker processes, from LOCAL_TRANSCRIPTION_WORKERS
+    (default: the worker count of the compute profile). 0 runs the model in the request's process.
+    Returns:
+        - The number of workers.
+    """
+    workers = os.environ.get("LOCAL_TRANSCRIPTION_WORKERS")
+    return max(0, int(workers)) if workers is not None else get_compute_profile().num_workers
+
+
+def worker_cpu_threads(profile: ComputeProfile, workers: int) -> int:
+    """
+    Intra-op threads of each worker: the profile's thread count, reduced so the workers
+    together do not use more threads than there are cores.
+    Args:
+        - profile: The compute profile.
+        - workers: Number of worker processes.
+    Returns:
+        - The number of threads per worker (0 keeps the CTranslate2 default).
+    """
+    if profile.cpu_threads <= 0:
+        return profile.cpu_threads
+    return max(1, min(profile.cpu_threads, profile.cpu_count // max(1, workers)))
+
+
+def _serialize_segment(segment: Any) -> Dict[str, Any]:
+    """Converts a faster-whisper segment to plain data sent back to the parent process."""
+    return dict(
+        id=segment.id,
+        text=segment.text,
+        start=segment.start,
+        end=segment.end,
+        avg_logprob=segment.avg_logprob,
+        compression_ratio=segment.compression_ratio,
+        words=[dict(word=word.word, start=word.start, end=word.end) for word in (segment.words or [])],
+    )
+
+
+def _worker_main(model_name: str, model_kwargs: Dict[str, Any], connection, stop) -> None:
+    """
+    Loop of a worker process: load the model once, then transcribe the tasks received on its
+    connection. Each task names a shared memory block holding the decoded samples; segments
+    are sent back as they are decoded, followed by a "done" or "error" message. Decoding stops
+    at the next segment once the stop event is set (the transcription was cancelled).
+    """
+    try:
+        from faster_whisper import WhisperModel
+
+        model, load_error = WhisperModel(model_name, device="auto", **model_kwargs), None
+    except Exception as e:
+        model, load_error = None, f"Could not load {model_name}: {str(e)}"
+    while True:
+        try:
+            task = connection.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        if load_error:
+            connection.send(("error", load_error))
+            continue
+        memory_name, num_samples, word_timestamps, kwargs = task
+        # Spawned workers share the parent's resource tracker, the parent unlinks the block
+        memory = shared_memory.SharedMemory(name=memory_name)
+        samples = segments = None
+        try:
+            samples = np.ndarray((num_samples,), dtype=np.float32, buffer=memory.buf)
+            segments, _ = model.transcribe(audio=samples, word_timestamps=word_timestamps, **kwargs)
+            for segment in segments:
+                if stop.is_set():
+                    break
+                connection.send(("segment", _serialize_segment(segment)))
+            connection.send(("done", None))
+        except Exception as e:
+            connection.send(("error", str(e)))
+        finally:
+            samples = segments = None
+            try:
+                memory.close()
+            except BufferError:
+                # Still referenced by the decoder; the mapping is released with it
+                pass
+
+
+class _Job:
+    """A transcription waiting for, or running in, a worker."""
+
+    def __init__(self, task: tuple):
+        self.task = task
+        self.messages: queue.Queue = queue.Queue()
+        self.cancelled = False
+        self._stop = None
+        self._lock = threading.Lock()
+
+    def attach(self, stop) -> bool:
+        """Binds the job to the stop event of the worker about to run it, unless it is already cancelled."""
+        with self._lock:
+            if self.cancelled:
+                return False
+            stop.clear()
+            self._stop = stop
+            return True
+
+    def detach(self) -> None:
+        """Unbinds the job from its worker once the worker is done with it."""
+        with self._lock:
+            self._stop = None
+
+    def cancel(self) -> None:
+        """Cancels the job, stopping its worker if it is running."""
+        with self._lock:
+            self.cancelled = True
+            if self._stop is not None:
+                self._stop.set()
+
+
+class TranscriptionWorkerPool:
+    """
+    Pool of long-lived worker processes, each holding a loaded faster-whisper model.
+
+    Transcriptions wait in a queue and are dispatched to the first idle worker. The decoded
+    samples are handed over in a shared memory block instead of being pickled, and segments
+    stream back as they are decoded, so checkpoints are written as they are produced.
+    A worker that dies fails its current transcription and is replaced, and a cancelled
+    transcription stops its worker at the next segment.
+    """
+
+    def __init__(self, model_name: str, workers: int, **model_kwargs):
+        """
+        Initializes the pool. The processes are started on the first transcription.
+        Args:
+            - model_name: Name of the faster-whisper model loaded by every worker.
+            - workers: Number of worker processes.
+            - **model_kwargs: WhisperModel arguments (compute_type, cpu_threads...).
+        """
+        self.model_name = model_name
+        self.workers = max(1, workers)
+        self.model_kwargs = model_kwargs
+        self._context = multiprocessing.get_context("spawn")
+        self._pending: queue.Queue = queue.Queue()
+        self._processes: List[Any] = []
+        self._lock = threading.Lock()
+        self._started = False
+        self._closed = False
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._closed:
+                raise Exception("The transcription pool is closed")
+            if self._started:
+                return
+            self._started = True
+            for index in range(self.workers):
+                threading.Thread(
+                    target=self._serve, name=f"transcription-worker-{index}", daemon=True
+                ).start()
+            atexit.register(self.close)
+
+    def _spawn(self) -> Tuple[Any, Any, Any]:
+        """Starts a worker process and returns it with the parent end of its connection and its stop event."""
+        parent_connection, child_connection = self._context.Pipe()
+        stop = self._context.Event()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self.model_name, self.model_kwargs, child_connection, stop),
+            name=f"transcription-worker-{self.model_name}",
+            daemon=True,
+        )
+        process.start()
+        # Only the worker holds the child end, so its exit is seen as EOF on the parent end
+        child_connection.close()
+        with self._lock:
+            self._processes.append(process)
+        return process, parent_connection, stop
+
+    def _serve(self) -> None:
+        """Feeds one worker process with pending jobs and relays its messages, restarting it when it dies."""
+        process, connection, stop = self._spawn()
+        while True:
+            job = self._pending.get()
+            if job is None:
+                connection.send(None)
+                process.join(timeout=5)
+                return
+            if not job.attach(stop):
+                continue
+            try:
+                connection.send(job.task)
+                while True:
+                    kind, payload = connection.recv()
+                    job.messages.put((kind, payload))
+                    if kind != "segment":
+                        break
+            except (EOFError, OSError):
+                process.join(timeout=5)
+                logger.warning(f"Transcription worker {process.pid} exited with code {process.exitcode}, restarting it")
+                job.messages.put(("error", f"worker exited with code {process.exitcode}"))
+                with self._lock:
+                    self._processes.remove(process)
+                connection.close()
+                process, connection, stop = self._spawn()
+            finally:
+                job.detach()
+
+    def transcribe(self, samples: np.ndarray, word_timestamps: bool, **kwargs) -> Iterator[SimpleNamespace]:
+        """
+        Transcribe decoded samples in a worker process.
+        Args:
+            - samples: The 16 kHz mono samples.
+            - word_timestamps: Whether to compute word timestamps.
+            - **kwargs: Decoding parameters of the model.
+        Returns:
+            - The segments as they are decoded, with the attributes of faster-whisper segments.
+              Closing the generator early cancels the transcription, its worker stops at the next segment.
+        """
+        self._ensure_started()
+        samples = np.ascontiguousarray(samples, dtype=np.float32)
+        memory = shared_memory.SharedMemory(create=True, size=max(1, samples.nbytes))
+        job = None
+        try:
+            np.ndarray(samples.shape, dtype=np.float32, buffer=memory.buf)[:] = samples
+            job = _Job((memory.name, len(samples), word_timestamps, kwargs))
+            self._pending.put(job)
+            while True:
+                kind, payload = job.messages.get()
+                if kind == "segment":
+                    yield SimpleNamespace(
+                        **{**payload, "words": [SimpleNamespace(**word) for word in payload["words"]]}
+                    )
+                elif kind == "error":
+                    raise Exception(payload)
+                else:
+                    return
+        finally:
+            if job is not None:
+                job.cancel()
+            memory.close()
+            memory.unlink()
+
+    def close(self) -> None:
+        """Stops the worker processes once their current transcription is done."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            started = self._started
+        if started:
+            for _ in range(self.workers):
+                self._pending.put(None)
+
+
+@lru_cache(maxsize=None)
+def get_transcription_pool(model_name: str, workers: int, **model_kwargs) -> TranscriptionWorkerPool:
+    """
+    Get the process-wide worker pool of a model and configuration.
+    Args:
+        - model_name: Name of the faster-whisper model.
+        - workers: Number of worker processes.
+        - **model_kwargs: WhisperModel arguments.
+    Returns:
+        - The pool.
+    """
+    return TranscriptionWorkerPool(model_name, workers, **model_kwargs)
+
+
+class FasterWhisperPoolTranscriber(TranscriberInterface):
+    """
+    Transcriber running faster-whisper in a pool of worker processes.
+    Each worker keeps its model loaded and uses a share of the cores (intra-op threads),
+    so concurrent requests scale with the core count instead of competing for one model.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        compute_profile: Optional[ComputeProfile] = None,
+        workers: Optional[int] = None,
+        **kwargs
+    ):
+        """
+        Initializes the transcriber on the pool of the model.
+        The compute type and thread settings come from the compute profile
+        (the active one by default), explicit kwargs take precedence.
+        Args:
+            - model_name: Name of the faster-whisper model.
+            - compute_profile: Compute profile of the workers.
+            - workers: Number of worker processes (default LOCAL_TRANSCRIPTION_WORKERS).
+            - **kwargs: Additional WhisperModel arguments.
+        """
+        profile = compute_profile or get_compute_profile()
+        workers = workers or local_transcription_workers() or 1
+        model_kwargs = dict(
+            compute_type=profile.compute_type,
+            cpu_threads=worker_cpu_threads(profile, workers),
+            num_workers=1,
+        )
+        model_kwargs.update(kwargs)
+        self.model_name = model_name
+        self.pool = get_transcription_pool(model_name, workers, **model_kwargs)
+
+    def transcribe_segments_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> List[SegmentTranscriptionModel]:
+        """
+        Transcribe the given audio file in a worker with segment-level timestamps.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        try:
+            segments = cancellable(
+                self.pool.transcribe(load_audio_samples(audio_path), word_timestamps=False, **kwargs)
+            )
+            return [
+                SegmentTranscriptionModel(
+                    id=str(segment.id),
+                    text=segment.text.strip(),
+                    start=segment.start,
+                    end=segment.end,
+                    avg_logprob=segment.avg_logprob,
+                    compression_ratio=segment.compression_ratio,
+                )
+                for segment in segments
+            ]
+        except Exception as e:
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
+
+    def transcribe_segments_with_words_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the given audio file in a worker with segment-level and word-level timestamps.
+        Segments are checkpointed as they are decoded, so a transcription interrupted by an
+        error or a restart resumes from the last completed timestamp.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        checkpoint = TranscriptionCheckpoint.open(
+            audio_path, model_name=self.model_name, word_timestamps=True, **kwargs
+        )
+        try:
+            checkpoint.start_attempt()
+            samples = load_audio_samples(audio_path)
+            remaining = slice_samples(samples, checkpoint.resume_offset, len(samples) / SAMPLE_RATE)
+            for segment in cancellable(self.pool.transcribe(remaining, word_timestamps=True, **kwargs)):
+                checkpoint.add_segment(segment)
+
+            return checkpoint.finish()
+        except Exception as e:
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
+        finally:
+            checkpoint.close()
@@ -0,0 +1,281 @@
+import asyncio
+import logging
+from typing import Any, BinaryIO, Dict, List, Optional, Tuple, Union
+
+from timestamp_whisper.models import (
+    SegmentTranscriptionModel,
+    SegmentTranscriptionModelWithWords,
+    WordTranscriptionModel,
+)
+from timestamp_whisper.core.interface.transcriber_interface import TranscriberInterface
+from timestamp_whisper.utils.audio_util import SAMPLE_RATE, load_audio_samples, samples_to_wav, slice_samples
+from timestamp_whisper.utils.audio_fingerprint_util import (
+    FingerprintIndex,
+    FingerprintMatch,
+    compute_fingerprint,
+    fingerprint_media_id,
+    get_fingerprint_index,
+    reuse_params_key,
+)
+from timestamp_whisper.utils.transcription_util import (
+    group_words_by_segment,
+    merge_transcriptions,
+    offset_transcription,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Unmatched spans shorter than this (pauses between reused segments) are not sent to Whisper.
+MIN_TRANSCRIBE_SPAN = 0.5
+
+
+class FingerprintReuseTranscriber(TranscriberInterface):
+    """
+    Transcriber reusing previous transcriptions of the same audio.
+    The decoded audio is fingerprinted and matched against the local fingerprint index, so a
+    re-encoded, re-containered or trimmed copy of a known media reuses its segments and words
+    (shifted to the new timeline) and only the unmatched spans are transcribed.
+    """
+
+    def __init__(self, transcriber: TranscriberInterface, index: Optional[FingerprintIndex] = None):
+        """
+        Initializes the transcriber.
+        Args:
+            - transcriber: Transcriber used for the audio that is not matched.
+            - index: Fingerprint index (defaults to the process-wide index).
+        """
+        self.transcriber = transcriber
+        self.model_name = getattr(transcriber, "model_name", None)
+        self.index = index or get_fingerprint_index()
+
+    def transcribe_segments_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> List[SegmentTranscriptionModel]:
+        """
+        Transcribe the given audio file with segment-level timestamps (not reused, as the index stores words).
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        return self.transcriber.transcribe_segments_timestamp(audio_path, **kwargs)
+
+    def transcribe_segments_with_words_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the given audio file with segment-level and word-level timestamps,
+        reusing the matched regions of previously transcribed audio.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        lookup = self._find_matches(audio_path, **kwargs)
+        if lookup is None:
+            return self.transcriber.transcribe_segments_with_words_timestamp(audio_path, **kwargs)
+        samples, fingerprint, params_key, matches = lookup
+
+        if matches:
+            transcription = self._transcribe_with_matches(samples, matches, params_key, **kwargs)
+        else:
+            transcription = self.transcriber.transcribe_segments_with_words_timestamp(audio_path, **kwargs)
+        self._store(fingerprint, params_key, transcription)
+        return transcription
+
+    async def atranscribe_segments_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> List[SegmentTranscriptionModel]:
+        """
+        Transcribe the given audio file with segment-level timestamps through the wrapped async transcriber.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        return await self.transcriber.atranscribe_segments_timestamp(audio_path, **kwargs)
+
+    async def atranscribe_segments_with_words_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the given audio file with segment-level and word-level timestamps, reusing the
+        matched regions of previously transcribed audio. Fingerprinting and the index run in a
+        worker thread and the wrapped transcriber is awaited.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        lookup = await asyncio.to_thread(self._find_matches, audio_path, **kwargs)
+        if lookup is None:
+            return await self.transcriber.atranscribe_segments_with_words_timestamp(audio_path, **kwargs)
+        samples, fingerprint, params_key, matches = lookup
+
+        if matches:
+            pieces, spans = await asyncio.to_thread(self._reuse_plan, samples, matches, params_key)
+            for start, end in spans:
+                span_audio = await asyncio.to_thread(samples_to_wav, slice_samples(samples, start, end))
+                self._add_span_pieces(
+                    pieces, start,
+                    await self.transcriber.atranscribe_segments_with_words_timestamp(span_audio, **kwargs),
+                )
+            transcription = merge_transcriptions(pieces)
+        else:
+            transcription = await self.transcriber.atranscribe_segments_with_words_timestamp(audio_path, **kwargs)
+        await asyncio.to_thread(self._store, fingerprint, params_key, transcription)
+        return transcription
+
+    def _find_matches(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> Optional[Tuple[Any, Any, str, List[FingerprintMatch]]]:
+        """
+        Fingerprint the audio and find the regions matching previously transcribed audio.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - The decoded samples, their fingerprint, the reuse parameters key and the matches,
+              or None when the audio cannot be fingerprinted.
+        """
+        try:
+            samples = load_audio_samples(audio_path)
+            fingerprint = compute_fingerprint(samples)
+            params_key = reuse_params_key(model_name=self.model_name, word_timestamps=True, **kwargs)
+            return samples, fingerprint, params_key, self.index.find_matches(fingerprint, params_key)
+        except Exception as e:
+            logger.warning(f"Transcription reuse disabled for this request: {str(e)}")
+            return None
+
+    def _store(self, fingerprint: Any, params_key: str, transcription: SegmentTranscriptionModelWithWords) -> None:
+        """
+        Store the transcription in the fingerprint index, for later copies of the audio.
+        Args:
+            - fingerprint: Fingerprint of the audio.
+            - params_key: Key of the model and decoding parameters.
+            - transcription: The transcription of the audio.
+        """
+        try:
+            self.index.add(fingerprint_media_id(fingerprint), fingerprint, params_key, transcription)
+        except Exception as e:
+            logger.warning(f"Could not store the transcription in the fingerprint index: {str(e)}")
+
+    def _reused_pieces(
+        self, matches: List[FingerprintMatch], params_key: str
+    ) -> List[Tuple[SegmentTranscriptionModel, List[WordTranscriptionModel]]]:
+        """
+        Collect the stored segments lying entirely inside a matched region, in new-audio time.
+        Args:
+            - matches: The matched regions.
+            - params_key: Key of the model and decoding parameters.
+        Return:
+            - The reused (segment, words) pieces.
+        """
+        stored: Dict[str, SegmentTranscriptionModelWithWords] = {}
+        pieces = []
+        for match in matches:
+            if match.media_id not in stored:
+                stored[match.media_id] = self.index.load_transcription(match.media_id, params_key)
+            shifted = offset_transcription(stored[match.media_id], -match.offset)
+            words_by_segment = group_words_by_segment(shifted)
+            pieces.extend(
+                (segment, words_by_segment.get(str(segment.id), []))
+                for segment in shifted.segments
+                if segment.start >= match.start and segment.end <= match.end
+            )
+        return pieces
+
+    @staticmethod
+    def _unmatched_spans(
+        duration: float, matches: List[FingerprintMatch], covered: List[Tuple[float, float]]
+    ) -> List[Tuple[float, float]]:
+        """
+        Compute the spans not covered by reused segments that still need a transcription.
+        Gaps lying inside a matched region are pauses of the known audio and are skipped.
+        Args:
+            - duration: Duration of the audio in seconds.
+            - matches: The matched regions.
+            - covered: Sorted (start, end) of the reused segments.
+        Return:
+            - The (start, end) spans to transcribe.
+        """
+        gaps = []
+        cursor = 0.0
+        for start, end in covered + [(duration, duration)]:
+            if start - cursor >= MIN_TRANSCRIBE_SPAN:
+                gaps.append((cursor, start))
+            cursor = max(cursor, end)
+        return [
+            (start, end)
+            for start, end in gaps
+            if not any(match.start <= start and end <= match.end for match in matches)
+        ]
+
+    def _reuse_plan(
+        self, samples, matches: List[FingerprintMatch], params_key: str
+    ) -> Tuple[List[Tuple[SegmentTranscriptionModel, List[WordTranscriptionModel]]], List[Tuple[float, float]]]:
+        """
+        Collect the reused pieces and the spans that still need a transcription.
+        Args:
+            - samples: The decoded 16 kHz samples.
+            - matches: The matched regions.
+            - params_key: Key of the model and decoding parameters.
+        Return:
+            - The reused (segment, words) pieces and the (start, end) spans to transcribe.
+        """
+        pieces = self._reused_pieces(matches, params_key)
+        covered = sorted((segment.start, segment.end) for segment, _ in pieces)
+        spans = self._unmatched_spans(len(samples) / SAMPLE_RATE, matches, covered)
+        logger.info(
+            f"Reusing {len(pieces)} segments from {len({match.media_id for match in matches})} fingerprinted "
+            f"media; transcribing {len(spans)} spans ({sum(end - start for start, end in spans):.1f}s)"
+        )
+        return pieces, spans
+
+    @staticmethod
+    def _add_span_pieces(
+        pieces: List[Tuple[SegmentTranscriptionModel, List[WordTranscriptionModel]]],
+        start: float,
+        span_transcription: SegmentTranscriptionModelWithWords,
+    ) -> None:
+        """
+        Add the segments of a transcribed span, shifted to the media time, to the pieces.
+        Args:
+            - pieces: The (segment, words) pieces collected so far.
+            - start: Start of the span in seconds.
+            - span_transcription: Transcription of the span audio.
+        """
+        span_transcription = offset_transcription(span_transcription, start)
+        span_words = group_words_by_segment(span_transcription)
+        pieces.extend(
+            (segment, span_words.get(str(segment.id), []))
+            for segment in span_transcription.segments
+        )
+
+    def _transcribe_with_matches(
+        self, samples, matches: List[FingerprintMatch], params_key: str, **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Build the transcription from the reused segments and the transcription of the unmatched spans.
+        Args:
+            - samples: The decoded 16 kHz samples.
+            - matches: The matched regions.
+            - params_key: Key of the model and decoding parameters.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - The merged transcription.
+        """
+        pieces, spans = self._reuse_plan(samples, matches, params_key)
+        for start, end in spans:
+            self._add_span_pieces(
+                pieces, start,
+                self.transcriber.transcribe_segments_with_words_timestamp(
+                    samples_to_wav(slice_samples(samples, start, end)), **kwargs
+                ),
+            )
+        return merge_transcriptions(pieces)
@@ -1,5 +1,6 @@
-from typing import BinaryIO, List, Union
-import uuid
+import asyncio
+from contextlib import aclosing
+from typing import Any, AsyncIterator, BinaryIO, List, Optional, Union
 import modal
 from dotenv import load_dotenv
 import os
@@ -7,10 +8,14 @@ import os
 from timestamp_whisper.models import (
     SegmentTranscriptionModel,
     SegmentTranscriptionModelWithWords,
-    WordTranscriptionModel,
 )
-from timestamp_whisper.core.interface.transcriber_interface import TranscriberInterface
+from timestamp_whisper.core.interface.transcriber_interface import TranscriberInterface, TranscriptionError
 from timestamp_whisper.utils import compress_bytes
+from timestamp_whisper.utils.audio_util import audio_bytes, trim_audio_start
+from timestamp_whisper.utils.call_policy_util import CallPolicy, get_call_policy
+from timestamp_whisper.utils.cancellation_util import cancellable
+from timestamp_whisper.utils.transcription_checkpoint_util import TranscriptionCheckpoint
+from timestamp_whisper.utils.transcription_wire_util import WireSegment, aiter_unpacked_segments, iter_unpacked_segments
 
 
 # Load variables from .env file
@@ -20,17 +25,29 @@ load_dotenv()
 class ModalFasterWhisperTranscriber(TranscriberInterface):
     """
     Transcriber class for faster-Whisper.
+    The async methods use the .aio variant of the Modal call, so a remote transcription
+    only holds the event loop while a batch is decoded, not a thread for its whole duration.
+    They run under a call policy (deadline, retries resuming after the segments received, hedging).
+    A cancelled request closes the call, which cancels the remote transcription.
     """
 
-    def __init__(self, model_name: str, **kwargs):
+    def __init__(
+        self, model_name: str, modal_cls: Optional[Any] = None, call_policy: Optional[CallPolicy] = None, **kwargs
+    ):
         """
         Initializes the faster-whisper locally with the given model name, .
+        Each model name is served by its own parametrized Modal container pool.
+        A class with the same call surface (e.g. LocalWhisperTranscriber) can be passed
+        as modal_cls to run the wire protocol in process.
+        The async calls follow call_policy (default: the process-wide "modal_transcribe" policy).
         """
-        self.modal_faster_whisper_transcriber_class = modal.Cls.from_name(
+        self.call_policy = call_policy or get_call_policy("modal_transcribe")
+        self.model_name = str(getattr(model_name, "value", model_name))
+        self.modal_faster_whisper_transcriber_class = modal_cls or modal.Cls.from_name(
             os.environ.get("MODAL_APP_NAME"),
             os.environ.get("MODAL_CLASS_NAME"),
         )
-        self.model = self.modal_faster_whisper_transcriber_class()
+        self.model = self.modal_faster_whisper_transcriber_class(model_name=self.model_name)
 
     def transcribe_segments_timestamp(
         self, audio_path: Union[BinaryIO, str], **kwargs
@@ -44,86 +61,139 @@ class ModalFasterWhisperTranscriber(TranscriberInterface):
             - Transcription of the audio file.
         """
         try:
-
-            # Read bytes from audio_path
-            if isinstance(audio_path, str):
-                with open(audio_path, "rb") as f:
-                    audio_bytes = f.read()
-            else:
-                audio_path.seek(0)
-                audio_bytes = audio_path.read()
-
-            compressed_bytes = compress_bytes(data=audio_bytes)
-            segments = self.model.transcribe.remote_gen(
-                audio_bytes=compressed_bytes,
+            batches = self.model.transcribe.remote_gen(
+                audio_bytes=self._compressed_audio(audio_path),
                 word_timestamps=False,
                 **kwargs,
             )
-            segments = [
-                SegmentTranscriptionModel(
-                    segment_id=str(segment.id),
-                    text=segment.text.strip(),
-                    start=segment.start,
-                    end=segment.end,
-                )
-                for segment in segments
-            ]
+            segments = [self._segment(segment) for segment in iter_unpacked_segments(cancellable(batches))]
             return segments
         except Exception as e:
-            raise Exception(f"Error during transcription: {str(e)}")
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
+
+    async def atranscribe_segments_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> List[SegmentTranscriptionModel]:
+        """
+        Transcribe the given audio file with segment-level timestamps through the async Modal call.
+        A retried call only sends the audio after the segments already received.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        try:
+            # Collected in memory, so a retried call resumes after the segments already received
+            checkpoint = TranscriptionCheckpoint()
+            async for segment in self._astream_segments(audio_path, checkpoint, word_timestamps=False, **kwargs):
+                checkpoint.add_segment(segment)
+            return checkpoint.segments
+        except Exception as e:
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
 
     def transcribe_segments_with_words_timestamp(
         self, audio_path: Union[BinaryIO, str], **kwargs
     ) -> SegmentTranscriptionModelWithWords:
         """
         Transcribe the given audio file using Whisper with segment-level and  word-level timestamps and return the transcription.
+        Segments are checkpointed as they stream back from Modal, so a retry after a failed or
+        timed out call only uploads and decodes the audio after the last completed timestamp.
         Args:
             - audio_path: path of audio file.
             - **kwargs: Additional arguments for the transcription model.
         Return:
             - Transcription of the audio file.
         """
+        checkpoint = TranscriptionCheckpoint.open(
+            audio_path, model_name=self.model_name, word_timestamps=True, **kwargs
+        )
         try:
-            # Read bytes from audio_path
-            if isinstance(audio_path, str):
-                with open(audio_path, "rb") as f:
-                    audio_bytes = f.read()
-            else:
-                # Go to beginning and read all bytes
-                audio_path.seek(0)
-                audio_bytes = audio_path.read()
-
-            compressed_bytes = compress_bytes(data=audio_bytes)
-            segments = self.model.transcribe.remote_gen(
-                audio_bytes=compressed_bytes,
+            checkpoint.start_attempt()
+            batches = self.model.transcribe.remote_gen(
+                audio_bytes=self._compressed_audio(audio_path, checkpoint.resume_offset),
                 word_timestamps=True,
                 **kwargs,
             )
-            segments_timestamps = []
-            words_timestamps = []
-            for segment in segments:
-                segments_timestamps.append(
-                    SegmentTranscriptionModel(
-                        id=str(segment.id),
-                        text=segment.text.strip(),
-                        start=segment.start,
-                        end=segment.end,
-                    )
-                )
-                for word in segment.words:
-                    words_timestamps.append(
-                        WordTranscriptionModel(
-                            id=str(uuid.uuid4()),
-                            segment_id=str(segment.id),
-                            text=word.word,
-                            start=word.start,
-                            end=word.end,
-                        )
-                    )
-
-            return SegmentTranscriptionModelWithWords(
-                segments=segments_timestamps,
-                words=words_timestamps,
-            )
+            for segment in iter_unpacked_segments(cancellable(batches)):
+                checkpoint.add_segment(segment)
+
+            return checkpoint.finish()
+        except Exception as e:
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
+        finally:
+            checkpoint.close()
+
+    async def atranscribe_segments_with_words_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the given audio file with segment-level and word-level timestamps through the
+        async Modal call, checkpointing the segments as they stream back.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        # Opening the checkpoint hashes the audio
+        checkpoint = await asyncio.to_thread(
+            TranscriptionCheckpoint.open, audio_path, model_name=self.model_name, word_timestamps=True, **kwargs
+        )
+        try:
+            async for segment in self._astream_segments(audio_path, checkpoint, word_timestamps=True, **kwargs):
+                checkpoint.add_segment(segment)
+
+            return checkpoint.finish()
         except Exception as e:
-            raise Exception(f"Error during transcription: {str(e)}")
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
+        finally:
+            checkpoint.close()
+
+    def _astream_segments(
+        self, audio_path: Union[BinaryIO, str], checkpoint: TranscriptionCheckpoint, **kwargs
+    ) -> AsyncIterator[WireSegment]:
+        """
+        Stream the segments of the audio remaining after the checkpoint from the async Modal call,
+        under the call policy. Every call (retry or hedge) transcribes the audio after the
+        segments already added to the checkpoint; a cancelled call is closed, cancelling it remotely.
+        Args:
+            - audio_path: path of audio file.
+            - checkpoint: Checkpoint receiving the segments.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - The decoded segments, in the time of the transcribed audio.
+        """
+        async def open_call() -> AsyncIterator[WireSegment]:
+            checkpoint.start_attempt()
+            compressed_bytes = await asyncio.to_thread(self._compressed_audio, audio_path, checkpoint.resume_offset)
+            batches = self.model.transcribe.remote_gen.aio(audio_bytes=compressed_bytes, **kwargs)
+            async with aclosing(batches):
+                async for segment in aiter_unpacked_segments(batches):
+                    yield segment
+
+        return self.call_policy.stream(open_call)
+
+    @staticmethod
+    def _compressed_audio(audio_path: Union[BinaryIO, str], start: float = 0.0) -> bytes:
+        """
+        Compress the audio content after a timestamp straight from its buffer.
+        Args:
+            - audio_path: path of audio file.
+            - start: Timestamp in seconds where the sent audio starts.
+        Return:
+            - The compressed audio file.
+        """
+        return compress_bytes(data=audio_bytes(trim_audio_start(audio_path, start)))
+
+    @staticmethod
+    def _segment(segment: Any) -> SegmentTranscriptionModel:
+        """Convert a decoded wire segment to a segment-level transcription."""
+        return SegmentTranscriptionModel(
+            id=str(segment.id),
+            text=segment.text.strip(),
+            start=segment.start,
+            end=segment.end,
+            avg_logprob=segment.avg_logprob,
+            compression_ratio=segment.compression_ratio,
+        )
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+from timestamp_whisper.models import (
+    SegmentTranscriptionModel,
+    SegmentTranscriptionModelWithWords,
+)
+from timestamp_whisper.core.interface.transcriber_interface import TranscriberInterface
+from timestamp_whisper.utils.audio_util import (
+    SAMPLE_RATE,
+    WAV_HEADER_SIZE,
+    AudioBuffer,
+    load_audio_samples,
+    samples_to_wav,
+)
+from timestamp_whisper.utils.speech_detection_util import (
+    MAX_REMOVED_FRACTION,
+    MIN_REMOVED_FRACTION,
+    SpeechTimeline,
+    detect_speech_regions,
+    remove_silences,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class SilenceRemovalTranscriber(TranscriberInterface):
+    """
+    Transcriber cutting non-speech out of the audio before transcription.
+    Pauses, intros and dead air are detected locally with an energy pass and removed
+    before the audio is compressed and uploaded, so the payload and decoding time scale
+    with the speech duration; timestamps are mapped back to the original media time.
+    """
+
+    def __init__(self, transcriber: TranscriberInterface):
+        """
+        Initializes the transcriber.
+        Args:
+            - transcriber: Transcriber used for the audio without silences.
+        """
+        self.transcriber = transcriber
+        self.model_name = getattr(transcriber, "model_name", None)
+
+    @staticmethod
+    def _audio_size(audio_path: Union[BinaryIO, str]) -> int:
+        """Size in bytes of the audio as it would be sent without silence removal."""
+        if isinstance(audio_path, str):
+            return os.path.getsize(audio_path)
+        if isinstance(audio_path, AudioBuffer):
+            return audio_path.nbytes
+        position = audio_path.tell()
+        size = audio_path.seek(0, os.SEEK_END)
+        audio_path.seek(position)
+        return size
+
+    def _cut_silences(
+        self, audio_path: Union[BinaryIO, str]
+    ) -> Optional[Tuple[BinaryIO, SpeechTimeline]]:
+        """
+        Remove the silences of the audio when it saves enough audio and bytes. When no speech is detected
+        or too much of the audio would be cut, the detection is not trusted and the audio is kept as is.
+        Args:
+            - audio_path: path of audio file.
+        Return:
+            - The audio without silences and its offset map, or None to transcribe the audio as is.
+        """
+        try:
+            samples = load_audio_samples(audio_path)
+            regions = detect_speech_regions(samples)
+            cut_samples, timeline = remove_silences(samples, regions)
+        except Exception as e:
+            logger.warning(f"Silence removal disabled for this request: {str(e)}")
+            return None
+
+        duration = len(samples) / SAMPLE_RATE
+        if duration == 0:
+            return None
+        removed_fraction = 1 - len(cut_samples) / len(samples)
+        if not regions or removed_fraction > MAX_REMOVED_FRACTION:
+            logger.warning(
+                f"Silence removal would cut {removed_fraction:.0%} of {duration:.1f}s of audio, "
+                f"transcribing the original audio"
+            )
+            return None
+        if removed_fraction < MIN_REMOVED_FRACTION:
+            return None
+        if WAV_HEADER_SIZE + 2 * len(cut_samples) >= self._audio_size(audio_path):
+            return None
+        logger.info(f"Removed {duration - timeline.speech_duration:.1f}s of silence out of {duration:.1f}s")
+        return samples_to_wav(cut_samples), timeline
+
+    def transcribe_segments_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> List[SegmentTranscriptionModel]:
+        """
+        Transcribe the speech of the given audio file with segment-level timestamps in media time.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        cut = self._cut_silences(audio_path)
+        if cut is None:
+            return self.transcriber.transcribe_segments_timestamp(audio_path, **kwargs)
+        cut_audio, timeline = cut
+        return timeline.remap_segments(self.transcriber.transcribe_segments_timestamp(cut_audio, **kwargs))
+
+    def transcribe_segments_with_words_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the speech of the given audio file with segment-level and word-level timestamps in media time.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        cut = self._cut_silences(audio_path)
+        if cut is None:
+            return self.transcriber.transcribe_segments_with_words_timestamp(audio_path, **kwargs)
+        cut_audio, timeline = cut
+        return timeline.remap_transcription(
+            self.transcriber.transcribe_segments_with_words_timestamp(cut_audio, **kwargs)
+        )
+
+    async def atranscribe_segments_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> List[SegmentTranscriptionModel]:
+        """
+        Transcribe the speech of the given audio file with segment-level timestamps in media time,
+        detecting the silences in a worker thread and awaiting the wrapped transcriber.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        cut = await asyncio.to_thread(self._cut_silences, audio_path)
+        if cut is None:
+            return await self.transcriber.atranscribe_segments_timestamp(audio_path, **kwargs)
+        cut_audio, timeline = cut
+        return timeline.remap_segments(await self.transcriber.atranscribe_segments_timestamp(cut_audio, **kwargs))
+
+    async def atranscribe_segments_with_words_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the speech of the given audio file with segment-level and word-level timestamps in
+        media time, detecting the silences in a worker thread and awaiting the wrapped transcriber.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Additional arguments for the transcription model.
+        Return:
+            - Transcription of the audio file.
+        """
+        cut = await asyncio.to_thread(self._cut_silences, audio_path)
+        if cut is None:
+            return await self.transcriber.atranscribe_segments_with_words_timestamp(audio_path, **kwargs)
+        cut_audio, timeline = cut
+        return timeline.remap_transcription(
+            await self.transcriber.atranscribe_segments_with_words_timestamp(cut_audio, **kwargs)
+        )
@@ -0,0 +1,216 @@
+import asyncio
+import os
+import random
+from typing import BinaryIO, List, Optional, Tuple, Union
+
+from timestamp_whisper.core.interface.transcriber_interface import TranscriberInterface, TranscriptionError
+from timestamp_whisper.core.types import (
+    DEFAULT_STUB_LATENCY_SECONDS,
+    DEFAULT_STUB_REAL_TIME_FACTOR,
+    DEFAULT_STUB_WORDS_PER_SECOND,
+)
+from timestamp_whisper.models import (
+    SegmentTranscriptionModel,
+    SegmentTranscriptionModelWithWords,
+    WordTranscriptionModel,
+)
+from timestamp_whisper.utils.audio_util import audio_duration
+from timestamp_whisper.utils.cancellation_util import CancellationToken, current_cancellation
+
+
+# Text the stub "recognizes", cycled as long as the audio lasts
+STUB_CORPUS = (
+    "In our last video we navigated the complex world of autonomous vehicles focusing on their perception "
+    "planning and safety. Today we are shifting our focus to a profoundly impactful area AI in healthcare. "
+    "Our objective is to investigate the transformative role of AI and robotics in healthcare from disease "
+    "diagnosis and medical imaging to advanced surgical procedures and patient rehabilitation and to examine "
+    "the varying levels of autonomy in surgical robots. The integration of AI and robotics is revolutionizing "
+    "healthcare promising to enhance efficiency accuracy and access to medical services. This transformation "
+    "can even lead to significant cost savings especially in areas like patient diagnosis. Image analysis "
+    "models can analyze vast amounts of medical images such as X rays CT scans and MRIs often detecting early "
+    "signs of diseases with accuracy comparable to human experts. Drug discovery and development is accelerated "
+    "by identifying potential drug candidates and predicting their effectiveness before clinical trials begin."
+).split()
+
+
+def stub_transcriber_enabled() -> bool:
+    """
+    Whether every transcriber is replaced by the stub transcriber (load testing), from STUB_TRANSCRIBER.
+    Returns:
+        - True when STUB_TRANSCRIBER is "true".
+    """
+    return os.environ.get("STUB_TRANSCRIBER", "false").lower() == "true"
+
+
+def stub_words(count: int, start: int = 0) -> List[str]:
+    """
+    Get the words the stub transcriber produces, cycling through its corpus.
+    Args:
+        - count: Number of words.
+        - start: Index of the first word in the transcript.
+    Returns:
+        - The words.
+    """
+    return [STUB_CORPUS[index % len(STUB_CORPUS)] for index in range(start, start + count)]
+
+
+class StubTranscriber(TranscriberInterface):
+    """
+    Deterministic transcriber returning a synthetic segment/word timeline for the duration of the audio,
+    after an artificial latency. It exercises the API, scheduling and alignment layers without a model.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        latency: Optional[float] = None,
+        real_time_factor: Optional[float] = None,
+        words_per_second: float = DEFAULT_STUB_WORDS_PER_SECOND,
+        **kwargs
+    ):
+        """
+        Initializes the stub transcriber.
+        Args:
+            - model_name: Name of the emulated model, only reported.
+            - latency: Fixed latency per transcription in seconds (default STUB_TRANSCRIBER_LATENCY).
+            - real_time_factor: Additional latency per second of audio (default STUB_TRANSCRIBER_RTF).
+            - words_per_second: Speaking rate of the synthetic transcript.
+        """
+        self.model_name = model_name
+        self.latency = float(
+            latency if latency is not None else os.environ.get("STUB_TRANSCRIBER_LATENCY", DEFAULT_STUB_LATENCY_SECONDS)
+        )
+        self.real_time_factor = float(
+            real_time_factor if real_time_factor is not None
+            else os.environ.get("STUB_TRANSCRIBER_RTF", DEFAULT_STUB_REAL_TIME_FACTOR)
+        )
+        self.words_per_second = words_per_second
+
+    def timeline(self, duration: float) -> Tuple[List[SegmentTranscriptionModel], List[WordTranscriptionModel]]:
+        """
+        Build the synthetic transcript of an audio duration: segments of 8 to 16 words separated by short
+        pauses, seeded by the duration so the same audio always gets the same transcript.
+        Args:
+            - duration: Duration of the audio in seconds.
+        Returns:
+            - The segments and the words.
+        """
+        rng = random.Random(round(duration * 1000))
+        word_slot = 1.0 / self.words_per_second
+        segments, words = [], []
+        time_position = rng.uniform(0.2, 0.8)
+        while True:
+            segment_id = str(len(segments))
+            segment_words = []
+            for text in stub_words(rng.randint(8, 16), start=len(words)):
+                word_end = time_position + word_slot * rng.uniform(0.6, 0.9)
+                if word_end > duration:
+                    break
+                segment_words.append(WordTranscriptionModel(
+                    id=str(len(words) + len(segment_words)),
+                    segment_id=segment_id,
+                    text=f" {text}",
+                    start=round(time_position, 3),
+                    end=round(word_end, 3),
+                ))
+                time_position += word_slot * rng.uniform(0.9, 1.1)
+            if not segment_words:
+                break
+            segments.append(SegmentTranscriptionModel(
+                id=segment_id,
+                text="".join(word.text for word in segment_words).strip(),
+                start=segment_words[0].start,
+                end=segment_words[-1].end,
+            ))
+            words.extend(segment_words)
+            time_position += rng.uniform(0.3, 1.2)
+        return segments, words
+
+    def _transcribe(
+        self, audio_path: Union[BinaryIO, str]
+    ) -> Tuple[List[SegmentTranscriptionModel], List[WordTranscriptionModel]]:
+        """
+        Wait for the artificial latency and return the timeline of the audio.
+        The wait ends early when the request is cancelled, as a decode would at its next segment.
+        """
+        duration = audio_duration(audio_path)
+        (current_cancellation() or CancellationToken()).sleep(self.latency + self.real_time_factor * duration)
+        return self.timeline(duration)
+
+    async def _atranscribe(
+        self, audio_path: Union[BinaryIO, str]
+    ) -> Tuple[List[SegmentTranscriptionModel], List[WordTranscriptionModel]]:
+        """
+        Wait for the artificial latency without holding a thread and return the timeline of the audio.
+        """
+        duration = await asyncio.to_thread(audio_duration, audio_path)
+        await asyncio.sleep(self.latency + self.real_time_factor * duration)
+        return self.timeline(duration)
+
+    def transcribe_segments_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> List[SegmentTranscriptionModel]:
+        """
+        Return the synthetic segments of the audio.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Decoding parameters, ignored.
+        Return:
+            - Transcription of the audio file.
+        """
+        try:
+            segments, _ = self._transcribe(audio_path)
+            return segments
+        except Exception as e:
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
+
+    def transcribe_segments_with_words_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Return the synthetic segments and words of the audio.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Decoding parameters, ignored.
+        Return:
+            - Transcription of the audio file.
+        """
+        try:
+            segments, words = self._transcribe(audio_path)
+            return SegmentTranscriptionModelWithWords(segments=segments, words=words)
+        except Exception as e:
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
+
+    async def atranscribe_segments_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> List[SegmentTranscriptionModel]:
+        """
+        Return the synthetic segments of the audio without blocking the event loop.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Decoding parameters, ignored.
+        Return:
+            - Transcription of the audio file.
+        """
+        try:
+            segments, _ = await self._atranscribe(audio_path)
+            return segments
+        except Exception as e:
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
+
+    async def atranscribe_segments_with_words_timestamp(
+        self, audio_path: Union[BinaryIO, str], **kwargs
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Return the synthetic segments and words of the audio without blocking the event loop.
+        Args:
+            - audio_path: path of audio file.
+            - **kwargs: Decoding parameters, ignored.
+        Return:
+            - Transcription of the audio file.
+        """
+        try:
+            segments, words = await self._atranscribe(audio_path)
+            return SegmentTranscriptionModelWithWords(segments=segments, words=words)
+        except Exception as e:
+            raise TranscriptionError(f"Error during transcription: {str(e)}")
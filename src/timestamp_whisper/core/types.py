@@ -8,6 +8,7 @@ class TranscriberType(str, Enum):
 
     FASTER_WHISPER = "faster_whisper"
     MODAL_WHISPER = "modal_whisper"
+    STUB = "stub"
 
 
 class AlignerType(str, Enum):
@@ -17,6 +18,7 @@ class AlignerType(str, Enum):
 
     FUZZY_ALIGNER = "fuzzy_aligner"
     FUZZYWUZZY_ALIGNER = "fuzzywuzzy_aligner"
+    SUBSTRING_ALIGNER = "substring_aligner"
 
 
 class FasterWhisperModel(str, Enum):
@@ -31,6 +33,120 @@ class FasterWhisperModel(str, Enum):
     BASE = "base"
 
 
+class ComputeType(str, Enum):
+    """
+    Enum-like class for CTranslate2 compute types used by the local backend.
+    """
+
+    INT8 = "int8"
+    INT8_FLOAT32 = "int8_float32"
+    FLOAT32 = "float32"
+
+
+class DecodePreset(str, Enum):
+    """
+    Enum-like class for named latency/quality decoding presets.
+    """
+
+    FAST = "fast"
+    BALANCED = "balanced"
+    ACCURATE = "accurate"
+
+
+class PipelineMode(str, Enum):
+    """
+    Enum-like class for the paragraph timestamp pipeline modes.
+    """
+
+    STANDARD = "standard"
+    COARSE_TO_FINE = "coarse_to_fine"
+    SEGMENT_ONLY = "segment_only"
+    BOUNDARY_REFINE = "boundary_refine"
+    SCRIPT_CONDITIONED = "script_conditioned"
+
+
+class TranscriptionBackend(str, Enum):
+    """
+    Enum-like class for the backends the auto router sends transcriptions to.
+    """
+
+    LOCAL_SMALL = "local_small"
+    LOCAL_LARGE = "local_large"
+    MODAL = "modal"
+
+
+class TranscriptionResource(str, Enum):
+    """
+    Enum-like class for the resources transcriptions are scheduled on.
+    """
+
+    CPU = "cpu"
+    GPU = "gpu"
+
+
 # Defaults
 
 DEFAULT_SEARCH_SEGMENT_SIZE: int = 8
+DEFAULT_DECODE_PRESET: DecodePreset = DecodePreset.ACCURATE
+DEFAULT_CALIBRATION_MODEL: str = FasterWhisperModel.TINY
+DEFAULT_CALIBRATION_AUDIO_SECONDS: int = 10
+DEFAULT_COMPUTE_PROFILE_PATH: str = "~/.cache/timestamp_whisper/compute_profile.json"
+DEFAULT_COARSE_MODEL: str = FasterWhisperModel.BASE
+DEFAULT_REFINE_SCORE_THRESHOLD: float = 0.75
+DEFAULT_REFINE_WINDOW_PADDING: float = 3.0
+DEFAULT_BOUNDARY_WINDOW_PADDING: float = 4.0
+DEFAULT_BOUNDARY_REFINE_CONCURRENCY: int = 4
+DEFAULT_MAX_CONCURRENT_CPU_TRANSCRIPTIONS: int = 1
+DEFAULT_MAX_CONCURRENT_GPU_TRANSCRIPTIONS: int = 8
+DEFAULT_SCHEDULER_AGING_RATE: float = 10.0
+DEFAULT_SHORT_JOB_SECONDS: float = 600.0
+DEFAULT_STUB_LATENCY_SECONDS: float = 0.5
+DEFAULT_STUB_REAL_TIME_FACTOR: float = 0.0
+DEFAULT_STUB_WORDS_PER_SECOND: float = 2.5
+DEFAULT_PROFILE_DIR: str = "~/.cache/timestamp_whisper/profiles"
+DEFAULT_PROFILE_SAMPLE_INTERVAL: float = 0.005
+DEFAULT_PROFILE_TOP_ALLOCATIONS: int = 25
+DEFAULT_TRANSCRIPT_STORE_DIR: str = "~/.cache/timestamp_whisper/transcripts"
+DEFAULT_ALIGNMENT_CACHE_SIZE: int = 10000
+DEFAULT_LOADED_TRANSCRIPTS: int = 8
+DEFAULT_REMOTE_CALL_DEADLINE_SECONDS: float = 180.0
+DEFAULT_REMOTE_CALL_MAX_ATTEMPTS: int = 3
+DEFAULT_REMOTE_CALL_BACKOFF_SECONDS: float = 1.0
+DEFAULT_REMOTE_CALL_HEDGE_QUANTILE: float = 0.95
+DEFAULT_REMOTE_CALL_HEDGE_MIN_SAMPLES: int = 20
+DEFAULT_STREAM_MODEL: str = FasterWhisperModel.BASE
+DEFAULT_STREAM_DECODE_PRESET: DecodePreset = DecodePreset.FAST
+DEFAULT_STREAM_STEP_SECONDS: float = 1.0
+DEFAULT_STREAM_WINDOW_SECONDS: float = 12.0
+DEFAULT_STREAM_STABILITY_SECONDS: float = 1.0
+DEFAULT_STREAM_START_SCORE: float = 0.8
+DEFAULT_STREAM_LOOKAHEAD: int = 2
+DEFAULT_AUTO_ROUTE_SMALL_MODEL: str = FasterWhisperModel.SMALL
+DEFAULT_AUTO_ROUTE_SHORT_SECONDS: float = 60.0
+DEFAULT_AUTO_ROUTE_MAX_LOCAL_WAIT_SECONDS: float = 30.0
+DEFAULT_AUTO_ROUTE_MODAL_OVERHEAD_SECONDS: float = 15.0
+DEFAULT_AUTO_ROUTE_MODAL_SLOW_SECONDS: float = 60.0
+DEFAULT_AUTO_ROUTE_MODAL_MAX_FAILURE_RATE: float = 0.2
+DEFAULT_AUTO_ROUTE_REAL_TIME_FACTORS: dict = {
+    TranscriptionBackend.LOCAL_SMALL: 0.3,
+    TranscriptionBackend.LOCAL_LARGE: 1.5,
+    TranscriptionBackend.MODAL: 0.05,
+}
+DEFAULT_SCRIPT_DECODE_PRESET: DecodePreset = DecodePreset.FAST
+DEFAULT_SCRIPT_WINDOW_SECONDS: float = 30.0
+DEFAULT_SCRIPT_OVERLAP_SECONDS: float = 2.0
+DEFAULT_SCRIPT_CONTEXT_WORDS: int = 30
+DEFAULT_SCRIPT_HINT_WORDS: int = 100
+DEFAULT_SCRIPT_MIN_AVG_LOGPROB: float = -1.0
+DEFAULT_SCRIPT_MAX_COMPRESSION_RATIO: float = 2.4
+DEFAULT_SCRIPT_MIN_MATCH_SCORE: float = 0.6
+DEFAULT_RETENTION_SWEEP_INTERVAL_SECONDS: float = 600.0
+DEFAULT_CHECKPOINT_TTL_SECONDS: float = 86400.0
+DEFAULT_PROFILE_MAX_COUNT: int = 500
+DEFAULT_PROFILE_TTL_SECONDS: float = 7 * 86400.0
+DEFAULT_ALIGNMENT_SEARCH_LENGTH: int = 10
+DEFAULT_MIN_WORD_MATCH_SCORE: float = 0.5
+DEFAULT_TRANSCRIPT_TTL_SECONDS: float = 30 * 86400.0
+DEFAULT_MAX_STORED_TRANSCRIPTS: int = 10000
+DEFAULT_AUTO_ROUTE_OUTCOME_MAX_AGE_SECONDS: float = 600.0
+DEFAULT_AUTO_ROUTE_PROBE_INTERVAL_SECONDS: float = 60.0
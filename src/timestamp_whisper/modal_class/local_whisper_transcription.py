@@ -0,0 +1,126 @@
+import asyncio
+import random
+import time
+from typing import Any, AsyncIterator, Callable, Iterator, Optional
+
+from timestamp_whisper.utils.transcription_wire_util import transcribe_packed
+
+
+class InjectedFailure(ConnectionError):
+    """Failure injected by the local stand-in in place of a remote transport error."""
+
+
+class LocalGeneratorCall:
+    """
+    In-process stand-in for the remote_gen call of a Modal method, callable directly or through .aio.
+    Latency (cold start, slow container) and failures can be injected to exercise the call policy.
+    """
+
+    def __init__(
+        self,
+        function: Callable[..., Iterator[bytes]],
+        latency: Optional[Callable[[], float]] = None,
+        fails: Optional[Callable[[], bool]] = None,
+    ):
+        """
+        Initializes the call.
+        Args:
+            function (Callable[..., Iterator[bytes]]): The method body.
+            latency (Optional[Callable[[], float]]): Returns the delay of a call before its first item.
+            fails (Optional[Callable[[], bool]]): Returns whether the next item fails.
+        """
+        self._function = function
+        self._latency = latency or (lambda: 0.0)
+        self._fails = fails or (lambda: False)
+
+    def __call__(self, *args, **kwargs) -> Iterator[bytes]:
+        """
+        Runs the method in the current process and returns its generator.
+        """
+        time.sleep(self._latency())
+        for item in self._function(*args, **kwargs):
+            if self._fails():
+                raise InjectedFailure("Injected remote call failure")
+            yield item
+
+    async def aio(self, *args, **kwargs) -> AsyncIterator[bytes]:
+        """
+        Runs the method in the current process, producing each item in a worker thread
+        so the event loop is not blocked while the model decodes.
+        """
+        await asyncio.sleep(self._latency())
+        iterator = self._function(*args, **kwargs)
+        done = object()
+        while True:
+            item = await asyncio.to_thread(next, iterator, done)
+            if item is done:
+                return
+            if self._fails():
+                raise InjectedFailure("Injected remote call failure")
+            yield item
+
+
+class LocalMethod:
+    """
+    In-process stand-in for a Modal method handle, exposing the same call variants.
+    """
+
+    def __init__(self, function: Callable[..., Iterator[bytes]], **faults):
+        self.remote_gen = LocalGeneratorCall(function, **faults)
+
+
+class LocalWhisperTranscriber:
+    """
+    In-process stand-in for the ModalWhisperTranscriber class, used to exercise the packed
+    wire protocol without deploying to Modal. It is constructed like the Modal class handle
+    (cls(model_name=...)) and exposes transcribe.remote_gen with the same packed output.
+    Attributes:
+        model_name (str): Name of the faster-whisper model (default "large-v3").
+    """
+
+    def __init__(
+        self,
+        model_name: str = "large-v3",
+        model: Optional[Any] = None,
+        latency: float = 0.0,
+        slow_call_rate: float = 0.0,
+        slow_call_latency: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ):
+        """
+        Initializes the stand-in.
+        Args:
+            model_name (str): Name of the faster-whisper model, loaded lazily.
+            model (Optional[Any]): An already loaded model (anything with a faster-whisper transcribe).
+            latency (float): Delay of every call before its first batch, in seconds.
+            slow_call_rate (float): Fraction of the calls delayed by slow_call_latency in addition.
+            slow_call_latency (float): Additional delay of the slow calls, in seconds.
+            failure_rate (float): Probability that each batch fails instead of being sent.
+            seed (Optional[int]): Seed of the injected latency and failures.
+        """
+        self.model_name = model_name
+        self._model = model
+        self.latency = latency
+        self.slow_call_rate = slow_call_rate
+        self.slow_call_latency = slow_call_latency
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+        self.transcribe = LocalMethod(self._transcribe, latency=self._call_latency, fails=self._batch_fails)
+
+    @property
+    def model(self) -> Any:
+        if self._model is None:
+            from faster_whisper import WhisperModel
+            self._model = WhisperModel(self.model_name)
+        return self._model
+
+    def _call_latency(self) -> float:
+        slow = self._random.random() < self.slow_call_rate
+        return self.latency + (self.slow_call_latency if slow else 0.0)
+
+    def _batch_fails(self) -> bool:
+        return self._random.random() < self.failure_rate
+
+    def _transcribe(self, audio_bytes: bytes, **kwargs) -> Iterator[bytes]:
+        return transcribe_packed(self.model, audio_bytes, **kwargs)
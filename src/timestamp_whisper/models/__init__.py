@@ -1,9 +1,12 @@
 from .transcription_models import SegmentTranscriptionModel, WordTranscriptionModel, SegmentTranscriptionModelWithWords, TranscribedChunk
 from .aligner_models import MatchChunk, ParagraphAlignment
+from .profile_models import ComputeProfile, DecodeOptions
 
 __all__ = ["SegmentTranscriptionModel", 
            "WordTranscriptionModel", 
            "SegmentTranscriptionModelWithWords", 
            "TranscribedChunk", 
            "MatchChunk", 
-           "ParagraphAlignment"]
+           "ParagraphAlignment",
+           "ComputeProfile",
+           "DecodeOptions"]
@@ -0,0 +1,30 @@
+from typing import Dict
+from pydantic import BaseModel, Field
+
+
+class DecodeOptions(BaseModel):
+    """
+    Model representing the decoding parameters passed to the transcription model.
+    """
+    beam_size: int = Field(..., description="Beam size used for beam search decoding.")
+    best_of: int = Field(..., description="Number of candidates when sampling with non-zero temperature.")
+    chunk_length: int = Field(..., description="Length of the audio chunks in seconds.")
+    temperature: float = Field(default=0.0, description="Sampling temperature (0.0 disables sampling).")
+
+
+class ComputeProfile(BaseModel):
+    """
+    Model representing the hardware-aware compute profile of the local transcription backend.
+    """
+    compute_type: str = Field(..., description="CTranslate2 compute type used to load the model.")
+    cpu_threads: int = Field(..., description="Number of intra-op threads used by each model call.")
+    num_workers: int = Field(..., description="Number of model workers allowed to run in parallel.")
+    cpu_count: int = Field(..., description="Number of CPU cores detected when the profile was built.")
+    calibrated: bool = Field(default=False, description="Whether the profile comes from a calibration run.")
+    calibration_timings: Dict[str, float] = Field(
+        default_factory=dict,
+        description="Calibration wall time in seconds per tested configuration.",
+    )
+    decode_presets: Dict[str, DecodeOptions] = Field(
+        default_factory=dict, description="Named latency/quality decoding presets."
+    )
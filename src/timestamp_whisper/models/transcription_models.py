@@ -1,3 +1,4 @@
+from typing import Optional
 from pydantic import BaseModel, Field
 
 
@@ -14,8 +15,12 @@ class TranscribedChunk(BaseModel):
 class SegmentTranscriptionModel(TranscribedChunk):
     """
     Model representing the transcription of an audio file on level of segments.
+    The decoding confidence is kept in memory only, it is not part of the serialized transcription.
     """
-    pass
+    avg_logprob: Optional[float] = Field(
+        default=None, exclude=True, description="Average log probability of the decoded tokens, when known.")
+    compression_ratio: Optional[float] = Field(
+        default=None, exclude=True, description="Compression ratio of the decoded text, when known.")
     
 
 class WordTranscriptionModel(TranscribedChunk):
@@ -1,4 +1,16 @@
 from .file_chunks_timestamp_service import FileChunksTimestampService
+from .coarse_to_fine_timestamp_service import CoarseToFineTimestampService
+from .segment_only_timestamp_service import SegmentOnlyTimestampService
+from .boundary_refinement_timestamp_service import BoundaryRefinementTimestampService
+from .script_conditioned_timestamp_service import ScriptConditionedTimestampService
+from .transcript_alignment_service import TranscriptAlignmentService
+from .streaming_alignment_service import StreamingAlignmentService
 from .transcriber_service import TranscriberService
 __all__ = ["FileChunksTimestampService",
-           "TranscriberService"]
\ No newline at end of file
+           "CoarseToFineTimestampService",
+           "SegmentOnlyTimestampService",
+           "BoundaryRefinementTimestampService",
+           "ScriptConditionedTimestampService",
+           "TranscriptAlignmentService",
+           "StreamingAlignmentService",
+           "TranscriberService"]
@@ -3,6 +3,7 @@ from typing import List
 from timestamp_whisper.core import AlignerInterface
 from timestamp_whisper.models import ParagraphAlignment
 from timestamp_whisper.models.transcription_models import SegmentTranscriptionModel
+from timestamp_whisper.utils.cancellation_util import check_cancelled
 
 
 class ParagraphAssAlimentService:
@@ -35,6 +36,7 @@ class ParagraphAssAlimentService:
 
             paragraphs_timestamps = []
             for paragraph in paragraphs:
+                check_cancelled()
                 # Align the paragraph with audio segments timestamp
                 segment_alignment = self.aligner.align_paragraph_with_segments(
                     paragraph, ass_segments,
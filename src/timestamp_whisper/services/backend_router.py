@@ -0,0 +1,413 @@
+import asyncio
+import logging
+import os
+import statistics
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, NamedTuple, Optional, Tuple, TypeVar
+import modal
+from starlette.concurrency import run_in_threadpool
+
+from timestamp_whisper.core.types import (
+    FasterWhisperModel,
+    TranscriberType,
+    TranscriptionBackend,
+    TranscriptionResource,
+    DEFAULT_AUTO_ROUTE_MAX_LOCAL_WAIT_SECONDS,
+    DEFAULT_AUTO_ROUTE_MODAL_MAX_FAILURE_RATE,
+    DEFAULT_AUTO_ROUTE_MODAL_OVERHEAD_SECONDS,
+    DEFAULT_AUTO_ROUTE_MODAL_SLOW_SECONDS,
+    DEFAULT_AUTO_ROUTE_OUTCOME_MAX_AGE_SECONDS,
+    DEFAULT_AUTO_ROUTE_PROBE_INTERVAL_SECONDS,
+    DEFAULT_AUTO_ROUTE_REAL_TIME_FACTORS,
+    DEFAULT_AUTO_ROUTE_SHORT_SECONDS,
+    DEFAULT_AUTO_ROUTE_SMALL_MODEL,
+)
+from timestamp_whisper.core.interface import TranscriptionError
+from timestamp_whisper.services.transcription_scheduler import TranscriptionScheduler, get_transcription_scheduler
+from timestamp_whisper.utils.audio_util import audio_duration
+from timestamp_whisper.utils.call_policy_util import CallPolicy, get_call_policy
+from timestamp_whisper.utils.metrics_util import metrics
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Outcomes of each backend kept for its health and speed estimates
+OUTCOME_WINDOW = 50
+# Recent Modal outcomes the failure rate is computed on, and the minimum to judge it
+FAILURE_WINDOW = 20
+MIN_FAILURE_SAMPLES = 5
+# Errors of the remote call itself (Modal, network, deadline), which a local run does not share
+TRANSPORT_ERRORS = (modal.exception.Error, ConnectionError, TimeoutError, asyncio.TimeoutError)
+
+backend_route_decisions = metrics.counter(
+    "backend_route_decisions_total", "Backends chosen by the auto router, by reason.", ("backend", "reason")
+)
+backend_route_outcomes = metrics.counter(
+    "backend_route_outcomes_total",
+    "Outcomes of the auto-routed requests (success, error, request_error for errors not caused by the backend).",
+    ("backend", "outcome"),
+)
+backend_route_seconds = metrics.histogram(
+    "backend_route_seconds", "Processing time of the auto-routed requests.", ("backend",)
+)
+
+
+def _error_chain(error: BaseException) -> Iterator[BaseException]:
+    """Iterate over an error and the errors it was raised from or while handling."""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_transport_error(error: BaseException) -> bool:
+    """
+    Tell whether an error was caused by the remote call itself (Modal, network or deadline), so the
+    request may succeed locally.
+    Args:
+        - error: The error.
+    Returns:
+        - Whether it is a transport error.
+    """
+    return any(isinstance(e, TRANSPORT_ERRORS) for e in _error_chain(error))
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """
+    Tell whether an error is a failure of the backend: of the transcription or of the remote call.
+    Errors of the rest of the request (e.g. the alignment) are not.
+    Args:
+        - error: The error.
+    Returns:
+        - Whether it counts against the backend.
+    """
+    return any(isinstance(e, (TranscriptionError,) + TRANSPORT_ERRORS) for e in _error_chain(error))
+
+
+class RouteDecision(NamedTuple):
+    """A backend chosen for a request and why."""
+
+    backend: TranscriptionBackend
+    reason: str
+    transcriber_type: TranscriberType
+    model_name: str
+    estimated_seconds: Optional[float] = None
+
+
+class BackendRouter:
+    """
+    Router of the auto backend: sends each transcription to a local small model, the local large
+    model or Modal.
+
+    Short clips go to the local small model, where the Modal round trip and cold start would
+    dominate. Longer audio goes to whichever of the local large model and Modal is expected to
+    finish first: the local estimate is the wait behind the audio already queued on the local
+    pool plus the transcription itself, the Modal one the recent time to first result plus the
+    transcription. Requests spill over to Modal when the local queue would wait longer than
+    max_local_wait, and stay local while Modal is failing or slow. A request failing on Modal with a
+    transport error is run again locally. Real-time factors are learned from the outcomes of the
+    routed requests.
+
+    Only errors of the transcription or of the remote call count as failures of a backend. The
+    estimates only use the outcomes and times to first result of the last outcome_max_age seconds,
+    so a failing or slow Modal is used again once its evidence ages out. Meanwhile one long request
+    every probe_interval is sent to Modal as a probe; a successful probe discards the older Modal
+    evidence.
+    """
+
+    def __init__(
+        self,
+        scheduler: Optional[TranscriptionScheduler] = None,
+        call_policy: Optional[CallPolicy] = None,
+        small_model: str = DEFAULT_AUTO_ROUTE_SMALL_MODEL,
+        large_model: str = FasterWhisperModel.LARGE_V3,
+        short_seconds: float = DEFAULT_AUTO_ROUTE_SHORT_SECONDS,
+        max_local_wait: float = DEFAULT_AUTO_ROUTE_MAX_LOCAL_WAIT_SECONDS,
+        modal_overhead: float = DEFAULT_AUTO_ROUTE_MODAL_OVERHEAD_SECONDS,
+        modal_slow_seconds: float = DEFAULT_AUTO_ROUTE_MODAL_SLOW_SECONDS,
+        modal_max_failure_rate: float = DEFAULT_AUTO_ROUTE_MODAL_MAX_FAILURE_RATE,
+        real_time_factors: Optional[Dict[TranscriptionBackend, float]] = None,
+        outcome_max_age: float = DEFAULT_AUTO_ROUTE_OUTCOME_MAX_AGE_SECONDS,
+        probe_interval: float = DEFAULT_AUTO_ROUTE_PROBE_INTERVAL_SECONDS,
+    ):
+        """
+        Initializes the router.
+        Args:
+            - scheduler: Scheduler of the local transcriptions, whose queue is the local load.
+            - call_policy: Policy of the Modal calls, whose times to first result are the Modal overhead.
+            - small_model: Model of the local small backend.
+            - large_model: Model of the local large and Modal backends.
+            - short_seconds: Audio duration up to which a clip is transcribed by the local small model.
+            - max_local_wait: Expected local wait in seconds above which requests spill over to Modal.
+            - modal_overhead: Modal round trip and cold start assumed until times to first result are observed.
+            - modal_slow_seconds: p95 time to first result above which Modal is considered slow.
+            - modal_max_failure_rate: Recent failure rate above which Modal is considered failing.
+            - real_time_factors: Processing seconds per audio second assumed for each backend until observed.
+            - outcome_max_age: Age in seconds after which outcomes and times to first result are ignored.
+            - probe_interval: Seconds without a Modal request after which a failing or slow Modal is probed.
+        """
+        self.scheduler = scheduler or get_transcription_scheduler(TranscriptionResource.CPU)
+        self.call_policy = call_policy or get_call_policy("modal_transcribe")
+        self.small_model = small_model
+        self.large_model = large_model
+        self.short_seconds = short_seconds
+        self.max_local_wait = max_local_wait
+        self.modal_overhead = modal_overhead
+        self.modal_slow_seconds = modal_slow_seconds
+        self.modal_max_failure_rate = modal_max_failure_rate
+        self.default_real_time_factors = dict(real_time_factors or DEFAULT_AUTO_ROUTE_REAL_TIME_FACTORS)
+        self.outcome_max_age = outcome_max_age
+        self.probe_interval = probe_interval
+        # (ok, audio duration, processing seconds, monotonic time finished)
+        self._outcomes: Dict[TranscriptionBackend, Deque[Tuple[bool, float, float, float]]] = {
+            backend: deque(maxlen=OUTCOME_WINDOW) for backend in TranscriptionBackend
+        }
+        # Start of the last successful probe: older Modal evidence is discarded
+        self._modal_evidence_since: Optional[float] = None
+        self._last_modal_request: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def _evidence_since(self, backend: TranscriptionBackend) -> float:
+        """Monotonic time before which the outcomes of a backend are ignored."""
+        since = time.monotonic() - self.outcome_max_age
+        if backend == TranscriptionBackend.MODAL and self._modal_evidence_since is not None:
+            since = max(since, self._modal_evidence_since)
+        return since
+
+    def _recent_outcomes(self, backend: TranscriptionBackend) -> List[Tuple[bool, float, float, float]]:
+        """The outcomes of a backend not aged out, oldest first."""
+        with self._lock:
+            since = self._evidence_since(backend)
+            return [outcome for outcome in self._outcomes[backend] if outcome[3] >= since]
+
+    def real_time_factor(self, backend: TranscriptionBackend) -> float:
+        """
+        Returns the median processing seconds per audio second of the recent successes of a backend,
+        without the Modal overhead.
+        Args:
+            - backend: The backend.
+        Returns:
+            - The real-time factor, the default one before any success.
+        """
+        overhead = self.modal_latency() if backend == TranscriptionBackend.MODAL else 0.0
+        factors = [
+            max(0.0, seconds - overhead) / duration
+            for ok, duration, seconds, _ in self._recent_outcomes(backend)
+            if ok and duration > 0
+        ]
+        return statistics.median(factors) if factors else self.default_real_time_factors[backend]
+
+    def modal_latency(self, quantile: float = 0.5) -> float:
+        """
+        Returns a quantile of the recent Modal times to first result (round trip and cold starts).
+        Args:
+            - quantile: The quantile.
+        Returns:
+            - The latency in seconds, modal_overhead before any observation.
+        """
+        with self._lock:
+            max_age = time.monotonic() - self._evidence_since(TranscriptionBackend.MODAL)
+        latency = self.call_policy.first_result_quantile(quantile, max_age=max_age)
+        return self.modal_overhead if latency is None else latency
+
+    def modal_failure_rate(self) -> Optional[float]:
+        """
+        Returns the failure rate of the recent Modal requests.
+        Returns:
+            - The rate, None with too few requests to judge.
+        """
+        recent = self._recent_outcomes(TranscriptionBackend.MODAL)[-FAILURE_WINDOW:]
+        if len(recent) < MIN_FAILURE_SAMPLES:
+            return None
+        return sum(1 for ok, _, _, _ in recent if not ok) / len(recent)
+
+    def local_wait(self) -> float:
+        """
+        Returns the expected wait of a new local transcription: the audio already running or queued
+        on the local pool, shared by its slots, at the local large real-time factor.
+        Returns:
+            - The wait in seconds.
+        """
+        return (
+            self.scheduler.pending_cost / self.scheduler.max_concurrent
+            * self.real_time_factor(TranscriptionBackend.LOCAL_LARGE)
+        )
+
+    def decide(self, duration: float) -> RouteDecision:
+        """
+        Choose the backend of a transcription.
+        Args:
+            - duration: Duration of the audio in seconds.
+        Returns:
+            - The decision.
+        """
+        local_wait = self.local_wait()
+        failure_rate = self.modal_failure_rate()
+        modal_failing = failure_rate is not None and failure_rate > self.modal_max_failure_rate
+        modal_slow = self.modal_latency(0.95) > self.modal_slow_seconds
+        local_backend = (
+            TranscriptionBackend.LOCAL_SMALL if duration <= self.short_seconds else TranscriptionBackend.LOCAL_LARGE
+        )
+        local_seconds = local_wait + duration * self.real_time_factor(local_backend)
+        modal_seconds = self.modal_latency() + duration * self.real_time_factor(TranscriptionBackend.MODAL)
+
+        if local_wait > self.max_local_wait and not (modal_failing or modal_slow):
+            return self._decision(TranscriptionBackend.MODAL, "local_saturated", modal_seconds)
+        if (modal_failing or modal_slow) and local_backend == TranscriptionBackend.LOCAL_LARGE and self._take_probe():
+            return self._decision(TranscriptionBackend.MODAL, "modal_probe", modal_seconds)
+        if modal_failing:
+            return self._decision(local_backend, "modal_failing", local_seconds)
+        if modal_slow:
+            return self._decision(local_backend, "modal_slow", local_seconds)
+        if local_backend == TranscriptionBackend.LOCAL_SMALL:
+            return self._decision(local_backend, "short_clip", local_seconds)
+        if local_seconds <= modal_seconds:
+            return self._decision(local_backend, "faster_locally", local_seconds)
+        return self._decision(TranscriptionBackend.MODAL, "faster_on_modal", modal_seconds)
+
+    def _take_probe(self) -> bool:
+        """Tell whether Modal is due a probe, no request having been sent to it for probe_interval."""
+        now = time.monotonic()
+        with self._lock:
+            if self._last_modal_request is not None and now - self._last_modal_request < self.probe_interval:
+                return False
+            self._last_modal_request = now
+            return True
+
+    def _decision(self, backend: TranscriptionBackend, reason: str, estimated_seconds: float) -> RouteDecision:
+        """Build a decision with the transcriber type and model of its backend."""
+        return RouteDecision(
+            backend=backend,
+            reason=reason,
+            transcriber_type=(
+                TranscriberType.MODAL_WHISPER if backend == TranscriptionBackend.MODAL
+                else TranscriberType.FASTER_WHISPER
+            ),
+            model_name=self.small_model if backend == TranscriptionBackend.LOCAL_SMALL else self.large_model,
+            estimated_seconds=round(estimated_seconds, 3),
+        )
+
+    def record(self, backend: TranscriptionBackend, duration: float, seconds: float, ok: bool) -> None:
+        """
+        Record the outcome of a routed request.
+        Args:
+            - backend: The backend the request ran on.
+            - duration: Duration of the audio in seconds.
+            - seconds: Processing time of the request.
+            - ok: Whether it succeeded.
+        """
+        with self._lock:
+            self._outcomes[backend].append((ok, duration, seconds, time.monotonic()))
+        backend_route_outcomes.inc(backend=backend.value, outcome="success" if ok else "error")
+        if ok:
+            backend_route_seconds.observe(seconds, backend=backend.value)
+
+    async def run(self, duration: float, transcribe: Callable[[str, str], Awaitable[T]]) -> T:
+        """
+        Run a request on the backend chosen for its audio, and again locally when the Modal call fails.
+        Args:
+            - duration: Duration of the audio in seconds.
+            - transcribe: Runs the request with a transcriber type and a model name.
+        Returns:
+            - The result of the request.
+        """
+        decision = self.decide(duration)
+        try:
+            return await self._run_decision(decision, duration, transcribe)
+        except Exception as e:
+            # Other errors would fail the same way locally
+            if decision.backend != TranscriptionBackend.MODAL or not is_transport_error(e):
+                raise
+            fallback_backend = (
+                TranscriptionBackend.LOCAL_SMALL if duration <= self.short_seconds
+                else TranscriptionBackend.LOCAL_LARGE
+            )
+            logger.warning(f"Transcription failed on Modal ({str(e)}), running it on {fallback_backend.value}")
+            fallback = self._decision(
+                fallback_backend, "modal_failed",
+                self.local_wait() + duration * self.real_time_factor(fallback_backend),
+            )
+            return await self._run_decision(fallback, duration, transcribe)
+
+    async def _run_decision(
+        self, decision: RouteDecision, duration: float, transcribe: Callable[[str, str], Awaitable[T]]
+    ) -> T:
+        """
+        Run a request on a decided backend, exporting the decision and its outcome. Errors not caused
+        by the backend are not recorded against it; a successful probe discards the older Modal evidence.
+        """
+        backend_route_decisions.inc(backend=decision.backend.value, reason=decision.reason)
+        logger.info(
+            f"Routing {duration:.1f}s of audio to {decision.backend.value} ({decision.reason}, "
+            f"expected {decision.estimated_seconds:.1f}s)"
+        )
+        started = time.monotonic()
+        if decision.backend == TranscriptionBackend.MODAL:
+            with self._lock:
+                self._last_modal_request = started
+        try:
+            result = await transcribe(decision.transcriber_type, decision.model_name)
+        except Exception as e:
+            if is_backend_failure(e):
+                self.record(decision.backend, duration, time.monotonic() - started, ok=False)
+            else:
+                backend_route_outcomes.inc(backend=decision.backend.value, outcome="request_error")
+            raise
+        if decision.reason == "modal_probe":
+            logger.info("Modal probe succeeded, discarding the older Modal outcomes")
+            with self._lock:
+                self._modal_evidence_since = started
+        self.record(decision.backend, duration, time.monotonic() - started, ok=True)
+        return result
+
+
+@lru_cache(maxsize=None)
+def get_backend_router() -> BackendRouter:
+    """
+    Get the process-wide router of the auto backend, so its estimates are shared by the requests.
+    It is configured by AUTO_ROUTE_SMALL_MODEL, AUTO_ROUTE_SHORT_SECONDS, AUTO_ROUTE_MAX_LOCAL_WAIT_SECONDS,
+    AUTO_ROUTE_OUTCOME_MAX_AGE_SECONDS and AUTO_ROUTE_PROBE_INTERVAL_SECONDS.
+    Returns:
+        - The router.
+    """
+    return BackendRouter(
+        small_model=os.environ.get("AUTO_ROUTE_SMALL_MODEL", DEFAULT_AUTO_ROUTE_SMALL_MODEL),
+        short_seconds=float(os.environ.get("AUTO_ROUTE_SHORT_SECONDS", DEFAULT_AUTO_ROUTE_SHORT_SECONDS)),
+        max_local_wait=float(
+            os.environ.get("AUTO_ROUTE_MAX_LOCAL_WAIT_SECONDS", DEFAULT_AUTO_ROUTE_MAX_LOCAL_WAIT_SECONDS)
+        ),
+        outcome_max_age=float(
+            os.environ.get("AUTO_ROUTE_OUTCOME_MAX_AGE_SECONDS", DEFAULT_AUTO_ROUTE_OUTCOME_MAX_AGE_SECONDS)
+        ),
+        probe_interval=float(
+            os.environ.get("AUTO_ROUTE_PROBE_INTERVAL_SECONDS", DEFAULT_AUTO_ROUTE_PROBE_INTERVAL_SECONDS)
+        ),
+    )
+
+
+async def run_on_backend(transcriber_backend: str, audio: Any, run: Callable[[str, str], Awaitable[T]]) -> T:
+    """
+    Run a request on the backend requested by its client: the large model locally or on Modal,
+    or the backend chosen by the router for "auto".
+    Args:
+        - transcriber_backend: "local", "modal" or "auto".
+        - audio: Audio data of the request, whose duration is routed on.
+        - run: Runs the request with a transcriber type and a model name.
+    Returns:
+        - The result of the request.
+    """
+    if transcriber_backend == "auto":
+        duration = await run_in_threadpool(audio_duration, audio)
+        return await get_backend_router().run(duration, run)
+    transcriber_type = (
+        TranscriberType.MODAL_WHISPER
+        if transcriber_backend == "modal"
+        else TranscriberType.FASTER_WHISPER
+    )
+    return await run(transcriber_type, FasterWhisperModel.LARGE_V3)
@@ -0,0 +1,284 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+
+from timestamp_whisper.core import TranscriberInterface, AlignerInterface
+from timestamp_whisper.core.types import DEFAULT_BOUNDARY_REFINE_CONCURRENCY, DEFAULT_BOUNDARY_WINDOW_PADDING
+from timestamp_whisper.models import DecodeOptions, SegmentTranscriptionModelWithWords, WordTranscriptionModel
+from timestamp_whisper.models.aligner_models import ParagraphAlignmentWithWords, ParagraphItem
+from timestamp_whisper.services.segment_only_timestamp_service import SegmentOnlyTimestampService
+from timestamp_whisper.services.transcription_flight import transcribe_single_flight
+from timestamp_whisper.utils import load_audio_samples, offset_transcription, samples_to_wav, slice_samples
+
+
+class BoundaryRefinementTimestampService(SegmentOnlyTimestampService):
+    """
+    Service for paragraph timestamps with word-level boundaries at segment-level cost.
+
+    The whole file is transcribed with segment timestamps only and aligned on interpolated
+    words. Short windows around every paragraph boundary are then transcribed concurrently
+    with word timestamps, and each boundary is re-matched on the words of its window, so
+    word alignment scales with the number of paragraphs instead of the media length.
+    """
+
+    def __init__(
+        self,
+        transcriber: TranscriberInterface,
+        aligner: AlignerInterface,
+        decode_options: Optional[DecodeOptions] = None,
+        window_transcriber: Optional[TranscriberInterface] = None,
+        window_padding: float = DEFAULT_BOUNDARY_WINDOW_PADDING,
+        max_concurrent_windows: int = DEFAULT_BOUNDARY_REFINE_CONCURRENCY,
+    ):
+        """
+        Initializes the BoundaryRefinementTimestampService.
+        Args:
+            - transcriber: Transcriber used for the segment-level pass over the whole file.
+            - aligner: Aligner used for segments and boundary words.
+            - decode_options: Decoding parameters used by both passes.
+            - window_transcriber: Transcriber of the boundary windows (defaults to the transcriber).
+            - window_padding: Seconds of audio kept on each side of a boundary.
+            - max_concurrent_windows: Number of windows transcribed at once.
+        """
+        super().__init__(transcriber=transcriber, aligner=aligner, decode_options=decode_options)
+        self.window_transcriber = window_transcriber or transcriber
+        self.window_padding = window_padding
+        self.max_concurrent_windows = max(1, max_concurrent_windows)
+
+    def _paragraphs_from_transcription(
+        self,
+        paragraphs: List[ParagraphItem],
+        audio: BinaryIO,
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+    ) -> List[ParagraphAlignmentWithWords]:
+        """
+        Align the paragraphs on the segment-level transcription, then refine every boundary on
+        the words of its window.
+        Args:
+            - paragraphs: List of paragraphs to be aligned.
+            - audio: Audio data being processed.
+            - transcribed_segments_with_words: The segment-level transcription with interpolated words.
+        Returns:
+            - List of ParagraphAlignmentWithWords objects, one per paragraph.
+        """
+        alignments = self._align_paragraphs(paragraphs, transcribed_segments_with_words)
+        if not alignments:
+            return alignments
+
+        windows = self._boundary_windows(alignments)
+        window_words = self._transcribe_windows(audio, windows)
+        return self._refine_alignments(
+            paragraphs, alignments, windows, window_words, transcribed_segments_with_words
+        )
+
+    async def _aparagraphs_from_transcription(
+        self,
+        paragraphs: List[ParagraphItem],
+        audio: BinaryIO,
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+        tenant: Optional[str] = None,
+    ) -> List[ParagraphAlignmentWithWords]:
+        """
+        Align the paragraphs on the segment-level transcription, then refine every boundary on
+        the words of its window, transcribed through the async window transcriber.
+        Args:
+            - paragraphs: List of paragraphs to be aligned.
+            - audio: Audio data being processed.
+            - transcribed_segments_with_words: The segment-level transcription with interpolated words.
+            - tenant: API key or tenant of the request, used by the transcription scheduler.
+        Returns:
+            - List of ParagraphAlignmentWithWords objects, one per paragraph.
+        """
+        alignments = await run_in_threadpool(self._align_paragraphs, paragraphs, transcribed_segments_with_words)
+        if not alignments:
+            return alignments
+
+        windows = self._boundary_windows(alignments)
+        window_words = await self._atranscribe_windows(audio, windows, tenant=tenant)
+        return await run_in_threadpool(
+            self._refine_alignments, paragraphs, alignments, windows, window_words, transcribed_segments_with_words
+        )
+
+    def _refine_alignments(
+        self,
+        paragraphs: List[ParagraphItem],
+        alignments: List[ParagraphAlignmentWithWords],
+        windows: List[Tuple[float, float]],
+        window_words: List[List[WordTranscriptionModel]],
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+    ) -> List[ParagraphAlignmentWithWords]:
+        """
+        Refine the alignments once the boundary windows are transcribed.
+        Args:
+            - paragraphs: List of paragraphs to be aligned.
+            - alignments: Paragraph alignments of the segment-level pass.
+            - windows: List of (start, end) windows in seconds.
+            - window_words: Transcribed words of each window.
+            - transcribed_segments_with_words: The segment-level transcription with interpolated words.
+        Returns:
+            - List of ParagraphAlignmentWithWords objects, one per paragraph.
+        """
+        words = self._merge_window_words(transcribed_segments_with_words.words, window_words)
+
+        def words_around(time: float) -> List[WordTranscriptionModel]:
+            for (start, end), precise_words in zip(windows, window_words):
+                if start <= time <= end:
+                    return precise_words
+            return []
+
+        return [
+            self._refine_alignment(paragraph, alignment, words_around(alignment.start), words_around(alignment.end), words)
+            for paragraph, alignment in zip(paragraphs, alignments)
+        ]
+
+    def _boundary_windows(self, alignments: List[ParagraphAlignmentWithWords]) -> List[Tuple[float, float]]:
+        """
+        Get the windows around the paragraph boundaries, merging overlapping ones.
+        Args:
+            - alignments: Paragraph alignments of the segment-level pass.
+        Returns:
+            - Sorted list of (start, end) windows in seconds.
+        """
+        windows = sorted(
+            (max(0.0, boundary - self.window_padding), boundary + self.window_padding)
+            for alignment in alignments
+            for boundary in (alignment.start, alignment.end)
+        )
+        merged: List[Tuple[float, float]] = []
+        for start, end in windows:
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _transcribe_windows(
+        self, audio: BinaryIO, windows: List[Tuple[float, float]]
+    ) -> List[List[WordTranscriptionModel]]:
+        """
+        Transcribe the windows concurrently with word timestamps.
+        Args:
+            - audio: Audio data to be processed.
+            - windows: List of (start, end) windows in seconds.
+        Returns:
+            - The words of each window, in media time.
+        """
+        samples = load_audio_samples(audio)
+
+        def transcribe_window(window: Tuple[float, float]) -> List[WordTranscriptionModel]:
+            start, end = window
+            window_transcription = self.window_transcriber.transcribe_segments_with_words_timestamp(
+                audio_path=samples_to_wav(slice_samples(samples, start, end)),
+                **self._transcription_kwargs(),
+            )
+            return self._window_words(start, window_transcription)
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_windows) as executor:
+            return list(executor.map(transcribe_window, windows))
+
+    async def _atranscribe_windows(
+        self, audio: BinaryIO, windows: List[Tuple[float, float]], tenant: Optional[str] = None
+    ) -> List[List[WordTranscriptionModel]]:
+        """
+        Transcribe the windows concurrently with word timestamps through the async window transcriber,
+        scheduled with the request's tenant and shared with identical windows in flight.
+        Args:
+            - audio: Audio data to be processed.
+            - windows: List of (start, end) windows in seconds.
+            - tenant: API key or tenant of the request.
+        Returns:
+            - The words of each window, in media time.
+        """
+        samples = await run_in_threadpool(load_audio_samples, audio)
+        semaphore = asyncio.Semaphore(self.max_concurrent_windows)
+
+        async def transcribe_window(window: Tuple[float, float]) -> List[WordTranscriptionModel]:
+            start, end = window
+            async with semaphore:
+                window_transcription = await transcribe_single_flight(
+                    self.window_transcriber,
+                    samples_to_wav(slice_samples(samples, start, end)),
+                    tenant=tenant,
+                    **self._transcription_kwargs(),
+                )
+            return self._window_words(start, window_transcription)
+
+        return list(await asyncio.gather(*(transcribe_window(window) for window in windows)))
+
+    @staticmethod
+    def _window_words(
+        start: float, window_transcription: SegmentTranscriptionModelWithWords
+    ) -> List[WordTranscriptionModel]:
+        """
+        Get the words of a window transcription in media time, with ids distinct from the other windows.
+        Args:
+            - start: Start of the window in seconds.
+            - window_transcription: Transcription of the window audio.
+        Returns:
+            - The words of the window.
+        """
+        return [
+            word.model_copy(update={"id": f"w{start:.2f}.{word.id}", "segment_id": f"w{start:.2f}.{word.segment_id}"})
+            for word in offset_transcription(window_transcription, start).words
+        ]
+
+    @staticmethod
+    def _merge_window_words(
+        words: List[WordTranscriptionModel],
+        window_words: List[List[WordTranscriptionModel]],
+    ) -> List[WordTranscriptionModel]:
+        """
+        Replace the interpolated words with the transcribed ones where the windows have words.
+        Only the span covered by the transcribed words of a window is replaced, as the words
+        cut by the window edges are not transcribed.
+        Args:
+            - words: Interpolated words of the whole file.
+            - window_words: Transcribed words of each window.
+        Returns:
+            - The merged words sorted by start time.
+        """
+        spans = [
+            (precise_words[0].start, precise_words[-1].end) for precise_words in window_words if precise_words
+        ]
+
+        def in_window(word: WordTranscriptionModel) -> bool:
+            middle = (word.start + word.end) / 2
+            return any(start <= middle <= end for start, end in spans)
+
+        merged = [word for word in words if not in_window(word)]
+        merged.extend(word for precise_words in window_words for word in precise_words)
+        return sorted(merged, key=lambda word: word.start)
+
+    def _refine_alignment(
+        self,
+        paragraph: ParagraphItem,
+        alignment: ParagraphAlignmentWithWords,
+        start_words: List[WordTranscriptionModel],
+        end_words: List[WordTranscriptionModel],
+        words: List[WordTranscriptionModel],
+    ) -> ParagraphAlignmentWithWords:
+        """
+        Re-match the paragraph start and end on the transcribed words of their windows.
+        A boundary keeps its interpolated time when its words do not match well enough.
+        Args:
+            - paragraph: The paragraph.
+            - alignment: Its alignment on the segment-level transcription.
+            - start_words: Transcribed words of the window around the start.
+            - end_words: Transcribed words of the window around the end.
+            - words: Merged words of the whole file.
+        Returns:
+            - The refined ParagraphAlignmentWithWords.
+        """
+        update = {}
+        start_match = self.aligner.align_paragraph_with_words(paragraph=paragraph.text, words=start_words)
+        if start_match and start_match.best_start_match and start_match.best_start_match.score > 0.5:
+            update.update(start=start_match.start, best_start_match=start_match.best_start_match)
+        end_match = self.aligner.align_paragraph_with_words(paragraph=paragraph.text, words=end_words)
+        if end_match and end_match.best_end_match and end_match.best_end_match.score > 0.5:
+            update.update(end=end_match.end, best_end_match=end_match.best_end_match)
+
+        start = update.get("start", alignment.start)
+        end = update.get("end", alignment.end)
+        update["paragraph_words"] = [word for word in words if word.start >= start and word.end <= end]
+        return alignment.model_copy(update=update)
@@ -0,0 +1,204 @@
+from typing import BinaryIO, List, Optional, Tuple
+from starlette.concurrency import run_in_threadpool
+
+from timestamp_whisper.core import TranscriberInterface, AlignerInterface
+from timestamp_whisper.core.types import DEFAULT_REFINE_SCORE_THRESHOLD, DEFAULT_REFINE_WINDOW_PADDING
+from timestamp_whisper.models import DecodeOptions, SegmentTranscriptionModelWithWords
+from timestamp_whisper.models.aligner_models import ParagraphAlignmentWithWords, ParagraphItem
+from timestamp_whisper.services.file_chunks_timestamp_service import FileChunksTimestampService
+from timestamp_whisper.services.transcription_flight import transcribe_single_flight
+from timestamp_whisper.utils import (
+    load_audio_samples,
+    offset_transcription,
+    samples_to_wav,
+    slice_samples,
+    splice_transcription,
+)
+
+
+class CoarseToFineTimestampService(FileChunksTimestampService):
+    """
+    Service for two-tier paragraph timestamps.
+
+    The whole file is transcribed with a fast coarse model and aligned; only the
+    audio windows around paragraph boundaries with a low match score are
+    re-transcribed with the fine model and spliced back before re-aligning.
+    """
+
+    def __init__(
+        self,
+        transcriber: TranscriberInterface,
+        fine_transcriber: TranscriberInterface,
+        aligner: AlignerInterface,
+        decode_options: Optional[DecodeOptions] = None,
+        score_threshold: float = DEFAULT_REFINE_SCORE_THRESHOLD,
+        window_padding: float = DEFAULT_REFINE_WINDOW_PADDING,
+    ):
+        """
+        Initializes the CoarseToFineTimestampService.
+        Args:
+            - transcriber: Fast transcriber used for the whole file.
+            - fine_transcriber: Accurate transcriber used for uncertain windows.
+            - aligner: Aligner used for both passes.
+            - decode_options: Decoding parameters used by both transcribers.
+            - score_threshold: Boundary match score below which a boundary is refined.
+            - window_padding: Seconds of audio kept around an uncertain boundary.
+        """
+        super().__init__(transcriber=transcriber, aligner=aligner, decode_options=decode_options)
+        self.fine_transcriber = fine_transcriber
+        self.score_threshold = score_threshold
+        self.window_padding = window_padding
+
+    def _paragraphs_from_transcription(
+        self,
+        paragraphs: List[ParagraphItem],
+        audio: BinaryIO,
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+    ) -> List[ParagraphAlignmentWithWords]:
+        """
+        Align the paragraphs on the coarse transcription, then refine the uncertain boundaries.
+        Args:
+            - paragraphs: List of paragraphs to be aligned.
+            - audio: Audio data being processed.
+            - transcribed_segments_with_words: The coarse transcription.
+        Returns:
+            - List of ParagraphAlignmentWithWords objects, one per paragraph.
+        """
+        alignments = self._align_paragraphs(paragraphs, transcribed_segments_with_words)
+
+        windows = self._uncertain_windows(alignments, transcribed_segments_with_words)
+        if not windows:
+            return alignments
+
+        refined_transcription = self._refine_windows(audio, windows, transcribed_segments_with_words)
+        return self._align_paragraphs(paragraphs, refined_transcription)
+
+    async def _aparagraphs_from_transcription(
+        self,
+        paragraphs: List[ParagraphItem],
+        audio: BinaryIO,
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+        tenant: Optional[str] = None,
+    ) -> List[ParagraphAlignmentWithWords]:
+        """
+        Align the paragraphs on the coarse transcription, then refine the uncertain boundaries
+        through the async fine transcriber.
+        Args:
+            - paragraphs: List of paragraphs to be aligned.
+            - audio: Audio data being processed.
+            - transcribed_segments_with_words: The coarse transcription.
+            - tenant: API key or tenant of the request, used by the transcription scheduler.
+        Returns:
+            - List of ParagraphAlignmentWithWords objects, one per paragraph.
+        """
+        alignments = await run_in_threadpool(self._align_paragraphs, paragraphs, transcribed_segments_with_words)
+
+        windows = self._uncertain_windows(alignments, transcribed_segments_with_words)
+        if not windows:
+            return alignments
+
+        refined_transcription = await self._arefine_windows(
+            audio, windows, transcribed_segments_with_words, tenant=tenant
+        )
+        return await run_in_threadpool(self._align_paragraphs, paragraphs, refined_transcription)
+
+    def _uncertain_windows(
+        self,
+        alignments: List[ParagraphAlignmentWithWords],
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+    ) -> List[Tuple[float, float]]:
+        """
+        Find the audio windows around boundaries whose match score is below the threshold.
+        Windows are widened to whole coarse segments and overlapping windows are merged.
+        Args:
+            - alignments: Paragraph alignments of the coarse pass.
+            - transcribed_segments_with_words: The coarse transcription.
+        Returns:
+            - Sorted list of (start, end) windows in seconds.
+        """
+        boundaries = []
+        for alignment in alignments:
+            if not alignment.best_start_match or alignment.best_start_match.score < self.score_threshold:
+                boundaries.append(alignment.start)
+            if not alignment.best_end_match or alignment.best_end_match.score < self.score_threshold:
+                boundaries.append(alignment.end)
+
+        windows = []
+        for boundary in boundaries:
+            start = max(0.0, boundary - self.window_padding)
+            end = boundary + self.window_padding
+            overlapping = [
+                segment for segment in transcribed_segments_with_words.segments
+                if segment.end >= start and segment.start <= end
+            ]
+            if overlapping:
+                start = min(start, min(segment.start for segment in overlapping))
+                end = max(end, max(segment.end for segment in overlapping))
+            windows.append((start, end))
+
+        merged: List[Tuple[float, float]] = []
+        for start, end in sorted(windows):
+            if merged and start <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def _refine_windows(
+        self,
+        audio: BinaryIO,
+        windows: List[Tuple[float, float]],
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Re-transcribe the windows with the fine transcriber and splice them into the coarse transcription.
+        Args:
+            - audio: Audio data to be processed.
+            - windows: List of (start, end) windows in seconds.
+            - transcribed_segments_with_words: The coarse transcription.
+        Returns:
+            - The refined transcription.
+        """
+        samples = load_audio_samples(audio)
+        replacements = []
+        for start, end in windows:
+            window_transcription = self.fine_transcriber.transcribe_segments_with_words_timestamp(
+                audio_path=samples_to_wav(slice_samples(samples, start, end)),
+                **self._transcription_kwargs(),
+            )
+            replacements.append(
+                (start, end, offset_transcription(window_transcription, start))
+            )
+        return splice_transcription(transcribed_segments_with_words, replacements)
+
+    async def _arefine_windows(
+        self,
+        audio: BinaryIO,
+        windows: List[Tuple[float, float]],
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+        tenant: Optional[str] = None,
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Re-transcribe the windows with the async fine transcriber and splice them into the coarse transcription.
+        The windows are scheduled with the request's tenant and shared with identical windows in flight.
+        Args:
+            - audio: Audio data to be processed.
+            - windows: List of (start, end) windows in seconds.
+            - transcribed_segments_with_words: The coarse transcription.
+            - tenant: API key or tenant of the request.
+        Returns:
+            - The refined transcription.
+        """
+        samples = await run_in_threadpool(load_audio_samples, audio)
+        replacements = []
+        for start, end in windows:
+            window_transcription = await transcribe_single_flight(
+                self.fine_transcriber,
+                samples_to_wav(slice_samples(samples, start, end)),
+                tenant=tenant,
+                **self._transcription_kwargs(),
+            )
+            replacements.append(
+                (start, end, offset_transcription(window_transcription, start))
+            )
+        return splice_transcription(transcribed_segments_with_words, replacements)
@@ -1,8 +1,17 @@
-from typing import BinaryIO, List, Union
+from typing import BinaryIO, List, Optional, Union
+from starlette.concurrency import run_in_threadpool
 
 from timestamp_whisper.core import TranscriberInterface, AlignerInterface
-from timestamp_whisper.models import ParagraphAlignment
+from timestamp_whisper.core.profile import get_decode_options
+from timestamp_whisper.core.types import (
+    DEFAULT_ALIGNMENT_SEARCH_LENGTH,
+    DEFAULT_DECODE_PRESET,
+    DEFAULT_MIN_WORD_MATCH_SCORE,
+)
+from timestamp_whisper.models import DecodeOptions, ParagraphAlignment, SegmentTranscriptionModelWithWords
 from timestamp_whisper.models.aligner_models import ParagraphAlignmentWithWords, ParagraphItem
+from timestamp_whisper.services.transcription_flight import transcribe_single_flight
+from timestamp_whisper.utils.cancellation_util import check_cancelled
 
 
 class FileChunksTimestampService:
@@ -13,12 +22,19 @@ class FileChunksTimestampService:
     and returns their timestamps using a specified transcriber and aligner.
     """
 
-    def __init__(self, transcriber: TranscriberInterface, aligner: AlignerInterface):
+    def __init__(
+        self,
+        transcriber: TranscriberInterface,
+        aligner: AlignerInterface,
+        decode_options: Optional[DecodeOptions] = None,
+    ):
         """
         Initializes the FileChunksTimestampPipeline with a transcriber and aligner.
+        Decoding parameters default to the accurate preset of the active compute profile.
         """
         self.transcriber = transcriber
         self.aligner = aligner
+        self.decode_options = decode_options or get_decode_options(DEFAULT_DECODE_PRESET)
 
     def get_paragraphs_timestamp(
         self,
@@ -30,96 +46,243 @@ class FileChunksTimestampService:
         Args:
             - paragraphs: List of paragraphs to be aligned with audio segments.
             - audio: Audio data to be processed.
-            - transcriber_model: Name of the transcription model to use.
         Returns:
             - List of ParagraphAlignment objects containing the start timestamps of each paragraph.
         """
         try:
-            print(1)
             if not paragraphs or not audio:
                 return []
-            print(paragraphs)
-            transcribed_segments_with_words = (
-                self.transcriber.transcribe_segments_with_words_timestamp(
-                    audio_path=audio,
-                    vad_filter=True,
-                    vad_parameters=dict(
-                        threshold=0.3,
-                        min_speech_duration_ms=1000
-                    ),
-                    chunk_length=3,
-                    beam_size=5,  # Use beam search instead of sampling
-                    best_of=5,    # Number of candidates when using sampling
-                    temperature=0.0,  # Disable sampling randomness
-                )
-            )
-            print(f"segments: {transcribed_segments_with_words.segments}")
-            print("----------")
-            print(f"words: {transcribed_segments_with_words.words}")
+            transcribed_segments_with_words = self._transcribe(audio)
             if not transcribed_segments_with_words:
                 return []
-            paragraphs_timestamps = []
-            for paragraph in paragraphs:
-                # Align the paragraph with audio segments timestamp
-                segment_alignment = self.aligner.align_paragraph_with_segments(
-                    paragraph.text, transcribed_segments_with_words.segments, search_length=10
-                )
-                print("------")
-                print(f"segment_alignment: {segment_alignment}")
-                # Align the paragraph with audio words timestamp
-                if segment_alignment:
-                    # Get the start word of the paragraph
-                    start_segments_words = [
-                        word
-                        for word in transcribed_segments_with_words.words
-                        if str(word.segment_id)
-                        in [str(segment_alignment.best_start_match.id), str(int(segment_alignment.best_start_match.id) - 1), str(int(segment_alignment.best_start_match.id) - 2)]
-                    ]
-                    paragraph_start_word = self.aligner.align_paragraph_with_words(
-                        paragraph=paragraph.text,
-                        words=start_segments_words,
-                    )
-                    paragraph_start = (
-                        paragraph_start_word
-                        if paragraph_start_word.best_start_match
-                        and paragraph_start_word.best_start_match.score > 0.5
-                        else segment_alignment
-                    )
-
-                    # Get the start word of the paragraph
-                    end_segments_words = [
-                        word
-                        for word in transcribed_segments_with_words.words
-                        if str(word.segment_id)
-                        in [str(segment_alignment.best_end_match.id), str(int(segment_alignment.best_end_match.id) +  1), str(int(segment_alignment.best_end_match.id) +  2)]
-                    ]
-                    paragraph_end_word = self.aligner.align_paragraph_with_words(
-                        paragraph=paragraph.text, words=end_segments_words
-                    )
-                    paragraph_end = (
-                        paragraph_end_word
-                        if paragraph_end_word.best_end_match
-                        and paragraph_end_word.best_end_match.score > 0.5
-                        else segment_alignment
-                    )
-                    # Get paragraph words
-                    paragraph_words = [word for word in transcribed_segments_with_words.words if word.start >=
-                                       paragraph_start.start and word.end <= paragraph_end.end]
-                    # Create a ParagraphAlignment object with the paragraph and its timestamps
-                    paragraphs_timestamps.append(
-                        ParagraphAlignmentWithWords(
-                            paragraph=paragraph.text,
-                            paragraph_index=paragraph.paragraph_index,
-                            start=paragraph_start.start,
-                            end=paragraph_end.end,
-                            best_start_match=paragraph_start.best_start_match,
-                            best_end_match=paragraph_end.best_end_match,
-                            paragraph_words=paragraph_words,
-                        )
-                    )
-
-                else:
-                    raise Exception(f"No alignment found for paragraph: {paragraph}")
-            return paragraphs_timestamps
+            return self._paragraphs_from_transcription(paragraphs, audio, transcribed_segments_with_words)
         except Exception as e:
             raise Exception(f"Error in get_paragraphs_timestamp: {str(e)}")
+
+    async def aget_paragraphs_timestamp(
+        self,
+        paragraphs: List[ParagraphItem],
+        audio: BinaryIO,
+        tenant: Optional[str] = None,
+    ) -> List[ParagraphAlignment]:
+        """
+        Get timestamps for paragraphs aligned with audio segments, without blocking the event loop.
+        Concurrent requests for the same audio and decoding parameters share one transcription.
+        Args:
+            - paragraphs: List of paragraphs to be aligned with audio segments.
+            - audio: Audio data to be processed.
+            - tenant: API key or tenant of the request, used by the transcription scheduler.
+        Returns:
+            - List of ParagraphAlignment objects containing the start timestamps of each paragraph.
+        """
+        try:
+            if not paragraphs or not audio:
+                return []
+            transcribed_segments_with_words = await self._atranscribe(audio, tenant=tenant)
+            if not transcribed_segments_with_words:
+                return []
+            return await self._aparagraphs_from_transcription(
+                paragraphs, audio, transcribed_segments_with_words, tenant=tenant
+            )
+        except Exception as e:
+            raise Exception(f"Error in get_paragraphs_timestamp: {str(e)}")
+
+    def _paragraphs_from_transcription(
+        self,
+        paragraphs: List[ParagraphItem],
+        audio: BinaryIO,
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+    ) -> List[ParagraphAlignmentWithWords]:
+        """
+        Get the paragraph timestamps once the audio is transcribed.
+        Args:
+            - paragraphs: List of paragraphs to be aligned.
+            - audio: Audio data being processed.
+            - transcribed_segments_with_words: Transcription with segment-level and word-level timestamps.
+        Returns:
+            - List of ParagraphAlignmentWithWords objects, one per paragraph.
+        """
+        return self._align_paragraphs(paragraphs, transcribed_segments_with_words)
+
+    async def _aparagraphs_from_transcription(
+        self,
+        paragraphs: List[ParagraphItem],
+        audio: BinaryIO,
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+        tenant: Optional[str] = None,
+    ) -> List[ParagraphAlignmentWithWords]:
+        """
+        Get the paragraph timestamps once the audio is transcribed, aligning in a worker thread.
+        Services transcribing again after the first alignment override it to await their transcribers.
+        Args:
+            - paragraphs: List of paragraphs to be aligned.
+            - audio: Audio data being processed.
+            - transcribed_segments_with_words: Transcription with segment-level and word-level timestamps.
+            - tenant: API key or tenant of the request, used by the transcription scheduler.
+        Returns:
+            - List of ParagraphAlignmentWithWords objects, one per paragraph.
+        """
+        return await run_in_threadpool(
+            self._paragraphs_from_transcription, paragraphs, audio, transcribed_segments_with_words
+        )
+
+    def _transcription_kwargs(self) -> dict:
+        """
+        Get the keyword arguments passed to the transcriber.
+        Returns:
+            - Dictionary of VAD and decoding parameters.
+        """
+        return dict(
+            vad_filter=True,
+            vad_parameters=dict(
+                threshold=0.3,
+                min_speech_duration_ms=1000
+            ),
+            **self.decode_options.model_dump(),
+        )
+
+    def _transcribe(self, audio: BinaryIO) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the audio with segment-level and word-level timestamps.
+        Args:
+            - audio: Audio data to be processed.
+        Returns:
+            - The transcription of the audio.
+        """
+        return self.transcriber.transcribe_segments_with_words_timestamp(
+            audio_path=audio,
+            **self._transcription_kwargs(),
+        )
+
+    async def _atranscribe(self, audio: BinaryIO, tenant: Optional[str] = None) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the audio with segment-level and word-level timestamps in a worker thread,
+        joining an identical transcription already in flight.
+        Args:
+            - audio: Audio data to be processed.
+            - tenant: API key or tenant of the request.
+        Returns:
+            - The transcription of the audio.
+        """
+        return await transcribe_single_flight(
+            self.transcriber, audio, tenant=tenant, **self._transcription_kwargs()
+        )
+
+    def _align_paragraphs(
+        self,
+        paragraphs: List[ParagraphItem],
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+    ) -> List[ParagraphAlignmentWithWords]:
+        """
+        Align every paragraph with the transcription, stopping between paragraphs when the request is cancelled.
+        Args:
+            - paragraphs: List of paragraphs to be aligned.
+            - transcribed_segments_with_words: Transcription with segment-level and word-level timestamps.
+        Returns:
+            - List of ParagraphAlignmentWithWords objects, one per paragraph.
+        """
+        alignments = []
+        for paragraph in paragraphs:
+            check_cancelled()
+            alignments.append(self._align_paragraph(paragraph, transcribed_segments_with_words))
+        return alignments
+
+    def _align_paragraph(
+        self,
+        paragraph: ParagraphItem,
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+    ) -> ParagraphAlignmentWithWords:
+        """
+        Align a paragraph with the segments first, then refine its boundaries with the words
+        of the best matching segments and their neighbours. Single-pass aligners search the
+        words of the whole transcription directly.
+        Args:
+            - paragraph: The paragraph to align.
+            - transcribed_segments_with_words: Transcription with segment-level and word-level timestamps.
+        Returns:
+            - ParagraphAlignmentWithWords object with the paragraph timestamps and words.
+        """
+        if self.aligner.single_pass:
+            word_alignment = self.aligner.align_paragraph_with_words(
+                paragraph=paragraph.text,
+                words=transcribed_segments_with_words.words,
+                search_length=DEFAULT_ALIGNMENT_SEARCH_LENGTH,
+            )
+            if not word_alignment:
+                raise Exception(f"No alignment found for paragraph: {paragraph}")
+            return self._paragraph_alignment(paragraph, word_alignment, word_alignment, transcribed_segments_with_words)
+
+        # Align the paragraph with audio segments timestamp
+        segment_alignment = self.aligner.align_paragraph_with_segments(
+            paragraph.text, transcribed_segments_with_words.segments, search_length=DEFAULT_ALIGNMENT_SEARCH_LENGTH
+        )
+        if not segment_alignment:
+            raise Exception(f"No alignment found for paragraph: {paragraph}")
+
+        # Align the paragraph with audio words timestamp
+        # Get the start word of the paragraph
+        start_segments_words = [
+            word
+            for word in transcribed_segments_with_words.words
+            if str(word.segment_id)
+            in [str(segment_alignment.best_start_match.id), str(int(segment_alignment.best_start_match.id) - 1), str(int(segment_alignment.best_start_match.id) - 2)]
+        ]
+        paragraph_start_word = self.aligner.align_paragraph_with_words(
+            paragraph=paragraph.text,
+            words=start_segments_words,
+        )
+        paragraph_start = (
+            paragraph_start_word
+            if paragraph_start_word.best_start_match
+            and paragraph_start_word.best_start_match.score > DEFAULT_MIN_WORD_MATCH_SCORE
+            else segment_alignment
+        )
+
+        # Get the start word of the paragraph
+        end_segments_words = [
+            word
+            for word in transcribed_segments_with_words.words
+            if str(word.segment_id)
+            in [str(segment_alignment.best_end_match.id), str(int(segment_alignment.best_end_match.id) +  1), str(int(segment_alignment.best_end_match.id) +  2)]
+        ]
+        paragraph_end_word = self.aligner.align_paragraph_with_words(
+            paragraph=paragraph.text, words=end_segments_words
+        )
+        paragraph_end = (
+            paragraph_end_word
+            if paragraph_end_word.best_end_match
+            and paragraph_end_word.best_end_match.score > DEFAULT_MIN_WORD_MATCH_SCORE
+            else segment_alignment
+        )
+        return self._paragraph_alignment(paragraph, paragraph_start, paragraph_end, transcribed_segments_with_words)
+
+    def _paragraph_alignment(
+        self,
+        paragraph: ParagraphItem,
+        paragraph_start: ParagraphAlignment,
+        paragraph_end: ParagraphAlignment,
+        transcribed_segments_with_words: SegmentTranscriptionModelWithWords,
+    ) -> ParagraphAlignmentWithWords:
+        """
+        Build the alignment of a paragraph from the matches of its start and end.
+        Args:
+            - paragraph: The aligned paragraph.
+            - paragraph_start: Alignment whose start and best_start_match are kept.
+            - paragraph_end: Alignment whose end and best_end_match are kept.
+            - transcribed_segments_with_words: Transcription with segment-level and word-level timestamps.
+        Returns:
+            - ParagraphAlignmentWithWords object with the paragraph timestamps and words.
+        """
+        # Get paragraph words
+        paragraph_words = [word for word in transcribed_segments_with_words.words if word.start >=
+                           paragraph_start.start and word.end <= paragraph_end.end]
+        # Create a ParagraphAlignment object with the paragraph and its timestamps
+        return ParagraphAlignmentWithWords(
+            paragraph=paragraph.text,
+            paragraph_index=paragraph.paragraph_index,
+            start=paragraph_start.start,
+            end=paragraph_end.end,
+            best_start_match=paragraph_start.best_start_match,
+            best_end_match=paragraph_end.best_end_match,
+            paragraph_words=paragraph_words,
+        )
@@ -0,0 +1,382 @@
+import bisect
+import string
+from typing import BinaryIO, List, NamedTuple, Optional, Tuple
+import numpy as np
+from rapidfuzz import fuzz
+from starlette.concurrency import run_in_threadpool
+
+from timestamp_whisper.core import TranscriberInterface, AlignerInterface
+from timestamp_whisper.core.aligner.search_index import ConcatenatedChunkIndex
+from timestamp_whisper.core.profile import get_decode_options
+from timestamp_whisper.core.types import (
+    DEFAULT_SCRIPT_CONTEXT_WORDS,
+    DEFAULT_SCRIPT_DECODE_PRESET,
+    DEFAULT_SCRIPT_HINT_WORDS,
+    DEFAULT_SCRIPT_MAX_COMPRESSION_RATIO,
+    DEFAULT_SCRIPT_MIN_AVG_LOGPROB,
+    DEFAULT_SCRIPT_MIN_MATCH_SCORE,
+    DEFAULT_SCRIPT_OVERLAP_SECONDS,
+    DEFAULT_SCRIPT_WINDOW_SECONDS,
+)
+from timestamp_whisper.models import (
+    DecodeOptions,
+    ParagraphAlignment,
+    SegmentTranscriptionModel,
+    SegmentTranscriptionModelWithWords,
+    WordTranscriptionModel,
+)
+from timestamp_whisper.models.aligner_models import ParagraphItem
+from timestamp_whisper.services.file_chunks_timestamp_service import FileChunksTimestampService
+from timestamp_whisper.services.transcription_flight import transcribe_single_flight
+from timestamp_whisper.utils import (
+    load_audio_samples,
+    merge_transcriptions,
+    offset_transcription,
+    samples_to_wav,
+    slice_samples,
+)
+from timestamp_whisper.utils.audio_util import SAMPLE_RATE
+from timestamp_whisper.utils.cancellation_util import check_cancelled
+from timestamp_whisper.utils.metrics_util import metrics
+from timestamp_whisper.utils.transcription_util import group_words_by_segment
+
+
+PUNCTUATION_TABLE = str.maketrans("", "", string.punctuation)
+
+script_decode_windows = metrics.counter(
+    "script_decode_windows_total",
+    "Windows decoded by the script_conditioned pipeline, by decoding (conditioned, fallback).",
+    ("decoding",),
+)
+
+
+class ScriptWord(NamedTuple):
+    """A word of the script, with its position in the script."""
+
+    text: str
+    position: int
+
+
+class WindowTranscription(NamedTuple):
+    """The segments kept from a window, where the next window starts and the match of the window with the script."""
+
+    pieces: List[Tuple[SegmentTranscriptionModel, List[WordTranscriptionModel]]]
+    next_start: float
+    score: Optional[float]
+    cursor: int
+
+
+class ScriptConditionedTimestampService(FileChunksTimestampService):
+    """
+    Service for paragraph timestamps decoded as a verification of the known script.
+
+    The audio is transcribed in consecutive windows of Whisper's 30 s context, with greedy (fast
+    preset) decoding conditioned on the script: the words read just before the window are its
+    initial_prompt and the next words of the script its hotwords. A script cursor follows the
+    transcription, so each window is prompted with the text expected at its position. A window
+    is decoded again with the decoding parameters of the service (the accurate preset by default)
+    and without the script when its decoding confidence is low (avg_logprob, compression ratio)
+    or its words do not match the script, so a speaker leaving the script is transcribed as
+    spoken. Words ending in the last overlap_seconds of a window are transcribed again at the
+    start of the next one, so no word is cut by a window edge. Transcribers without decoding
+    confidence fall back on the match score only.
+    """
+
+    def __init__(
+        self,
+        transcriber: TranscriberInterface,
+        aligner: AlignerInterface,
+        decode_options: Optional[DecodeOptions] = None,
+        conditioned_decode_options: Optional[DecodeOptions] = None,
+        window_seconds: float = DEFAULT_SCRIPT_WINDOW_SECONDS,
+        overlap_seconds: float = DEFAULT_SCRIPT_OVERLAP_SECONDS,
+        context_words: int = DEFAULT_SCRIPT_CONTEXT_WORDS,
+        hint_words: int = DEFAULT_SCRIPT_HINT_WORDS,
+        min_avg_logprob: float = DEFAULT_SCRIPT_MIN_AVG_LOGPROB,
+        max_compression_ratio: float = DEFAULT_SCRIPT_MAX_COMPRESSION_RATIO,
+        min_match_score: float = DEFAULT_SCRIPT_MIN_MATCH_SCORE,
+    ):
+        """
+        Initializes the ScriptConditionedTimestampService.
+        Args:
+            - transcriber: Transcriber of the windows.
+            - aligner: Aligner of the paragraphs with the transcription.
+            - decode_options: Decoding parameters of the windows decoded again without the script.
+            - conditioned_decode_options: Decoding parameters with the script, the fast preset by default.
+            - window_seconds: Audio transcribed at once.
+            - overlap_seconds: End of a window whose words are transcribed again by the next one.
+            - context_words: Script words before the cursor passed as initial_prompt.
+            - hint_words: Script words after the cursor passed as hotwords.
+            - min_avg_logprob: Average log probability of a segment below which its window is decoded again.
+            - max_compression_ratio: Compression ratio of a segment above which its window is decoded again.
+            - min_match_score: Score of the match with the script below which a window is decoded again.
+        """
+        super().__init__(transcriber=transcriber, aligner=aligner, decode_options=decode_options)
+        self.conditioned_decode_options = (
+            conditioned_decode_options or get_decode_options(DEFAULT_SCRIPT_DECODE_PRESET)
+        )
+        self.window_seconds = window_seconds
+        self.overlap_seconds = min(overlap_seconds, window_seconds / 2)
+        self.context_words = context_words
+        self.hint_words = hint_words
+        self.min_avg_logprob = min_avg_logprob
+        self.max_compression_ratio = max_compression_ratio
+        self.min_match_score = min_match_score
+
+    def get_paragraphs_timestamp(
+        self,
+        paragraphs: List[ParagraphItem],
+        audio: BinaryIO,
+    ) -> List[ParagraphAlignment]:
+        """
+        Get timestamps for paragraphs aligned with audio transcribed with the paragraphs as script.
+        Args:
+            - paragraphs: List of paragraphs to be aligned with audio segments.
+            - audio: Audio data to be processed.
+        Returns:
+            - List of ParagraphAlignment objects containing the start timestamps of each paragraph.
+        """
+        try:
+            if not paragraphs or not audio:
+                return []
+            transcribed_segments_with_words = self._transcribe_script(paragraphs, audio)
+            if not transcribed_segments_with_words.segments:
+                return []
+            return self._paragraphs_from_transcription(paragraphs, audio, transcribed_segments_with_words)
+        except Exception as e:
+            raise Exception(f"Error in get_paragraphs_timestamp: {str(e)}")
+
+    async def aget_paragraphs_timestamp(
+        self,
+        paragraphs: List[ParagraphItem],
+        audio: BinaryIO,
+        tenant: Optional[str] = None,
+    ) -> List[ParagraphAlignment]:
+        """
+        Get timestamps for paragraphs aligned with audio transcribed with the paragraphs as script,
+        without blocking the event loop. The windows go through the transcription scheduler one by one.
+        Args:
+            - paragraphs: List of paragraphs to be aligned with audio segments.
+            - audio: Audio data to be processed.
+            - tenant: API key or tenant of the request, used by the transcription scheduler.
+        Returns:
+            - List of ParagraphAlignment objects containing the start timestamps of each paragraph.
+        """
+        try:
+            if not paragraphs or not audio:
+                return []
+            transcribed_segments_with_words = await self._atranscribe_script(paragraphs, audio, tenant=tenant)
+            if not transcribed_segments_with_words.segments:
+                return []
+            return await self._aparagraphs_from_transcription(
+                paragraphs, audio, transcribed_segments_with_words, tenant=tenant
+            )
+        except Exception as e:
+            raise Exception(f"Error in get_paragraphs_timestamp: {str(e)}")
+
+    def _transcribe_script(
+        self, paragraphs: List[ParagraphItem], audio: BinaryIO
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the audio window by window, conditioned on the script.
+        Args:
+            - paragraphs: The script.
+            - audio: Audio data to be processed.
+        Returns:
+            - The transcription of the audio.
+        """
+        samples = load_audio_samples(audio)
+        script, index = self._script_index(paragraphs)
+        pieces: List[Tuple[SegmentTranscriptionModel, List[WordTranscriptionModel]]] = []
+        start, cursor = 0.0, 0
+        while start < len(samples) / SAMPLE_RATE:
+            check_cancelled()
+            end, final, window = self._window(samples, start)
+            transcription = self.transcriber.transcribe_segments_with_words_timestamp(
+                audio_path=window, **self._conditioned_kwargs(script, cursor)
+            )
+            result = self._commit_window(start, end, final, transcription, index, cursor)
+            if self._needs_fallback(result):
+                script_decode_windows.inc(decoding="fallback")
+                transcription = self.transcriber.transcribe_segments_with_words_timestamp(
+                    audio_path=window, **self._transcription_kwargs()
+                )
+                result = self._commit_window(start, end, final, transcription, index, cursor)
+            else:
+                script_decode_windows.inc(decoding="conditioned")
+            pieces.extend(result.pieces)
+            start, cursor = result.next_start, result.cursor
+        return merge_transcriptions(pieces)
+
+    async def _atranscribe_script(
+        self, paragraphs: List[ParagraphItem], audio: BinaryIO, tenant: Optional[str] = None
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the audio window by window, conditioned on the script, through the async transcriber.
+        Args:
+            - paragraphs: The script.
+            - audio: Audio data to be processed.
+            - tenant: API key or tenant of the request.
+        Returns:
+            - The transcription of the audio.
+        """
+        samples = await run_in_threadpool(load_audio_samples, audio)
+        script, index = await run_in_threadpool(self._script_index, paragraphs)
+        pieces: List[Tuple[SegmentTranscriptionModel, List[WordTranscriptionModel]]] = []
+        start, cursor = 0.0, 0
+        while start < len(samples) / SAMPLE_RATE:
+            end, final, window = self._window(samples, start)
+            transcription = await transcribe_single_flight(
+                self.transcriber, window, tenant=tenant, **self._conditioned_kwargs(script, cursor)
+            )
+            result = self._commit_window(start, end, final, transcription, index, cursor)
+            if self._needs_fallback(result):
+                script_decode_windows.inc(decoding="fallback")
+                transcription = await transcribe_single_flight(
+                    self.transcriber, window, tenant=tenant, **self._transcription_kwargs()
+                )
+                result = self._commit_window(start, end, final, transcription, index, cursor)
+            else:
+                script_decode_windows.inc(decoding="conditioned")
+            pieces.extend(result.pieces)
+            start, cursor = result.next_start, result.cursor
+        return merge_transcriptions(pieces)
+
+    def _script_index(self, paragraphs: List[ParagraphItem]) -> Tuple[List[str], ConcatenatedChunkIndex]:
+        """
+        Get the words of the script and their normalized concatenation, searched for the script cursor.
+        Args:
+            - paragraphs: The script.
+        Returns:
+            - The words of the script and their index.
+        """
+        script = [word for paragraph in paragraphs for word in paragraph.text.split()]
+        index = ConcatenatedChunkIndex(
+            [ScriptWord(text=word, position=position) for position, word in enumerate(script)],
+            normalize=self._normalize,
+        )
+        return script, index
+
+    def _window(self, samples: np.ndarray, start: float) -> Tuple[float, bool, BinaryIO]:
+        """
+        Get the window of audio starting at a time.
+        Args:
+            - samples: Samples of the whole audio.
+            - start: Start of the window in seconds.
+        Returns:
+            - The end of the window, whether it is the last one, and its audio.
+        """
+        duration = len(samples) / SAMPLE_RATE
+        end = min(duration, start + self.window_seconds)
+        return end, end >= duration, samples_to_wav(slice_samples(samples, start, end))
+
+    def _conditioned_kwargs(self, script: List[str], cursor: int) -> dict:
+        """
+        Get the keyword arguments of a window decoded with the script.
+        Args:
+            - script: The words of the script.
+            - cursor: Position in the script of the first word expected in the window.
+        Returns:
+            - Dictionary of VAD, decoding and prompt parameters.
+        """
+        kwargs = self._transcription_kwargs()
+        kwargs.update(
+            self.conditioned_decode_options.model_dump(),
+            initial_prompt=" ".join(script[max(0, cursor - self.context_words):cursor]) or None,
+            hotwords=" ".join(script[cursor:cursor + self.hint_words]) or None,
+        )
+        return kwargs
+
+    def _commit_window(
+        self,
+        start: float,
+        end: float,
+        final: bool,
+        transcription: SegmentTranscriptionModelWithWords,
+        index: ConcatenatedChunkIndex,
+        cursor: int,
+    ) -> WindowTranscription:
+        """
+        Keep the segments of a window ending before its overlap, and match their text with the script.
+        Args:
+            - start: Start of the window in seconds.
+            - end: End of the window in seconds.
+            - final: Whether the window ends the audio, in which case every segment is kept.
+            - transcription: Transcription of the window audio.
+            - index: The normalized script.
+            - cursor: Position in the script of the first word expected in the window.
+        Returns:
+            - The kept segments with their words in media time, the start of the next window,
+              and the score (None without words) and cursor after the match with the script.
+        """
+        transcription = offset_transcription(transcription, start) if transcription else None
+        segments = transcription.segments if transcription else []
+        kept = segments if final else [segment for segment in segments if segment.end <= end - self.overlap_seconds]
+        if not kept and not final:
+            # A segment covering the whole window is kept rather than transcribed again forever
+            kept = segments
+        next_start = kept[-1].end if kept and kept[-1].end > start else end - self.overlap_seconds
+        if final:
+            next_start = end
+
+        words_by_segment = group_words_by_segment(transcription) if transcription else {}
+        pieces = [
+            (
+                segment,
+                [
+                    word.model_copy(update={"id": f"{start:.2f}.{word.id}"})
+                    for word in words_by_segment.get(str(segment.id), [])
+                ],
+            )
+            for segment in kept
+        ]
+        score, next_cursor = self._match_script(
+            " ".join(word.text for _, words in pieces for word in words), index, cursor
+        )
+        return WindowTranscription(pieces=pieces, next_start=next_start, score=score, cursor=next_cursor)
+
+    def _match_script(self, text: str, index: ConcatenatedChunkIndex, cursor: int) -> Tuple[Optional[float], int]:
+        """
+        Find the transcribed text of a window in the script, from a little before the cursor.
+        Args:
+            - text: Transcribed text of the window.
+            - index: The normalized script.
+            - cursor: Position in the script of the first word expected in the window.
+        Returns:
+            - The match score (None when there is nothing to match) and the position after the match.
+        """
+        search_text = self._normalize(text)
+        if not search_text or not index.chunks:
+            return None, cursor
+        position = bisect.bisect_left(index.chunks, cursor, key=lambda chunk: chunk.position)
+        first = max(0, min(len(index.chunks) - 1, position - self.context_words))
+        from_offset = index.offsets[first]
+        alignment = fuzz.partial_ratio_alignment(search_text, index.text[from_offset:])
+        if alignment is None:
+            return 0.0, cursor
+        score = alignment.score / 100
+        if score < self.min_match_score:
+            return score, cursor
+        _, last = index.span(from_offset + alignment.dest_start, from_offset + alignment.dest_end)
+        return score, max(cursor, index.chunks[last].position + 1)
+
+    def _needs_fallback(self, result: WindowTranscription) -> bool:
+        """
+        Check whether a window decoded with the script must be decoded again without it.
+        Args:
+            - result: The window decoded with the script.
+        Returns:
+            - Whether the decoding confidence or the match with the script is too low.
+        """
+        if result.score is not None and result.score < self.min_match_score:
+            return True
+        return any(
+            (segment.avg_logprob is not None and segment.avg_logprob < self.min_avg_logprob)
+            or (segment.compression_ratio is not None and segment.compression_ratio > self.max_compression_ratio)
+            for segment, _ in result.pieces
+        )
+
+    @staticmethod
+    def _normalize(text: str) -> str:
+        """Normalize the text for comparison: no punctuation, lowercase, single spaces."""
+        return " ".join(text.translate(PUNCTUATION_TABLE).lower().split())
@@ -0,0 +1,46 @@
+from typing import BinaryIO, Optional
+
+from timestamp_whisper.models import SegmentTranscriptionModelWithWords
+from timestamp_whisper.services.file_chunks_timestamp_service import FileChunksTimestampService
+from timestamp_whisper.services.transcription_flight import transcribe_single_flight
+from timestamp_whisper.utils.transcription_util import interpolate_words
+
+
+class SegmentOnlyTimestampService(FileChunksTimestampService):
+    """
+    Service for fast paragraph timestamps.
+
+    The audio is transcribed with segment-level timestamps only, which skips the word
+    alignment pass of the model. Paragraphs are aligned with the segments, and their
+    boundary words get timestamps interpolated inside the matched segments in proportion
+    to their number of letters.
+    """
+
+    def _transcribe(self, audio: BinaryIO) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the audio with segment-level timestamps and interpolate the word timestamps.
+        Args:
+            - audio: Audio data to be processed.
+        Returns:
+            - The transcription of the audio with interpolated words.
+        """
+        segments = self.transcriber.transcribe_segments_timestamp(
+            audio_path=audio,
+            **self._transcription_kwargs(),
+        )
+        return interpolate_words(segments)
+
+    async def _atranscribe(self, audio: BinaryIO, tenant: Optional[str] = None) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the audio with segment-level timestamps in a worker thread, joining an identical
+        transcription already in flight, and interpolate the word timestamps.
+        Args:
+            - audio: Audio data to be processed.
+            - tenant: API key or tenant of the request.
+        Returns:
+            - The transcription of the audio with interpolated words.
+        """
+        segments = await transcribe_single_flight(
+            self.transcriber, audio, tenant=tenant, segments_only=True, **self._transcription_kwargs()
+        )
+        return interpolate_words(segments)
@@ -0,0 +1,237 @@
+import bisect
+from typing import List, Optional
+import numpy as np
+
+from timestamp_whisper.core import TranscriberInterface, AlignerInterface
+from timestamp_whisper.core.profile import get_decode_options
+from timestamp_whisper.core.types import (
+    DEFAULT_STREAM_DECODE_PRESET,
+    DEFAULT_STREAM_LOOKAHEAD,
+    DEFAULT_STREAM_STABILITY_SECONDS,
+    DEFAULT_STREAM_START_SCORE,
+    DEFAULT_STREAM_STEP_SECONDS,
+    DEFAULT_STREAM_WINDOW_SECONDS,
+)
+from timestamp_whisper.models import DecodeOptions, SegmentTranscriptionModelWithWords, WordTranscriptionModel
+from timestamp_whisper.models.aligner_models import ParagraphItem
+from timestamp_whisper.services.file_chunks_timestamp_service import FileChunksTimestampService
+from timestamp_whisper.utils.audio_util import SAMPLE_RATE, samples_to_wav
+from timestamp_whisper.utils.transcription_util import offset_transcription
+
+
+# Committed words needed before a paragraph start is searched (the aligners match 3-word heads)
+MIN_START_WORDS = 3
+
+
+class StreamingAlignmentService(FileChunksTimestampService):
+    """
+    Service for the live alignment of a known script with a stream of audio.
+
+    The audio is transcribed in rolling windows starting at the last committed word. The words
+    ending more than stability_seconds before the end of the received audio are committed, the
+    others are transcribed again with more context at the next step. A paragraph cursor only
+    moves forward: the start of the paragraph under the cursor, or of one of the next lookahead
+    paragraphs when the speaker skipped some, is searched in the words committed since the
+    previous start, and is reported as soon as it is found. A window never exceeds
+    window_seconds: when the transcription falls behind, the oldest audio is skipped so the
+    reported starts stay a few seconds behind real time.
+    One instance serves one stream.
+    """
+
+    def __init__(
+        self,
+        transcriber: TranscriberInterface,
+        aligner: AlignerInterface,
+        paragraphs: List[ParagraphItem],
+        decode_options: Optional[DecodeOptions] = None,
+        step_seconds: float = DEFAULT_STREAM_STEP_SECONDS,
+        window_seconds: float = DEFAULT_STREAM_WINDOW_SECONDS,
+        stability_seconds: float = DEFAULT_STREAM_STABILITY_SECONDS,
+        start_score: float = DEFAULT_STREAM_START_SCORE,
+        lookahead: int = DEFAULT_STREAM_LOOKAHEAD,
+    ):
+        """
+        Initializes the service for the paragraphs of a stream.
+        Args:
+            - transcriber: Transcriber of the windows, loaded once and shared by the streams.
+            - aligner: Aligner searching the paragraph starts in the committed words.
+            - paragraphs: The script, in reading order.
+            - decode_options: Decoding parameters, the fast preset by default.
+            - step_seconds: Audio received between two transcriptions.
+            - window_seconds: Maximum audio transcribed at once.
+            - stability_seconds: Words ending closer than this to the end of the received audio are not committed yet.
+            - start_score: Minimum score of the match of a paragraph start.
+            - lookahead: Paragraphs after the cursor whose start is also searched, to follow skipped paragraphs.
+        """
+        super().__init__(
+            transcriber=transcriber,
+            aligner=aligner,
+            decode_options=decode_options or get_decode_options(DEFAULT_STREAM_DECODE_PRESET),
+        )
+        self.paragraphs = paragraphs
+        self.step_seconds = step_seconds
+        self.window_seconds = window_seconds
+        self.stability_seconds = stability_seconds
+        self.start_score = start_score
+        self.lookahead = lookahead
+        self.cursor = 0
+        self.words: List[WordTranscriptionModel] = []
+        self.starts: List[dict] = []
+        self.skipped: List[int] = []
+        self.committed_time = 0.0
+        self._chunks: List[np.ndarray] = []
+        self._buffer_start = 0.0
+        self._received_samples = 0
+        self._transcribed_until = 0.0
+        self._search_from = 0
+
+    @property
+    def received_seconds(self) -> float:
+        """Duration of the audio received so far."""
+        return self._received_samples / SAMPLE_RATE
+
+    @property
+    def pending_seconds(self) -> float:
+        """Audio received since the last transcription."""
+        return self.received_seconds - self._transcribed_until
+
+    @property
+    def finished(self) -> bool:
+        """Whether the start of every paragraph was found or skipped."""
+        return self.cursor >= len(self.paragraphs)
+
+    def add_audio(self, frame: bytes) -> None:
+        """
+        Append a frame of the stream.
+        Args:
+            - frame: 16 kHz mono audio, 16-bit little-endian PCM.
+        """
+        if len(frame) % 2:
+            raise ValueError("Audio frames must contain 16-bit PCM samples")
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32) / 32768.0
+        self._chunks.append(samples)
+        self._received_samples += len(samples)
+
+    async def advance(self, final: bool = False) -> List[dict]:
+        """
+        Transcribe the audio after the last committed word, commit the stable words and search
+        the next paragraph starts in them.
+        Args:
+            - final: Whether the stream ended, in which case every transcribed word is committed.
+        Returns:
+            - The events of the paragraphs found or skipped by this step.
+        """
+        try:
+            end = self.received_seconds
+            start = max(self.committed_time, end - self.window_seconds)
+            if end <= start or self.finished:
+                self._transcribed_until = end
+                return []
+            window = self._window_samples(start, end)
+            transcription = await self.transcriber.atranscribe_segments_with_words_timestamp(
+                audio_path=samples_to_wav(window),
+                **self._transcription_kwargs(),
+            )
+            self._transcribed_until = end
+            self._commit_words(start, end if final else end - self.stability_seconds, transcription)
+            return self._detect_starts()
+        except Exception as e:
+            raise Exception(f"Error in advance: {str(e)}")
+
+    def summary(self) -> dict:
+        """
+        Get the final event of the stream.
+        Returns:
+            - The starts found, the skipped paragraphs and the paragraphs never reached.
+        """
+        found = {event["paragraph_index"] for event in self.starts}
+        return {
+            "type": "done",
+            "paragraphs": self.starts,
+            "skipped": self.skipped,
+            "missing": [
+                paragraph.paragraph_index
+                for paragraph in self.paragraphs[self.cursor:]
+                if paragraph.paragraph_index not in found
+            ],
+            "received_seconds": round(self.received_seconds, 3),
+        }
+
+    def _window_samples(self, start: float, end: float) -> np.ndarray:
+        """
+        Get the samples of a window and drop the buffered audio before it, which is never transcribed again.
+        Args:
+            - start: Start of the window in seconds, in stream time.
+            - end: End of the window in seconds, the end of the received audio.
+        Returns:
+            - The samples of the window.
+        """
+        samples = np.concatenate(self._chunks) if len(self._chunks) > 1 else self._chunks[0]
+        first = int(round((start - self._buffer_start) * SAMPLE_RATE))
+        samples = samples[max(0, first):]
+        self._chunks = [samples]
+        self._buffer_start = end - len(samples) / SAMPLE_RATE
+        return samples
+
+    def _commit_words(
+        self, start: float, stable_until: float, transcription: SegmentTranscriptionModelWithWords
+    ) -> None:
+        """
+        Commit the words of a window ending before the unstable tail of the audio.
+        Args:
+            - start: Start of the window in seconds.
+            - stable_until: Words ending after this time are transcribed again at the next step.
+            - transcription: Transcription of the window audio.
+        """
+        words = offset_transcription(transcription, start).words if transcription else []
+        for word in words:
+            if word.end > stable_until:
+                break
+            if word.start < self.committed_time or not word.text.strip():
+                continue
+            self.words.append(
+                word.model_copy(update={"id": str(len(self.words)), "segment_id": f"{start:.2f}.{word.segment_id}"})
+            )
+            self.committed_time = word.end
+
+    def _detect_starts(self) -> List[dict]:
+        """
+        Search the starts of the paragraphs under and after the cursor in the words committed since
+        the previous start, moving the cursor past every paragraph found.
+        Returns:
+            - The events of the paragraphs found or skipped.
+        """
+        events = []
+        while not self.finished:
+            candidates = self.words[self._search_from:]
+            if len(candidates) < MIN_START_WORDS:
+                break
+            match = None
+            for index in range(self.cursor, min(len(self.paragraphs), self.cursor + 1 + self.lookahead)):
+                alignment = self.aligner.align_paragraph_with_words(
+                    paragraph=self.paragraphs[index].text, words=candidates
+                )
+                best = alignment.best_start_match if alignment else None
+                if best is not None and best.score >= self.start_score:
+                    match = (index, best)
+                    break
+            if match is None:
+                break
+            index, best = match
+            for paragraph in self.paragraphs[self.cursor:index]:
+                self.skipped.append(paragraph.paragraph_index)
+                events.append({"type": "paragraph_skipped", "paragraph_index": paragraph.paragraph_index})
+            event = {
+                "type": "paragraph_start",
+                "paragraph_index": self.paragraphs[index].paragraph_index,
+                "start": round(best.start, 3),
+                "score": round(best.score, 3),
+                "delay": round(self.received_seconds - best.start, 3),
+            }
+            self.starts.append(event)
+            events.append(event)
+            self.cursor = index + 1
+            # The next paragraph starts after the first word of this one
+            starts = [word.start for word in self.words]
+            self._search_from = bisect.bisect_right(starts, best.start, lo=self._search_from)
+        return events
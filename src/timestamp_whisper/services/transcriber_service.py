@@ -1,7 +1,11 @@
-from typing import BinaryIO, List
+from typing import BinaryIO, List, Optional
 
 from timestamp_whisper.core import TranscriberInterface
+from timestamp_whisper.core.profile import get_decode_options
+from timestamp_whisper.core.types import DEFAULT_DECODE_PRESET
+from timestamp_whisper.models import DecodeOptions
 from timestamp_whisper.models.transcription_models import SegmentTranscriptionModelWithWords
+from timestamp_whisper.services.transcription_flight import transcribe_single_flight
 
 
 class TranscriberService:
@@ -9,11 +13,13 @@ class TranscriberService:
     Service for transcribe file  with timestamps.
     """
 
-    def __init__(self, transcriber: TranscriberInterface):
+    def __init__(self, transcriber: TranscriberInterface, decode_options: Optional[DecodeOptions] = None):
         """
         Initializes the TranscriberService with a transcriber and aligner.
+        Decoding parameters default to the accurate preset of the active compute profile.
         """
         self.transcriber = transcriber
+        self.decode_options = decode_options or get_decode_options(DEFAULT_DECODE_PRESET)
 
     def get_paragraphs_timestamp(
         self,
@@ -30,14 +36,7 @@ class TranscriberService:
             transcribed_segments_with_words = (
                 self.transcriber.transcribe_segments_with_words_timestamp(
                     audio_path=audio,
-                    vad_filter=True,
-                    vad_parameters=dict(
-                        threshold=0.3,
-                    ),
-                    chunk_length=3,
-                    beam_size=5,  # Use beam search instead of sampling
-                    best_of=5,    # Number of candidates when using sampling
-                    temperature=0.0,  # Disable sampling randomness
+                    **self._transcription_kwargs(),
                 )
             )
 
@@ -46,3 +45,41 @@ class TranscriberService:
             return transcribed_segments_with_words
         except Exception as e:
             raise Exception(f"Error in get_paragraphs_timestamp: {str(e)}")
+
+    async def aget_paragraphs_timestamp(
+        self,
+        audio: BinaryIO,
+        tenant: Optional[str] = None,
+    ) -> SegmentTranscriptionModelWithWords:
+        """
+        Transcribe the audio without blocking the event loop.
+        Concurrent requests for the same audio and decoding parameters share one transcription.
+        Args:
+            - audio: Audio data to be processed.
+            - tenant: API key or tenant of the request, used by the transcription scheduler.
+        Returns:
+            - SegmentTranscriptionModelWithWords object containing the segments with word-level timestamps.
+        """
+        try:
+            transcribed_segments_with_words = await transcribe_single_flight(
+                self.transcriber, audio, tenant=tenant, **self._transcription_kwargs()
+            )
+            if not transcribed_segments_with_words:
+                return []
+            return transcribed_segments_with_words
+        except Exception as e:
+            raise Exception(f"Error in get_paragraphs_timestamp: {str(e)}")
+
+    def _transcription_kwargs(self) -> dict:
+        """
+        Get the keyword arguments passed to the transcriber.
+        Returns:
+            - Dictionary of VAD and decoding parameters.
+        """
+        return dict(
+            vad_filter=True,
+            vad_parameters=dict(
+                threshold=0.3,
+            ),
+            **self.decode_options.model_dump(),
+        )
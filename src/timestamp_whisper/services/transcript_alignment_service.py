@@ -0,0 +1,163 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+
+from timestamp_whisper.core import AlignerInterface
+from timestamp_whisper.core.factory.aligner_factory import AlignerFactory
+from timestamp_whisper.core.types import (
+    DEFAULT_ALIGNMENT_CACHE_SIZE,
+    DEFAULT_ALIGNMENT_SEARCH_LENGTH,
+    DEFAULT_LOADED_TRANSCRIPTS,
+    DEFAULT_MIN_WORD_MATCH_SCORE,
+    AlignerType,
+)
+from timestamp_whisper.models import SegmentTranscriptionModelWithWords
+from timestamp_whisper.models.aligner_models import ParagraphAlignmentWithWords, ParagraphItem
+from timestamp_whisper.services.file_chunks_timestamp_service import FileChunksTimestampService
+from timestamp_whisper.utils.cancellation_util import check_cancelled
+from timestamp_whisper.utils.metrics_util import metrics
+from timestamp_whisper.utils.transcript_store_util import normalize_paragraph, paragraph_hash
+
+
+# Parameters of FileChunksTimestampService._align_paragraph, part of the cache key
+ALIGNMENT_PARAMS = f"search_length={DEFAULT_ALIGNMENT_SEARCH_LENGTH};word_score={DEFAULT_MIN_WORD_MATCH_SCORE}"
+
+AlignmentKey = Tuple[str, str, str]
+
+alignment_cache_lookups = metrics.counter(
+    "alignment_cache_lookups_total", "Paragraph alignment cache lookups by result.", ["result"]
+)
+
+
+class AlignmentCache:
+    """
+    In-memory LRU cache of paragraph alignments keyed by (transcript id, normalized paragraph hash,
+    aligner parameters).
+    """
+
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        Initializes the cache.
+        Args:
+            - max_size: Maximum number of alignments kept (default ALIGNMENT_CACHE_SIZE).
+        """
+        self.max_size = int(max_size or os.environ.get("ALIGNMENT_CACHE_SIZE", DEFAULT_ALIGNMENT_CACHE_SIZE))
+        self._entries: "OrderedDict[AlignmentKey, ParagraphAlignmentWithWords]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: AlignmentKey) -> Optional[ParagraphAlignmentWithWords]:
+        with self._lock:
+            alignment = self._entries.get(key)
+            if alignment is not None:
+                self._entries.move_to_end(key)
+        alignment_cache_lookups.inc(result="hit" if alignment is not None else "miss")
+        return alignment
+
+    def put(self, key: AlignmentKey, alignment: ParagraphAlignmentWithWords) -> None:
+        with self._lock:
+            self._entries[key] = alignment
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+alignment_cache = AlignmentCache()
+
+
+class TranscriptAligners:
+    """
+    LRU of aligners per (transcript id, aligner type). An aligner caches the search index of the
+    segments it last searched, and stored transcripts stay loaded as the same objects, so requests
+    aligning with a recently used transcript reuse its index instead of rebuilding it.
+    """
+
+    def __init__(self, max_size: int = DEFAULT_LOADED_TRANSCRIPTS):
+        """
+        Initializes the LRU.
+        Args:
+            - max_size: Maximum number of aligners kept.
+        """
+        self.max_size = max_size
+        self._aligners: "OrderedDict[Tuple[str, AlignerType], AlignerInterface]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, transcript_id: str, aligner_type: AlignerType) -> AlignerInterface:
+        """
+        Get the aligner of a transcript, creating it on first use.
+        Args:
+            - transcript_id: Content hash of the transcription.
+            - aligner_type: Type of the aligner.
+        Returns:
+            - The aligner.
+        """
+        key = (transcript_id, aligner_type)
+        with self._lock:
+            aligner = self._aligners.get(key)
+            if aligner is None:
+                aligner = AlignerFactory.get_aligner(aligner_type=aligner_type)
+                self._aligners[key] = aligner
+            self._aligners.move_to_end(key)
+            while len(self._aligners) > self.max_size:
+                self._aligners.popitem(last=False)
+        return aligner
+
+
+transcript_aligners = TranscriptAligners()
+
+
+class TranscriptAlignmentService(FileChunksTimestampService):
+    """
+    Service aligning paragraphs with an existing transcription instead of media.
+
+    Each paragraph is aligned independently of the others on the whole transcription, so its
+    alignment only depends on the transcription, its own normalized text and the aligner
+    parameters. Alignments are cached under that key: when a script is edited, only the changed
+    or added paragraphs are aligned again.
+    """
+
+    def __init__(self, aligner: AlignerInterface, cache: Optional[AlignmentCache] = None):
+        """
+        Initializes the TranscriptAlignmentService.
+        Args:
+            - aligner: Aligner used to match paragraphs with the transcription.
+            - cache: Alignment cache (defaults to the process-wide cache).
+        """
+        super().__init__(transcriber=None, aligner=aligner)
+        self.cache = cache or alignment_cache
+
+    def align_with_transcript(
+        self,
+        paragraphs: List[ParagraphItem],
+        transcript_id: str,
+        transcription: SegmentTranscriptionModelWithWords,
+    ) -> List[ParagraphAlignmentWithWords]:
+        """
+        Get timestamps for paragraphs aligned with a transcription, reusing cached alignments.
+        Args:
+            - paragraphs: List of paragraphs to be aligned.
+            - transcript_id: Content hash of the transcription.
+            - transcription: Transcription with segment-level and word-level timestamps.
+        Returns:
+            - List of ParagraphAlignmentWithWords objects, one per paragraph.
+        """
+        try:
+            if not paragraphs or not transcription.segments:
+                return []
+            aligner_params = f"{type(self.aligner).__name__};{ALIGNMENT_PARAMS}"
+            results = []
+            for paragraph in paragraphs:
+                check_cancelled()
+                text = normalize_paragraph(paragraph.text)
+                key = (transcript_id, paragraph_hash(text), aligner_params)
+                alignment = self.cache.get(key)
+                if alignment is None:
+                    # The normalized text is aligned, so every text with the same key gets the same result
+                    alignment = self._align_paragraph(paragraph.model_copy(update={"text": text}), transcription)
+                    self.cache.put(key, alignment)
+                results.append(alignment.model_copy(
+                    update={"paragraph": paragraph.text, "paragraph_index": paragraph.paragraph_index}
+                ))
+            return results
+        except Exception as e:
+            raise Exception(f"Error in align_with_transcript: {str(e)}")
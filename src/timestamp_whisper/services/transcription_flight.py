@@ -0,0 +1,99 @@
+from typing import BinaryIO, List, Optional, Union
+from starlette.concurrency import run_in_threadpool
+
+from timestamp_whisper.core import TranscriberInterface
+from timestamp_whisper.models import SegmentTranscriptionModel, SegmentTranscriptionModelWithWords
+from timestamp_whisper.services.transcription_scheduler import get_transcription_scheduler, transcriber_resource
+from timestamp_whisper.utils.audio_util import audio_duration, hash_audio
+from timestamp_whisper.utils.cancellation_util import cancellation_scope
+from timestamp_whisper.utils.single_flight_util import SingleFlight
+from timestamp_whisper.utils.transcription_checkpoint_util import checkpoint_key
+
+
+# Transcriptions in flight in this process, shared by every service
+transcription_flights = SingleFlight()
+
+
+def transcriber_identity(transcriber: TranscriberInterface) -> str:
+    """
+    Describe a transcriber, including the transcribers it wraps, and its model.
+    Args:
+        - transcriber: The transcriber.
+    Returns:
+        - Identity such as "FingerprintReuseTranscriber/ModalFasterWhisperTranscriber:large-v3".
+    """
+    names = []
+    model_name = getattr(transcriber, "model_name", None)
+    while transcriber is not None:
+        names.append(type(transcriber).__name__)
+        transcriber = getattr(transcriber, "transcriber", None)
+    return f"{'/'.join(names)}:{getattr(model_name, 'value', model_name)}"
+
+
+def transcription_key(transcriber: TranscriberInterface, audio: BinaryIO, **kwargs) -> str:
+    """
+    Build the key of a transcription from the audio content hash, the transcriber and the decoding parameters.
+    Args:
+        - transcriber: The transcriber.
+        - audio: Audio data to be transcribed.
+        - **kwargs: Decoding parameters passed to the transcriber.
+    Returns:
+        - The transcription key.
+    """
+    return checkpoint_key(hash_audio(audio), transcriber=transcriber_identity(transcriber), **kwargs)
+
+
+async def _scheduled_transcription(
+    transcriber: TranscriberInterface, audio: BinaryIO, tenant: Optional[str], segments_only: bool, **kwargs
+) -> Union[SegmentTranscriptionModelWithWords, List[SegmentTranscriptionModel]]:
+    """
+    Wait for a slot of the transcriber's resource, prioritized by the audio duration, then transcribe
+    through the async methods of the transcriber. The transcription is shared by the requests in
+    flight, so it is detached from the cancellation of the request that started it: it is only
+    cancelled (its worker threads and remote calls with it) once every waiting request is gone.
+    Args:
+        - transcriber: The transcriber.
+        - audio: Audio data to be transcribed.
+        - tenant: API key or tenant of the request.
+        - segments_only: Transcribe with segment-level timestamps only.
+        - **kwargs: Decoding parameters passed to the transcriber.
+    Returns:
+        - The transcription of the audio.
+    """
+    # Runs in the task of the flight, so the detachment does not leak into the request
+    with cancellation_scope(None):
+        duration = await run_in_threadpool(audio_duration, audio)
+        scheduler = get_transcription_scheduler(transcriber_resource(transcriber_identity(transcriber)))
+        transcribe = (
+            transcriber.atranscribe_segments_timestamp if segments_only
+            else transcriber.atranscribe_segments_with_words_timestamp
+        )
+        async with scheduler.slot(cost=duration, tenant=tenant):
+            return await transcribe(audio_path=audio, **kwargs)
+
+
+async def transcribe_single_flight(
+    transcriber: TranscriberInterface,
+    audio: BinaryIO,
+    tenant: Optional[str] = None,
+    segments_only: bool = False,
+    **kwargs
+) -> Union[SegmentTranscriptionModelWithWords, List[SegmentTranscriptionModel]]:
+    """
+    Transcribe the audio with segment-level and word-level timestamps, joining an identical
+    transcription already in flight instead of starting another one. New transcriptions go
+    through the duration-aware scheduler of their resource.
+    Args:
+        - transcriber: The transcriber.
+        - audio: Audio data to be transcribed.
+        - tenant: API key or tenant of the request, for fair share between tenants.
+        - segments_only: Transcribe with segment-level timestamps only and return the segments.
+        - **kwargs: Decoding parameters passed to the transcriber.
+    Returns:
+        - The transcription of the audio.
+    """
+    key_kwargs = dict(kwargs, segments_only=True) if segments_only else kwargs
+    key = await run_in_threadpool(transcription_key, transcriber, audio, **key_kwargs)
+    return await transcription_flights.run(
+        key, lambda: _scheduled_transcription(transcriber, audio, tenant, segments_only, **kwargs)
+    )
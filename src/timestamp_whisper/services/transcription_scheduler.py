@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Optional
+
+from timestamp_whisper.core.types import (
+    TranscriptionResource,
+    DEFAULT_MAX_CONCURRENT_CPU_TRANSCRIPTIONS,
+    DEFAULT_MAX_CONCURRENT_GPU_TRANSCRIPTIONS,
+    DEFAULT_SCHEDULER_AGING_RATE,
+    DEFAULT_SHORT_JOB_SECONDS,
+)
+from timestamp_whisper.core.transcriber.faster_whisper_pool import local_transcription_workers
+from timestamp_whisper.utils.metrics_util import metrics
+
+
+queue_wait_seconds = metrics.histogram(
+    "transcription_queue_wait_seconds",
+    "Time a transcription waited for a slot before starting.",
+    ("resource", "job_size"),
+)
+queued_transcriptions = metrics.gauge(
+    "transcription_queued", "Transcriptions waiting for a slot.", ("resource",)
+)
+running_transcriptions = metrics.gauge(
+    "transcription_running", "Transcriptions holding a slot.", ("resource",)
+)
+
+
+class _Job:
+    """A transcription waiting for, or holding, a slot."""
+
+    def __init__(self, cost: float, tenant: str):
+        self.cost = cost
+        self.tenant = tenant
+        self.enqueued_at = time.monotonic()
+        self.granted = asyncio.get_running_loop().create_future()
+
+
+class TranscriptionScheduler:
+    """
+    Admission scheduler bounding the concurrent transcriptions of one resource.
+
+    Waiting transcriptions are started shortest expected job first, where the cost is the
+    audio duration. A job's priority improves with the time it has waited (aging), so long
+    jobs are not starved, and worsens with the cost its tenant already has running (fair share).
+    """
+
+    def __init__(
+        self,
+        resource: str,
+        max_concurrent: int,
+        aging_rate: float = DEFAULT_SCHEDULER_AGING_RATE,
+        short_job_seconds: float = DEFAULT_SHORT_JOB_SECONDS,
+    ):
+        """
+        Initializes the TranscriptionScheduler.
+        Args:
+            - resource: Name of the scheduled resource, used as metric label.
+            - max_concurrent: Maximum number of transcriptions running at once.
+            - aging_rate: Seconds of cost forgiven per second waited.
+            - short_job_seconds: Duration under which a job is reported as short.
+        """
+        self.resource = str(getattr(resource, "value", resource))
+        self.max_concurrent = max(1, max_concurrent)
+        self.aging_rate = aging_rate
+        self.short_job_seconds = short_job_seconds
+        self._waiting: List[_Job] = []
+        self._running = 0
+        self._running_cost: Dict[str, float] = {}
+
+    @property
+    def queued(self) -> int:
+        """Transcriptions waiting for a slot."""
+        return len(self._waiting)
+
+    @property
+    def running(self) -> int:
+        """Transcriptions holding a slot."""
+        return self._running
+
+    @property
+    def pending_cost(self) -> float:
+        """Cost (audio seconds) of the running and waiting transcriptions."""
+        return sum(self._running_cost.values()) + sum(job.cost for job in self._waiting)
+
+    def _priority(self, job: _Job, now: float) -> float:
+        """Lower is served first."""
+        return job.cost + self._running_cost.get(job.tenant, 0.0) - self.aging_rate * (now - job.enqueued_at)
+
+    def _dispatch(self) -> None:
+        """Grant free slots to the best waiting jobs."""
+        # A cancelled waiter's future is cancelled before the waiter leaves the queue
+        self._waiting = [job for job in self._waiting if not job.granted.done()]
+        while self._running < self.max_concurrent and self._waiting:
+            now = time.monotonic()
+            job = min(self._waiting, key=lambda waiting: self._priority(waiting, now))
+            self._waiting.remove(job)
+            self._running += 1
+            self._running_cost[job.tenant] = self._running_cost.get(job.tenant, 0.0) + job.cost
+            job.granted.set_result(None)
+        queued_transcriptions.set(len(self._waiting), resource=self.resource)
+        running_transcriptions.set(self._running, resource=self.resource)
+
+    def _release(self, job: _Job) -> None:
+        """Free the slot of a finished job."""
+        self._running -= 1
+        remaining_cost = self._running_cost.get(job.tenant, 0.0) - job.cost
+        if remaining_cost <= 0:
+            self._running_cost.pop(job.tenant, None)
+        else:
+            self._running_cost[job.tenant] = remaining_cost
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, cost: float, tenant: Optional[str] = None) -> AsyncIterator[None]:
+        """
+        Wait for a transcription slot and hold it for the duration of the context.
+        Args:
+            - cost: Expected cost of the transcription (audio duration in seconds).
+            - tenant: API key or tenant of the request, for fair share.
+        """
+        job = _Job(cost=cost, tenant=tenant or "")
+        self._waiting.append(job)
+        self._dispatch()
+        try:
+            await job.granted
+        except asyncio.CancelledError:
+            if job.granted.done() and not job.granted.cancelled():
+                self._release(job)
+            else:
+                if job in self._waiting:
+                    self._waiting.remove(job)
+                self._dispatch()
+            raise
+
+        queue_wait_seconds.observe(
+            time.monotonic() - job.enqueued_at,
+            resource=self.resource,
+            job_size="short" if cost < self.short_job_seconds else "long",
+        )
+        try:
+            yield
+        finally:
+            self._release(job)
+
+
+def transcriber_resource(transcriber_identity: str) -> TranscriptionResource:
+    """
+    Get the resource a transcriber runs on from its identity.
+    Args:
+        - transcriber_identity: Identity of the transcriber chain.
+    Returns:
+        - GPU for the Modal backend and the stub standing in for it, CPU for the local one.
+    """
+    if "Modal" in transcriber_identity or "Stub" in transcriber_identity:
+        return TranscriptionResource.GPU
+    return TranscriptionResource.CPU
+
+
+@lru_cache(maxsize=None)
+def get_transcription_scheduler(resource: TranscriptionResource) -> TranscriptionScheduler:
+    """
+    Get the process-wide scheduler of a resource.
+    Limits come from MAX_CONCURRENT_CPU_TRANSCRIPTIONS / MAX_CONCURRENT_GPU_TRANSCRIPTIONS;
+    the CPU limit defaults to the number of local transcription workers.
+    Args:
+        - resource: The scheduled resource.
+    Returns:
+        - The scheduler of the resource.
+    """
+    if resource == TranscriptionResource.GPU:
+        max_concurrent = int(os.environ.get(
+            "MAX_CONCURRENT_GPU_TRANSCRIPTIONS", DEFAULT_MAX_CONCURRENT_GPU_TRANSCRIPTIONS
+        ))
+    else:
+        max_concurrent = int(os.environ.get(
+            "MAX_CONCURRENT_CPU_TRANSCRIPTIONS",
+            local_transcription_workers() or DEFAULT_MAX_CONCURRENT_CPU_TRANSCRIPTIONS,
+        ))
+    return TranscriptionScheduler(resource=resource, max_concurrent=max_concurrent)
@@ -3,6 +3,8 @@ from .detect_file_type_util import detect_file_type
 from .video_compression_util import compress_bytes, decompress_bytes
 from .read_url_util import read_url
 from .read_ass_file_util import read_ass_file
+from .audio_util import AudioBuffer, load_audio_samples, slice_samples, samples_to_wav
+from .transcription_util import offset_transcription, merge_transcriptions, splice_transcription, interpolate_words
 
 __all__ = [
     "convert_video_to_audio",
@@ -11,4 +13,12 @@ __all__ = [
     "detect_file_type",
     "read_url",
     "read_ass_file",
+    "AudioBuffer",
+    "load_audio_samples",
+    "slice_samples",
+    "samples_to_wav",
+    "offset_transcription",
+    "merge_transcriptions",
+    "splice_transcription",
+    "interpolate_words",
 ]
@@ -0,0 +1,434 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from pydantic import BaseModel, Field
+
+from timestamp_whisper.models.transcription_models import SegmentTranscriptionModelWithWords
+from timestamp_whisper.utils.audio_util import SAMPLE_RATE
+
+
+logger = logging.getLogger(__name__)
+
+# Sub-fingerprints are 32-bit energy-difference hashes (Haitsma-Kalker style) over
+# 33 log-spaced bands, computed on 256 ms frames every 64 ms of 16 kHz audio.
+FRAME_SIZE = 4096
+HOP_SIZE = 1024
+NUM_BANDS = 33
+MIN_FREQUENCY = 300.0
+MAX_FREQUENCY = 2000.0
+FRAME_BATCH_SIZE = 2048
+
+# A block of ~2 seconds of sub-fingerprints is the unit that is matched and reused.
+BLOCK_FRAMES = 32
+MAX_BIT_ERROR_RATE = 0.35
+MIN_OFFSET_VOTES = 8
+MAX_OFFSETS_PER_MEDIA = 4
+# Hashes found in more stored frames than this are too common to select candidate media.
+MAX_HASH_POSTINGS = 64
+
+DEFAULT_FINGERPRINT_INDEX_DIR = "~/.cache/timestamp_whisper/fingerprints"
+DEFAULT_FINGERPRINT_INDEX_MAX_MEDIA = 1000
+
+
+class FingerprintMatch(BaseModel):
+    """
+    Model representing a region of new audio that matches previously fingerprinted audio.
+    """
+    media_id: str = Field(..., description="Identifier of the matched media in the index.")
+    start: float = Field(..., description="Start time of the region in the new audio, in seconds.")
+    end: float = Field(..., description="End time of the region in the new audio, in seconds.")
+    offset: float = Field(..., description="Seconds to add to a new-audio time to get the matched media time.")
+
+
+def transcription_reuse_enabled() -> bool:
+    """
+    Returns whether fingerprint-based transcription reuse is enabled (TRANSCRIPTION_REUSE, default true).
+    """
+    return os.environ.get("TRANSCRIPTION_REUSE", "true").lower() == "true"
+
+
+def reuse_params_key(**params: Any) -> str:
+    """
+    Builds the key of the parameters a reused transcription must have been produced with.
+
+    Args:
+        **params: Model name and decoding parameters that change the transcription.
+
+    Returns:
+        str: The parameters key.
+    """
+    encoded_params = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(encoded_params.encode("utf-8")).hexdigest()[:16]
+
+
+def fingerprint_media_id(fingerprint: np.ndarray) -> str:
+    """
+    Returns the identifier of a media in the index, derived from its fingerprint.
+    """
+    return hashlib.sha256(fingerprint.tobytes()).hexdigest()[:32]
+
+
+def frames_to_seconds(frames: int) -> float:
+    """
+    Converts a number of sub-fingerprint frames to seconds.
+    """
+    return frames * HOP_SIZE / SAMPLE_RATE
+
+
+def compute_fingerprint(samples: np.ndarray) -> np.ndarray:
+    """
+    Computes the sub-fingerprints of 16 kHz mono samples.
+
+    Args:
+        samples (np.ndarray): The decoded float32 samples.
+
+    Returns:
+        np.ndarray: One uint32 sub-fingerprint per hop (frame k starts at k * HOP_SIZE samples).
+    """
+    if len(samples) < FRAME_SIZE + HOP_SIZE:
+        return np.zeros(0, dtype=np.uint32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, FRAME_SIZE)[::HOP_SIZE]
+    window = np.hanning(FRAME_SIZE).astype(np.float32)
+    frequencies = np.fft.rfftfreq(FRAME_SIZE, d=1.0 / SAMPLE_RATE)
+    band_edges = np.searchsorted(
+        frequencies, np.geomspace(MIN_FREQUENCY, MAX_FREQUENCY, NUM_BANDS + 1)
+    )
+
+    energies = np.empty((len(frames), NUM_BANDS), dtype=np.float64)
+    for start in range(0, len(frames), FRAME_BATCH_SIZE):
+        batch = frames[start:start + FRAME_BATCH_SIZE] * window
+        power = np.abs(np.fft.rfft(batch, axis=1)) ** 2
+        cumulative = np.concatenate(
+            [np.zeros((len(power), 1)), np.cumsum(power, axis=1)], axis=1
+        )
+        energies[start:start + len(batch)] = cumulative[:, band_edges[1:]] - cumulative[:, band_edges[:-1]]
+
+    band_differences = energies[:, :-1] - energies[:, 1:]
+    bits = (band_differences[1:] - band_differences[:-1]) > 0
+    weights = (1 << np.arange(NUM_BANDS - 1, dtype=np.uint64))
+    return (bits.astype(np.uint64) * weights).sum(axis=1).astype(np.uint32)
+
+
+def _block_bit_error_rates(query: np.ndarray, stored: np.ndarray, offset: int) -> np.ndarray:
+    """Bit error rate of every query block against the stored frames shifted by offset (1.0 when out of range)."""
+    n_blocks = len(query) // BLOCK_FRAMES
+    rates = np.ones(n_blocks)
+    for block in range(n_blocks):
+        start = block * BLOCK_FRAMES
+        stored_start = start + offset
+        if stored_start < 0 or stored_start + BLOCK_FRAMES > len(stored):
+            continue
+        differences = np.bitwise_xor(
+            query[start:start + BLOCK_FRAMES], stored[stored_start:stored_start + BLOCK_FRAMES]
+        )
+        rates[block] = np.unpackbits(differences.view(np.uint8)).sum() / (32 * BLOCK_FRAMES)
+    return rates
+
+
+def match_fingerprint(
+    query: np.ndarray, stored: np.ndarray, sorted_hashes: np.ndarray, sorted_positions: np.ndarray,
+    unmatched_blocks: np.ndarray,
+) -> List[Tuple[int, int, int]]:
+    """
+    Finds the blocks of a query fingerprint that match a stored fingerprint.
+    Candidate time offsets are voted by exact sub-fingerprint hits and each candidate is
+    verified block by block with the bit error rate, so re-encoded audio still matches
+    and trimmed or edited audio matches with one offset per unchanged part.
+
+    Args:
+        query (np.ndarray): Sub-fingerprints of the new audio.
+        stored (np.ndarray): Sub-fingerprints of the indexed audio.
+        sorted_hashes (np.ndarray): The stored sub-fingerprints, sorted.
+        sorted_positions (np.ndarray): Frame position of each sorted stored sub-fingerprint.
+        unmatched_blocks (np.ndarray): Mask of query blocks still to match, updated in place.
+
+    Returns:
+        List[Tuple[int, int, int]]: (first block, last block + 1, frame offset) of each matched run.
+    """
+    runs = []
+    for _ in range(MAX_OFFSETS_PER_MEDIA):
+        frame_mask = np.repeat(unmatched_blocks, BLOCK_FRAMES)
+        query_positions = np.nonzero(frame_mask)[0]
+        if len(query_positions) == 0 or len(sorted_hashes) == 0:
+            break
+        lookup = np.minimum(np.searchsorted(sorted_hashes, query[query_positions]), len(sorted_hashes) - 1)
+        hits = sorted_hashes[lookup] == query[query_positions]
+        if hits.sum() < MIN_OFFSET_VOTES:
+            break
+        offsets = sorted_positions[lookup[hits]].astype(np.int64) - query_positions[hits]
+        values, counts = np.unique(offsets, return_counts=True)
+        if counts.max() < MIN_OFFSET_VOTES:
+            break
+        offset = int(values[np.argmax(counts)])
+
+        matched = (_block_bit_error_rates(query, stored, offset) < MAX_BIT_ERROR_RATE) & unmatched_blocks
+        if not matched.any():
+            break
+        unmatched_blocks &= ~matched
+
+        block = 0
+        while block < len(matched):
+            if matched[block]:
+                end = block
+                while end < len(matched) and matched[end]:
+                    end += 1
+                runs.append((block, end, offset))
+                block = end
+            else:
+                block += 1
+    return runs
+
+
+class FingerprintIndex:
+    """
+    Local index mapping audio fingerprints to the transcriptions previously produced for them.
+    Each media is stored as a fingerprint (.npy) and a transcription (.json) keyed by a
+    parameters key, so a transcription is only reused for the same model and decoding settings.
+    The index keeps at most max_media media, evicting the least recently used ones from disk.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_media: Optional[int] = None):
+        """
+        Initializes the index.
+
+        Args:
+            directory (Optional[str]): Index directory (default from FINGERPRINT_INDEX_DIR).
+            max_media (Optional[int]): Number of media kept (default from FINGERPRINT_INDEX_MAX_MEDIA).
+        """
+        self.directory = os.path.expanduser(
+            directory or os.environ.get("FINGERPRINT_INDEX_DIR", DEFAULT_FINGERPRINT_INDEX_DIR)
+        )
+        self.max_media = max_media or int(
+            os.environ.get("FINGERPRINT_INDEX_MAX_MEDIA", DEFAULT_FINGERPRINT_INDEX_MAX_MEDIA)
+        )
+        os.makedirs(self.directory, exist_ok=True)
+        # Least recently used first
+        self._entries: "OrderedDict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]]" = OrderedDict()
+        # Inverted index over all the loaded media: sub-fingerprint hashes in sorted order,
+        # with the slot of the media each hash belongs to
+        self._slots: Dict[str, int] = {}
+        self._slot_media: Dict[int, str] = {}
+        self._next_slot = 0
+        self._postings_hashes = np.zeros(0, dtype=np.uint32)
+        self._postings_slots = np.zeros(0, dtype=np.int64)
+        self._directory_mtime: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _refresh(self) -> None:
+        """Loads the fingerprints added to the directory and drops the deleted ones, when the directory changed."""
+        try:
+            directory_mtime = os.stat(self.directory).st_mtime_ns
+        except OSError:
+            return
+        if directory_mtime == self._directory_mtime:
+            return
+        self._directory_mtime = directory_mtime
+
+        fingerprint_files = {}
+        for entry in os.scandir(self.directory):
+            media_id, extension = os.path.splitext(entry.name)
+            if extension == ".npy":
+                try:
+                    fingerprint_files[media_id] = entry.stat().st_mtime
+                except OSError:
+                    continue
+        for media_id in [media_id for media_id in self._entries if media_id not in fingerprint_files]:
+            self._unindex(media_id)
+        # Oldest first, so the most recent media end up the most recently used
+        for media_id in sorted(fingerprint_files, key=fingerprint_files.get):
+            if media_id in self._entries:
+                continue
+            try:
+                fingerprint = np.load(os.path.join(self.directory, f"{media_id}.npy"))
+            except Exception as e:
+                logger.warning(f"Skipping unreadable fingerprint {media_id}.npy: {str(e)}")
+                continue
+            self._index(media_id, fingerprint)
+        self._evict()
+
+    def _index(self, media_id: str, fingerprint: np.ndarray) -> None:
+        """Adds a media to the loaded entries and to the inverted index."""
+        order = np.argsort(fingerprint, kind="stable")
+        sorted_hashes = fingerprint[order]
+        self._entries[media_id] = (fingerprint, sorted_hashes, order)
+        slot = self._next_slot
+        self._next_slot += 1
+        self._slots[media_id] = slot
+        self._slot_media[slot] = media_id
+        # New arrays rather than in-place updates, so lookups can keep using a snapshot
+        insert_at = np.searchsorted(self._postings_hashes, sorted_hashes)
+        self._postings_hashes = np.insert(self._postings_hashes, insert_at, sorted_hashes)
+        self._postings_slots = np.insert(self._postings_slots, insert_at, slot)
+
+    def _unindex(self, media_id: str) -> None:
+        """Removes a media from the loaded entries and from the inverted index."""
+        self._entries.pop(media_id, None)
+        slot = self._slots.pop(media_id, None)
+        if slot is None:
+            return
+        del self._slot_media[slot]
+        kept = self._postings_slots != slot
+        self._postings_hashes = self._postings_hashes[kept]
+        self._postings_slots = self._postings_slots[kept]
+
+    def _evict(self) -> None:
+        """Deletes the least recently used media above max_media."""
+        while len(self._entries) > self.max_media:
+            media_id = next(iter(self._entries))
+            self._unindex(media_id)
+            for file_name in os.listdir(self.directory):
+                if file_name.startswith(f"{media_id}."):
+                    try:
+                        os.remove(os.path.join(self.directory, file_name))
+                    except OSError:
+                        pass
+            logger.info(f"Evicted media {media_id} from the fingerprint index")
+
+    def _candidates(
+        self, query: np.ndarray, postings_hashes: np.ndarray, postings_slots: np.ndarray, slot_media: Dict[int, str]
+    ) -> List[str]:
+        """
+        Selects the media sharing enough sub-fingerprints with the query to possibly match it.
+
+        Args:
+            query (np.ndarray): Sub-fingerprints of the new audio.
+            postings_hashes (np.ndarray): Sorted hashes of the inverted index.
+            postings_slots (np.ndarray): Media slot of each hash of the inverted index.
+            slot_media (Dict[int, str]): Media identifier of each slot.
+
+        Returns:
+            List[str]: The candidate media, most shared sub-fingerprints first.
+        """
+        if len(query) == 0 or len(postings_hashes) == 0:
+            return []
+        left = np.searchsorted(postings_hashes, query, side="left")
+        right = np.searchsorted(postings_hashes, query, side="right")
+        counts = right - left
+        # Hashes shared by too many frames (silence, tones) do not tell media apart
+        keep = (counts > 0) & (counts <= MAX_HASH_POSTINGS)
+        starts, counts = left[keep], counts[keep]
+        if len(counts) == 0:
+            return []
+        total = int(counts.sum())
+        run_offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts)
+        slots = postings_slots[run_offsets + np.arange(total)]
+        slot_ids, votes = np.unique(slots, return_counts=True)
+        ranked = np.argsort(-votes, kind="stable")
+        return [
+            slot_media[int(slot_ids[i])] for i in ranked
+            if votes[i] >= MIN_OFFSET_VOTES and int(slot_ids[i]) in slot_media
+        ]
+
+    def find_matches(self, query: np.ndarray, params_key: str) -> List[FingerprintMatch]:
+        """
+        Finds the regions of new audio already transcribed with the same parameters.
+
+        Args:
+            query (np.ndarray): Sub-fingerprints of the new audio.
+            params_key (str): Key of the model and decoding parameters.
+
+        Returns:
+            List[FingerprintMatch]: The matched regions, in new-audio time order.
+        """
+        with self._lock:
+            self._refresh()
+            entries = dict(self._entries)
+            postings_hashes, postings_slots = self._postings_hashes, self._postings_slots
+            slot_media = dict(self._slot_media)
+
+        unmatched_blocks = np.ones(len(query) // BLOCK_FRAMES, dtype=bool)
+        matches = []
+        for media_id in self._candidates(query, postings_hashes, postings_slots, slot_media):
+            if not unmatched_blocks.any():
+                break
+            if media_id not in entries or not self.has_transcription(media_id, params_key):
+                continue
+            stored, sorted_hashes, sorted_positions = entries[media_id]
+            for first_block, end_block, offset in match_fingerprint(
+                query, stored, sorted_hashes, sorted_positions, unmatched_blocks
+            ):
+                matches.append(
+                    FingerprintMatch(
+                        media_id=media_id,
+                        start=frames_to_seconds(first_block * BLOCK_FRAMES),
+                        end=frames_to_seconds(end_block * BLOCK_FRAMES),
+                        offset=frames_to_seconds(offset),
+                    )
+                )
+
+        if matches:
+            with self._lock:
+                for media_id in {match.media_id for match in matches}:
+                    if media_id in self._entries:
+                        self._entries.move_to_end(media_id)
+        return sorted(matches, key=lambda match: match.start)
+
+    def has_transcription(self, media_id: str, params_key: str) -> bool:
+        """
+        Returns whether a transcription of a media is stored for the given parameters.
+        """
+        return os.path.exists(os.path.join(self.directory, f"{media_id}.{params_key}.json"))
+
+    def load_transcription(self, media_id: str, params_key: str) -> Optional[SegmentTranscriptionModelWithWords]:
+        """
+        Loads the stored transcription of a media for the given parameters.
+
+        Args:
+            media_id (str): Identifier of the media in the index.
+            params_key (str): Key of the model and decoding parameters.
+
+        Returns:
+            Optional[SegmentTranscriptionModelWithWords]: The transcription, or None if missing.
+        """
+        path = os.path.join(self.directory, f"{media_id}.{params_key}.json")
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return SegmentTranscriptionModelWithWords(**json.load(f))
+        except FileNotFoundError:
+            return None
+
+    def add(
+        self, media_id: str, fingerprint: np.ndarray, params_key: str,
+        transcription: SegmentTranscriptionModelWithWords,
+    ) -> None:
+        """
+        Stores the fingerprint and transcription of a media.
+
+        Args:
+            media_id (str): Identifier of the media.
+            fingerprint (np.ndarray): Sub-fingerprints of the media.
+            params_key (str): Key of the model and decoding parameters.
+            transcription (SegmentTranscriptionModelWithWords): The transcription to reuse later.
+        """
+        transcription_path = os.path.join(self.directory, f"{media_id}.{params_key}.json")
+        with open(f"{transcription_path}.tmp", "w", encoding="utf-8") as f:
+            f.write(transcription.model_dump_json())
+        os.replace(f"{transcription_path}.tmp", transcription_path)
+
+        fingerprint_path = os.path.join(self.directory, f"{media_id}.npy")
+        if not os.path.exists(fingerprint_path):
+            with open(f"{fingerprint_path}.tmp", "wb") as f:
+                np.save(f, fingerprint)
+            os.replace(f"{fingerprint_path}.tmp", fingerprint_path)
+
+        with self._lock:
+            if media_id in self._entries:
+                self._entries.move_to_end(media_id)
+            else:
+                self._index(media_id, fingerprint)
+                self._evict()
+
+
+@lru_cache(maxsize=1)
+def get_fingerprint_index() -> FingerprintIndex:
+    """
+    Returns the process-wide fingerprint index, so its loaded fingerprints are shared between requests.
+    """
+    return FingerprintIndex()
@@ -0,0 +1,395 @@
+import gc
+import hashlib
+import io
+import mmap
+import os
+import wave
+from typing import Any, BinaryIO, Optional, Union
+import numpy as np
+
+
+SAMPLE_RATE = 16000
+HASH_CHUNK_SIZE = 1024 * 1024
+WAV_HEADER_SIZE = 44
+
+
+class AudioBuffer(io.RawIOBase):
+    """
+    Read-only, seekable file object over audio held in memory once.
+    The content is either a bytes-like object (bytes, memoryview or a memory-mapped file,
+    exposed without copying through getbuffer) or decoded samples, encoded to WAV only
+    when the bytes are actually needed. Decoded samples are cached, so every stage of a
+    request shares one decoding of the audio.
+    """
+
+    def __init__(self, data: Optional[Any] = None, samples: Optional[np.ndarray] = None):
+        """
+        Initializes the buffer.
+
+        Args:
+            data (Optional[Any]): The encoded audio, any object supporting the buffer protocol.
+            samples (Optional[np.ndarray]): The decoded 16 kHz mono float32 samples.
+        """
+        super().__init__()
+        if data is None and samples is None:
+            raise ValueError("AudioBuffer needs data or samples")
+        self._view = memoryview(data).cast("B") if data is not None else None
+        self._samples = samples
+        self._from_samples = data is None
+        self._position = 0
+
+    @classmethod
+    def from_file(cls, path: str) -> "AudioBuffer":
+        """
+        Memory-maps a file. The file can be deleted afterwards, the mapping stays valid.
+
+        Args:
+            path (str): Path of the file.
+
+        Returns:
+            AudioBuffer: The buffer over the mapped file.
+        """
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(b"")
+            return cls(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+    @classmethod
+    def from_upload(cls, file: BinaryIO) -> "AudioBuffer":
+        """
+        Wraps an uploaded file, memory-mapping it when it is backed by a file descriptor.
+
+        Args:
+            file (BinaryIO): The uploaded file (e.g. a SpooledTemporaryFile).
+
+        Returns:
+            AudioBuffer: The buffer over the upload.
+        """
+        try:
+            file.flush()
+            if os.fstat(file.fileno()).st_size > 0:
+                return cls(mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ))
+        except (AttributeError, OSError, ValueError, io.UnsupportedOperation):
+            pass
+        file.seek(0)
+        return cls(file.read())
+
+    @classmethod
+    def from_samples(cls, samples: np.ndarray) -> "AudioBuffer":
+        """
+        Wraps decoded samples; the WAV encoding is produced lazily.
+
+        Args:
+            samples (np.ndarray): The decoded 16 kHz mono float32 samples.
+
+        Returns:
+            AudioBuffer: The buffer over the samples.
+        """
+        return cls(samples=samples)
+
+    def getbuffer(self) -> memoryview:
+        """
+        Returns the encoded audio without copying it.
+        """
+        if self._view is None:
+            self._view = memoryview(encode_wav(self._samples))
+        return self._view
+
+    @property
+    def samples(self) -> np.ndarray:
+        """
+        Returns the decoded 16 kHz mono samples, decoding them on first access.
+        """
+        if self._samples is None:
+            self.seek(0)
+            self._samples = decode_samples(self)
+            self.seek(0)
+        return self._samples
+
+    def content_hash(self) -> str:
+        """
+        Returns the SHA-256 of the content: of the samples for a buffer built from samples, whether or
+        not its WAV encoding was materialized since, and of the encoded bytes otherwise.
+        """
+        if self._from_samples:
+            return hashlib.sha256(np.ascontiguousarray(self._samples).data).hexdigest()
+        return hashlib.sha256(self._view).hexdigest()
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Returns the size of the encoded audio, without encoding samples to compute it.
+        """
+        if self._view is None:
+            return WAV_HEADER_SIZE + 2 * len(self._samples)
+        return len(self._view)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self.nbytes + offset
+        else:
+            raise ValueError(f"Invalid whence: {whence}")
+        self._position = max(0, position)
+        return self._position
+
+    def readinto(self, buffer: Any) -> int:
+        view = self.getbuffer()
+        size = max(0, min(len(buffer), len(view) - self._position))
+        memoryview(buffer).cast("B")[:size] = view[self._position:self._position + size]
+        self._position += size
+        return size
+
+    def read(self, size: int = -1) -> bytes:
+        view = self.getbuffer()
+        end = len(view) if size is None or size < 0 else min(len(view), self._position + size)
+        data = bytes(view[self._position:end])
+        self._position = max(self._position, end)
+        return data
+
+
+def decode_samples(audio: Union[BinaryIO, str], sampling_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decodes an audio or video file into mono float32 samples, like faster-whisper's decode_audio
+    but scaling each 16-bit PCM chunk straight into one float32 array, preallocated from the
+    duration of the container: decoding holds a single float copy and one chunk, instead of all
+    the PCM chunks plus two float copies. The array grows when the duration is unknown or short.
+
+    Args:
+        audio (Union[BinaryIO, str]): The audio file object or path.
+        sampling_rate (int): The target sample rate.
+
+    Returns:
+        np.ndarray: The decoded samples in the range [-1, 1].
+    """
+    import av
+    from faster_whisper.audio import _group_frames, _ignore_invalid_frames, _resample_frames
+
+    resampler = av.audio.resampler.AudioResampler(format="s16", layout="mono", rate=sampling_rate)
+    with av.open(audio, mode="r", metadata_errors="ignore") as container:
+        duration = container.duration / av.time_base if container.duration else 0.0
+        samples = np.empty(int(duration * sampling_rate) + sampling_rate, dtype=np.float32)
+        position = 0
+        frames = _ignore_invalid_frames(container.decode(audio=0))
+        for frame in _resample_frames(_group_frames(frames, 500000), resampler):
+            chunk = frame.to_ndarray().reshape(-1)
+            if position + len(chunk) > len(samples):
+                samples = _grow(samples, position + len(chunk))
+            window = samples[position:position + len(chunk)]
+            window[:] = chunk
+            window *= 1 / 32768.0
+            position += len(chunk)
+    # The resampler is only freed by a garbage collection (faster-whisper issue #390)
+    del resampler
+    gc.collect()
+
+    # Shrinks in place, without a second copy
+    samples.resize(position, refcheck=False)
+    return samples
+
+
+def _grow(samples: np.ndarray, size: int) -> np.ndarray:
+    """Returns a copy of the samples in an array of at least size samples, grown geometrically."""
+    grown = np.empty(max(size, len(samples) * 3 // 2), dtype=samples.dtype)
+    grown[:len(samples)] = samples
+    return grown
+
+
+def encode_wav(samples: np.ndarray, sampling_rate: int = SAMPLE_RATE) -> bytes:
+    """
+    Encodes float32 samples as a 16-bit PCM mono WAV file.
+
+    Args:
+        samples (np.ndarray): The samples in the range [-1, 1].
+        sampling_rate (int): The sample rate of the samples.
+
+    Returns:
+        bytes: The WAV file content.
+    """
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    audio_binary = io.BytesIO()
+    with wave.open(audio_binary, "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sampling_rate)
+        wav_file.writeframes(pcm.data)
+    return audio_binary.getvalue()
+
+
+def audio_bytes(audio: Union[BinaryIO, str]) -> Union[bytes, memoryview]:
+    """
+    Returns the content of an audio file, without copying it for an AudioBuffer.
+
+    Args:
+        audio (Union[BinaryIO, str]): The audio file object or path.
+
+    Returns:
+        Union[bytes, memoryview]: The content of the audio file.
+    """
+    if isinstance(audio, AudioBuffer):
+        return audio.getbuffer()
+    if isinstance(audio, str):
+        with open(audio, "rb") as f:
+            return f.read()
+    audio.seek(0)
+    return audio.read()
+
+
+def model_input(audio: Union[BinaryIO, str]) -> Union[BinaryIO, str, np.ndarray]:
+    """
+    Returns what to pass to a faster-whisper model: the already decoded samples of an
+    AudioBuffer, so the model does not decode the audio again, or the audio itself.
+
+    Args:
+        audio (Union[BinaryIO, str]): The audio file object or path.
+
+    Returns:
+        Union[BinaryIO, str, np.ndarray]: The model input.
+    """
+    return audio.samples if isinstance(audio, AudioBuffer) else audio
+
+
+def load_audio_samples(audio: Union[BinaryIO, str], sampling_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Decodes an audio or video file into mono float32 samples.
+    The samples of an AudioBuffer are decoded once and shared.
+
+    Args:
+        audio (Union[BinaryIO, str]): The audio file object or path.
+        sampling_rate (int): The target sample rate.
+
+    Returns:
+        np.ndarray: The decoded samples in the range [-1, 1].
+    """
+    try:
+        if isinstance(audio, AudioBuffer) and sampling_rate == SAMPLE_RATE:
+            return audio.samples
+        if not isinstance(audio, str):
+            audio.seek(0)
+        samples = decode_samples(audio, sampling_rate=sampling_rate)
+        if not isinstance(audio, str):
+            audio.seek(0)
+        return samples
+    except Exception as e:
+        raise Exception(f"An error occurred while decoding audio: {e}")
+
+
+def audio_duration(audio: Union[BinaryIO, str]) -> float:
+    """
+    Returns the duration of an audio or video file from its container metadata,
+    falling back to decoding it when the container does not declare one.
+
+    Args:
+        audio (Union[BinaryIO, str]): The audio file object or path.
+
+    Returns:
+        float: The duration in seconds.
+    """
+    import av
+
+    if isinstance(audio, AudioBuffer) and audio._samples is not None:
+        return len(audio._samples) / SAMPLE_RATE
+    try:
+        if not isinstance(audio, str):
+            audio.seek(0)
+        with av.open(audio, mode="r", metadata_errors="ignore") as container:
+            if container.duration:
+                return container.duration / av.time_base
+            stream = container.streams.audio[0]
+            if stream.duration and stream.time_base:
+                return float(stream.duration * stream.time_base)
+    except Exception:
+        pass
+    finally:
+        if not isinstance(audio, str):
+            audio.seek(0)
+    return len(load_audio_samples(audio)) / SAMPLE_RATE
+
+
+def slice_samples(samples: np.ndarray, start: float, end: float, sampling_rate: int = SAMPLE_RATE) -> np.ndarray:
+    """
+    Returns the samples between two timestamps without copying them.
+
+    Args:
+        samples (np.ndarray): The decoded samples.
+        start (float): Start time of the window in seconds.
+        end (float): End time of the window in seconds.
+        sampling_rate (int): The sample rate of the samples.
+
+    Returns:
+        np.ndarray: A view on the samples of the window.
+    """
+    start_index = max(0, int(round(start * sampling_rate)))
+    end_index = min(len(samples), int(round(end * sampling_rate)))
+    return samples[start_index:max(start_index, end_index)]
+
+
+def samples_to_wav(samples: np.ndarray, sampling_rate: int = SAMPLE_RATE) -> BinaryIO:
+    """
+    Wraps float32 samples as a 16-bit PCM mono WAV file.
+    The WAV is only encoded if its bytes are read; local models use the samples directly.
+
+    Args:
+        samples (np.ndarray): The samples in the range [-1, 1].
+        sampling_rate (int): The sample rate of the samples.
+
+    Returns:
+        BinaryIO: The WAV file as a BinaryIO object.
+    """
+    if sampling_rate == SAMPLE_RATE:
+        return AudioBuffer.from_samples(samples)
+    return AudioBuffer(encode_wav(samples, sampling_rate))
+
+
+def hash_audio(audio: Union[BinaryIO, str]) -> str:
+    """
+    Computes the SHA-256 of an audio file content, reading it in chunks.
+
+    Args:
+        audio (Union[BinaryIO, str]): The audio file object or path.
+
+    Returns:
+        str: The hex digest of the content.
+    """
+    if isinstance(audio, AudioBuffer):
+        return audio.content_hash()
+    digest = hashlib.sha256()
+    if isinstance(audio, str):
+        with open(audio, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    else:
+        audio.seek(0)
+        for chunk in iter(lambda: audio.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+        audio.seek(0)
+    return digest.hexdigest()
+
+
+def trim_audio_start(audio: Union[BinaryIO, str], start: float) -> Union[BinaryIO, str]:
+    """
+    Returns the audio remaining after a timestamp, as a WAV file.
+
+    Args:
+        audio (Union[BinaryIO, str]): The audio file object or path.
+        start (float): The timestamp in seconds where the returned audio starts.
+
+    Returns:
+        Union[BinaryIO, str]: The original audio when start is 0, otherwise the trimmed WAV file.
+    """
+    if start <= 0:
+        return audio
+    samples = load_audio_samples(audio)
+    return samples_to_wav(slice_samples(samples, start, len(samples) / SAMPLE_RATE))
@@ -0,0 +1,268 @@
+import asyncio
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from functools import lru_cache
+from typing import Any, AsyncIterator, Callable, Deque, Optional, Tuple
+
+from timestamp_whisper.core.types import (
+    DEFAULT_REMOTE_CALL_BACKOFF_SECONDS,
+    DEFAULT_REMOTE_CALL_DEADLINE_SECONDS,
+    DEFAULT_REMOTE_CALL_HEDGE_MIN_SAMPLES,
+    DEFAULT_REMOTE_CALL_HEDGE_QUANTILE,
+    DEFAULT_REMOTE_CALL_MAX_ATTEMPTS,
+)
+from timestamp_whisper.utils.metrics_util import metrics
+
+
+logger = logging.getLogger(__name__)
+
+# Time-to-first-result observations kept for the hedge delay
+LATENCY_WINDOW = 200
+MAX_BACKOFF_SECONDS = 30.0
+
+remote_call_attempts = metrics.counter(
+    "remote_call_attempts_total", "Remote call attempts by outcome (success, error, timeout).", ("call", "outcome")
+)
+remote_call_hedges = metrics.counter(
+    "remote_call_hedges_total", "Hedged remote calls by the attempt that won (primary, hedge).", ("call", "winner")
+)
+remote_call_first_result_seconds = metrics.histogram(
+    "remote_call_first_result_seconds", "Time until a remote call returned its first result.", ("call",)
+)
+
+
+class CallPolicy:
+    """
+    Deadline, retry and hedging policy of a streaming remote call.
+
+    Every wait for the next result of a call is bounded by the deadline. A failed or timed out
+    call is started again after an exponential backoff with full jitter, up to max_attempts;
+    the call is expected to resume after the results already consumed. With hedging, when
+    the first result takes longer than the quantile of the recent times to first result
+    (cold starts, slow containers), a duplicate call is started: the first call to return a
+    result is kept and the other one is cancelled.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        deadline: float = DEFAULT_REMOTE_CALL_DEADLINE_SECONDS,
+        max_attempts: int = DEFAULT_REMOTE_CALL_MAX_ATTEMPTS,
+        backoff: float = DEFAULT_REMOTE_CALL_BACKOFF_SECONDS,
+        hedge: bool = False,
+        hedge_quantile: float = DEFAULT_REMOTE_CALL_HEDGE_QUANTILE,
+        hedge_min_samples: int = DEFAULT_REMOTE_CALL_HEDGE_MIN_SAMPLES,
+        hedge_delay: Optional[float] = None,
+    ):
+        """
+        Initializes the policy.
+
+        Args:
+            name (str): Name of the call, used as metric label.
+            deadline (float): Maximum seconds waited for the next result of a call.
+            max_attempts (int): Maximum number of calls, the first one included.
+            backoff (float): Base backoff in seconds, doubled on every retry.
+            hedge (bool): Whether a duplicate call is started when the first result is late.
+            hedge_quantile (float): Quantile of the recent times to first result after which a call is hedged.
+            hedge_min_samples (int): Observations needed before calls are hedged.
+            hedge_delay (Optional[float]): Fixed hedge delay in seconds, instead of the quantile.
+        """
+        self.name = name
+        self.deadline = deadline
+        self.max_attempts = max(1, max_attempts)
+        self.backoff = backoff
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self.fixed_hedge_delay = hedge_delay
+        # (monotonic time observed, time to first result)
+        self._first_result_times: Deque[Tuple[float, float]] = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+
+    def observe_first_result(self, seconds: float) -> None:
+        """
+        Records the time a call took to return its first result.
+
+        Args:
+            seconds (float): The time to first result.
+        """
+        with self._lock:
+            self._first_result_times.append((time.monotonic(), seconds))
+        remote_call_first_result_seconds.observe(seconds, call=self.name)
+
+    def first_result_quantile(
+        self, quantile: float, min_samples: int = 1, max_age: Optional[float] = None
+    ) -> Optional[float]:
+        """
+        Returns a quantile of the recent times to first result.
+
+        Args:
+            quantile (float): The quantile in [0, 1].
+            min_samples (int): Observations needed for an estimate.
+            max_age (Optional[float]): Only observations made within the last max_age seconds are used.
+
+        Returns:
+            Optional[float]: The quantile in seconds, or None with too few observations.
+        """
+        oldest = None if max_age is None else time.monotonic() - max_age
+        with self._lock:
+            times = sorted(
+                seconds for observed_at, seconds in self._first_result_times if oldest is None or observed_at >= oldest
+            )
+        if not times or len(times) < min_samples:
+            return None
+        return times[min(len(times) - 1, int(quantile * len(times)))]
+
+    def hedge_delay(self) -> Optional[float]:
+        """
+        Returns the delay after which a call without result is hedged.
+
+        Returns:
+            Optional[float]: The delay in seconds, or None when calls are not hedged (disabled, or too few observations).
+        """
+        if not self.hedge:
+            return None
+        if self.fixed_hedge_delay is not None:
+            return self.fixed_hedge_delay
+        return self.first_result_quantile(self.hedge_quantile, min_samples=self.hedge_min_samples)
+
+    def _backoff_delay(self, retry: int) -> float:
+        """Full jitter: a random delay up to the exponential backoff of the retry."""
+        return random.uniform(0, min(MAX_BACKOFF_SECONDS, self.backoff * 2 ** (retry - 1)))
+
+    async def stream(self, open_call: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Streams the results of a remote call under the policy.
+
+        Args:
+            open_call (Callable[[], AsyncIterator[Any]]): Starts the call and returns its results. It is
+                called again for a retry or a hedge, and must then resume after the results already consumed.
+
+        Yields:
+            Any: The results of the call.
+        """
+        attempt = 1
+        while True:
+            try:
+                async for result in self._attempt(open_call):
+                    yield result
+                remote_call_attempts.inc(call=self.name, outcome="success")
+                return
+            except Exception as e:
+                outcome = "timeout" if isinstance(e, asyncio.TimeoutError) else "error"
+                remote_call_attempts.inc(call=self.name, outcome=outcome)
+                if attempt >= self.max_attempts:
+                    if outcome == "timeout":
+                        raise Exception(f"{self.name} returned no result within {self.deadline:g}s")
+                    raise
+                delay = self._backoff_delay(attempt)
+                logger.warning(
+                    f"{self.name} attempt {attempt}/{self.max_attempts} failed ({outcome}: {str(e)}), "
+                    f"retrying in {delay:.1f}s"
+                )
+                attempt += 1
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, open_call: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        One attempt: the first result, possibly raced with a hedge, then the following results of the winner.
+        """
+        started = time.monotonic()
+        winner, first_result, has_result = await self._first_result(open_call, started)
+        try:
+            if not has_result:
+                return
+            self.observe_first_result(time.monotonic() - started)
+            yield first_result
+            while True:
+                try:
+                    result = await asyncio.wait_for(winner.__anext__(), self.deadline)
+                except StopAsyncIteration:
+                    return
+                yield result
+        finally:
+            await winner.aclose()
+
+    async def _first_result(
+        self, open_call: Callable[[], AsyncIterator[Any]], started: float
+    ) -> Tuple[AsyncIterator[Any], Any, bool]:
+        """
+        Waits for the first result of a call, starting a hedge when it is late.
+
+        Returns:
+            Tuple[AsyncIterator[Any], Any, bool]: The winning call, its first result, and whether it has
+            one (False for a call without results).
+        """
+        calls = {}
+
+        def start(role: str) -> None:
+            call = open_call()
+            calls[asyncio.ensure_future(call.__anext__())] = (role, call)
+
+        start("primary")
+        hedge_delay = self.hedge_delay()
+        hedged = False
+        error: Optional[BaseException] = None
+        try:
+            while calls:
+                elapsed = time.monotonic() - started
+                if elapsed >= self.deadline:
+                    raise asyncio.TimeoutError()
+                can_hedge = hedge_delay is not None and not hedged and error is None
+                timeout = self.deadline - elapsed
+                if can_hedge:
+                    timeout = min(timeout, max(0.0, hedge_delay - elapsed))
+                done, _ = await asyncio.wait(list(calls), timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    if can_hedge and time.monotonic() - started >= hedge_delay:
+                        logger.info(f"{self.name} has no result after {hedge_delay:.1f}s, starting a hedge")
+                        start("hedge")
+                        hedged = True
+                    continue
+                for task in done:
+                    role, call = calls.pop(task)
+                    exception = task.exception()
+                    if exception is None or isinstance(exception, StopAsyncIteration):
+                        if hedged:
+                            remote_call_hedges.inc(call=self.name, winner=role)
+                        return call, task.result() if exception is None else None, exception is None
+                    # A failed call leaves the race to the other one, if any
+                    error = exception
+                    await call.aclose()
+            raise error
+        finally:
+            for task, (_, call) in calls.items():
+                task.cancel()
+                try:
+                    await task
+                except BaseException:
+                    pass
+                await call.aclose()
+
+
+@lru_cache(maxsize=None)
+def get_call_policy(name: str) -> CallPolicy:
+    """
+    Returns the process-wide policy of a remote call, so its times to first result are shared between
+    requests. It is configured by REMOTE_CALL_DEADLINE_SECONDS, REMOTE_CALL_MAX_ATTEMPTS,
+    REMOTE_CALL_HEDGING ("true" to hedge) and REMOTE_CALL_HEDGE_DELAY_SECONDS (fixed hedge delay,
+    default: the p95 of the recent times to first result).
+
+    Args:
+        name (str): Name of the call.
+
+    Returns:
+        CallPolicy: The policy of the call.
+    """
+    hedge_delay = os.environ.get("REMOTE_CALL_HEDGE_DELAY_SECONDS")
+    return CallPolicy(
+        name=name,
+        deadline=float(os.environ.get("REMOTE_CALL_DEADLINE_SECONDS", DEFAULT_REMOTE_CALL_DEADLINE_SECONDS)),
+        max_attempts=int(os.environ.get("REMOTE_CALL_MAX_ATTEMPTS", DEFAULT_REMOTE_CALL_MAX_ATTEMPTS)),
+        hedge=os.environ.get("REMOTE_CALL_HEDGING", "false").lower() == "true",
+        hedge_delay=float(hedge_delay) if hedge_delay else None,
+    )
@@ -0,0 +1,287 @@
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Awaitable, Callable, Iterable, Iterator, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+# Reasons of a cancellation
+CLIENT_DISCONNECTED = "client disconnected"
+DEADLINE_EXCEEDED = "deadline exceeded"
+CANCELLED = "cancelled"
+
+# Time a cancelled worker thread is given to reach its next cancellation check
+THREAD_STOP_TIMEOUT = 1.0
+
+_current_token: contextvars.ContextVar[Optional["CancellationToken"]] = contextvars.ContextVar(
+    "cancellation_token", default=None
+)
+
+
+class OperationCancelled(BaseException):
+    """
+    Raised when the work of a request is abandoned (client gone, deadline exceeded).
+    Like asyncio.CancelledError it is not an Exception, so the error handlers wrapping
+    the failures of a stage do not turn it into a failed transcription or alignment.
+    """
+
+    def __init__(self, reason: str = CANCELLED):
+        super().__init__(reason)
+        self.reason = reason
+
+    @property
+    def deadline_exceeded(self) -> bool:
+        return self.reason == DEADLINE_EXCEEDED
+
+
+class CancellationToken:
+    """
+    Cancellation state of a request, shared by the event loop and the worker threads doing its work.
+
+    A token is cancelled explicitly (client disconnected) or once its deadline passes, and is
+    also cancelled when its parent is. Blocking code polls it between units of work (segments,
+    paragraphs, audio chunks) through check_cancelled(); async code runs under token.run(), which
+    cancels the awaited task.
+    """
+
+    def __init__(self, timeout: Optional[float] = None, parent: Optional["CancellationToken"] = None):
+        """
+        Initializes the token.
+
+        Args:
+            timeout (Optional[float]): Seconds until the deadline, None for no deadline.
+            parent (Optional[CancellationToken]): Token whose cancellation cancels this one.
+        """
+        self.deadline = time.monotonic() + timeout if timeout else None
+        self.parent = parent
+        self._reason: Optional[str] = None
+        self._callbacks: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        if parent is not None:
+            parent.add_callback(lambda: self.cancel(parent.reason or CANCELLED))
+
+    @property
+    def reason(self) -> Optional[str]:
+        """The reason of the cancellation, None while the token is not cancelled."""
+        if self._reason is None and self.deadline is not None and time.monotonic() >= self.deadline:
+            self.cancel(DEADLINE_EXCEEDED)
+        return self._reason
+
+    @property
+    def cancelled(self) -> bool:
+        return self.reason is not None
+
+    def remaining(self) -> Optional[float]:
+        """
+        Returns the seconds left before the deadline.
+
+        Returns:
+            Optional[float]: The remaining time (0 once passed), None without deadline.
+        """
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def cancel(self, reason: str = CANCELLED) -> None:
+        """
+        Cancels the token and runs its callbacks; later cancellations keep the first reason.
+
+        Args:
+            reason (str): Reason of the cancellation.
+        """
+        with self._lock:
+            if self._reason is not None:
+                return
+            self._reason = reason
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback()
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        """
+        Registers a function called once when the token is cancelled (now if it already is).
+        It may be called from any thread.
+
+        Args:
+            callback (Callable[[], None]): The function.
+        """
+        with self._lock:
+            if self._reason is None:
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def raise_if_cancelled(self) -> None:
+        """
+        Raises OperationCancelled when the token is cancelled or its deadline passed.
+        """
+        reason = self.reason
+        if reason is not None:
+            raise OperationCancelled(reason)
+
+    def sleep(self, seconds: float) -> None:
+        """
+        Sleeps in the calling thread, waking up early to raise OperationCancelled on cancellation.
+
+        Args:
+            seconds (float): Time to sleep.
+        """
+        woken = threading.Event()
+        self.add_callback(woken.set)
+        try:
+            remaining = self.remaining()
+            woken.wait(seconds if remaining is None else min(seconds, remaining))
+        finally:
+            self.remove_callback(woken.set)
+        self.raise_if_cancelled()
+
+    async def run(self, awaitable: Awaitable[T]) -> T:
+        """
+        Awaits a coroutine as a task that sees this token as its current token, and cancels
+        the task when the token is cancelled or its deadline passes.
+
+        Args:
+            awaitable (Awaitable[T]): The work of the request.
+
+        Returns:
+            T: The result of the work.
+
+        Raises:
+            OperationCancelled: When the token was cancelled before the work completed.
+        """
+        loop = asyncio.get_running_loop()
+        woken = loop.create_future()
+
+        def wake() -> None:
+            loop.call_soon_threadsafe(lambda: woken.done() or woken.set_result(None))
+
+        with cancellation_scope(self):
+            task = asyncio.ensure_future(awaitable)
+        self.add_callback(wake)
+        try:
+            await asyncio.wait({task, woken}, timeout=self.remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if task.done():
+                return task.result()
+            # Woken by a cancellation or by the deadline
+            self.raise_if_cancelled()
+            self.cancel(DEADLINE_EXCEEDED)
+            raise OperationCancelled(self.reason)
+        except asyncio.CancelledError:
+            self.cancel(CANCELLED)
+            raise
+        finally:
+            self.remove_callback(wake)
+            if not task.done():
+                task.cancel()
+                await asyncio.wait({task})
+                _discard_outcome(task)
+
+
+def _discard_outcome(future: asyncio.Future) -> None:
+    """Retrieves the outcome of abandoned work, so it is not reported as never retrieved."""
+    if not future.cancelled():
+        future.exception()
+
+
+def current_cancellation() -> Optional[CancellationToken]:
+    """
+    Returns the cancellation token of the current request, propagated to its worker threads.
+
+    Returns:
+        Optional[CancellationToken]: The token, None outside a request.
+    """
+    return _current_token.get()
+
+
+def check_cancelled() -> None:
+    """
+    Raises OperationCancelled when the work of the current request is abandoned.
+    Called by blocking loops between units of work.
+    """
+    token = _current_token.get()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+@contextmanager
+def cancellation_scope(token: Optional[CancellationToken]) -> Iterator[Optional[CancellationToken]]:
+    """
+    Makes a token the current token of the enclosed code and of the tasks and threads it starts.
+    None detaches the enclosed code from the cancellation of the request (shared work).
+
+    Args:
+        token (Optional[CancellationToken]): The token.
+
+    Yields:
+        Optional[CancellationToken]: The token.
+    """
+    reset = _current_token.set(token)
+    try:
+        yield token
+    finally:
+        _current_token.reset(reset)
+
+
+def cancellable(items: Iterable[T]) -> Iterator[T]:
+    """
+    Iterates over items, checking the current token before each one is produced. Once the token
+    is cancelled the iterator is not advanced again (a lazy segment generator stops decoding)
+    and is closed (a streamed remote call is cancelled).
+
+    Args:
+        items (Iterable[T]): The items, typically a generator.
+
+    Yields:
+        T: The items.
+    """
+    token = _current_token.get()
+    iterator = iter(items)
+    try:
+        while True:
+            if token is not None:
+                token.raise_if_cancelled()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            yield item
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            close()
+
+
+async def run_in_thread(function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Runs a blocking function in the default executor under a token of its own, child of the
+    current one. When the awaiting task is cancelled, the token of the thread is cancelled
+    and the thread is given THREAD_STOP_TIMEOUT to stop at its next check, so the capacity
+    it used is actually free when the cancellation completes.
+
+    Args:
+        function (Callable[..., T]): The blocking function.
+        *args: Positional arguments of the function.
+        **kwargs: Keyword arguments of the function.
+
+    Returns:
+        T: The result of the function.
+    """
+    token = CancellationToken(parent=_current_token.get())
+    context = contextvars.copy_context()
+    context.run(_current_token.set, token)
+    future = asyncio.get_running_loop().run_in_executor(None, lambda: context.run(function, *args, **kwargs))
+    try:
+        return await asyncio.shield(future)
+    except asyncio.CancelledError:
+        token.cancel(CANCELLED)
+        future.add_done_callback(_discard_outcome)
+        await asyncio.wait({future}, timeout=THREAD_STOP_TIMEOUT)
+        raise
@@ -1,18 +1,24 @@
+from typing import Any
 import magic
 
 
-def detect_file_type(file_bytes: bytes) -> str:
+# libmagic only inspects the beginning of a file
+MAGIC_HEADER_BYTES = 1024 * 1024
+
+
+def detect_file_type(file_bytes: Any) -> str:
     """
     Detects the file type based on its content using the magic library.
+    Only the first MAGIC_HEADER_BYTES are passed to libmagic.
     
     Args:
-        file_bytes (bytes): The file content as bytes.
+        file_bytes (Any): The file content as a bytes-like object.
     
     Returns:
         str: The detected file type.
     """
     try:
         mime = magic.Magic(mime=True)
-        return mime.from_buffer(file_bytes)  
+        return mime.from_buffer(bytes(memoryview(file_bytes)[:MAGIC_HEADER_BYTES]))  
     except Exception as e:
         raise Exception(status_code=500, detail=f"An error occurred: {str(e)}")
@@ -0,0 +1,143 @@
+import logging
+import os
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from timestamp_whisper.core.types import DEFAULT_RETENTION_SWEEP_INTERVAL_SECONDS
+
+
+logger = logging.getLogger(__name__)
+
+
+class DirectoryRetention:
+    """
+    Retention policy of a directory of files written by the service: files older than a maximum
+    age are deleted, then the oldest files while the directory holds too many files or bytes.
+    Sweeps are throttled, so they can be triggered from every write.
+    """
+
+    def __init__(
+        self,
+        suffix: str,
+        max_age_seconds: Optional[float] = None,
+        max_files: Optional[int] = None,
+        max_total_bytes: Optional[int] = None,
+        interval_seconds: float = DEFAULT_RETENTION_SWEEP_INTERVAL_SECONDS,
+        is_busy: Optional[Callable[[str], bool]] = None,
+    ):
+        """
+        Initializes the policy.
+
+        Args:
+            suffix (str): Suffix of the files the policy applies to.
+            max_age_seconds (Optional[float]): Age after the last modification at which a file is deleted.
+            max_files (Optional[int]): Number of files kept, the most recently modified ones.
+            max_total_bytes (Optional[int]): Total size of the files kept.
+            interval_seconds (float): Minimum time between two throttled sweeps.
+            is_busy (Optional[Callable[[str], bool]]): Tells whether a file is in use and must be kept.
+        """
+        self.suffix = suffix
+        self.max_age_seconds = max_age_seconds
+        self.max_files = max_files
+        self.max_total_bytes = max_total_bytes
+        self.interval_seconds = interval_seconds
+        self.is_busy = is_busy
+        self._last_sweep: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def maybe_sweep(self, directory: str) -> int:
+        """
+        Sweeps the directory unless it was swept less than interval_seconds ago.
+
+        Args:
+            directory (str): The directory.
+
+        Returns:
+            int: The number of files deleted.
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._last_sweep is not None and now - self._last_sweep < self.interval_seconds:
+                return 0
+            self._last_sweep = now
+        return self.sweep(directory)
+
+    def sweep(self, directory: str) -> int:
+        """
+        Deletes the expired files, then the oldest files above the count and size limits.
+
+        Args:
+            directory (str): The directory.
+
+        Returns:
+            int: The number of files deleted.
+        """
+        try:
+            files = self._files(directory)
+        except OSError:
+            return 0
+        now = time.time()
+        removed = 0
+        kept: List[Tuple[float, int, str]] = []
+        for modified, size, path in files:
+            if self.max_age_seconds is not None and now - modified > self.max_age_seconds and self._remove(path):
+                removed += 1
+            else:
+                kept.append((modified, size, path))
+
+        total_bytes = sum(size for _, size, _ in kept)
+        count = len(kept)
+        # Oldest first
+        for modified, size, path in kept:
+            over_count = self.max_files is not None and count > self.max_files
+            over_size = self.max_total_bytes is not None and total_bytes > self.max_total_bytes
+            if not (over_count or over_size):
+                break
+            if self._remove(path):
+                removed += 1
+                count -= 1
+                total_bytes -= size
+        if removed:
+            logger.info(f"Deleted {removed} expired files from {directory}")
+        return removed
+
+    def _files(self, directory: str) -> List[Tuple[float, int, str]]:
+        """
+        Lists the files of the policy, oldest first.
+
+        Args:
+            directory (str): The directory.
+
+        Returns:
+            List[Tuple[float, int, str]]: The modification time, size and path of each file.
+        """
+        files = []
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith(self.suffix) or not entry.is_file():
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        return sorted(files)
+
+    def _remove(self, path: str) -> bool:
+        """
+        Deletes a file unless it is in use.
+
+        Args:
+            path (str): The file.
+
+        Returns:
+            bool: Whether the file was deleted.
+        """
+        if self.is_busy is not None and self.is_busy(path):
+            return False
+        try:
+            os.remove(path)
+            return True
+        except OSError:
+            return False
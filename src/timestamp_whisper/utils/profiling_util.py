@@ -0,0 +1,308 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from timestamp_whisper.core.types import (
+    DEFAULT_PROFILE_DIR,
+    DEFAULT_PROFILE_MAX_COUNT,
+    DEFAULT_PROFILE_SAMPLE_INTERVAL,
+    DEFAULT_PROFILE_TOP_ALLOCATIONS,
+    DEFAULT_PROFILE_TTL_SECONDS,
+)
+from timestamp_whisper.utils.file_retention_util import DirectoryRetention
+
+
+# Innermost frames of a thread waiting for work, not worth a sample
+IDLE_FRAMES = {("threading.py", "wait"), ("queue.py", "get"), ("threading.py", "_wait_for_tstate_lock")}
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_.-]{1,128}$")
+PROFILE_EXTENSIONS = ("json", "folded")
+
+
+def profiling_sample_rate() -> float:
+    """
+    Returns the fraction of requests profiled automatically, from PROFILE_SAMPLE_RATE (default 0).
+    """
+    return float(os.environ.get("PROFILE_SAMPLE_RATE", "0"))
+
+
+def profiling_min_duration() -> float:
+    """
+    Returns the duration under which a profiled request is not stored, from PROFILE_MIN_DURATION (default 0 s).
+    """
+    return float(os.environ.get("PROFILE_MIN_DURATION", "0"))
+
+
+def profiling_on_request_enabled() -> bool:
+    """
+    Returns whether clients may ask for their request to be profiled with "X-Profile: true",
+    from PROFILE_ON_REQUEST (default false): profiling traces allocations of the whole process.
+    """
+    return os.environ.get("PROFILE_ON_REQUEST", "false").lower() == "true"
+
+
+def profile_listing_enabled() -> bool:
+    """
+    Returns whether GET /profiles lists the stored profiles, from PROFILE_LISTING (default false).
+    """
+    return os.environ.get("PROFILE_LISTING", "false").lower() == "true"
+
+
+def should_profile(requested: bool) -> bool:
+    """
+    Decides whether a request is profiled: explicitly requested when the server allows it,
+    or drawn at the sampling rate.
+
+    Args:
+        requested (bool): Whether the request asked to be profiled.
+
+    Returns:
+        bool: Whether to profile the request.
+    """
+    return (requested and profiling_on_request_enabled()) or random.random() < profiling_sample_rate()
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    Statistical profiler sampling the stacks of every thread of the process at a fixed interval
+    from a background thread. Stacks are aggregated in the folded format of flame graph tools
+    (flamegraph.pl, speedscope), rooted at the thread name. Threads idle in a queue or lock wait
+    are skipped. Work of concurrent requests running in the same threads is sampled too.
+    """
+
+    def __init__(self, interval: float = DEFAULT_PROFILE_SAMPLE_INTERVAL):
+        """
+        Initializes the profiler.
+
+        Args:
+            interval (float): Seconds between samples.
+        """
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                if (os.path.basename(frame.f_code.co_filename), frame.f_code.co_name) in IDLE_FRAMES:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def folded(self) -> str:
+        """
+        Returns the aggregated stacks in the folded format ("root;caller;callee count" per line).
+        """
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class _AllocationTracing:
+    """Reference-counted tracemalloc session shared by the requests profiled at the same time."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._users = 0
+        self._started_here = False
+
+    def acquire(self) -> tracemalloc.Snapshot:
+        with self._lock:
+            if self._users == 0 and not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_here = True
+            self._users += 1
+        return tracemalloc.take_snapshot()
+
+    def release(self) -> None:
+        with self._lock:
+            self._users -= 1
+            if self._users == 0 and self._started_here:
+                tracemalloc.stop()
+                self._started_here = False
+
+
+allocation_tracing = _AllocationTracing()
+
+
+class RequestProfile:
+    """
+    Profile of one request: sampled stacks and the allocation sites that grew during the request.
+    """
+
+    _active = 0
+    _active_lock = threading.Lock()
+
+    def __init__(self, request_id: str, interval: float = DEFAULT_PROFILE_SAMPLE_INTERVAL):
+        """
+        Initializes the profile.
+
+        Args:
+            request_id (str): Identifier of the request, as sent by the client.
+            interval (float): Seconds between stack samples.
+        """
+        self.request_id = request_id
+        # Profiles are stored under a server-generated id: request ids come from clients and may collide
+        self.profile_id = uuid.uuid4().hex
+        self.profiler = SamplingProfiler(interval=interval)
+        self.metadata: Dict = {"profile_id": self.profile_id, "request_id": request_id, "sample_interval": interval}
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+        self._started_at = 0.0
+
+    def start(self) -> None:
+        with RequestProfile._active_lock:
+            RequestProfile._active += 1
+            self.metadata["concurrent_requests"] = RequestProfile._active
+        self._start_snapshot = allocation_tracing.acquire()
+        self._started_at = time.perf_counter()
+        self.metadata["started_at"] = time.time()
+        self.profiler.start()
+
+    def stop(self, top_allocations: int = DEFAULT_PROFILE_TOP_ALLOCATIONS) -> None:
+        """
+        Stops sampling and records the top allocation sites of the request.
+
+        Args:
+            top_allocations (int): Number of allocation sites kept.
+        """
+        self.profiler.stop()
+        self.metadata["duration"] = time.perf_counter() - self._started_at
+        try:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            allocation_tracing.release()
+            with RequestProfile._active_lock:
+                self.metadata["concurrent_requests"] = max(self.metadata["concurrent_requests"], RequestProfile._active)
+                RequestProfile._active -= 1
+        statistics = snapshot.compare_to(self._start_snapshot, "lineno")
+        statistics = sorted(statistics, key=lambda statistic: statistic.size_diff, reverse=True)[:top_allocations]
+        self.metadata["traced_peak_bytes"] = peak
+        self.metadata["samples"] = self.profiler.samples
+        self.metadata["top_allocations"] = [
+            {
+                "file": statistic.traceback[0].filename,
+                "line": statistic.traceback[0].lineno,
+                "size_diff_bytes": statistic.size_diff,
+                "count_diff": statistic.count_diff,
+            }
+            for statistic in statistics
+            if statistic.size_diff > 0
+        ]
+
+
+class ProfileStore:
+    """
+    Directory of request profiles: {profile_id}.json (metadata and allocation sites) and
+    {profile_id}.folded (stacks in the folded flame graph format). Profiles older than max_age_seconds
+    are deleted, then the oldest ones above max_profiles.
+    """
+
+    def __init__(
+        self, directory: str, max_profiles: Optional[int] = None, max_age_seconds: Optional[float] = None
+    ):
+        self.directory = os.path.expanduser(directory)
+        # Checked on every save, so the directory never holds more than max_profiles profiles
+        self.retentions = [
+            DirectoryRetention(
+                f".{extension}", max_age_seconds=max_age_seconds, max_files=max_profiles, interval_seconds=0
+            )
+            for extension in PROFILE_EXTENSIONS
+        ]
+
+    def _path(self, profile_id: str, extension: str) -> str:
+        if not REQUEST_ID_PATTERN.match(profile_id):
+            raise ValueError(f"Invalid profile id: {profile_id}")
+        return os.path.join(self.directory, f"{profile_id}.{extension}")
+
+    def save(self, profile: RequestProfile) -> None:
+        """
+        Stores a profile.
+
+        Args:
+            profile (RequestProfile): The stopped profile.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(profile.profile_id, "folded"), "w") as f:
+            f.write(profile.profiler.folded())
+        with open(self._path(profile.profile_id, "json"), "w") as f:
+            json.dump(profile.metadata, f, indent=2)
+        for retention in self.retentions:
+            retention.maybe_sweep(self.directory)
+
+    def metadata(self, profile_id: str) -> Optional[dict]:
+        """
+        Returns the metadata of a profile, or None if there is none.
+        """
+        try:
+            with open(self._path(profile_id, "json")) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def folded(self, profile_id: str) -> Optional[str]:
+        """
+        Returns the folded stacks of a profile, or None if there is none.
+        """
+        try:
+            with open(self._path(profile_id, "folded")) as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def list(self) -> List[dict]:
+        """
+        Returns the summaries of the stored profiles, the most recent first.
+        """
+        if not os.path.isdir(self.directory):
+            return []
+        summaries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".json"):
+                metadata = self.metadata(name[:-len(".json")]) or {}
+                summaries.append({
+                    key: metadata.get(key)
+                    for key in ("profile_id", "request_id", "method", "path", "status", "duration", "started_at")
+                })
+        return sorted(summaries, key=lambda summary: summary.get("started_at") or 0, reverse=True)
+
+
+def get_profile_store() -> ProfileStore:
+    """
+    Returns the profile store in PROFILE_DIR, keeping PROFILE_MAX_COUNT profiles for PROFILE_TTL_SECONDS.
+    """
+    return ProfileStore(
+        os.environ.get("PROFILE_DIR", DEFAULT_PROFILE_DIR),
+        max_profiles=int(os.environ.get("PROFILE_MAX_COUNT", DEFAULT_PROFILE_MAX_COUNT)),
+        max_age_seconds=float(os.environ.get("PROFILE_TTL_SECONDS", DEFAULT_PROFILE_TTL_SECONDS)),
+    )
@@ -1,14 +1,18 @@
-from typing import BinaryIO
+import mmap
+import tempfile
+from typing import Any
 import requests
-from io import BytesIO
 from pydantic import BaseModel, Field
 
 
+READ_CHUNK_SIZE = 1024 * 1024
+
+
 class ReadURLResult(BaseModel):
     """
     Model to represent the result of reading a URL.
     """
-    content: bytes = Field(..., description="The content of the URL.")
+    content: Any = Field(..., description="The content of the URL, as a bytes-like object.")
     content_type: str = Field(..., description="The content type of the URL.")
 
     class Config:
@@ -17,20 +21,28 @@ class ReadURLResult(BaseModel):
 def read_url(url: str) -> ReadURLResult:
     """
     Reads the content of a url.
+    The content is streamed to a temporary file and memory-mapped, instead of being
+    accumulated in memory.
     
     Args:
         url (str): The url to read.
     
     Returns:
-        ReadURLResult: A model containing the content and content type of the URL.
+        ReadURLResult: A model containing the content (a memoryview) and content type of the URL.
     """
     try:
         with requests.get(url, stream=True) as data:
             data.raise_for_status()
-            url_content = b""
-            for chunk in data.iter_content(chunk_size=8192):
-                if chunk:
-                    url_content += chunk
+            with tempfile.TemporaryFile() as url_file:
+                for chunk in data.iter_content(chunk_size=READ_CHUNK_SIZE):
+                    if chunk:
+                        url_file.write(chunk)
+                url_file.flush()
+                if url_file.tell() == 0:
+                    url_content = memoryview(b"")
+                else:
+                    # The mapping stays valid once the temporary file is closed
+                    url_content = memoryview(mmap.mmap(url_file.fileno(), 0, access=mmap.ACCESS_READ))
             url_content_type = data.headers.get('Content-Type', "")
             return ReadURLResult(content=url_content, content_type=url_content_type)
     except Exception as e:
@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class _Flight:
+    """A pending call and the number of callers waiting for it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Registry coalescing concurrent calls with the same key into one execution.
+    The first caller (leader) starts the call; callers arriving while it is pending
+    (followers) wait for the same result. The call is cancelled only once every
+    waiter is gone, and is forgotten as soon as it completes.
+    """
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+
+    def in_flight(self, key: str) -> bool:
+        """
+        Returns whether a call with the given key is pending.
+        """
+        return key in self._flights
+
+    def _forget(self, key: str, flight: _Flight) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    async def run(self, key: str, function: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Runs the call for a key, or joins the pending one.
+
+        Args:
+            key (str): Key identifying identical calls.
+            function (Callable[[], Awaitable[Any]]): Starts the call, only invoked by the leader.
+
+        Returns:
+            Any: The result of the call (its exception is raised to every waiter).
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(asyncio.ensure_future(function()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
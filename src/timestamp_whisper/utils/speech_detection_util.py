@@ -0,0 +1,177 @@
+import os
+from bisect import bisect_right
+from typing import List, Tuple
+import numpy as np
+
+from timestamp_whisper.models.transcription_models import (
+    SegmentTranscriptionModel,
+    SegmentTranscriptionModelWithWords,
+)
+from timestamp_whisper.utils.audio_util import SAMPLE_RATE
+
+
+# Energy VAD: 30 ms frames are speech when louder than the noise floor by a margin.
+FRAME_SECONDS = 0.03
+NOISE_FLOOR_PERCENTILE = 10
+SPEECH_MARGIN_DB = 12.0
+MIN_SPEECH_DB = -60.0
+
+# Only pauses longer than MIN_SILENCE_SECONDS are cut, keeping PADDING_SECONDS of
+# context on each side, and kept regions are joined with JOIN_GAP_SECONDS of silence.
+MIN_SILENCE_SECONDS = 1.0
+PADDING_SECONDS = 0.25
+JOIN_GAP_SECONDS = 0.2
+
+# Silence removal is skipped when it would drop less than MIN_REMOVED_FRACTION of the audio,
+# or more than MAX_REMOVED_FRACTION: the energy pass then most likely missed speech (continuous
+# speech over background noise, low SNR) and the audio is transcribed uncut.
+MIN_REMOVED_FRACTION = 0.05
+MAX_REMOVED_FRACTION = 0.8
+
+
+def silence_removal_enabled() -> bool:
+    """
+    Returns whether local silence removal is enabled (SILENCE_REMOVAL, default true).
+    """
+    return os.environ.get("SILENCE_REMOVAL", "true").lower() == "true"
+
+
+def detect_speech_regions(samples: np.ndarray, sampling_rate: int = SAMPLE_RATE) -> List[Tuple[float, float]]:
+    """
+    Detects the regions containing speech with an energy pass over the samples.
+
+    Args:
+        samples (np.ndarray): The decoded float32 samples.
+        sampling_rate (int): The sample rate of the samples.
+
+    Returns:
+        List[Tuple[float, float]]: Sorted, non-overlapping (start, end) of the speech regions in seconds.
+    """
+    frame_length = int(FRAME_SECONDS * sampling_rate)
+    n_frames = len(samples) // frame_length
+    if n_frames == 0:
+        return []
+
+    # Frame view on the samples, the energy is reduced without copying them
+    frames = samples[:n_frames * frame_length].reshape(n_frames, frame_length)
+    energy = np.einsum("ij,ij->i", frames, frames, dtype=np.float64) / frame_length
+    energy_db = 10 * np.log10(energy + 1e-12)
+    threshold = max(np.percentile(energy_db, NOISE_FLOOR_PERCENTILE) + SPEECH_MARGIN_DB, MIN_SPEECH_DB)
+    speech_frames = np.nonzero(energy_db > threshold)[0]
+
+    duration = len(samples) / sampling_rate
+    regions: List[Tuple[float, float]] = []
+    for frame in speech_frames.tolist():
+        start = max(0.0, frame * FRAME_SECONDS - PADDING_SECONDS)
+        end = min(duration, (frame + 1) * FRAME_SECONDS + PADDING_SECONDS)
+        if regions and start - regions[-1][1] < MIN_SILENCE_SECONDS:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return regions
+
+
+class SpeechTimeline:
+    """
+    Offset map between audio with the silences cut out and the original media.
+    Each kept region is a piece starting at compact_start in the cut audio and at
+    original_start in the media.
+    """
+
+    def __init__(self, pieces: List[Tuple[float, float, float]]):
+        """
+        Initializes the timeline.
+
+        Args:
+            pieces (List[Tuple[float, float, float]]): (compact_start, original_start, duration) of each kept region.
+        """
+        self.pieces = pieces
+        self._compact_starts = [compact_start for compact_start, _, _ in pieces]
+
+    @property
+    def speech_duration(self) -> float:
+        """
+        Returns the duration of the kept audio in seconds.
+        """
+        return sum(duration for _, _, duration in self.pieces)
+
+    def to_original(self, time: float) -> float:
+        """
+        Maps a time of the cut audio to the original media time.
+        Times falling in a join gap are clamped to the end of the previous region.
+
+        Args:
+            time (float): Time in the cut audio, in seconds.
+
+        Returns:
+            float: Time in the original media, in seconds.
+        """
+        if not self.pieces:
+            return time
+        index = max(0, bisect_right(self._compact_starts, time) - 1)
+        compact_start, original_start, duration = self.pieces[index]
+        return original_start + min(max(time - compact_start, 0.0), duration)
+
+    def remap_segments(self, segments: List[SegmentTranscriptionModel]) -> List[SegmentTranscriptionModel]:
+        """
+        Maps the timestamps of transcribed segments back to the original media time.
+
+        Args:
+            segments (List[SegmentTranscriptionModel]): Segments of the cut audio.
+
+        Returns:
+            List[SegmentTranscriptionModel]: The segments in media time.
+        """
+        return [
+            segment.model_copy(update={"start": self.to_original(segment.start), "end": self.to_original(segment.end)})
+            for segment in segments
+        ]
+
+    def remap_transcription(self, transcription: SegmentTranscriptionModelWithWords) -> SegmentTranscriptionModelWithWords:
+        """
+        Maps the segment and word timestamps of a transcription back to the original media time.
+
+        Args:
+            transcription (SegmentTranscriptionModelWithWords): Transcription of the cut audio.
+
+        Returns:
+            SegmentTranscriptionModelWithWords: The transcription in media time.
+        """
+        return SegmentTranscriptionModelWithWords(
+            segments=self.remap_segments(transcription.segments),
+            words=[
+                word.model_copy(update={"start": self.to_original(word.start), "end": self.to_original(word.end)})
+                for word in transcription.words
+            ],
+        )
+
+
+def remove_silences(
+    samples: np.ndarray, regions: List[Tuple[float, float]], sampling_rate: int = SAMPLE_RATE
+) -> Tuple[np.ndarray, SpeechTimeline]:
+    """
+    Cuts the audio outside the speech regions, joining the regions with a short silence.
+
+    Args:
+        samples (np.ndarray): The decoded float32 samples.
+        regions (List[Tuple[float, float]]): Sorted (start, end) of the speech regions in seconds.
+        sampling_rate (int): The sample rate of the samples.
+
+    Returns:
+        Tuple[np.ndarray, SpeechTimeline]: The cut samples and the offset map back to the original.
+    """
+    gap = np.zeros(int(JOIN_GAP_SECONDS * sampling_rate), dtype=samples.dtype)
+    parts = []
+    pieces = []
+    compact_start = 0.0
+    for start, end in regions:
+        start_index = int(round(start * sampling_rate))
+        part = samples[start_index:int(round(end * sampling_rate))]
+        if parts:
+            parts.append(gap)
+            compact_start += len(gap) / sampling_rate
+        parts.append(part)
+        pieces.append((compact_start, start_index / sampling_rate, len(part) / sampling_rate))
+        compact_start += len(part) / sampling_rate
+    cut_samples = np.concatenate(parts) if parts else np.zeros(0, dtype=samples.dtype)
+    return cut_samples, SpeechTimeline(pieces)
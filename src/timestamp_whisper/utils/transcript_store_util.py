@@ -0,0 +1,163 @@
+import hashlib
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Optional
+
+from timestamp_whisper.core.types import (
+    DEFAULT_LOADED_TRANSCRIPTS,
+    DEFAULT_MAX_STORED_TRANSCRIPTS,
+    DEFAULT_TRANSCRIPT_STORE_DIR,
+    DEFAULT_TRANSCRIPT_TTL_SECONDS,
+)
+from timestamp_whisper.models.transcription_models import SegmentTranscriptionModelWithWords
+from timestamp_whisper.utils.file_retention_util import DirectoryRetention
+
+
+TRANSCRIPT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+
+
+def normalize_paragraph(text: str) -> str:
+    """
+    Normalizes a paragraph so edits that do not change its words (Unicode composition,
+    whitespace) keep the same alignment.
+
+    Args:
+        text (str): The paragraph text.
+
+    Returns:
+        str: The NFC-normalized text with collapsed whitespace.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def paragraph_hash(text: str) -> str:
+    """
+    Computes the hash of a normalized paragraph.
+
+    Args:
+        text (str): The paragraph text.
+
+    Returns:
+        str: Hex SHA-256 of the normalized text.
+    """
+    return hashlib.sha256(normalize_paragraph(text).encode("utf-8")).hexdigest()
+
+
+class TranscriptStore:
+    """
+    Directory of transcriptions keyed by their content hash ({transcript_id}.json), so paragraphs
+    can be re-aligned without resending the media. The most recently used transcriptions are
+    kept loaded, so repeated alignments skip parsing. Files are touched when used, and the ones
+    unused for max_age_seconds are deleted, then the least recently used above max_stored.
+    """
+
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_loaded: int = DEFAULT_LOADED_TRANSCRIPTS,
+        max_age_seconds: Optional[float] = None,
+        max_stored: Optional[int] = None,
+    ):
+        """
+        Initializes the store.
+
+        Args:
+            directory (Optional[str]): Store directory (default from TRANSCRIPT_STORE_DIR).
+            max_loaded (int): Number of transcriptions kept in memory.
+            max_age_seconds (Optional[float]): Time unused after which a transcription is deleted
+                (default from TRANSCRIPT_STORE_TTL_SECONDS).
+            max_stored (Optional[int]): Number of transcriptions kept on disk (default from TRANSCRIPT_STORE_MAX_COUNT).
+        """
+        self.directory = os.path.expanduser(
+            directory or os.environ.get("TRANSCRIPT_STORE_DIR", DEFAULT_TRANSCRIPT_STORE_DIR)
+        )
+        self.max_loaded = max_loaded
+        self.retention = DirectoryRetention(
+            ".json",
+            max_age_seconds=max_age_seconds or float(
+                os.environ.get("TRANSCRIPT_STORE_TTL_SECONDS", DEFAULT_TRANSCRIPT_TTL_SECONDS)
+            ),
+            max_files=max_stored or int(os.environ.get("TRANSCRIPT_STORE_MAX_COUNT", DEFAULT_MAX_STORED_TRANSCRIPTS)),
+        )
+        self._loaded: "OrderedDict[str, SegmentTranscriptionModelWithWords]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _path(self, transcript_id: str) -> str:
+        if not TRANSCRIPT_ID_PATTERN.match(transcript_id):
+            raise ValueError(f"Invalid transcript id: {transcript_id}")
+        return os.path.join(self.directory, f"{transcript_id}.json")
+
+    def _touch(self, transcript_id: str) -> None:
+        """Marks a stored transcription as used, so the retention keeps the most recently used ones."""
+        try:
+            os.utime(self._path(transcript_id))
+        except OSError:
+            pass
+
+    def _remember(self, transcript_id: str, transcription: SegmentTranscriptionModelWithWords) -> None:
+        with self._lock:
+            self._loaded[transcript_id] = transcription
+            self._loaded.move_to_end(transcript_id)
+            while len(self._loaded) > self.max_loaded:
+                self._loaded.popitem(last=False)
+
+    def save(self, transcription: SegmentTranscriptionModelWithWords) -> str:
+        """
+        Stores a transcription, unless the same one is already stored.
+
+        Args:
+            transcription (SegmentTranscriptionModelWithWords): The transcription.
+
+        Returns:
+            str: Its transcript id.
+        """
+        serialized = transcription.model_dump_json()
+        transcript_id = hashlib.sha256(serialized.encode("utf-8")).hexdigest()
+        path = self._path(transcript_id)
+        if not os.path.exists(path):
+            os.makedirs(self.directory, exist_ok=True)
+            temporary_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temporary_path, "w", encoding="utf-8") as f:
+                f.write(serialized)
+            os.replace(temporary_path, path)
+        else:
+            self._touch(transcript_id)
+        self._remember(transcript_id, transcription)
+        self.retention.maybe_sweep(self.directory)
+        return transcript_id
+
+    def load(self, transcript_id: str) -> Optional[SegmentTranscriptionModelWithWords]:
+        """
+        Returns a stored transcription, or None if there is none.
+
+        Args:
+            transcript_id (str): The transcript id.
+
+        Returns:
+            Optional[SegmentTranscriptionModelWithWords]: The transcription.
+        """
+        with self._lock:
+            transcription = self._loaded.get(transcript_id)
+            if transcription is not None:
+                self._loaded.move_to_end(transcript_id)
+        if transcription is None:
+            try:
+                with open(self._path(transcript_id), encoding="utf-8") as f:
+                    transcription = SegmentTranscriptionModelWithWords.model_validate_json(f.read())
+            except FileNotFoundError:
+                return None
+            self._remember(transcript_id, transcription)
+        self._touch(transcript_id)
+        return transcription
+
+
+@lru_cache(maxsize=1)
+def get_transcript_store() -> TranscriptStore:
+    """
+    Returns the process-wide transcript store, so its loaded transcriptions are shared between requests.
+    """
+    return TranscriptStore()
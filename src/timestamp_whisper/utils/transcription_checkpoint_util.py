@@ -0,0 +1,243 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import uuid
+from typing import Any, BinaryIO, List, Optional, Union
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - not available on Windows
+    fcntl = None
+
+from timestamp_whisper.core.types import DEFAULT_CHECKPOINT_TTL_SECONDS
+from timestamp_whisper.models.transcription_models import (
+    SegmentTranscriptionModel,
+    SegmentTranscriptionModelWithWords,
+    WordTranscriptionModel,
+)
+from timestamp_whisper.utils.audio_util import hash_audio
+from timestamp_whisper.utils.file_retention_util import DirectoryRetention
+
+
+logger = logging.getLogger(__name__)
+
+
+def checkpoints_enabled() -> bool:
+    """
+    Returns whether transcription checkpoints are enabled (TRANSCRIPTION_CHECKPOINTS, default true).
+    """
+    return os.environ.get("TRANSCRIPTION_CHECKPOINTS", "true").lower() == "true"
+
+
+def checkpoint_directory() -> str:
+    """
+    Returns the directory holding the transcription checkpoints (TRANSCRIPTION_CHECKPOINT_DIR).
+    """
+    return os.environ.get(
+        "TRANSCRIPTION_CHECKPOINT_DIR",
+        os.path.join(tempfile.gettempdir(), "timestamp_whisper", "checkpoints"),
+    )
+
+
+def checkpoint_in_use(path: str) -> bool:
+    """
+    Returns whether a checkpoint file is locked by a transcription in progress.
+
+    Args:
+        path (str): The checkpoint file.
+
+    Returns:
+        bool: Whether another transcription holds its lock.
+    """
+    if fcntl is None:
+        return False
+    try:
+        with open(path, "rb") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+        return False
+    except OSError:
+        return True
+
+
+# Checkpoints of failed or abandoned transcriptions are deleted when not resumed within the TTL
+checkpoint_retention = DirectoryRetention(
+    suffix=".jsonl",
+    max_age_seconds=float(os.environ.get("TRANSCRIPTION_CHECKPOINT_TTL_SECONDS", DEFAULT_CHECKPOINT_TTL_SECONDS)),
+    is_busy=checkpoint_in_use,
+)
+
+
+def checkpoint_key(audio_hash: str, **params: Any) -> str:
+    """
+    Builds the checkpoint key of a transcription.
+
+    Args:
+        audio_hash (str): SHA-256 of the audio content.
+        **params: Model name and decoding parameters that change the transcription.
+
+    Returns:
+        str: The checkpoint key.
+    """
+    encoded_params = json.dumps(params, sort_keys=True, default=str)
+    return hashlib.sha256(f"{audio_hash}:{encoded_params}".encode("utf-8")).hexdigest()
+
+
+class TranscriptionCheckpoint:
+    """
+    Collects the segments of a transcription as they stream out of the model and,
+    when backed by a file, appends each of them to a JSON lines checkpoint so a
+    failed transcription can be resumed from the last completed timestamp.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Initializes the checkpoint.
+
+        Args:
+            path (Optional[str]): The checkpoint file, or None to only collect in memory.
+        """
+        self.path = path
+        self.segments: List[SegmentTranscriptionModel] = []
+        self.words: List[WordTranscriptionModel] = []
+        self.time_offset = 0.0
+        self.id_offset = 0
+        self._file = None
+        if path:
+            self._open_and_load()
+
+    @classmethod
+    def open(cls, audio: Union[BinaryIO, str], **params: Any) -> "TranscriptionCheckpoint":
+        """
+        Opens the checkpoint of a transcription, resuming from a previous attempt if one was persisted.
+
+        Args:
+            audio (Union[BinaryIO, str]): The audio being transcribed.
+            **params: Model name and decoding parameters that change the transcription.
+
+        Returns:
+            TranscriptionCheckpoint: The file-backed checkpoint, or an in-memory one when disabled.
+        """
+        if not checkpoints_enabled():
+            return cls()
+        try:
+            directory = checkpoint_directory()
+            os.makedirs(directory, exist_ok=True)
+            checkpoint_retention.maybe_sweep(directory)
+            key = checkpoint_key(hash_audio(audio), **params)
+            return cls(os.path.join(directory, f"{key}.jsonl"))
+        except Exception as e:
+            logger.warning(f"Transcription checkpoint disabled for this request: {str(e)}")
+            return cls()
+
+    @property
+    def resume_offset(self) -> float:
+        """
+        Returns the timestamp (in seconds) up to which the transcription is complete.
+        """
+        return self.segments[-1].end if self.segments else 0.0
+
+    def _open_and_load(self) -> None:
+        """
+        Opens the checkpoint file with an exclusive lock and loads the segments persisted by
+        a previous attempt. A torn trailing record is truncated; if another process holds
+        the lock, the checkpoint falls back to memory only.
+        """
+        self._file = open(self.path, "a+b")
+        if fcntl is not None:
+            try:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                self._file.close()
+                self._file = None
+                return
+
+        self._file.seek(0)
+        valid_length = 0
+        for line in self._file:
+            try:
+                record = json.loads(line.decode("utf-8"))
+                segment = SegmentTranscriptionModel(**record["segment"])
+                words = [WordTranscriptionModel(**word) for word in record["words"]]
+            except Exception:
+                break
+            self.segments.append(segment)
+            self.words.extend(words)
+            valid_length += len(line)
+        self._file.truncate(valid_length)
+        self._file.seek(valid_length)
+        if self.segments:
+            logger.info(f"Resuming transcription from {self.resume_offset:.2f}s ({self.path})")
+
+    @staticmethod
+    def _record(segment: SegmentTranscriptionModel, words: List[WordTranscriptionModel]) -> str:
+        """Serializes a segment and its words as one JSON line."""
+        return json.dumps(
+            {"segment": segment.model_dump(), "words": [word.model_dump() for word in words]},
+            ensure_ascii=False,
+        ) + "\n"
+
+    def start_attempt(self) -> None:
+        """
+        Prepares an attempt that transcribes the audio remaining after resume_offset:
+        its timestamps are shifted by the offset and its segment ids continue the existing ones.
+        """
+        self.time_offset = self.resume_offset
+        self.id_offset = len(self.segments)
+
+    def add_segment(self, segment: Any) -> SegmentTranscriptionModel:
+        """
+        Adds a faster-whisper segment produced by the current attempt.
+
+        Args:
+            segment (Any): The faster-whisper segment (id, text, start, end, optional words and confidence).
+
+        Returns:
+            SegmentTranscriptionModel: The stored segment in media time.
+        """
+        segment_id = str(self.id_offset + int(segment.id))
+        segment_model = SegmentTranscriptionModel(
+            id=segment_id,
+            text=segment.text.strip(),
+            start=self.time_offset + segment.start,
+            end=self.time_offset + segment.end,
+            avg_logprob=getattr(segment, "avg_logprob", None),
+            compression_ratio=getattr(segment, "compression_ratio", None),
+        )
+        word_models = [
+            WordTranscriptionModel(
+                id=str(uuid.uuid4()),
+                segment_id=segment_id,
+                text=word.word,
+                start=self.time_offset + word.start,
+                end=self.time_offset + word.end,
+            )
+            for word in (segment.words or [])
+        ]
+        self.segments.append(segment_model)
+        self.words.extend(word_models)
+        if self._file is not None:
+            self._file.write(self._record(segment_model, word_models).encode("utf-8"))
+            self._file.flush()
+        return segment_model
+
+    def close(self) -> None:
+        """Closes the checkpoint file, keeping it for a later resume."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def finish(self) -> SegmentTranscriptionModelWithWords:
+        """
+        Completes the transcription and removes the checkpoint file.
+
+        Returns:
+            SegmentTranscriptionModelWithWords: The full transcription.
+        """
+        owns_file = self._file is not None
+        self.close()
+        if owns_file and os.path.exists(self.path):
+            os.remove(self.path)
+        return SegmentTranscriptionModelWithWords(segments=self.segments, words=self.words)
@@ -0,0 +1,144 @@
+from typing import Dict, List, Tuple
+
+from timestamp_whisper.models.transcription_models import (
+    SegmentTranscriptionModel,
+    SegmentTranscriptionModelWithWords,
+    WordTranscriptionModel,
+)
+
+
+def group_words_by_segment(
+    transcription: SegmentTranscriptionModelWithWords,
+) -> Dict[str, List[WordTranscriptionModel]]:
+    """
+    Groups the words of a transcription by the id of their segment.
+
+    Args:
+        transcription (SegmentTranscriptionModelWithWords): The transcription.
+
+    Returns:
+        Dict[str, List[WordTranscriptionModel]]: The words of each segment id.
+    """
+    words_by_segment: Dict[str, List[WordTranscriptionModel]] = {}
+    for word in transcription.words:
+        words_by_segment.setdefault(str(word.segment_id), []).append(word)
+    return words_by_segment
+
+
+def offset_transcription(
+    transcription: SegmentTranscriptionModelWithWords, offset: float
+) -> SegmentTranscriptionModelWithWords:
+    """
+    Shifts every segment and word timestamp of a transcription.
+
+    Args:
+        transcription (SegmentTranscriptionModelWithWords): The transcription to shift.
+        offset (float): The number of seconds to add to each timestamp.
+
+    Returns:
+        SegmentTranscriptionModelWithWords: The shifted transcription.
+    """
+    return SegmentTranscriptionModelWithWords(
+        segments=[
+            segment.model_copy(update={"start": segment.start + offset, "end": segment.end + offset})
+            for segment in transcription.segments
+        ],
+        words=[
+            word.model_copy(update={"start": word.start + offset, "end": word.end + offset})
+            for word in transcription.words
+        ],
+    )
+
+
+def merge_transcriptions(
+    pieces: List[Tuple[SegmentTranscriptionModel, List[WordTranscriptionModel]]],
+) -> SegmentTranscriptionModelWithWords:
+    """
+    Builds a transcription from (segment, words) pieces of different sources.
+    Segments are ordered by start time and renumbered from 1, so neighbouring
+    segments keep consecutive ids, and words are re-attached to the new ids.
+
+    Args:
+        pieces (List[Tuple[SegmentTranscriptionModel, List[WordTranscriptionModel]]]): The segments with their words.
+
+    Returns:
+        SegmentTranscriptionModelWithWords: The merged transcription.
+    """
+    segments = []
+    words = []
+    for index, (segment, segment_words) in enumerate(sorted(pieces, key=lambda piece: piece[0].start), start=1):
+        segment_id = str(index)
+        segments.append(segment.model_copy(update={"id": segment_id}))
+        words.extend(word.model_copy(update={"segment_id": segment_id}) for word in segment_words)
+    return SegmentTranscriptionModelWithWords(segments=segments, words=words)
+
+
+def splice_transcription(
+    transcription: SegmentTranscriptionModelWithWords,
+    replacements: List[Tuple[float, float, SegmentTranscriptionModelWithWords]],
+) -> SegmentTranscriptionModelWithWords:
+    """
+    Replaces the segments inside time windows with another transcription of those windows.
+
+    Args:
+        transcription (SegmentTranscriptionModelWithWords): The base transcription.
+        replacements (List[Tuple[float, float, SegmentTranscriptionModelWithWords]]): Window start,
+            window end and the transcription of the window, already in media time.
+
+    Returns:
+        SegmentTranscriptionModelWithWords: The spliced and renumbered transcription.
+    """
+    def in_replaced_window(segment: SegmentTranscriptionModel) -> bool:
+        middle = (segment.start + segment.end) / 2
+        return any(start <= middle <= end for start, end, _ in replacements)
+
+    base_words = group_words_by_segment(transcription)
+    pieces = [
+        (segment, base_words.get(str(segment.id), []))
+        for segment in transcription.segments
+        if not in_replaced_window(segment)
+    ]
+    for _, _, window_transcription in replacements:
+        window_words = group_words_by_segment(window_transcription)
+        pieces.extend(
+            (segment, window_words.get(str(segment.id), []))
+            for segment in window_transcription.segments
+        )
+    return merge_transcriptions(pieces)
+
+
+# Share of a segment given to the pause after each word, in characters
+INTERWORD_GAP_CHARS = 1.0
+
+
+def interpolate_words(segments: List[SegmentTranscriptionModel]) -> SegmentTranscriptionModelWithWords:
+    """
+    Estimates word timestamps from segment timestamps: each segment's duration is split between its
+    words in proportion to their number of letters, plus a short pause after each word.
+
+    Args:
+        segments (List[SegmentTranscriptionModel]): Segments transcribed without word timestamps.
+
+    Returns:
+        SegmentTranscriptionModelWithWords: The segments with interpolated words.
+    """
+    words = []
+    for segment in segments:
+        texts = segment.text.split()
+        if not texts:
+            continue
+        weights = [max(1, sum(character.isalnum() for character in text)) for text in texts]
+        total = sum(weights) + INTERWORD_GAP_CHARS * (len(texts) - 1)
+        seconds_per_char = max(0.0, segment.end - segment.start) / total
+        position = segment.start
+        for index, (text, weight) in enumerate(zip(texts, weights)):
+            end = position + weight * seconds_per_char
+            words.append(WordTranscriptionModel(
+                id=f"{segment.id}.{index}",
+                segment_id=str(segment.id),
+                text=f" {text}",
+                start=round(position, 3),
+                end=round(min(end, segment.end), 3),
+            ))
+            position = end + INTERWORD_GAP_CHARS * seconds_per_char
+    return SegmentTranscriptionModelWithWords(segments=list(segments), words=words)
@@ -0,0 +1,227 @@
+import io
+import struct
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Iterable, Iterator, List, NamedTuple, Optional
+import numpy as np
+import zstandard as zstd
+
+from timestamp_whisper.utils.video_compression_util import decompress_bytes
+
+
+# Packed batch layout (little-endian):
+#   header  <BII : version, number of segments, number of words
+#   int32   segment ids
+#   uint32  segment start ms, segment end ms, words per segment, segment text byte lengths
+#   float32 segment avg_logprob, segment compression ratio (NaN when unknown)
+#   uint32  word start ms, word end ms, word text byte lengths
+#   bytes   UTF-8 segment texts followed by UTF-8 word texts
+# The whole batch is zstd-compressed.
+WIRE_VERSION = 2
+HEADER_FORMAT = "<BII"
+
+# A batch is flushed once it holds this many segments or this many seconds passed since the last flush.
+BATCH_MAX_SEGMENTS = 32
+BATCH_MAX_SECONDS = 2.0
+
+
+class WireWord(NamedTuple):
+    """
+    A decoded word, with the field names of faster-whisper words.
+    """
+    word: str
+    start: float
+    end: float
+
+
+class WireSegment(NamedTuple):
+    """
+    A decoded segment, with the field names of faster-whisper segments.
+    """
+    id: int
+    text: str
+    start: float
+    end: float
+    words: List[WireWord]
+    avg_logprob: Optional[float] = None
+    compression_ratio: Optional[float] = None
+
+
+def _milliseconds(values: List[float]) -> np.ndarray:
+    """Converts seconds to uint32 milliseconds."""
+    return np.round(np.asarray(values, dtype=np.float64) * 1000).astype("<u4")
+
+
+def _optional_floats(values: List[Optional[float]]) -> np.ndarray:
+    """Converts optional floats to float32, None as NaN."""
+    return np.asarray([np.nan if value is None else value for value in values], dtype="<f4")
+
+
+def pack_segments(segments: List[Any]) -> bytes:
+    """
+    Packs faster-whisper segments into one compressed batch, keeping only id, text, start, end, words
+    and the decoding confidence (avg_logprob, compression_ratio).
+
+    Args:
+        segments (List[Any]): Segments with id, text, start, end, optional words (word, start, end)
+            and optional avg_logprob and compression_ratio.
+
+    Returns:
+        bytes: The packed batch.
+    """
+    words = [word for segment in segments for word in (segment.words or [])]
+    segment_texts = [segment.text.encode("utf-8") for segment in segments]
+    word_texts = [word.word.encode("utf-8") for word in words]
+    arrays = [
+        np.asarray([segment.id for segment in segments], dtype="<i4"),
+        _milliseconds([segment.start for segment in segments]),
+        _milliseconds([segment.end for segment in segments]),
+        np.asarray([len(segment.words or []) for segment in segments], dtype="<u4"),
+        np.asarray([len(text) for text in segment_texts], dtype="<u4"),
+        _optional_floats([getattr(segment, "avg_logprob", None) for segment in segments]),
+        _optional_floats([getattr(segment, "compression_ratio", None) for segment in segments]),
+        _milliseconds([word.start for word in words]),
+        _milliseconds([word.end for word in words]),
+        np.asarray([len(text) for text in word_texts], dtype="<u4"),
+    ]
+    payload = b"".join(
+        [struct.pack(HEADER_FORMAT, WIRE_VERSION, len(segments), len(words))]
+        + [array.tobytes() for array in arrays]
+        + segment_texts
+        + word_texts
+    )
+    return zstd.ZstdCompressor().compress(payload)
+
+
+def unpack_segments(batch: bytes) -> List[WireSegment]:
+    """
+    Decodes a packed batch into segments.
+
+    Args:
+        batch (bytes): The packed batch.
+
+    Returns:
+        List[WireSegment]: The segments with their words and confidence, timestamps in seconds.
+    """
+    payload = zstd.ZstdDecompressor().decompress(batch)
+    version, n_segments, n_words = struct.unpack_from(HEADER_FORMAT, payload)
+    if version != WIRE_VERSION:
+        raise ValueError(f"Unsupported transcription wire version {version}, expected {WIRE_VERSION}")
+
+    offset = struct.calcsize(HEADER_FORMAT)
+
+    def read_array(dtype: str, count: int) -> np.ndarray:
+        nonlocal offset
+        array = np.frombuffer(payload, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array
+
+    segment_ids = read_array("<i4", n_segments).tolist()
+    segment_starts = (read_array("<u4", n_segments) / 1000).tolist()
+    segment_ends = (read_array("<u4", n_segments) / 1000).tolist()
+    word_counts = read_array("<u4", n_segments).tolist()
+    segment_text_lengths = read_array("<u4", n_segments).tolist()
+    avg_logprobs = [None if np.isnan(value) else value for value in read_array("<f4", n_segments).tolist()]
+    compression_ratios = [None if np.isnan(value) else value for value in read_array("<f4", n_segments).tolist()]
+    word_starts = (read_array("<u4", n_words) / 1000).tolist()
+    word_ends = (read_array("<u4", n_words) / 1000).tolist()
+    word_text_lengths = read_array("<u4", n_words).tolist()
+
+    def read_texts(lengths: List[int]) -> List[str]:
+        nonlocal offset
+        texts = []
+        for length in lengths:
+            texts.append(payload[offset:offset + length].decode("utf-8"))
+            offset += length
+        return texts
+
+    segment_texts = read_texts(segment_text_lengths)
+    words = [
+        WireWord(word=text, start=start, end=end)
+        for text, start, end in zip(read_texts(word_text_lengths), word_starts, word_ends)
+    ]
+
+    segments = []
+    word_index = 0
+    for segment_id, text, start, end, count, avg_logprob, compression_ratio in zip(
+        segment_ids, segment_texts, segment_starts, segment_ends, word_counts, avg_logprobs, compression_ratios
+    ):
+        segments.append(
+            WireSegment(
+                id=segment_id, text=text, start=start, end=end, words=words[word_index:word_index + count],
+                avg_logprob=avg_logprob, compression_ratio=compression_ratio,
+            )
+        )
+        word_index += count
+    return segments
+
+
+def iter_packed_batches(segments: Iterable[Any]) -> Iterator[bytes]:
+    """
+    Groups a stream of segments into packed batches, flushing on size or elapsed time
+    so the client still receives the transcription progressively.
+
+    Args:
+        segments (Iterable[Any]): The faster-whisper segment generator.
+
+    Yields:
+        bytes: The packed batches.
+    """
+    batch = []
+    last_flush = time.monotonic()
+    for segment in segments:
+        batch.append(segment)
+        if len(batch) >= BATCH_MAX_SEGMENTS or time.monotonic() - last_flush >= BATCH_MAX_SECONDS:
+            yield pack_segments(batch)
+            batch = []
+            last_flush = time.monotonic()
+    if batch:
+        yield pack_segments(batch)
+
+
+def iter_unpacked_segments(batches: Iterable[bytes]) -> Iterator[WireSegment]:
+    """
+    Decodes a stream of packed batches into segments.
+
+    Args:
+        batches (Iterable[bytes]): The packed batches.
+
+    Yields:
+        WireSegment: The segments, in order.
+    """
+    for batch in batches:
+        yield from unpack_segments(batch)
+
+
+async def aiter_unpacked_segments(batches: AsyncIterable[bytes]) -> AsyncIterator[WireSegment]:
+    """
+    Decodes an asynchronous stream of packed batches (a Modal .aio generator) into segments.
+
+    Args:
+        batches (AsyncIterable[bytes]): The packed batches.
+
+    Yields:
+        WireSegment: The segments, in order.
+    """
+    async for batch in batches:
+        for segment in unpack_segments(batch):
+            yield segment
+
+
+def transcribe_packed(model: Any, audio_bytes: bytes, **kwargs) -> Iterator[bytes]:
+    """
+    Transcribes compressed audio bytes and streams the segments as packed batches.
+    This is the body of the Modal transcription method, shared with its local stand-in.
+
+    Args:
+        model (Any): The loaded faster-whisper WhisperModel.
+        audio_bytes (bytes): The zstd-compressed audio file.
+        **kwargs: Additional keyword arguments to pass to the model's transcribe method.
+
+    Yields:
+        bytes: The packed batches.
+    """
+    decompressed_audio_bytes = decompress_bytes(audio_bytes)
+    if not decompressed_audio_bytes:
+        raise ValueError("Audio file is empty")
+    segments, info = model.transcribe(io.BytesIO(decompressed_audio_bytes), **kwargs)
+    yield from iter_packed_batches(segments)
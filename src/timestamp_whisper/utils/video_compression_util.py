@@ -6,7 +6,7 @@ def compress_bytes(data: bytes) -> bytes:
     Compresses a byte array using the zlib library.
 
     Args:
-        data (bytes): The byte array to compress.
+        data (bytes): The byte array to compress (any bytes-like object, e.g. a memoryview).
 
     Returns:
         bytes: The compressed byte array.
@@ -1,43 +1,81 @@
-import io
 import os
 import tempfile
-from typing import BinaryIO
+from typing import Any, BinaryIO
 from moviepy import VideoFileClip
+from proglog import ProgressBarLogger
 import zstandard as zstd
 
+from timestamp_whisper.utils.audio_util import SAMPLE_RATE, AudioBuffer
+from timestamp_whisper.utils.cancellation_util import check_cancelled, run_in_thread
 
-async def convert_video_to_audio(video_bytes: bytes, video_name: str) -> BinaryIO:
+
+class CancellationLogger(ProgressBarLogger):
     """
-    Converts a video file to an audio file. 
+    Silent moviepy progress logger checking the cancellation of the request at every audio chunk,
+    so an abandoned extraction stops instead of running to the end of the video.
+    """
+
+    def bars_callback(self, bar, attr, value, old_value=None):
+        check_cancelled()
+
+
+def extract_audio(video_bytes: Any, video_name: str) -> AudioBuffer:
+    """
+    Extracts the audio of a video as a 16 kHz mono WAV, blocking the calling thread.
 
     Args:
-        video_file (str): The path to the video file.
+        video_bytes (Any): The video content, any bytes-like object (bytes, memoryview, mmap).
+        video_name (str): The name of the video file, used for its extension.
 
     Returns:
-        BinaryIO: The audio file as a BinaryIO object.   
+        AudioBuffer: The memory-mapped audio.
     """
+    extension = video_name.split('.')[-1]
+    # Save video temporarily
+    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{extension}") as temp_video:
+        temp_video.write(memoryview(video_bytes))
+        temp_video_path = temp_video.name
+    temp_audio_path = temp_video_path.replace(f".{extension}", ".wav")
+
+    video_clip = None
     try:
-        # Save video temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f".{video_name.split('.')[-1]}") as temp_video:
-            temp_video.write(video_bytes)
-            temp_video_path = temp_video.name
-
         # Load video and extract audio using moviepy
+        check_cancelled()
         video_clip = VideoFileClip(temp_video_path)
-        temp_audio_path = temp_video_path.replace(f".{video_name.split('.')[-1]}", ".wav")
-        video_clip.audio.write_audiofile(temp_audio_path, codec='pcm_s16le')  # WAV format
-
-        # Read audio back into BinaryIO
-        audio_binary = io.BytesIO()
-        with open(temp_audio_path, "rb") as f:
-            audio_binary.write(f.read())
-        audio_binary.seek(0)
+        video_clip.audio.write_audiofile(
+            temp_audio_path,
+            fps=SAMPLE_RATE,
+            codec='pcm_s16le',  # WAV format
+            ffmpeg_params=["-ac", "1"],
+            logger=CancellationLogger(),
+        )
+
+        # Map the audio file, the mapping outlives the file
+        return AudioBuffer.from_file(temp_audio_path)
+    finally:
+        # Cleanup temporary files, also when the extraction failed or was cancelled
+        if video_clip is not None:
+            video_clip.close()
+        for path in (temp_audio_path, temp_video_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+async def convert_video_to_audio(video_bytes: Any, video_name: str) -> BinaryIO:
+    """
+    Converts a video file to an audio file. 
+    The audio is extracted as a 16 kHz mono WAV and memory-mapped rather than read back into memory.
+    The extraction runs in a worker thread and stops at the next audio chunk when the request is cancelled.
 
-        # Cleanup temporary files
-        os.remove(temp_audio_path)
-        os.remove(temp_video_path)
+    Args:
+        video_bytes (Any): The video content, any bytes-like object (bytes, memoryview, mmap).
+        video_name (str): The name of the video file, used for its extension.
 
-        return audio_binary
+    Returns:
+        BinaryIO: The audio file as an AudioBuffer.
+    """
+    try:
+        return await run_in_thread(extract_audio, video_bytes, video_name)
     except Exception as e:
         raise Exception(f"An error occurred while converting video to audio: {e}")
 
@@ -47,7 +85,7 @@ def compress_bytes(data: bytes) -> bytes:
     Compresses a byte array using the zlib library.
 
     Args:
-        data (bytes): The byte array to compress.
+        data (bytes): The byte array to compress (any bytes-like object, e.g. a memoryview).
 
     Returns:
         bytes: The compressed byte array.
@@ -0,0 +1,132 @@
+import mmap
+import subprocess
+import tracemalloc
+
+import imageio_ffmpeg
+import numpy as np
+
+from timestamp_whisper.core.transcriber.modal_whisper import ModalFasterWhisperTranscriber
+from timestamp_whisper.utils.audio_util import (
+    SAMPLE_RATE,
+    AudioBuffer,
+    audio_bytes,
+    audio_duration,
+    decode_samples,
+    encode_wav,
+    hash_audio,
+    load_audio_samples,
+    samples_to_wav,
+)
+from timestamp_whisper.utils.speech_detection_util import detect_speech_regions
+from timestamp_whisper.utils.video_to_audio_util import extract_audio
+
+# Peak traced memory of the request stages, in decoded copies of the audio: the shared samples
+# plus the buffers of the speech detection or of the decoding.
+MAX_DECODED_COPIES = 1.25
+# Held while decoding on top of the samples, whatever the audio duration: a group of 500000 resampled
+# 16-bit samples and its copy, and the one second of headroom of the preallocated samples.
+DECODE_CHUNK_BYTES = 2 * 2 * 500000 + 4 * SAMPLE_RATE + 64 * 1024
+
+
+def noise(seconds: float) -> np.ndarray:
+    return (0.1 * np.random.default_rng(0).standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def traced_peak(function):
+    tracemalloc.start()
+    try:
+        result = function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def video(tmp_path, seconds: int) -> bytes:
+    path = tmp_path / f"video_{seconds}.mp4"
+    subprocess.run(
+        [
+            imageio_ffmpeg.get_ffmpeg_exe(), "-y", "-loglevel", "error",
+            "-f", "lavfi", "-i", "color=size=16x16:rate=1",
+            "-f", "lavfi", "-i", "anoisesrc=sample_rate=16000:amplitude=0.1",
+            "-t", str(seconds), "-shortest", "-c:v", "libx264", "-c:a", "aac", str(path),
+        ],
+        check=True,
+    )
+    return path.read_bytes()
+
+
+def test_decoding_holds_one_float_copy_and_one_chunk(tmp_path):
+    path = tmp_path / "audio.wav"
+    path.write_bytes(encode_wav(noise(120)))
+    audio = AudioBuffer.from_file(str(path))
+
+    samples, peak = traced_peak(lambda: decode_samples(audio))
+
+    assert len(samples) == 120 * SAMPLE_RATE
+    assert peak <= samples.nbytes + DECODE_CHUNK_BYTES
+
+
+def test_request_stages_share_one_decoded_copy(tmp_path):
+    path = tmp_path / "audio.wav"
+    # Long enough for the decoding chunk to be small next to the samples
+    path.write_bytes(encode_wav(noise(300)))
+    audio = AudioBuffer.from_file(str(path))
+
+    tracemalloc.start()
+    try:
+        hash_audio(audio)
+        audio_duration(audio)
+        samples = load_audio_samples(audio)
+        detect_speech_regions(samples)
+        assert load_audio_samples(audio) is samples
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    assert len(samples) == 300 * SAMPLE_RATE
+    assert peak <= MAX_DECODED_COPIES * samples.nbytes
+
+
+def test_video_audio_is_extracted_to_a_mapped_file(tmp_path):
+    short_video, long_video = video(tmp_path, 30), video(tmp_path, 240)
+
+    short_audio, short_peak = traced_peak(lambda: extract_audio(short_video, "short.mp4"))
+    long_audio, long_peak = traced_peak(lambda: extract_audio(long_video, "long.mp4"))
+
+    assert isinstance(long_audio, AudioBuffer) and isinstance(long_audio.getbuffer().obj, mmap.mmap)
+    assert audio_duration(long_audio) == 240
+    # The extraction buffers are bounded: the audio is never held in memory
+    assert long_peak - short_peak <= 0.1 * long_audio.nbytes
+
+
+def test_compressor_reads_the_mapped_audio_in_place(tmp_path):
+    path = tmp_path / "audio.wav"
+    path.write_bytes(encode_wav(noise(120)))
+    audio = AudioBuffer.from_file(str(path))
+
+    content = audio_bytes(audio)
+    compressed, peak = traced_peak(lambda: ModalFasterWhisperTranscriber._compressed_audio(audio))
+
+    assert isinstance(content, memoryview) and isinstance(content.obj, mmap.mmap)
+    # Only the compressed output is allocated, the audio itself is not copied
+    assert peak <= len(compressed) + 0.25 * audio.nbytes
+
+
+def test_content_hash_is_stable_once_the_wav_is_encoded():
+    audio = samples_to_wav(noise(1))
+    before = audio.content_hash()
+
+    audio.getbuffer()
+    audio.read()
+
+    assert audio.content_hash() == before == hash_audio(samples_to_wav(noise(1)))
+
+
+def test_content_hash_of_encoded_audio_uses_its_bytes():
+    wav = encode_wav(noise(1))
+    audio = AudioBuffer(wav)
+
+    audio.samples
+
+    assert audio.content_hash() == AudioBuffer(wav).content_hash()
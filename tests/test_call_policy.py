@@ -0,0 +1,177 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from timestamp_whisper.core.interface import TranscriptionError
+from timestamp_whisper.core.transcriber.modal_whisper import ModalFasterWhisperTranscriber
+from timestamp_whisper.modal_class.local_whisper_transcription import InjectedFailure, LocalWhisperTranscriber
+from timestamp_whisper.utils import compress_bytes
+from timestamp_whisper.utils.audio_util import SAMPLE_RATE, audio_duration, samples_to_wav
+from timestamp_whisper.utils.call_policy_util import CallPolicy, remote_call_attempts, remote_call_hedges
+from timestamp_whisper.utils.transcription_wire_util import aiter_unpacked_segments
+
+SEGMENT_SECONDS = 5.0
+AUDIO_SECONDS = 20
+
+
+class SyntheticModel:
+    """Stands in for a faster-whisper model: one segment every 5 s of the received audio."""
+
+    def transcribe(self, audio, **kwargs):
+        segments = [
+            SimpleNamespace(id=index + 1, text=f" w{index}", start=index * SEGMENT_SECONDS,
+                            end=(index + 1) * SEGMENT_SECONDS, words=[])
+            for index in range(int(audio_duration(audio) // SEGMENT_SECONDS))
+        ]
+        return iter(segments), None
+
+
+class RecordingCall:
+    """A call of the stand-in, recording when it was opened and closed."""
+
+    def __init__(self, batches, started: float):
+        self.opened_after = time.monotonic() - started
+        self.closed = False
+        self._segments = aiter_unpacked_segments(batches)
+
+    def __anext__(self):
+        return self._segments.__anext__()
+
+    async def aclose(self):
+        self.closed = True
+        await self._segments.aclose()
+
+
+class StandInCalls:
+    """Opens calls of the stand-in with the latency and failure rate of each call set in order."""
+
+    def __init__(self, stand_in: LocalWhisperTranscriber, latencies=(), failure_rates=()):
+        self.stand_in = stand_in
+        self.latencies = list(latencies)
+        self.failure_rates = list(failure_rates)
+        self.calls = []
+        self.audio_bytes = compress_bytes(data=samples_to_wav(np.zeros(AUDIO_SECONDS * SAMPLE_RATE, np.float32)).read())
+        self.started = time.monotonic()
+
+    def __call__(self) -> RecordingCall:
+        if len(self.calls) < len(self.latencies):
+            self.stand_in.latency = self.latencies[len(self.calls)]
+        if len(self.calls) < len(self.failure_rates):
+            self.stand_in.failure_rate = self.failure_rates[len(self.calls)]
+        call = RecordingCall(self.stand_in.transcribe.remote_gen.aio(audio_bytes=self.audio_bytes), self.started)
+        self.calls.append(call)
+        return call
+
+
+async def collect(policy: CallPolicy, open_call: StandInCalls):
+    return [segment async for segment in policy.stream(open_call)]
+
+
+def test_failed_calls_are_retried_up_to_max_attempts():
+    stand_in = LocalWhisperTranscriber(model=SyntheticModel(), failure_rate=1.0, seed=0)
+    open_call = StandInCalls(stand_in)
+    policy = CallPolicy("test_retry", max_attempts=3, backoff=0.0)
+
+    with pytest.raises(InjectedFailure):
+        asyncio.run(collect(policy, open_call))
+
+    assert len(open_call.calls) == 3
+    assert all(call.closed for call in open_call.calls)
+    assert remote_call_attempts.value(call="test_retry", outcome="error") == 3
+
+
+def test_retry_succeeds_after_a_failed_call():
+    stand_in = LocalWhisperTranscriber(model=SyntheticModel(), seed=0)
+    open_call = StandInCalls(stand_in, failure_rates=[1.0, 0.0])
+    policy = CallPolicy("test_retry_success", max_attempts=3, backoff=0.0)
+
+    segments = asyncio.run(collect(policy, open_call))
+
+    assert [segment.text for segment in segments] == [" w0", " w1", " w2", " w3"]
+    assert len(open_call.calls) == 2 and open_call.calls[0].closed
+    assert remote_call_attempts.value(call="test_retry_success", outcome="error") == 1
+    assert remote_call_attempts.value(call="test_retry_success", outcome="success") == 1
+
+
+def test_deadline_timeout_becomes_no_result_error():
+    stand_in = LocalWhisperTranscriber(model=SyntheticModel(), latency=1.0)
+    open_call = StandInCalls(stand_in)
+    policy = CallPolicy("test_deadline", deadline=0.1, max_attempts=2, backoff=0.0)
+
+    started = time.monotonic()
+    with pytest.raises(Exception, match="test_deadline returned no result within 0.1s") as error:
+        asyncio.run(collect(policy, open_call))
+
+    assert time.monotonic() - started < 1.0
+    assert isinstance(error.value.__context__, asyncio.TimeoutError)
+    assert len(open_call.calls) == 2 and all(call.closed for call in open_call.calls)
+    assert remote_call_attempts.value(call="test_deadline", outcome="timeout") == 2
+
+
+def test_late_call_is_hedged_and_the_loser_closed():
+    stand_in = LocalWhisperTranscriber(model=SyntheticModel())
+    # The primary call is slow, the hedge answers at once
+    open_call = StandInCalls(stand_in, latencies=[2.0, 0.0])
+    policy = CallPolicy("test_hedge_wins", hedge=True, hedge_delay=0.2)
+
+    async def scenario():
+        segments = []
+        async for segment in policy.stream(open_call):
+            if not segments:
+                # Closed before the results of the winner are consumed
+                assert open_call.calls[0].closed
+            segments.append(segment)
+        return segments
+
+    started = time.monotonic()
+    segments = asyncio.run(scenario())
+
+    assert len(segments) == AUDIO_SECONDS // SEGMENT_SECONDS
+    assert time.monotonic() - started < 2.0
+    primary, hedge = open_call.calls
+    assert hedge.opened_after >= 0.2
+    assert remote_call_hedges.value(call="test_hedge_wins", winner="hedge") == 1
+    assert remote_call_hedges.value(call="test_hedge_wins", winner="primary") == 0
+
+
+def test_primary_answering_first_wins_the_hedge():
+    stand_in = LocalWhisperTranscriber(model=SyntheticModel())
+    open_call = StandInCalls(stand_in, latencies=[0.4, 2.0])
+    policy = CallPolicy("test_primary_wins", hedge=True, hedge_delay=0.1)
+
+    started = time.monotonic()
+    segments = asyncio.run(collect(policy, open_call))
+
+    assert len(segments) == AUDIO_SECONDS // SEGMENT_SECONDS
+    assert time.monotonic() - started < 2.0
+    assert len(open_call.calls) == 2 and open_call.calls[1].closed
+    assert remote_call_hedges.value(call="test_primary_wins", winner="primary") == 1
+    assert remote_call_hedges.value(call="test_primary_wins", winner="hedge") == 0
+
+
+def test_no_hedge_without_enough_observations():
+    stand_in = LocalWhisperTranscriber(model=SyntheticModel(), latency=0.2)
+    open_call = StandInCalls(stand_in)
+    policy = CallPolicy("test_no_hedge", hedge=True, hedge_min_samples=5)
+
+    asyncio.run(collect(policy, open_call))
+
+    assert len(open_call.calls) == 1
+    assert policy.first_result_quantile(0.5) == pytest.approx(0.2, abs=0.1)
+
+
+def test_modal_transcriber_retries_through_the_stand_in(monkeypatch):
+    monkeypatch.setenv("TRANSCRIPTION_CHECKPOINTS", "false")
+    stand_in = LocalWhisperTranscriber(model=SyntheticModel(), failure_rate=1.0, seed=0)
+    policy = CallPolicy("test_modal_retry", max_attempts=2, backoff=0.0)
+    transcriber = ModalFasterWhisperTranscriber("synthetic", modal_cls=lambda model_name: stand_in, call_policy=policy)
+    audio = samples_to_wav(np.zeros(AUDIO_SECONDS * SAMPLE_RATE, np.float32))
+
+    with pytest.raises(TranscriptionError) as error:
+        asyncio.run(transcriber.atranscribe_segments_timestamp(audio))
+
+    assert isinstance(error.value.__context__, InjectedFailure)
+    assert remote_call_attempts.value(call="test_modal_retry", outcome="error") == 2
@@ -0,0 +1,85 @@
+import pytest
+
+from timestamp_whisper.core.aligner.fuzzywuzzy_aligner import FuzzyWuzzyAligner
+from timestamp_whisper.core.types import DEFAULT_MIN_WORD_MATCH_SCORE
+from timestamp_whisper.models import SegmentTranscriptionModel, WordTranscriptionModel
+
+# Composite scores (rapidfuzz partial_ratio, ratio and token_set_ratio) of the first and last
+# DEFAULT_SEARCH_SEGMENT_SIZE words of a paragraph against a single segment
+SEGMENT_SCORES = [
+    ("In the beginning God created the heaven and the earth.",
+     "In the beginning, God created the heavens and the earth.", 0.9500, 0.9653),
+    ("In the beginning God created the heaven and the earth.",
+     "and the earth was without form and void", 0.4564, 0.5001),
+    ("The quick brown fox jumps over the lazy dog",
+     "the quick brown fox jumped over a lazy dog and ran away", 0.8918, 0.8879),
+    ("The quick brown fox jumps over the lazy dog",
+     "Stock markets closed higher on Friday", 0.4039, 0.3871),
+    ("Ça a été un été très chaud à Paris",
+     "ça a été un été très chaud à paris cette année", 0.9757, 0.9805),
+    ("Ça a été un été très chaud à Paris",
+     "Il a plu toute la semaine", 0.3879, 0.4062),
+    ("東京は今日とても暑いです",
+     "東京は今日とても暑い", 0.9636, 0.9636),
+    ("Müller sagte, dass die Straße gesperrt sei",
+     "Mueller sagte dass die Strasse gesperrt sei", 0.9344, 0.9344),
+]
+
+# Ratio of a three-word paragraph against the best three-word sequence of the transcribed words,
+# and whether the words are the paragraph (possibly misheard or transliterated)
+WORD_SCORES = [
+    ("over the lazy", "jumps over the lazy dog", 1.0, True),
+    ("over the lazy", "over a lazy", 0.8333, True),
+    ("quick brown fox", "the quack brown fax", 0.8667, True),
+    ("très chaud à", "très chaud à paris", 1.0, True),
+    ("Straße gesperrt sei", "strasse gesperrt sei", 0.9231, True),
+    ("東京 は 暑い", "東京 は 暑かった", 0.75, True),
+    ("très chaud à", "il a plu", 0.3, False),
+    ("the lazy dog", "stock markets closed", 0.3125, False),
+]
+
+
+def words(text):
+    return [
+        WordTranscriptionModel(id=str(index), text=word, start=index, end=index + 1, segment_id="0")
+        for index, word in enumerate(text.split())
+    ]
+
+
+@pytest.mark.parametrize("paragraph,segment_text,start_score,end_score", SEGMENT_SCORES)
+def test_segment_scores(paragraph, segment_text, start_score, end_score):
+    segments = [SegmentTranscriptionModel(id="0", text=segment_text, start=0.0, end=1.0)]
+
+    alignment = FuzzyWuzzyAligner().align_paragraph_with_segments(paragraph, segments)
+
+    assert alignment.best_start_match.score == pytest.approx(start_score, abs=1e-4)
+    assert alignment.best_end_match.score == pytest.approx(end_score, abs=1e-4)
+
+
+@pytest.mark.parametrize("paragraph,transcribed,score,matches", WORD_SCORES)
+def test_word_scores(paragraph, transcribed, score, matches):
+    alignment = FuzzyWuzzyAligner().align_paragraph_with_words(paragraph, words(transcribed))
+
+    assert alignment.best_start_match.score == pytest.approx(score, abs=1e-4)
+    assert alignment.best_end_match.score == pytest.approx(score, abs=1e-4)
+
+
+@pytest.mark.parametrize("paragraph,transcribed,score,matches", WORD_SCORES)
+def test_word_threshold_separates_matches_from_unrelated_words(paragraph, transcribed, score, matches):
+    alignment = FuzzyWuzzyAligner().align_paragraph_with_words(paragraph, words(transcribed))
+
+    assert (alignment.best_start_match.score > DEFAULT_MIN_WORD_MATCH_SCORE) == matches
+
+
+def test_best_segment_is_chosen():
+    segments = [
+        SegmentTranscriptionModel(id="0", text="Stock markets closed higher on Friday", start=0.0, end=4.0),
+        SegmentTranscriptionModel(id="1", text="the quick brown fox jumped over a lazy dog", start=4.0, end=8.0),
+        SegmentTranscriptionModel(id="2", text="and ran away into the forest", start=8.0, end=11.0),
+    ]
+
+    alignment = FuzzyWuzzyAligner().align_paragraph_with_segments(
+        "The quick brown fox jumps over the lazy dog", segments
+    )
+
+    assert (alignment.best_start_match.id, alignment.start, alignment.end) == ("1", 4.0, 8.0)
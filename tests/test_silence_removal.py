@@ -0,0 +1,92 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from timestamp_whisper.core.interface.transcriber_interface import TranscriberInterface
+from timestamp_whisper.core.transcriber.silence_removal import SilenceRemovalTranscriber
+from timestamp_whisper.models import (
+    SegmentTranscriptionModel,
+    SegmentTranscriptionModelWithWords,
+    WordTranscriptionModel,
+)
+from timestamp_whisper.utils.audio_util import SAMPLE_RATE, load_audio_samples, samples_to_wav
+
+
+class RecordingTranscriber(TranscriberInterface):
+    """Transcriber returning one segment spanning the audio it receives, and recording that audio."""
+
+    def __init__(self):
+        self.received = []
+
+    def _segment(self, audio_path) -> SegmentTranscriptionModel:
+        self.received.append(audio_path)
+        duration = len(load_audio_samples(audio_path)) / SAMPLE_RATE
+        return SegmentTranscriptionModel(id="0", text="speech", start=0.0, end=duration)
+
+    def transcribe_segments_timestamp(self, audio_path, **kwargs):
+        return [self._segment(audio_path)]
+
+    def transcribe_segments_with_words_timestamp(self, audio_path, **kwargs):
+        segment = self._segment(audio_path)
+        word = WordTranscriptionModel(id="0", text="speech", start=segment.start, end=segment.end, segment_id="0")
+        return SegmentTranscriptionModelWithWords(segments=[segment], words=[word])
+
+
+def noise(seconds: float, level: float, seed: int = 0) -> np.ndarray:
+    return (level * np.random.default_rng(seed).standard_normal(int(seconds * SAMPLE_RATE))).astype(np.float32)
+
+
+def transcribe(transcriber: SilenceRemovalTranscriber, audio, variant: str):
+    if variant == "segments":
+        return transcriber.transcribe_segments_timestamp(audio)
+    if variant == "words":
+        return transcriber.transcribe_segments_with_words_timestamp(audio).segments
+    if variant == "async_segments":
+        return asyncio.run(transcriber.atranscribe_segments_timestamp(audio))
+    return asyncio.run(transcriber.atranscribe_segments_with_words_timestamp(audio)).segments
+
+
+VARIANTS = ["segments", "words", "async_segments", "async_words"]
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_continuous_speech_is_transcribed_uncut(variant):
+    # Constant-level audio: no frame rises above the noise floor, so no speech region is detected
+    audio = samples_to_wav(noise(20, 0.1))
+    inner = RecordingTranscriber()
+
+    segments = transcribe(SilenceRemovalTranscriber(inner), audio, variant)
+
+    assert inner.received == [audio]
+    assert len(segments) == 1 and segments[0].end == pytest.approx(20.0)
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_audio_mostly_cut_is_transcribed_uncut(variant):
+    # A single short burst in a minute of near-silence would cut more than MAX_REMOVED_FRACTION
+    samples = noise(60, 0.001)
+    samples[30 * SAMPLE_RATE:31 * SAMPLE_RATE] = noise(1, 0.3, seed=1)
+    audio = samples_to_wav(samples)
+    inner = RecordingTranscriber()
+
+    segments = transcribe(SilenceRemovalTranscriber(inner), audio, variant)
+
+    assert inner.received == [audio]
+    assert segments[0].end == pytest.approx(60.0)
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_pauses_are_cut_and_timestamps_mapped_back(variant):
+    samples = noise(20, 0.001)
+    samples[2 * SAMPLE_RATE:8 * SAMPLE_RATE] = noise(6, 0.3, seed=1)
+    samples[12 * SAMPLE_RATE:18 * SAMPLE_RATE] = noise(6, 0.3, seed=2)
+    audio = samples_to_wav(samples)
+    inner = RecordingTranscriber()
+
+    segments = transcribe(SilenceRemovalTranscriber(inner), audio, variant)
+
+    assert len(inner.received) == 1 and inner.received[0] is not audio
+    assert len(load_audio_samples(inner.received[0])) < len(samples)
+    assert segments[0].start == pytest.approx(1.75, abs=0.05)
+    assert segments[0].end == pytest.approx(18.25, abs=0.05)
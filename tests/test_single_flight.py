@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+
+from timestamp_whisper.utils.single_flight_util import SingleFlight
+
+
+class Call:
+    """A call counting its executions, finishing when released."""
+
+    def __init__(self, result="result", error=None):
+        self.result = result
+        self.error = error
+        self.executions = 0
+        self.cancelled = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self):
+        self.executions += 1
+        try:
+            await self.release.wait()
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+def test_followers_share_one_execution():
+    async def scenario():
+        flights = SingleFlight()
+        call = Call()
+        waiters = [asyncio.create_task(flights.run("key", call)) for _ in range(5)]
+        await asyncio.sleep(0)
+        assert flights.in_flight("key")
+
+        call.release.set()
+        results = await asyncio.gather(*waiters)
+
+        assert results == ["result"] * 5
+        assert call.executions == 1
+        assert not flights.in_flight("key")
+
+    asyncio.run(scenario())
+
+
+def test_error_is_raised_to_every_waiter_and_forgotten():
+    async def scenario():
+        flights = SingleFlight()
+        call = Call(error=RuntimeError("failed"))
+        waiters = [asyncio.create_task(flights.run("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        call.release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert call.executions == 1
+        # The next call runs again
+        call.error = None
+        assert await flights.run("key", call) == "result"
+        assert call.executions == 2
+
+    asyncio.run(scenario())
+
+
+def test_call_survives_the_leader_leaving():
+    async def scenario():
+        flights = SingleFlight()
+        call = Call()
+        leader = asyncio.create_task(flights.run("key", call))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flights.run("key", call))
+        await asyncio.sleep(0)
+
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        assert flights.in_flight("key") and call.cancelled == 0
+
+        call.release.set()
+        assert await follower == "result"
+        assert call.executions == 1 and call.cancelled == 0
+
+    asyncio.run(scenario())
+
+
+def test_call_is_cancelled_after_the_last_waiter_leaves():
+    async def scenario():
+        flights = SingleFlight()
+        call = Call()
+        waiters = [asyncio.create_task(flights.run("key", call)) for _ in range(3)]
+        await asyncio.sleep(0)
+
+        for waiter in waiters[:2]:
+            waiter.cancel()
+        await asyncio.gather(*waiters[:2], return_exceptions=True)
+        await asyncio.sleep(0)
+        assert call.cancelled == 0 and flights.in_flight("key")
+
+        waiters[2].cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiters[2]
+        await asyncio.sleep(0)
+        assert call.cancelled == 1
+        assert not flights.in_flight("key")
+
+        # A later caller starts a new execution instead of joining the cancelled one
+        call.release.set()
+        assert await flights.run("key", call) == "result"
+        assert call.executions == 2
+
+    asyncio.run(scenario())
+
+
+def test_different_keys_run_separately():
+    async def scenario():
+        flights = SingleFlight()
+        first, second = Call("first"), Call("second")
+        first.release.set()
+        second.release.set()
+
+        results = await asyncio.gather(flights.run("a", first), flights.run("b", second))
+
+        assert results == ["first", "second"]
+        assert (first.executions, second.executions) == (1, 1)
+
+    asyncio.run(scenario())
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from timestamp_whisper.services.transcription_scheduler import TranscriptionScheduler
+
+
+def test_waiter_cancelled_while_the_slot_is_released():
+    async def scenario():
+        scheduler = TranscriptionScheduler(resource="test", max_concurrent=1)
+        release = asyncio.Event()
+
+        async def holder():
+            async with scheduler.slot(cost=10):
+                await release.wait()
+
+        async def waiter():
+            async with scheduler.slot(cost=10):
+                pass
+
+        holding = asyncio.create_task(holder())
+        await asyncio.sleep(0)
+        waiting = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        assert (scheduler.running, scheduler.queued) == (1, 1)
+
+        # The waiter is cancelled in the same tick as the slot is released
+        release.set()
+        waiting.cancel()
+        await holding
+        with pytest.raises(asyncio.CancelledError):
+            await waiting
+
+        assert (scheduler.running, scheduler.queued, scheduler.pending_cost) == (0, 0, 0)
+        # The slot is still usable
+        async with scheduler.slot(cost=1):
+            assert scheduler.running == 1
+        assert scheduler.running == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_waiter_is_skipped_for_the_next_one():
+    async def scenario():
+        scheduler = TranscriptionScheduler(resource="test", max_concurrent=1)
+        release = asyncio.Event()
+        order = []
+
+        async def job(name, cost, wait=False):
+            async with scheduler.slot(cost=cost):
+                order.append(name)
+                if wait:
+                    await release.wait()
+
+        holding = asyncio.create_task(job("holder", 10, wait=True))
+        await asyncio.sleep(0)
+        # The cancelled job is the shortest, so it would be dispatched first
+        cancelled = asyncio.create_task(job("cancelled", 1))
+        queued = asyncio.create_task(job("queued", 5))
+        await asyncio.sleep(0)
+
+        release.set()
+        cancelled.cancel()
+        await asyncio.gather(holding, queued)
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+
+        assert order == ["holder", "queued"]
+        assert (scheduler.running, scheduler.queued) == (0, 0)
+
+    asyncio.run(scenario())
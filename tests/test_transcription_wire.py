@@ -0,0 +1,101 @@
+import struct
+from types import SimpleNamespace
+
+import pytest
+import zstandard as zstd
+
+from timestamp_whisper.utils.transcription_wire_util import (
+    HEADER_FORMAT,
+    WIRE_VERSION,
+    WireSegment,
+    WireWord,
+    iter_packed_batches,
+    iter_unpacked_segments,
+    pack_segments,
+    unpack_segments,
+)
+
+
+def segment(id, text, start, end, words=None):
+    return SimpleNamespace(id=id, text=text, start=start, end=end, words=words)
+
+
+def word(text, start, end):
+    return SimpleNamespace(word=text, start=start, end=end)
+
+
+def test_segments_with_and_without_words_round_trip():
+    # Segments without decoding confidence decode it as None
+    segments = [
+        segment(1, " Hello world.", 0.0, 1.52, [word(" Hello", 0.0, 0.6), word(" world.", 0.61, 1.52)]),
+        segment(2, " No words here.", 1.52, 3.004),
+        segment(3, " Last one", 3.004, 4.5, []),
+        segment(4, " Again", 4.5, 5.25, [word(" Again", 4.5, 5.25)]),
+    ]
+
+    decoded = unpack_segments(pack_segments(segments))
+
+    assert decoded == [
+        WireSegment(id=1, text=" Hello world.", start=0.0, end=1.52,
+                    words=[WireWord(" Hello", 0.0, 0.6), WireWord(" world.", 0.61, 1.52)]),
+        WireSegment(id=2, text=" No words here.", start=1.52, end=3.004, words=[]),
+        WireSegment(id=3, text=" Last one", start=3.004, end=4.5, words=[]),
+        WireSegment(id=4, text=" Again", start=4.5, end=5.25, words=[WireWord(" Again", 4.5, 5.25)]),
+    ]
+
+
+def test_non_ascii_text_round_trips():
+    segments = [
+        segment(1, " Ça a été un été très chaud", 0.0, 2.0, [word(" Ça", 0.0, 0.3), word(" été", 0.3, 0.8)]),
+        segment(2, " 東京は晴れです 🌤", 2.0, 4.0, [word(" 東京", 2.0, 2.7), word(" 🌤", 3.5, 4.0)]),
+        segment(3, " مرحبا", 4.0, 5.0),
+    ]
+
+    decoded = unpack_segments(pack_segments(segments))
+
+    assert [s.text for s in decoded] == [s.text for s in segments]
+    assert [[w.word for w in s.words] for s in decoded] == [[" Ça", " été"], [" 東京", " 🌤"], []]
+
+
+def test_timestamps_are_rounded_to_milliseconds():
+    decoded = unpack_segments(pack_segments([segment(1, " a", 0.12345, 1.9996, [word(" a", 0.0004, 0.0006)])]))
+
+    assert (decoded[0].start, decoded[0].end) == (0.123, 2.0)
+    assert (decoded[0].words[0].start, decoded[0].words[0].end) == (0.0, 0.001)
+
+
+def test_empty_batch_round_trips():
+    assert unpack_segments(pack_segments([])) == []
+
+
+def test_other_wire_version_is_rejected():
+    payload = struct.pack(HEADER_FORMAT, WIRE_VERSION + 1, 0, 0)
+
+    with pytest.raises(ValueError, match="Unsupported transcription wire version"):
+        unpack_segments(zstd.ZstdCompressor().compress(payload))
+
+
+def test_segment_stream_is_batched_in_order():
+    segments = [segment(i, f" s{i}", float(i), i + 1.0, [word(f" s{i}", float(i), i + 0.5)]) for i in range(70)]
+
+    batches = list(iter_packed_batches(iter(segments)))
+    decoded = list(iter_unpacked_segments(batches))
+
+    assert len(batches) == 3
+    assert [s.id for s in decoded] == list(range(70))
+    assert [s.words[0].word for s in decoded] == [f" s{i}" for i in range(70)]
+
+
+def test_decoding_confidence_round_trips():
+    segments = [
+        segment(1, " sure", 0.0, 1.0, [word(" sure", 0.0, 1.0)]),
+        segment(2, " unknown", 1.0, 2.0),
+    ]
+    segments[0].avg_logprob, segments[0].compression_ratio = -0.25, 1.5
+    segments[1].avg_logprob, segments[1].compression_ratio = -1.2345, None
+
+    decoded = unpack_segments(pack_segments(segments))
+
+    assert (decoded[0].avg_logprob, decoded[0].compression_ratio) == (-0.25, 1.5)
+    assert decoded[1].avg_logprob == pytest.approx(-1.2345, abs=1e-6)
+    assert decoded[1].compression_ratio is None